@@ -1,6 +1,21 @@
-from .handlers import router
-from .parser_service import ParserService
-from .notification_service import NotificationService
-from .bot_manager import bot_manager
+# Экспорт пакета загружается лениво: импорт bot.states или bot.keyboards
+# не тянет за собой обработчики, парсеры и форматтеры
+import importlib
 
-__all__ = ['router', 'ParserService', 'NotificationService', 'bot_manager']
\ No newline at end of file
+_EXPORTS = {
+    'router': 'bot.handlers',
+    'ParserService': 'bot.parser_service',
+    'NotificationService': 'bot.notification_service',
+    'bot_manager': 'bot.bot_manager',
+}
+
+__all__ = ['router', 'ParserService', 'NotificationService', 'bot_manager']
+
+
+def __getattr__(name):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module 'bot' has no attribute {name!r}")
+    value = getattr(importlib.import_module(module), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,92 @@
+"""
+FSM-хранилище aiogram в SQLite (FSM_STORAGE=sqlite)
+
+Состояние диалогов (добавление ссылки, настройки и т.п.) переживает
+перезапуск бота. Строки лежат в таблице fsm_storage основной БД,
+запись идет через поток БД (run_in_db_executor), чтобы не блокировать
+event loop.
+
+Чтения идут через ограниченный кэш (utils/user_state_store.py):
+в памяти только недавно активные пользователи, остальные - в БД.
+
+Данные FSM сериализуются в JSON: значения, которые JSON не поддерживает,
+сохраняются строкой.
+"""
+import json
+import logging
+from typing import Any, Dict, Optional, Tuple
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, KeyBuilder, StateType, StorageKey
+
+from data.database import get_db_session, run_in_db_executor
+from data.models import FsmRecord
+from utils.user_state_store import UserStateStore
+
+logger = logging.getLogger(__name__)
+
+
+def _load_record(key: str) -> Tuple[Optional[str], Dict[str, Any]]:
+    with get_db_session() as db:
+        record = db.query(FsmRecord).filter(FsmRecord.key == key).first()
+        if record is None:
+            return None, {}
+        return record.state, json.loads(record.data) if record.data else {}
+
+
+def _save_record(key: str, state: Optional[str], data: Dict[str, Any]):
+    with get_db_session() as db:
+        record = db.query(FsmRecord).filter(FsmRecord.key == key).first()
+        if state is None and not data:
+            # Пустое состояние - строка не нужна
+            if record is not None:
+                db.delete(record)
+            return
+        payload = json.dumps(data, ensure_ascii=False, default=str) if data else None
+        if record is None:
+            db.add(FsmRecord(key=key, state=state, data=payload))
+        else:
+            record.state = state
+            record.data = payload
+
+
+class SQLiteStorage(BaseStorage):
+    """FSM-хранилище в таблице fsm_storage с кэшем недавних пользователей"""
+
+    def __init__(self, key_builder: Optional[KeyBuilder] = None, cache_ttl: float = None):
+        self.key_builder = key_builder or DefaultKeyBuilder(with_destiny=True)
+        self._cache = UserStateStore('fsm', ttl=cache_ttl)  # key -> (state, data)
+
+    async def _get(self, key: StorageKey) -> Tuple[str, Optional[str], Dict[str, Any]]:
+        storage_key = self.key_builder.build(key)
+        cached = self._cache.get(storage_key)
+        if cached is None:
+            cached = await run_in_db_executor(_load_record, storage_key)
+            self._cache[storage_key] = cached
+        state, data = cached
+        return storage_key, state, data
+
+    async def _put(self, storage_key: str, state: Optional[str], data: Dict[str, Any]):
+        await run_in_db_executor(_save_record, storage_key, state, data)
+        self._cache[storage_key] = (state, data)
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        storage_key, _, data = await self._get(key)
+        await self._put(storage_key, state.state if isinstance(state, State) else state, data)
+
+    async def get_state(self, key: StorageKey) -> Optional[str]:
+        _, state, _ = await self._get(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Dict[str, Any]) -> None:
+        if not isinstance(data, dict):
+            raise ValueError(f"Data must be a dict, got {type(data).__name__}")
+        storage_key, state, _ = await self._get(key)
+        await self._put(storage_key, state, data.copy())
+
+    async def get_data(self, key: StorageKey) -> Dict[str, Any]:
+        _, _, data = await self._get(key)
+        return data.copy()
+
+    async def close(self) -> None:
+        self._cache.clear()
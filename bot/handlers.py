@@ -15,7 +15,7 @@ from data.database import (
     # Новые async функции для отзывчивого UI
     get_links_async, get_link_by_id_async, get_active_links_count_async,
     get_links_by_category_async, update_link_async, delete_link_async, create_link_async,
-    get_favorite_links_async
+    get_favorite_links_async, run_in_db_executor
 )
 from data.models import ApiLink
 from bot.parser_service import ParserService
@@ -39,18 +39,24 @@ from utils.url_template_builder import URLTemplateAnalyzer, get_url_builder
 
 # ИМПОРТЫ ДЛЯ ОТЗЫВЧИВОГО UI (Фаза 4)
 from utils.cache import get_cache_manager, invalidate_links_cache
+from utils.page_cache import (
+    KIND_PROMOS, KIND_STAKINGS, current_version, get_dataset, put_dataset, get_page, put_page
+)
 from utils.loading_indicator import LoadingContext, with_loading, LoadingTexts, show_temporary_message
+from utils.user_state_store import UserStateStore
+from config import USER_SELECTION_TTL
 
 
-navigation_stack = {}
-# Глобальный словарь для новых систем выбора
-user_selections = {}
-# Глобальный словарь для хранения состояния просмотра стейкингов
-current_stakings_state = {}
-# Глобальный словарь для хранения состояния просмотра промоакций
-current_promos_state = {}
-# Глобальный словарь для хранения контекста навигации (favorites/category)
-user_nav_context = {}
+# Состояние пользователей - ограниченные хранилища (LRU + TTL простоя), см. utils/user_state_store.py
+navigation_stack = UserStateStore('navigation_stack', ttl=USER_SELECTION_TTL)
+# Выбранная ссылка для новых систем выбора
+user_selections = UserStateStore('user_selections', ttl=USER_SELECTION_TTL)
+# Состояние просмотра стейкингов (ссылка, фильтры, страница)
+current_stakings_state = UserStateStore('current_stakings')
+# Состояние просмотра промоакций (ссылка, флаги формата, страница)
+current_promos_state = UserStateStore('current_promos')
+# Контекст навигации (favorites/category)
+user_nav_context = UserStateStore('user_nav_context', ttl=USER_SELECTION_TTL)
 
 router = Router()
 logger = logging.getLogger(__name__)
@@ -5972,6 +5978,167 @@ async def check_staking_pools(callback: CallbackQuery):
         logger.error(f"❌ Ошибка в обработчике check_staking_pools: {e}", exc_info=True)
         await callback.message.edit_text("❌ Произошла ошибка")
 
+async def load_stakings_with_deltas(link_id: int, exchange_filter: str, min_apr) -> tuple:
+    """
+    Стейкинги с дельтами для ссылки: из кэша, пока данные в БД не менялись
+
+    Returns:
+        (версия данных, список стейкингов с дельтами)
+    """
+    filters = {'exchange': exchange_filter, 'min_apr': min_apr}
+    cached = get_dataset(KIND_STAKINGS, link_id, filters, scope=exchange_filter)
+    if cached is not None:
+        return cached
+
+    from services.staking_snapshot_service import StakingSnapshotService
+    snapshot_service = StakingSnapshotService()
+
+    # Версию читаем ДО запроса: изменения во время запроса ее увеличат
+    version = current_version(KIND_STAKINGS, exchange_filter)
+    stakings_with_deltas = await run_in_db_executor(
+        snapshot_service.get_stakings_with_deltas, exchange_filter, min_apr
+    )
+    put_dataset(KIND_STAKINGS, link_id, filters, version, stakings_with_deltas)
+    return version, stakings_with_deltas
+
+
+def render_stakings_page(
+    notif_service: NotificationService,
+    link_id: int,
+    data_version: int,
+    page_stakings: list,
+    page: int,
+    total_pages: int,
+    exchange_name: str,
+    min_apr,
+    page_url: str,
+    is_okx_flash: bool,
+    last_checked=None
+) -> str:
+    """Страница текущих стейкингов (готовая из кэша или отрендеренная и закэшированная)"""
+    page_filters = {
+        'exchange_name': exchange_name,
+        'min_apr': min_apr,
+        'page_url': page_url,
+        'is_okx_flash': is_okx_flash,
+        'last_checked': last_checked
+    }
+    # Без версии (старое состояние) - только рендер, без кэша
+    cacheable = data_version is not None
+    if cacheable:
+        message_text = get_page(KIND_STAKINGS, link_id, page_filters, page, data_version)
+        if message_text is not None:
+            return message_text
+
+    # Для OKX Flash Earn используем специальный формат с группировкой по проектам
+    if is_okx_flash:
+        message_text = notif_service.format_okx_flash_earn_page(
+            stakings_with_deltas=page_stakings,
+            page=page,
+            total_pages=total_pages,
+            exchange_name=exchange_name,
+            min_apr=min_apr,
+            page_url=page_url,
+            last_checked=last_checked
+        )
+    else:
+        message_text = notif_service.format_current_stakings_page(
+            stakings_with_deltas=page_stakings,
+            page=page,
+            total_pages=total_pages,
+            exchange_name=exchange_name,
+            min_apr=min_apr,
+            page_url=page_url,
+            last_checked=last_checked
+        )
+
+    if cacheable:
+        put_page(KIND_STAKINGS, link_id, page_filters, page, data_version, message_text)
+    return message_text
+
+
+def paginate_stakings(stakings_with_deltas: list, page: int, is_okx_flash: bool) -> tuple:
+    """
+    Стейкинги страницы: OKX Flash Earn - по 2 проекта, остальные - по 5 стейкингов
+
+    Returns:
+        (стейкинги страницы, номер страницы в допустимых пределах, всего страниц)
+    """
+    if is_okx_flash:
+        # Группируем стейкинги по проектам (reward_coin + start_time + end_time)
+        projects = {}
+        for item in stakings_with_deltas:
+            staking = item['staking'] if isinstance(item, dict) and 'staking' in item else item
+            if isinstance(staking, dict):
+                reward_coin = staking.get('reward_coin') or staking.get('coin')
+                start_time = staking.get('start_time')
+                end_time = staking.get('end_time')
+            else:
+                reward_coin = getattr(staking, 'reward_coin', None) or getattr(staking, 'coin', None)
+                start_time = getattr(staking, 'start_time', None)
+                end_time = getattr(staking, 'end_time', None)
+            project_key = (reward_coin, start_time, end_time)
+            if project_key not in projects:
+                projects[project_key] = []
+            projects[project_key].append(item)
+
+        items = list(projects.values())
+        per_page = 2  # 2 проекта на страницу
+    else:
+        items = stakings_with_deltas
+        per_page = 5
+
+    total_pages = max(1, (len(items) + per_page - 1) // per_page)
+    page = min(max(1, page), total_pages)
+    page_items = items[(page - 1) * per_page:page * per_page]
+
+    if is_okx_flash:
+        # Развернуть проекты обратно в список стейкингов для формата
+        page_stakings = []
+        for project_pools in page_items:
+            page_stakings.extend(project_pools)
+        return page_stakings, page, total_pages
+
+    return page_items, page, total_pages
+
+
+async def build_stakings_view(notif_service: NotificationService, state: dict, last_checked=None) -> tuple:
+    """
+    Страница текущих стейкингов по state просмотра
+
+    В state только ссылка, фильтры и номер страницы: сами стейкинги берутся
+    из кэша набора данных (utils/page_cache.py), пока данные в БД не менялись.
+    Обновляет в state страницу, число страниц и версию данных.
+
+    Returns:
+        (текст сообщения, клавиатура)
+    """
+    link_id = state['link_id']
+    exchange_name = state['exchange_name']
+
+    data_version, stakings_with_deltas = await load_stakings_with_deltas(
+        link_id, state['exchange_filter'], state['min_apr']
+    )
+
+    # Для OKX Flash Earn пагинация по проектам
+    is_okx_flash = 'okx' in exchange_name.lower() and 'flash' in exchange_name.lower()
+    page_stakings, page, total_pages = paginate_stakings(stakings_with_deltas, state.get('page', 1), is_okx_flash)
+
+    state['page'] = page
+    state['total_pages'] = total_pages
+    state['is_okx_flash'] = is_okx_flash
+    state['data_version'] = data_version
+
+    logger.info(f"   📱 Всего стейкингов: {len(stakings_with_deltas)}, на странице: {len(page_stakings)}")
+
+    message_text = render_stakings_page(
+        notif_service, link_id, data_version, page_stakings, page, total_pages,
+        exchange_name, state['min_apr'], state.get('page_url'), is_okx_flash, last_checked=last_checked
+    )
+    keyboard = get_current_stakings_keyboard(page, total_pages, category=state.get('category'))
+    return message_text, keyboard
+
+
 @router.callback_query(F.data == "manage_view_current_stakings")
 async def view_current_stakings(callback: CallbackQuery):
     """Показать текущие стейкинги из БД (без принудительного парсинга)"""
@@ -6028,121 +6195,25 @@ async def view_current_stakings(callback: CallbackQuery):
             exchange_filter = exchange_name_mapping[exchange_filter_lower]
             logger.info(f"🔄 Нормализация биржи: {exchange_name} -> {exchange_filter}")
 
-        # Получить стейкинги с дельтами
-        from services.staking_snapshot_service import StakingSnapshotService
-        snapshot_service = StakingSnapshotService()
-
-        stakings_with_deltas = snapshot_service.get_stakings_with_deltas(
-            exchange=exchange_filter,  # Используем нормализованное имя биржи
-            min_apr=min_apr
-        )
-
-        # Для OKX Flash Earn: группируем по проектам, пагинируем проекты
-        is_okx_flash = 'okx' in exchange_name.lower() and 'flash' in exchange_name.lower()
-
-        if is_okx_flash:
-            # Группируем все стейкинги по проектам (reward_coin + start_time + end_time)
-            projects = {}
-            for item in stakings_with_deltas:
-                staking = item['staking'] if isinstance(item, dict) and 'staking' in item else item
-                if isinstance(staking, dict):
-                    reward_coin = staking.get('reward_coin') or staking.get('coin')
-                    start_time = staking.get('start_time')
-                    end_time = staking.get('end_time')
-                else:
-                    reward_coin = getattr(staking, 'reward_coin', None) or getattr(staking, 'coin', None)
-                    start_time = getattr(staking, 'start_time', None)
-                    end_time = getattr(staking, 'end_time', None)
-                project_key = (reward_coin, start_time, end_time)
-                if project_key not in projects:
-                    projects[project_key] = []
-                projects[project_key].append(item)
-
-            # Конвертируем в список проектов (каждый проект = список пулов)
-            project_list = list(projects.values())
-
-            # Пагинация по проектам (2 проекта на страницу для OKX)
-            page = 1
-            per_page = 2  # 2 проекта на страницу
-            total_pages = max(1, (len(project_list) + per_page - 1) // per_page)
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_projects = project_list[start_idx:end_idx]
-
-            # Развернуть проекты обратно в список стейкингов для формата
-            page_stakings = []
-            for project_pools in page_projects:
-                page_stakings.extend(project_pools)
-
-            # Сохраняем сгруппированные проекты
-            current_stakings_state[user_id] = {
-                'page': page,
-                'link_id': link_id,
-                'total_pages': total_pages,
-                'stakings': stakings_with_deltas,
-                'projects': project_list,  # Сохраняем список проектов
-                'exchange_name': exchange_name,
-                'min_apr': min_apr,
-                'page_url': page_url,
-                'is_okx_flash': True,
-                'last_checked': last_checked,  # Время последней проверки
-                'category': link.category  # Категория для настроек
-            }
-        else:
-            # Стандартная пагинация по стейкингам
-            page = 1
-            per_page = 5
-            total_pages = max(1, (len(stakings_with_deltas) + per_page - 1) // per_page)
-            start_idx = (page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_stakings = stakings_with_deltas[start_idx:end_idx]
-
-            # Сохранить состояние
-            current_stakings_state[user_id] = {
-                'page': page,
-                'link_id': link_id,
-                'total_pages': total_pages,
-                'stakings': stakings_with_deltas,
-                'exchange_name': exchange_name,
-                'min_apr': min_apr,
-                'page_url': page_url,
-                'is_okx_flash': False,
-                'last_checked': last_checked,  # Время последней проверки
-                'category': link.category  # Категория для настроек
-            }
-
-        logger.info(f"   💾 Состояние сохранено: page={page}, link_id={link_id}, total_pages={total_pages}, category={link.category}")
-        logger.info(f"   📱 Всего стейкингов: {len(stakings_with_deltas)}, на странице: {len(page_stakings)}")
+        # Состояние просмотра: ссылка, фильтры и страница (стейкинги - в кэше набора данных)
+        state = {
+            'page': 1,
+            'link_id': link_id,
+            'exchange_name': exchange_name,
+            'exchange_filter': exchange_filter,  # Нормализованное имя биржи для поиска в БД
+            'min_apr': min_apr,
+            'page_url': page_url,
+            'last_checked': last_checked,  # Время последней проверки
+            'category': link.category,  # Категория для настроек
+        }
+        current_stakings_state[user_id] = state
 
         # Форматировать сообщение (skip_price_fetch=True - данные уже в БД, не нужны внешние запросы)
         from bot.notification_service import NotificationService
         notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
 
-        # Для OKX Flash Earn используем специальный формат с группировкой по проектам
-        if is_okx_flash:
-            message_text = notif_service.format_okx_flash_earn_page(
-                stakings_with_deltas=page_stakings,
-                page=page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url,
-                last_checked=last_checked
-            )
-        else:
-            message_text = notif_service.format_current_stakings_page(
-                stakings_with_deltas=page_stakings,
-                page=page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url,
-                last_checked=last_checked
-            )
-
-        # Отправить с кнопками
-        category = link.category
-        keyboard = get_current_stakings_keyboard(page, total_pages, category=category)
+        message_text, keyboard = await build_stakings_view(notif_service, state, last_checked=last_checked)
+        logger.info(f"   💾 Состояние сохранено: page=1, link_id={link_id}, total_pages={state['total_pages']}, category={link.category}")
 
         await callback.message.edit_text(
             message_text,
@@ -6171,7 +6242,6 @@ async def navigate_stakings_page(callback: CallbackQuery):
 
         current_page = state['page']
         total_pages = state['total_pages']
-        link_id = state['link_id']
 
         # Вычисляем новую страницу
         if action == "prev":
@@ -6183,66 +6253,19 @@ async def navigate_stakings_page(callback: CallbackQuery):
             await callback.answer()
             return
 
-        # Обновляем состояние
-        state['page'] = new_page
-
-        # Используем сохраненные данные вместо повторного запроса к БД
-        stakings_with_deltas = state.get('stakings', [])
-        exchange_name = state.get('exchange_name', 'Unknown')
-        min_apr = state.get('min_apr')
-        page_url = state.get('page_url')
-        is_okx_flash = state.get('is_okx_flash', False)
-
-        if not stakings_with_deltas:
+        if not state.get('exchange_filter'):
             await callback.answer("❌ Данные потеряны. Откройте раздел заново.", show_alert=True)
             return
 
-        # Для OKX Flash Earn пагинация по проектам
-        if is_okx_flash:
-            project_list = state.get('projects', [])
-            per_page = 2  # 2 проекта на страницу
-            start_idx = (new_page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_projects = project_list[start_idx:end_idx]
-
-            # Развернуть проекты в список стейкингов
-            page_stakings = []
-            for project_pools in page_projects:
-                page_stakings.extend(project_pools)
-        else:
-            # Стандартная пагинация
-            per_page = 5
-            start_idx = (new_page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_stakings = stakings_with_deltas[start_idx:end_idx]
+        # Обновляем состояние
+        state['page'] = new_page
 
         # Форматировать сообщение (skip_price_fetch=True - данные уже в БД)
         from bot.notification_service import NotificationService
         notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
 
-        # Для OKX Flash Earn используем специальный формат
-        if is_okx_flash:
-            message_text = notif_service.format_okx_flash_earn_page(
-                stakings_with_deltas=page_stakings,
-                page=new_page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url
-            )
-        else:
-            message_text = notif_service.format_current_stakings_page(
-                stakings_with_deltas=page_stakings,
-                page=new_page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url
-            )
-
-        # Отправить с обновленными кнопками
-        category = state.get('category')
-        keyboard = get_current_stakings_keyboard(new_page, total_pages, category=category)
+        # Стейкинги из кэша набора данных, страница - из кэша страниц, пока данные не менялись
+        message_text, keyboard = await build_stakings_view(notif_service, state)
 
         await callback.message.edit_text(
             message_text,
@@ -6258,11 +6281,102 @@ async def navigate_stakings_page(callback: CallbackQuery):
         await callback.answer("❌ Ошибка", show_alert=True)
 
 
+def format_data_age(checked_at) -> str:
+    """Возраст данных для подписи: 'только что', '5 мин назад', '2 ч 10 мин назад'"""
+    if not checked_at:
+        return "время неизвестно"
+    minutes = int((datetime.utcnow() - checked_at).total_seconds() // 60)
+    if minutes < 1:
+        return "только что"
+    if minutes < 60:
+        return f"{minutes} мин назад"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours} ч {minutes} мин назад" if minutes else f"{hours} ч назад"
+    return f"{hours // 24} дн назад"
+
+
+def _local_time_str(moment) -> str:
+    from datetime import timedelta
+    return (moment + timedelta(hours=2)).strftime("%d.%m.%Y %H:%M")
+
+
+def _get_link_last_checked(link_id: int):
+    with get_db_session() as db:
+        link = db.query(ApiLink).filter(ApiLink.id == link_id).first()
+        return link.last_checked if link else None
+
+
+# Фоновые задачи обновления сообщений со стейкингами (ссылки, чтобы задачи не собрал GC)
+_stakings_refresh_edits = set()
+
+
+async def _finish_stakings_refresh(message: Message, refresh: asyncio.Task, user_id: int, sent_state: dict):
+    """Дождаться фонового парсинга и обновить отправленное сообщение на месте"""
+    link_id = sent_state['link_id']
+    exchange_name = sent_state['exchange_name']
+
+    refresh_error = None
+    try:
+        # shield: обновление общее для всех, кто его ждет
+        await asyncio.shield(refresh)
+    except asyncio.CancelledError:
+        if not refresh.cancelled():
+            raise
+        refresh_error = "обновление отменено"
+    except Exception as e:
+        logger.error(f"❌ Ошибка фонового обновления стейкингов {exchange_name}: {e}")
+        refresh_error = str(e)
+
+    try:
+        # Пользователь мог перелистнуть страницу в этом же сообщении - берем его state;
+        # если он уже открыл другую ссылку, обновляем только это сообщение
+        state = current_stakings_state.get(user_id)
+        if not state or state.get('link_id') != link_id:
+            state = sent_state
+
+        notif_service = NotificationService(bot=message.bot, skip_price_fetch=True)
+        message_text, keyboard = await build_stakings_view(notif_service, state)
+
+        if refresh_error is None:
+            message_text += f"\n\n⏱ <i>Обновлено: {_local_time_str(datetime.utcnow())}</i>"
+        else:
+            last_checked = await run_in_db_executor(_get_link_last_checked, link_id)
+            data_time = _local_time_str(last_checked) if last_checked else "неизвестно"
+            message_text += (
+                f"\n\n⚠️ <i>Не удалось обновить, данные от {data_time} "
+                f"({format_data_age(last_checked)})</i>"
+            )
+
+        await message.edit_text(
+            message_text,
+            parse_mode="HTML",
+            reply_markup=keyboard,
+            disable_web_page_preview=True
+        )
+
+    except TelegramBadRequest as e:
+        if "message is not modified" not in str(e):
+            logger.warning(f"⚠️ Не удалось обновить сообщение стейкингов: {e}")
+    except Exception as e:
+        logger.error(f"❌ Ошибка обновления сообщения стейкингов: {e}", exc_info=True)
+
+
 @router.callback_query(F.data == "stakings_force_parse")
 async def force_parse_stakings(callback: CallbackQuery):
-    """Принудительный парсинг стейкингов (с обновлением БД)"""
+    """
+    Обновление стейкингов (stale-while-revalidate)
+
+    Сразу показывает данные из БД с их возрастом, парсинг идет в фоне
+    через пул воркеров (повторное нажатие присоединяется к идущему),
+    по завершении сообщение редактируется на месте.
+    При STAKINGS_SWR_ENABLED=false - ждет парсинг, как раньше.
+    """
+    from config import STAKINGS_SWR_ENABLED
+    from services.staking_refresh_service import get_staking_refresh_service
+
     logger.info("="*80)
-    logger.info("🔍 ПРИНУДИТЕЛЬНЫЙ ПАРСИНГ СТЕЙКИНГОВ")
+    logger.info("🔍 ОБНОВЛЕНИЕ СТЕЙКИНГОВ")
     logger.info("="*80)
     try:
         user_id = callback.from_user.id
@@ -6278,16 +6392,13 @@ async def force_parse_stakings(callback: CallbackQuery):
                 state = {
                     'page': 1,
                     'link_id': link_id,
-                    'total_pages': 1,
-                    'stakings': [],
-                    'is_okx_flash': False
+                    'total_pages': 1
                 }
                 current_stakings_state[user_id] = state
             else:
                 await callback.answer("❌ Сессия истекла. Откройте раздел заново.", show_alert=True)
                 return
 
-        current_page = state['page']
         link_id = state['link_id']
 
         # Получить данные ссылки
@@ -6302,11 +6413,9 @@ async def force_parse_stakings(callback: CallbackQuery):
             page_url = link.page_url
             api_url = link.api_url or link.url
             exchange = link.exchange
+            last_checked = link.last_checked
 
-        # ПРИНУДИТЕЛЬНО запускаем парсер
-        from bot.parser_service import ParserService
         from utils.exchange_detector import detect_exchange_from_url
-        import asyncio
 
         # Автоопределение биржи если не указана
         if not exchange or exchange in ['Unknown', 'None', '', 'null']:
@@ -6327,179 +6436,83 @@ async def force_parse_stakings(callback: CallbackQuery):
             exchange_filter = exchange_name_mapping[exchange_filter_lower]
             logger.info(f"🔄 Нормализация биржи: {exchange_name} -> {exchange_filter}")
 
-        # Закрываем callback
-        await callback.answer()
+        state['exchange_name'] = exchange_name
+        state['exchange_filter'] = exchange_filter
+        state['min_apr'] = min_apr
+        state['page_url'] = page_url
 
-        # Отправляем сообщение о начале обновления
-        status_msg = await callback.message.answer(
-            f"⏳ <b>Принудительный парсинг {exchange_name}...</b>\n"
-            f"📊 Запуск парсера стейкинг-продуктов",
-            parse_mode="HTML"
+        # Запускаем парсинг (или присоединяемся к уже идущему для этой ссылки)
+        refresh_service = get_staking_refresh_service()
+        already_running = refresh_service.is_refreshing(link_id)
+        refresh = refresh_service.refresh(link_id, exchange_name, api_url, exchange, page_url, min_apr)
+        logger.info(
+            f"🔄 Обновление {exchange_name}: link_id={link_id}, exchange={exchange}, "
+            f"{'присоединились к идущему' if already_running else 'запущено'}"
         )
 
-        # Запускаем парсер и ЖДЕМ его завершения
-        parser_service = ParserService()
-        loop = asyncio.get_event_loop()
-
-        try:
-            logger.info(f"{'='*60}")
-            logger.info(f"🔄 ПРИНУДИТЕЛЬНЫЙ ПАРСИНГ СТЕЙКИНГОВ: {exchange_name}")
-            logger.info(f"   link_id={link_id}")
-            logger.info(f"   api_url={api_url}")
-            logger.info(f"   exchange={exchange}")
-            logger.info(f"{'='*60}")
-
-            # СИНХРОННО выполняем парсинг
-            new_stakings = await loop.run_in_executor(
-                get_executor(),
-                parser_service.parse_staking_link,
-                link_id,
-                api_url,
-                exchange,
-                page_url
-            )
-
-            logger.info(f"✅ ПАРСЕР ЗАВЕРШИЛ РАБОТУ")
-            logger.info(f"   Получено новых записей: {len(new_stakings) if new_stakings else 0}")
-            logger.info(f"{'='*60}")
-
-            # Обновляем last_checked для ApiLink
-            with get_db_session() as db:
-                link_record = db.query(ApiLink).filter(ApiLink.id == link_id).first()
-                if link_record:
-                    link_record.last_checked = datetime.utcnow()
-                    db.commit()
+        from bot.notification_service import NotificationService
+        notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
 
-            # Удаляем сообщение о статусе
-            await status_msg.delete()
+        if not STAKINGS_SWR_ENABLED:
+            await callback.answer()
 
-        except Exception as e:
-            logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА при принудительном парсинге {exchange_name}: {e}", exc_info=True)
-            await status_msg.edit_text(
-                f"❌ <b>Ошибка при парсинге {exchange_name}</b>\n"
-                f"Показываю данные из кэша",
+            # Отправляем сообщение о начале обновления и ЖДЕМ завершения парсинга
+            status_msg = await callback.message.answer(
+                f"⏳ <b>Принудительный парсинг {exchange_name}...</b>\n"
+                f"📊 Запуск парсера стейкинг-продуктов",
                 parse_mode="HTML"
             )
-            await asyncio.sleep(2)
-            await status_msg.delete()
-
-        # Получить стейкинги с дельтами (ПОСЛЕ парсинга)
-        from services.staking_snapshot_service import StakingSnapshotService
-        snapshot_service = StakingSnapshotService()
-
-        stakings_with_deltas = snapshot_service.get_stakings_with_deltas(
-            exchange=exchange_filter,
-            min_apr=min_apr
-        )
-
-        # Для OKX Flash Earn пагинация по проектам
-        is_okx_flash = 'okx' in exchange_name.lower() and 'flash' in exchange_name.lower()
-
-        if is_okx_flash:
-            # Группируем все стейкинги по проектам
-            projects = {}
-            for item in stakings_with_deltas:
-                staking = item['staking'] if isinstance(item, dict) and 'staking' in item else item
-                if isinstance(staking, dict):
-                    reward_coin = staking.get('reward_coin') or staking.get('coin')
-                    start_time = staking.get('start_time')
-                    end_time = staking.get('end_time')
-                else:
-                    reward_coin = getattr(staking, 'reward_coin', None) or getattr(staking, 'coin', None)
-                    start_time = getattr(staking, 'start_time', None)
-                    end_time = getattr(staking, 'end_time', None)
-                project_key = (reward_coin, start_time, end_time)
-                if project_key not in projects:
-                    projects[project_key] = []
-                projects[project_key].append(item)
-
-            project_list = list(projects.values())
-            per_page = 2
-            total_pages = max(1, (len(project_list) + per_page - 1) // per_page)
-
-            if current_page > total_pages:
-                current_page = total_pages
-
-            start_idx = (current_page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_projects = project_list[start_idx:end_idx]
-
-            page_stakings = []
-            for project_pools in page_projects:
-                page_stakings.extend(project_pools)
-
-            # Обновляем state
-            state['page'] = current_page
-            state['total_pages'] = total_pages
-            state['stakings'] = stakings_with_deltas
-            state['projects'] = project_list
-            state['is_okx_flash'] = True
-        else:
-            # Стандартная пагинация
-            per_page = 5
-            total_pages = max(1, (len(stakings_with_deltas) + per_page - 1) // per_page)
-
-            if current_page > total_pages:
-                current_page = total_pages
-
-            start_idx = (current_page - 1) * per_page
-            end_idx = start_idx + per_page
-            page_stakings = stakings_with_deltas[start_idx:end_idx]
-
-            # Обновляем state
-            state['page'] = current_page
-            state['total_pages'] = total_pages
-            state['stakings'] = stakings_with_deltas
-            state['is_okx_flash'] = False
-
-        state['exchange_name'] = exchange_name
-        state['min_apr'] = min_apr
-        state['page_url'] = page_url
+            try:
+                new_count = await asyncio.shield(refresh)
+                logger.info(f"✅ Парсер завершил работу, новых записей: {new_count}")
+                await status_msg.delete()
+            except Exception as e:
+                logger.error(f"❌ КРИТИЧЕСКАЯ ОШИБКА при принудительном парсинге {exchange_name}: {e}", exc_info=True)
+                await status_msg.edit_text(
+                    f"❌ <b>Ошибка при парсинге {exchange_name}</b>\n"
+                    f"Показываю данные из кэша",
+                    parse_mode="HTML"
+                )
+                await asyncio.sleep(2)
+                await status_msg.delete()
 
-        # Форматировать сообщение (skip_price_fetch=True - данные уже в БД)
-        from bot.notification_service import NotificationService
-        notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
+            message_text, keyboard = await build_stakings_view(notif_service, state)
+            message_text += f"\n\n⏱ <i>Обновлено: {_local_time_str(datetime.utcnow())}</i>"
 
-        # Для OKX Flash Earn используем специальный формат
-        if is_okx_flash:
-            message_text = notif_service.format_okx_flash_earn_page(
-                stakings_with_deltas=page_stakings,
-                page=current_page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url
-            )
-        else:
-            message_text = notif_service.format_current_stakings_page(
-                stakings_with_deltas=page_stakings,
-                page=current_page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                min_apr=min_apr,
-                page_url=page_url
+            await callback.message.answer(
+                message_text,
+                parse_mode="HTML",
+                reply_markup=keyboard,
+                disable_web_page_preview=True
             )
+            return
 
-        # Добавляем время парсинга
-        from datetime import timedelta
-        now_local = datetime.utcnow() + timedelta(hours=2)
-        last_updated_str = now_local.strftime("%d.%m.%Y %H:%M")
-        message_text += f"\n\n⏱ <i>Обновлено: {last_updated_str}</i>"
+        await callback.answer(
+            "🔄 Обновление уже идет, покажу результат" if already_running else "🔄 Обновляю в фоне"
+        )
 
-        # Отправляем НОВОЕ сообщение с обновленными данными
-        category = state.get('category')
-        keyboard = get_current_stakings_keyboard(current_page, total_pages, category=category)
+        # Сразу показываем сохраненные данные с их возрастом
+        message_text, keyboard = await build_stakings_view(notif_service, state)
+        if last_checked:
+            message_text += (
+                f"\n\n🕒 <i>Данные от {_local_time_str(last_checked)} ({format_data_age(last_checked)})</i>"
+            )
+        message_text += "\n🔄 <i>Обновляю в фоне, сообщение обновится само...</i>"
 
-        await callback.message.answer(
+        sent_message = await callback.message.answer(
             message_text,
             parse_mode="HTML",
             reply_markup=keyboard,
             disable_web_page_preview=True
         )
 
+        edit_task = asyncio.create_task(_finish_stakings_refresh(sent_message, refresh, user_id, dict(state)))
+        _stakings_refresh_edits.add(edit_task)
+        edit_task.add_done_callback(_stakings_refresh_edits.discard)
+
     except Exception as e:
-        logger.error(f"❌ Ошибка принудительного парсинга стейкингов: {e}", exc_info=True)
-        await callback.answer("❌ Ошибка парсинга", show_alert=True)
+        logger.error(f"❌ Ошибка обновления стейкингов: {e}", exc_info=True)
+        await safe_answer_callback(callback, "❌ Ошибка обновления", show_alert=True)
 
 
 # =============================================================================
@@ -6612,6 +6625,156 @@ def get_promos_from_db(link_id: int, exchange_name: str = None, sort_by_reward:
         return []
 
 
+async def load_current_promos(link_id: int, exchange_name: str) -> tuple:
+    """
+    Текущие промоакции ссылки: из кэша, пока данные в БД не менялись
+
+    Returns:
+        (версия данных, список промоакций)
+    """
+    filters = {'exchange_name': exchange_name}
+    cached = get_dataset(KIND_PROMOS, link_id, filters, scope=link_id)
+    if cached is not None:
+        return cached
+
+    # Версию читаем ДО запроса: изменения во время запроса ее увеличат
+    version = current_version(KIND_PROMOS, link_id)
+    promos_data = await run_in_db_executor(get_promos_from_db, link_id, exchange_name)
+    put_dataset(KIND_PROMOS, link_id, filters, version, promos_data)
+    return version, promos_data
+
+
+async def render_promos_page(
+    notif_service: NotificationService,
+    link_id: int,
+    state: dict,
+    page_promos: list,
+    page: int,
+    total_pages: int
+) -> str:
+    """
+    Страница текущих промоакций (готовая из кэша или отрендеренная и закэшированная)
+
+    Launchpool-страницы при рендере берут данные из API биржи - их не кэшируем.
+    """
+    exchange_name = state.get('exchange_name', 'Unknown')
+    page_url = state.get('page_url')
+    prev_participants = state.get('participants_snapshot', {})
+    data_version = state.get('data_version')
+
+    is_live = state.get('is_launchpool') and not any(
+        state.get(flag) for flag in (
+            'is_gate_candy', 'is_bitget_candy', 'is_phemex_candy', 'is_weex', 'is_mexc_launchpad'
+        )
+    )
+    page_filters = {'exchange_name': exchange_name, 'page_url': page_url, 'total_pages': total_pages}
+    cacheable = data_version is not None and not is_live and not prev_participants
+    if cacheable:
+        message_text = get_page(KIND_PROMOS, link_id, page_filters, page, data_version)
+        if message_text is not None:
+            return message_text
+
+    # Статистика участников для страницы - одним запросом
+    if page_promos:
+        try:
+            from services.participants_tracker_service import get_participants_tracker
+            tracker = get_participants_tracker()
+            
+            stats_by_promo = tracker.get_participants_stats_batch(
+                exchange_name, [promo.get('promo_id') for promo in page_promos]
+            )
+            for promo in page_promos:
+                promo_id = promo.get('promo_id')
+                if promo_id:
+                    promo['participants_stats'] = stats_by_promo.get(promo_id, {})
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка загрузки статистики участников: {e}")
+
+    # Используем специальный форматтер для каждой биржи
+    if state.get('is_gate_candy'):
+        message_text = notif_service.format_gate_candy_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            page_url=page_url,
+            prev_participants=prev_participants
+        )
+    elif state.get('is_bitget_candy'):
+        message_text = notif_service.format_bitget_candy_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            page_url=page_url,
+            prev_participants=prev_participants
+        )
+    elif state.get('is_phemex_candy'):
+        message_text = notif_service.format_phemex_candy_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            page_url=page_url,
+            prev_participants=prev_participants
+        )
+    elif state.get('is_weex'):
+        message_text = notif_service.format_weex_airdrop_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            page_url=page_url
+        )
+    elif state.get('is_mexc_launchpad'):
+        message_text = notif_service.format_mexc_launchpad_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            page_url=page_url,
+            token_prices=await notif_service.prefetch_promo_prices(page_promos)
+        )
+    elif state.get('is_launchpool'):
+        # Для BingX и Bitget используем асинхронную версию
+        special_parser = state.get('special_parser')
+        if special_parser in ['bingx_launchpool', 'bitget_launchpool']:
+            message_text = await notif_service.format_launchpool_page_async(
+                promos=page_promos,
+                page=page,
+                total_pages=total_pages,
+                page_url=page_url,
+                special_parser=special_parser,
+                exchange_name=exchange_name
+            )
+        else:
+            # Универсальный форматтер для других launchpool парсеров.
+            # Выполняется в пуле потоков: запрос к API биржи и загрузка цен
+            # до рендера, чтобы первая же страница была с USD-эквивалентами
+            loop = asyncio.get_event_loop()
+            message_text = await loop.run_in_executor(
+                get_executor(),
+                lambda: notif_service.format_launchpool_page(
+                    promos=page_promos,
+                    page=page,
+                    total_pages=total_pages,
+                    page_url=page_url,
+                    special_parser=special_parser,
+                    exchange_name=exchange_name,
+                    wait_prices=True
+                )
+            )
+    else:
+        message_text = notif_service.format_current_promos_page(
+            promos=page_promos,
+            page=page,
+            total_pages=total_pages,
+            exchange_name=exchange_name,
+            page_url=page_url
+        )
+
+    # Страница без части цен (загрузка не уложилась в таймаут) не кэшируется,
+    # иначе USD-эквиваленты не появятся до смены версии данных или TTL
+    if cacheable and not notif_service.missing_price_symbols(page_promos):
+        put_page(KIND_PROMOS, link_id, page_filters, page, data_version, message_text)
+    return message_text
+
+
 @router.callback_query(F.data == "manage_view_current_promos")
 async def view_current_promos(callback: CallbackQuery):
     """Показать текущие промоакции из БД (без принудительного парсинга)"""
@@ -6766,8 +6929,8 @@ async def view_current_promos(callback: CallbackQuery):
             except Exception as e:
                 logger.error(f"❌ Ошибка отображения weex_useragent: {e}")
 
-        # Получаем данные из БД (без парсинга)
-        promos_data = get_promos_from_db(link_id, exchange_name)
+        # Получаем данные из БД (без парсинга; из кэша, пока данные в БД не менялись)
+        data_version, promos_data = await load_current_promos(link_id, exchange_name)
         
         # Форматируем время последнего обновления
         last_updated_str = ""
@@ -6840,27 +7003,12 @@ async def view_current_promos(callback: CallbackQuery):
         end_idx = start_idx + per_page
         page_promos = promos_data[start_idx:end_idx]
 
-        # Добавляем статистику участников для ВСЕХ бирж при первом открытии
-        if page_promos:
-            try:
-                from services.participants_tracker_service import get_participants_tracker
-                tracker = get_participants_tracker()
-                
-                for promo in page_promos:
-                    promo_id = promo.get('promo_id')
-                    if promo_id:
-                        stats = tracker.get_participants_stats(exchange_name, promo_id)
-                        promo['participants_stats'] = stats
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка загрузки статистики участников: {e}")
-
         # Сохранить состояние
         current_promos_state[user_id] = {
             'page': page,
             'link_id': link_id,
             'total_pages': total_pages,
-            'promos': promos_data,
-            'exchange_name': exchange_name,
+            'exchange_name': exchange_name,  # Промоакции - в кэше набора данных (load_current_promos)
             'page_url': page_url,
             'category': link.category,  # Для настроек уведомлений launchpool
             'is_okx_boost': is_okx_boost,
@@ -6880,81 +7028,18 @@ async def view_current_promos(callback: CallbackQuery):
             'last_checked': last_checked,
             'last_updated_str': last_updated_str,
             'participants_snapshot': {},
-            'from_favorites': from_favorites  # Сохраняем контекст навигации
+            'from_favorites': from_favorites,  # Сохраняем контекст навигации
+            'data_version': data_version  # Версия данных для кэша страниц
         }
         logger.info(f"   💾 Состояние сохранено: page={page}, total_pages={total_pages}, from_favorites={from_favorites}")
 
         # Форматировать сообщение (skip_price_fetch=True - данные уже в БД, не нужны внешние запросы)
         notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
 
-        # Используем специальный форматтер для каждой биржи
-        if is_gate_candy:
-            message_text = notif_service.format_gate_candy_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants={}
-            )
-        elif is_bitget_candy:
-            message_text = notif_service.format_bitget_candy_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants={}
-            )
-        elif is_phemex_candy:
-            message_text = notif_service.format_phemex_candy_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants={}
-            )
-        elif is_weex:
-            message_text = notif_service.format_weex_airdrop_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                page_url=page_url
-            )
-        elif is_mexc_launchpad:
-            message_text = notif_service.format_mexc_launchpad_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                page_url=page_url
-            )
-        elif is_launchpool:
-            # Для BingX и Bitget используем асинхронную версию (нужен браузер)
-            if link.special_parser in ['bingx_launchpool', 'bitget_launchpool']:
-                message_text = await notif_service.format_launchpool_page_async(
-                    promos=page_promos,
-                    page=page,
-                    total_pages=total_pages,
-                    page_url=page_url,
-                    special_parser=link.special_parser,
-                    exchange_name=exchange_name
-                )
-            else:
-                # Универсальный форматтер для других launchpool парсеров
-                message_text = notif_service.format_launchpool_page(
-                    promos=page_promos,
-                    page=page,
-                    total_pages=total_pages,
-                    page_url=page_url,
-                    special_parser=link.special_parser,
-                    exchange_name=exchange_name
-                )
-        else:
-            message_text = notif_service.format_current_promos_page(
-                promos=page_promos,
-                page=page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                page_url=page_url
-            )
+        # Используем специальный форматтер для каждой биржи (страница кэшируется по версии данных)
+        message_text = await render_promos_page(
+            notif_service, link_id, current_promos_state[user_id], page_promos, page, total_pages
+        )
 
         # Добавляем информацию о времени последнего обновления сразу после "🏦 Биржа:"
         if last_updated_str:
@@ -7075,6 +7160,13 @@ async def view_trading_promos(callback: CallbackQuery):
 
         # Форматируем Trading Token Splash с калькулятором
         from utils.message_formatters import BybitTokenSplashFormatter
+        from utils.price_fetcher import prefetch_prices
+        
+        # Цены токенов одной пачкой до рендера - форматтер берет их из кэша
+        await prefetch_prices(
+            (promo.get('award_token') or promo.get('token_symbol') for promo in trading_promos),
+            'bybit'
+        )
         
         message_parts = [
             f"📊 <b>TRADING TOKEN SPLASH</b>",
@@ -7356,7 +7448,8 @@ async def force_parse_promos(callback: CallbackQuery):
                         elif is_weex:
                             message_text = notif_service.format_weex_airdrop_page(promos=page_promos, page=page, total_pages=total_pages, page_url=page_url)
                         elif is_mexc_launchpad:
-                            message_text = notif_service.format_mexc_launchpad_page(promos=page_promos, page=page, total_pages=total_pages, page_url=page_url)
+                            token_prices = await notif_service.prefetch_promo_prices(page_promos)
+                            message_text = notif_service.format_mexc_launchpad_page(promos=page_promos, page=page, total_pages=total_pages, page_url=page_url, token_prices=token_prices)
                         else:
                             message_text = notif_service.format_current_promos_page(promos=page_promos, page=page, total_pages=total_pages, exchange_name=exchange_name, page_url=page_url)
                         
@@ -7428,121 +7521,34 @@ async def navigate_promos_page(callback: CallbackQuery):
             await callback.answer()
             return
 
-        # Обновляем состояние
-        state['page'] = new_page
-
-        # Используем сохраненные данные
-        promos_data = state.get('promos', [])
-        exchange_name = state.get('exchange_name', 'Unknown')
-        page_url = state.get('page_url')
+        # Промоакции из кэша набора данных, пока данные в БД не менялись
+        data_version, promos_data = await load_current_promos(state['link_id'], state.get('exchange_name'))
 
         if not promos_data:
             await callback.answer("❌ Данные потеряны. Откройте раздел заново.", show_alert=True)
             return
 
-        # Проверяем тип для правильной пагинации
-        is_okx_boost = state.get('is_okx_boost', False)
-        is_gate_candy = state.get('is_gate_candy', False)
-        is_bitget_candy = state.get('is_bitget_candy', False)
-        is_mexc_airdrop = state.get('is_mexc_airdrop', False)
-        is_mexc_launchpad = state.get('is_mexc_launchpad', False)
-        is_weex = state.get('is_weex', False)
-        is_weex_rewards = state.get('is_weex_rewards', False)
-        is_bybit_launchpool = state.get('is_bybit_launchpool', False)
-        prev_participants = state.get('participants_snapshot', {})
-
         # Пагинация - по 5 на страницу
         per_page = 5
+        total_pages = max(1, (len(promos_data) + per_page - 1) // per_page)
+        new_page = min(new_page, total_pages)
+
+        # Обновляем состояние
+        state['page'] = new_page
+        state['total_pages'] = total_pages
+        state['data_version'] = data_version
+
         start_idx = (new_page - 1) * per_page
         end_idx = start_idx + per_page
         page_promos = promos_data[start_idx:end_idx]
 
-        # Обновляем статистику участников для ВСЕХ бирж при пагинации
-        if page_promos:
-            try:
-                from services.participants_tracker_service import get_participants_tracker
-                tracker = get_participants_tracker()
-                
-                for promo in page_promos:
-                    promo_id = promo.get('promo_id')
-                    if promo_id:
-                        stats = tracker.get_participants_stats(exchange_name, promo_id)
-                        promo['participants_stats'] = stats
-            except Exception as e:
-                logger.warning(f"⚠️ Ошибка обновления статистики при пагинации: {e}")
-
         # Форматировать сообщение (skip_price_fetch=True - данные уже в БД)
         notif_service = NotificationService(bot=callback.bot, skip_price_fetch=True)
 
-        # Используем специальный форматтер для каждой биржи
-        if is_gate_candy:
-            message_text = notif_service.format_gate_candy_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants=prev_participants
-            )
-        elif is_bitget_candy:
-            message_text = notif_service.format_bitget_candy_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants=prev_participants
-            )
-        elif state.get('is_phemex_candy'):
-            message_text = notif_service.format_phemex_candy_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                page_url=page_url,
-                prev_participants=prev_participants
-            )
-        elif is_weex:
-            message_text = notif_service.format_weex_airdrop_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                page_url=page_url
-            )
-        elif is_mexc_launchpad:
-            message_text = notif_service.format_mexc_launchpad_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                page_url=page_url
-            )
-        elif state.get('is_launchpool'):
-            # Для BingX и Bitget используем асинхронную версию
-            special_parser = state.get('special_parser')
-            if special_parser in ['bingx_launchpool', 'bitget_launchpool']:
-                message_text = await notif_service.format_launchpool_page_async(
-                    promos=page_promos,
-                    page=new_page,
-                    total_pages=total_pages,
-                    page_url=page_url,
-                    special_parser=special_parser,
-                    exchange_name=exchange_name
-                )
-            else:
-                # Универсальный форматтер для других launchpool парсеров
-                message_text = notif_service.format_launchpool_page(
-                    promos=page_promos,
-                    page=new_page,
-                    total_pages=total_pages,
-                    page_url=page_url,
-                    special_parser=special_parser,
-                    exchange_name=exchange_name
-                )
-        else:
-            message_text = notif_service.format_current_promos_page(
-                promos=page_promos,
-                page=new_page,
-                total_pages=total_pages,
-                exchange_name=exchange_name,
-                page_url=page_url
-            )
+        # Страница из кэша для версии данных, с которой открыт раздел
+        message_text = await render_promos_page(
+            notif_service, state.get('link_id'), state, page_promos, new_page, total_pages
+        )
 
         # Добавляем время обновления сразу после "🏦 Биржа:"
         last_updated_str = state.get('last_updated_str', '')
@@ -11995,8 +12001,8 @@ def _format_timestamp(timestamp: float) -> str:
 # ТОП АКТИВНОСТИ - ОБРАБОТЧИКИ
 # =============================================================================
 
-# Состояние пагинации для ТОП АКТИВНОСТИ
-top_activity_state = {}
+# Состояние пагинации для ТОП АКТИВНОСТИ (параметры рейтинга и страница)
+top_activity_state = UserStateStore('top_activity')
 
 @router.callback_query(F.data == "top_activity_menu")
 async def show_top_activity_menu(callback: CallbackQuery):
@@ -12109,8 +12115,9 @@ async def show_top_stakings_by_type(callback: CallbackQuery):
         items_per_page = 5
         total_pages = max(1, (len(stakings) + items_per_page - 1) // items_per_page)
         
+        # Только параметры: список берется из рейтинга сервиса при листании
         top_activity_state[user_id] = {
-            'stakings': stakings,
+            'type': 'top_stakings',
             'staking_type': staking_type,
             'page': 1,
             'items_per_page': items_per_page,
@@ -12143,7 +12150,7 @@ async def navigate_top_stakings(callback: CallbackQuery):
         user_id = callback.from_user.id
         state = top_activity_state.get(user_id)
         
-        if not state or 'stakings' not in state:
+        if not state or state.get('type') != 'top_stakings':
             await callback.answer("❌ Данные устарели, обновите список", show_alert=True)
             return
         
@@ -12151,9 +12158,17 @@ async def navigate_top_stakings(callback: CallbackQuery):
         staking_type = state.get('staking_type', 'fixed')
         is_prev = callback.data.endswith("_prev")
         
+        # Рейтинг сервиса в памяти - повторный запрос дешевый
+        from services.top_activity_service import get_top_activity_service
+        stakings = get_top_activity_service().get_top_stakings(limit=50, staking_type=staking_type)
+        if not stakings:
+            await callback.answer("❌ Данные устарели, обновите список", show_alert=True)
+            return
+        
         # Изменяем страницу
-        current_page = state['page']
-        total_pages = state['total_pages']
+        total_pages = max(1, (len(stakings) + state['items_per_page'] - 1) // state['items_per_page'])
+        current_page = min(state['page'], total_pages)
+        state['total_pages'] = total_pages
         
         if is_prev and current_page > 1:
             current_page -= 1
@@ -12164,7 +12179,7 @@ async def navigate_top_stakings(callback: CallbackQuery):
         
         # Форматируем страницу
         message = format_top_stakings_page(
-            state['stakings'], 
+            stakings, 
             current_page, 
             total_pages, 
             state['items_per_page'],
@@ -12281,14 +12296,17 @@ async def show_category_promos(callback: CallbackQuery):
         
         # Зберігаємо стан
         top_activity_state[user_id] = {
-            'category_promos': promos,
             'category': category,
+            'min_apr': min_apr,
             'page': 1,
             'items_per_page': items_per_page,
             'total_pages': total_pages,
             'type': 'category_promos'
         }
         
+        # Ціни токенів сторінки - однією паралельною пачкою до рендеру
+        await prefetch_category_prices(promos, 1, items_per_page)
+        
         # Форматуємо сторінку
         message = format_category_page(
             promos, 1, total_pages, items_per_page, 
@@ -12331,8 +12349,18 @@ async def navigate_category_promos(callback: CallbackQuery):
             await callback.answer("❌ Дані застаріли", show_alert=True)
             return
         
-        current_page = state['page']
-        total_pages = state['total_pages']
+        # Рейтинг сервісу в пам'яті - повторний запит дешевий
+        from services.top_activity_service import get_top_activity_service
+        promos = get_top_activity_service().get_top_promos_by_category(
+            category, limit=50, min_apr=state.get('min_apr', 0)
+        )
+        if not promos:
+            await callback.answer("❌ Дані застаріли, оновіть список", show_alert=True)
+            return
+        
+        total_pages = max(1, (len(promos) + state['items_per_page'] - 1) // state['items_per_page'])
+        current_page = min(state['page'], total_pages)
+        state['total_pages'] = total_pages
         
         if action == "prev" and current_page > 1:
             current_page -= 1
@@ -12351,9 +12379,12 @@ async def navigate_category_promos(callback: CallbackQuery):
         }
         config = CATEGORY_CONFIG.get(category, {'icon': '📋', 'name': category.title()})
         
+        # Ціни токенів сторінки - однією паралельною пачкою до рендеру
+        await prefetch_category_prices(promos, current_page, state['items_per_page'])
+        
         # Форматуємо сторінку
         message = format_category_page(
-            state['category_promos'], 
+            promos, 
             current_page, 
             total_pages, 
             state['items_per_page'],
@@ -12885,6 +12916,15 @@ def format_top_promos_page(promos: list, page: int, total_pages: int, items_per_
 # ФОРМАТУВАННЯ ДЛЯ КАТЕГОРІЙ ПРОМОАКЦІЙ
 # =============================================================================
 
+async def prefetch_category_prices(promos: list, page: int, items_per_page: int):
+    """Завантажує ціни award_token для промо сторінки (форматери читають лише кеш)"""
+    from utils.price_fetcher import prefetch_prices
+    
+    start_idx = (page - 1) * items_per_page
+    page_promos = promos[start_idx:start_idx + items_per_page]
+    await prefetch_prices(promo.get('award_token') for promo in page_promos)
+
+
 def format_category_page(
     promos: list, 
     page: int, 
@@ -13303,12 +13343,11 @@ def format_launchpool_page(
         if (not total_pool_usd or total_pool_usd == 0) and raw_data:
             total_pool_usd = raw_data.get('total_pool_usd', 0)
         
-        # Fallback на price_fetcher если USD всё ещё нет
+        # Fallback на кэш price_fetcher если USD всё ещё нет (см. prefetch_category_prices)
         if (not total_pool_usd or total_pool_usd == 0) and total_pool and award_token:
             try:
                 from utils.price_fetcher import get_price_fetcher
-                pf = get_price_fetcher()
-                token_price = pf.get_token_price(award_token, exchange.lower() if exchange else None)
+                token_price = get_price_fetcher().get_cached_price(award_token)
                 if token_price:
                     total_pool_usd = float(total_pool) * token_price
             except:
@@ -0,0 +1,142 @@
+"""
+Ленивая регистрация обработчиков по функциональным разделам
+
+Модуль раздела (Telegram аккаунты, API ключи бирж, фьючерсы) со всеми его
+зависимостями импортируется не при старте бота, а при первом апдейте,
+который к нему относится: callback с префиксом раздела, команда или
+сообщение в FSM-состоянии раздела.
+
+Как это работает: LazyRouter стоит в дереве роутеров на месте настоящего.
+Его фильтр при первом подходящем апдейте импортирует модуль, подключает
+настоящий роутер как вложенный и возвращает False - aiogram продолжает
+обработку во вложенных роутерах, и тот же апдейт получает настоящий
+обработчик. Порядок роутеров в диспетчере сохраняется.
+
+Использование:
+    from bot.lazy_router import LazyRouter
+
+    dp.include_router(LazyRouter(
+        'bot.exchange_credentials_handlers',
+        callback_prefixes=('exchange_cred_', 'exchange_select_'),
+        states=(ExchangeCredentialsStates,)
+    ))
+"""
+import importlib
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from aiogram import Router
+from aiogram.fsm.state import StatesGroup
+from aiogram.types import CallbackQuery, Message
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Все ленивые роутеры (для статистики)
+_lazy_routers: List['LazyRouter'] = []
+
+
+class LazyRouter(Router):
+    """Роутер-заглушка раздела: импортирует модуль раздела при первом обращении"""
+
+    def __init__(
+        self,
+        module: str,
+        attr: str = 'router',
+        *,
+        callback_prefixes: Iterable[str] = (),
+        commands: Iterable[str] = (),
+        states: Iterable[type] = (),
+        any_message: bool = False,
+        name: Optional[str] = None
+    ):
+        """
+        Args:
+            module: Модуль раздела (bot.exchange_credentials_handlers)
+            attr: Имя роутера в модуле
+            callback_prefixes: Префиксы callback_data раздела
+            commands: Команды раздела (без "/")
+            states: StatesGroup раздела - сообщения в этих состояниях
+            any_message: Загружать на любое сообщение (для разделов с F.text)
+        """
+        super().__init__(name=name or f"lazy:{module}")
+        self.module = module
+        self.attr = attr
+        self.callback_prefixes = tuple(callback_prefixes)
+        self.commands = {command.lower() for command in commands}
+        self.state_names = {
+            state_name
+            for group in states
+            if isinstance(group, type) and issubclass(group, StatesGroup)
+            for state_name in group.__all_states_names__
+        }
+        self.any_message = any_message
+
+        self.loaded = False
+        self.load_time_ms: Optional[float] = None
+        self.loaded_by: Optional[str] = None
+
+        self.message.register(self._pass, self._message_filter)
+        self.callback_query.register(self._pass, self._callback_filter)
+        _lazy_routers.append(self)
+
+        if not config.LAZY_HANDLERS_ENABLED:
+            self.load(reason='startup')
+
+    def load(self, reason: str = 'preload') -> Router:
+        """Импортировать модуль раздела и подключить его роутер (один раз)"""
+        if self.loaded:
+            return self.sub_routers[0]
+
+        started = time.perf_counter()
+        module = importlib.import_module(self.module)
+        router = getattr(module, self.attr)
+        self.include_router(router)
+
+        self.loaded = True
+        self.loaded_by = reason
+        self.load_time_ms = (time.perf_counter() - started) * 1000
+        logger.info(f"📦 Раздел {self.module} загружен ({reason}) за {self.load_time_ms:.0f} мс")
+        return router
+
+    def _message_matches(self, message: Message, raw_state: Optional[str]) -> bool:
+        if self.any_message:
+            return True
+        if raw_state and raw_state in self.state_names:
+            return True
+        text = message.text or ''
+        if self.commands and text.startswith('/'):
+            command = text[1:].split(maxsplit=1)[0].split('@', 1)[0].lower() if len(text) > 1 else ''
+            return command in self.commands
+        return False
+
+    async def _message_filter(self, message: Message, raw_state: Optional[str] = None) -> bool:
+        if not self.loaded and self._message_matches(message, raw_state):
+            self.load(reason='message')
+        # Всегда False: апдейт уходит во вложенный (настоящий) роутер
+        return False
+
+    async def _callback_filter(self, callback: CallbackQuery) -> bool:
+        if not self.loaded and (callback.data or '').startswith(self.callback_prefixes):
+            self.load(reason=f"callback {callback.data}")
+        return False
+
+    @staticmethod
+    async def _pass(*args, **kwargs):
+        # Не вызывается: фильтры заглушки всегда False
+        return None
+
+    def get_stats(self) -> Dict[str, Any]:
+        return {
+            'module': self.module,
+            'loaded': self.loaded,
+            'loaded_by': self.loaded_by,
+            'load_time_ms': round(self.load_time_ms, 1) if self.load_time_ms is not None else None,
+        }
+
+
+def get_lazy_routers_stats() -> List[Dict[str, Any]]:
+    """Статистика ленивых разделов"""
+    return [lazy_router.get_stats() for lazy_router in _lazy_routers]
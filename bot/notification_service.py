@@ -1,5 +1,8 @@
+import asyncio
 import logging
+import hashlib
 import html
+import json
 import re
 from datetime import datetime
 from aiogram import Bot
@@ -19,6 +22,23 @@ from utils.message_formatters import (
     format_universal_header
 )
 
+# Очередь исходящих сообщений с лимитами Telegram
+from utils.send_queue import get_send_queue
+
+# Цены загружаются пачкой до рендера, форматтеры читают только кэш
+from utils.price_fetcher import prefetch_prices, schedule_price_prefetch
+
+# Кэш отрендеренных уведомлений (один рендер на всех получателей)
+from utils.cache import get_cache_manager, CacheKeys
+
+import config
+
+# Лимит длины одного сообщения Telegram
+TELEGRAM_MESSAGE_LIMIT = 4096
+
+# Сумма и символ токена в тексте: "100 BTC", "10,000 USDT", "1,500,000 SHIB"
+TOKEN_AMOUNT_PATTERN = re.compile(r'([\d,]+(?:\.\d+)?)\s*([A-Z]{2,10})(?:\s|$|,|\.|\)|!)')
+
 logger = logging.getLogger(__name__)
 
 class NotificationService:
@@ -163,12 +183,17 @@ class NotificationService:
         
         return earnings_tokens, earnings_usd, period_text, formatted
 
-    def parse_token_amounts(self, text: str) -> List[Tuple[float, str, Optional[float]]]:
+    def parse_token_amounts(
+        self,
+        text: str,
+        token_prices: Optional[Dict[str, float]] = None
+    ) -> List[Tuple[float, str, Optional[float]]]:
         """
         Парсит токены и их количество из текста
 
         Args:
             text: Текст для парсинга (например, "Win 100 BTC or 10,000 USDT Prize Pool")
+            token_prices: Готовая карта цен (без нее - только кэш PriceFetcher)
 
         Returns:
             Список кортежей (amount, token_symbol, price_usd)
@@ -177,13 +202,8 @@ class NotificationService:
         if not text:
             return []
 
-        # Паттерн для поиска токенов:
-        # - Число (с опциональными разделителями , и пробелами)
-        # - Затем символ токена (обычно 2-6 заглавных букв)
-        # Примеры: "100 BTC", "10,000 USDT", "1,500,000 SHIB"
-        pattern = r'([\d,]+(?:\.\d+)?)\s*([A-Z]{2,10})(?:\s|$|,|\.|\)|!)'
-
-        matches = re.findall(pattern, text)
+        # Число (с опциональными разделителями ,) и символ токена - см. TOKEN_AMOUNT_PATTERN
+        matches = TOKEN_AMOUNT_PATTERN.findall(text)
 
         if not matches:
             logger.debug(f"🔍 Токены не найдены в тексте: {text[:100]}...")
@@ -195,16 +215,12 @@ class NotificationService:
                 # Убираем запятые и конвертируем в float
                 amount = float(amount_str.replace(',', ''))
 
-                # Получаем цену токена
-                price_usd = None
-                if self.price_fetcher:
-                    price_usd = self.price_fetcher.get_token_price(token_symbol)
-                    if price_usd:
-                        logger.info(f"💰 Найден токен: {amount} {token_symbol} = ${amount * price_usd:,.2f}")
-                    else:
-                        logger.warning(f"⚠️ Цена не найдена для {token_symbol}")
+                # Цена из заранее загруженной карты (см. prefetch_promo_prices)
+                price_usd = self._lookup_price(token_symbol, token_prices)
+                if price_usd:
+                    logger.debug(f"💰 Найден токен: {amount} {token_symbol} = ${amount * price_usd:,.2f}")
                 else:
-                    logger.warning(f"⚠️ Price fetcher недоступен для {token_symbol}")
+                    logger.debug(f"⚠️ Цена не загружена для {token_symbol}")
 
                 results.append((amount, token_symbol, price_usd))
 
@@ -214,6 +230,115 @@ class NotificationService:
 
         return results
 
+    def _lookup_price(self, symbol: str, token_prices: Optional[Dict[str, float]] = None) -> Optional[float]:
+        """
+        Цена токена для форматтеров - без сетевых запросов.
+
+        Сначала готовая карта цен, затем кэш PriceFetcher (его заполняет prefetch).
+        """
+        if not symbol:
+            return None
+        symbol = symbol.upper().strip()
+        if token_prices and token_prices.get(symbol):
+            return token_prices[symbol]
+        if self.price_fetcher:
+            return self.price_fetcher.get_cached_price(symbol)
+        return None
+
+    def _cached_prices(
+        self,
+        symbols,
+        preferred_exchange: Optional[str] = None,
+        wait: bool = False
+    ) -> Dict[str, float]:
+        """
+        Карта цен для синхронных форматтеров страниц.
+
+        wait=False - только кэш, недостающие цены загружаются в фоне и появятся
+        при следующем рендере (форматтер вызван из event loop).
+        wait=True - недостающие цены загружаются сразу одной пачкой
+        (форматтер выполняется в пуле потоков, блокировать можно).
+        """
+        if not self.price_fetcher:
+            return {}
+        if not wait:
+            schedule_price_prefetch(symbols, preferred_exchange)
+            return self.price_fetcher.get_cached_prices(symbols)
+
+        symbols = [symbol for symbol in symbols if symbol and isinstance(symbol, str)]
+        prices = self.price_fetcher.get_cached_prices(symbols)
+        missing = [symbol for symbol in symbols if symbol not in prices]
+        if missing:
+            fetched = self.price_fetcher.get_multiple_prices(
+                sorted({symbol.upper().strip() for symbol in missing}),
+                preferred_exchange,
+                self.price_fetcher.PREFETCH_MAX_WORKERS
+            )
+            # Ключи - как переданы форматтером (get_multiple_prices возвращает в верхнем регистре)
+            for symbol in missing:
+                price = fetched.get(symbol.upper().strip())
+                if price and price > 0:
+                    prices[symbol] = price
+        return prices
+
+    @staticmethod
+    def collect_price_symbols(promos: List[Dict[str, Any]]) -> Dict[str, set]:
+        """
+        Символы токенов, цены которых понадобятся форматтерам.
+
+        Returns:
+            {биржа: {символы}} - биржа используется как предпочтительный источник цены
+        """
+        symbols_by_exchange: Dict[str, set] = {}
+        for promo in promos or []:
+            if not isinstance(promo, dict):
+                continue
+            exchange = str(promo.get('exchange') or '').lower()
+            symbols = symbols_by_exchange.setdefault(exchange, set())
+
+            for field in ('award_token', 'token_symbol'):
+                value = promo.get(field)
+                if isinstance(value, str) and value.strip():
+                    symbols.add(value.strip().upper())
+
+            for field in ('total_prize_pool', 'reward_per_winner', 'award_token'):
+                value = promo.get(field)
+                if value:
+                    symbols.update(symbol for _, symbol in TOKEN_AMOUNT_PATTERN.findall(str(value)))
+
+            # MEXC launchpad: токен в raw_data
+            raw_data = promo.get('raw_data')
+            if isinstance(raw_data, str):
+                try:
+                    raw_data = json.loads(raw_data)
+                except (TypeError, ValueError):
+                    raw_data = None
+            if isinstance(raw_data, dict) and isinstance(raw_data.get('activityCoin'), str):
+                symbols.add(raw_data['activityCoin'].upper())
+
+        return {exchange: symbols for exchange, symbols in symbols_by_exchange.items() if symbols}
+
+    async def prefetch_promo_prices(self, promos: List[Dict[str, Any]]) -> Dict[str, float]:
+        """
+        Загрузить цены для промоакций одной параллельной пачкой до рендера.
+
+        Форматтеры после этого берут цены из карты/кэша и не блокируют event loop.
+        """
+        if not self.price_fetcher or not promos:
+            return {}
+
+        groups = self.collect_price_symbols(promos)
+        results = await asyncio.gather(
+            *(prefetch_prices(symbols, exchange or None) for exchange, symbols in groups.items()),
+            return_exceptions=True
+        )
+
+        token_prices: Dict[str, float] = {}
+        for result in results:
+            if isinstance(result, dict):
+                token_prices.update(result)
+        return token_prices
+
     def format_token_value(self, amount: float, token_symbol: str, price_usd: Optional[float]) -> str:
         """
         Форматирует значение токена с опциональной ценой в USD
@@ -343,7 +468,7 @@ class NotificationService:
                             message += f"<b>💰 Призовой фонд:</b> {formatted_value}\n"
                         else:
                             # Пробуем получить цену отдельно для токена
-                            price_usd = self.get_token_price(token_symbol)
+                            price_usd = self._lookup_price(token_symbol)
                             try:
                                 amount = float(str(prize_amount).replace(',', '').replace(' ', ''))
                                 formatted_value = self.format_token_value(amount, token_symbol, price_usd)
@@ -432,16 +557,139 @@ class NotificationService:
             logger.error(f"❌ Ошибка форматирования сообщения: {e}")
             return f"🎉 <b>Новая промоакция!</b>\n\nБиржа: {promo.get('exchange', 'Unknown')}\nID: {promo.get('promo_id', 'unknown')}"
 
+    async def _send_message(self, chat_id: int, text: str, **kwargs):
+        """Отправка через общую очередь с лимитами Telegram (см. utils/send_queue.py)"""
+        kwargs.setdefault('parse_mode', "HTML")
+        kwargs.setdefault('disable_web_page_preview', True)
+        return await get_send_queue().send(self.bot, chat_id, text, **kwargs)
+
+    async def send_rendered(self, chat_id: int, chunks: List[str]):
+        """
+        Отправляет готовые части сообщений по порядку.
+
+        В отличие от send_bulk_notifications не глотает ошибки -
+        вызывающий (outbox) сам решает, повторять ли отправку.
+        """
+        for chunk in chunks:
+            await self._send_message(chat_id, chunk)
+
+    @staticmethod
+    def split_message_chunks(message: str, limit: int = TELEGRAM_MESSAGE_LIMIT) -> List[str]:
+        """Разбивает сообщение на части не длиннее limit по границам строк"""
+        if len(message) <= limit:
+            return [message]
+
+        chunks = []
+        current = ""
+        for line in message.split('\n'):
+            # Строка длиннее лимита - режем принудительно
+            while len(line) > limit:
+                if current:
+                    chunks.append(current)
+                    current = ""
+                chunks.append(line[:limit])
+                line = line[limit:]
+
+            candidate = f"{current}\n{line}" if current else line
+            if len(candidate) > limit:
+                chunks.append(current)
+                current = line
+            else:
+                current = candidate
+
+        if current:
+            chunks.append(current)
+        return chunks
+
+    @staticmethod
+    def _content_hash(data: Any) -> Optional[str]:
+        """Хэш содержимого промо для ключа кэша рендера (None - не кэшировать)"""
+        try:
+            payload = json.dumps(data, sort_keys=True, ensure_ascii=False, default=str)
+        except (TypeError, ValueError):
+            return None
+        return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+    def _price_symbols(self, data: Any) -> set:
+        """Все символы промо (или списка промо), цены которых нужны форматтерам"""
+        promos = data if isinstance(data, list) else [data]
+        symbols = set()
+        for group in self.collect_price_symbols(promos).values():
+            symbols.update(group)
+        return symbols
+
+    def _priced_symbols(self, data: Any) -> List[str]:
+        """Символы промо, цены которых уже есть в кэше (часть ключа кэша рендера)"""
+        if not self.price_fetcher:
+            return []
+        return sorted(symbol for symbol in self._price_symbols(data) if self.price_fetcher.get_cached_price(symbol))
+
+    def missing_price_symbols(self, promos: List[Dict[str, Any]]) -> List[str]:
+        """Символы промо без цены в кэше (такой рендер не стоит кэшировать)"""
+        if not self.price_fetcher:
+            return []
+        return sorted(symbol for symbol in self._price_symbols(promos) if not self.price_fetcher.get_cached_price(symbol))
+
+    def _render_cached(self, variant: str, data: Any, render) -> List[str]:
+        """
+        Рендерит сообщение один раз на содержимое и вариант шаблона.
+
+        Результат (уже разбитый на части по 4096) переиспользуется для всех
+        получателей и повторных отправок того же содержимого в течение TTL.
+        В ключе - символы с загруженной ценой: рендер без цен (prefetch не
+        уложился в таймаут) не переиспользуется после их загрузки.
+        """
+        digest = self._content_hash([data, self._priced_symbols(data)])
+        if not digest or not config.CACHE_ENABLED:
+            return render()
+
+        cache = get_cache_manager()
+        key = CacheKeys.rendered_message(variant, digest)
+        chunks = cache.get(key)
+        if chunks is None:
+            chunks = render()
+            cache.set(key, chunks, ttl=config.CACHE_RENDERED_TTL)
+        return chunks
+
+    def render_promo_notification(self, promo: Dict[str, Any]) -> List[str]:
+        """Части сообщения о новой промоакции (кэшируется по содержимому)"""
+        return self._render_cached(
+            'promo', promo,
+            lambda: self.split_message_chunks(self.format_promo_message(promo))
+        )
+
+    def render_bulk_notifications(self, promos: List[Dict[str, Any]]) -> List[str]:
+        """
+        Все части сообщений для send_bulk_notifications
+
+        - <= 5 промоакций: по сообщению на каждую
+        - > 5 промоакций: компактный список (разбитый на части)
+        """
+        if not promos:
+            return []
+
+        if len(promos) <= 5:
+            chunks = []
+            for promo in promos:
+                chunks.extend(self.render_promo_notification(promo))
+            return chunks
+
+        def render_compact() -> List[str]:
+            message = self.format_compact_promo_list(promos)
+            if len(message) > TELEGRAM_MESSAGE_LIMIT:
+                logger.warning(f"⚠️ Сообщение слишком длинное ({len(message)} символов), разбиваем")
+                parts = self._split_long_message(message, promos)
+                return [chunk for part in parts for chunk in self.split_message_chunks(part)]
+            return [message]
+
+        return self._render_cached('compact', promos, render_compact)
+
     async def send_promo_notification(self, chat_id: int, promo: Dict[str, Any]):
         """Отправляет уведомление о новой промоакции"""
         try:
-            message = self.format_promo_message(promo)
-            await self.bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode="HTML",
-                disable_web_page_preview=True
-            )
+            await self.prefetch_promo_prices([promo])
+            for chunk in self.render_promo_notification(promo):
+                await self._send_message(chat_id, chunk)
             logger.info(f"📤 Уведомление отправлено в чат {chat_id} - {promo.get('promo_id')}")
 
         except Exception as e:
@@ -491,12 +739,7 @@ class NotificationService:
         """Отправляет уведомление об изменении названия промоакции"""
         try:
             message = self.format_title_change_notification(change)
-            await self.bot.send_message(
-                chat_id=chat_id,
-                text=message,
-                parse_mode="HTML",
-                disable_web_page_preview=True
-            )
+            await self._send_message(chat_id, message)
             logger.info(f"📤 Уведомление об изменении названия отправлено в чат {chat_id}")
         except Exception as e:
             logger.error(f"❌ Ошибка отправки уведомления об изменении названия: {e}")
@@ -549,58 +792,44 @@ class NotificationService:
             logger.error(f"❌ Ошибка форматирования списка: {e}")
             return f"🎉 Найдено {len(promos)} новых промоакций!"
 
-    async def send_bulk_notifications(self, chat_id: int, promos: List[Dict[str, Any]]):
+    async def send_bulk_notifications(
+        self,
+        chat_id: int,
+        promos: List[Dict[str, Any]],
+        rendered: Optional[List[str]] = None
+    ):
         """Отправляет уведомления о нескольких промоакциях
 
         Логика:
         - Если <= 5 промоакций: отправляем по отдельности (детальная информация)
         - Если > 5 промоакций: объединяем в одно сообщение (компактный список)
+
+        Args:
+            rendered: Готовые части из render_bulk_notifications - при рассылке
+                нескольким получателям рендерим один раз и передаем сюда
         """
         if not promos:
             return
 
         logger.info(f"📨 Отправка {len(promos)} уведомлений в чат {chat_id}")
 
-        # Если промоакций много (больше 5), отправляем одним сообщением
-        if len(promos) > 5:
-            logger.info(f"📦 Объединяем {len(promos)} промоакций в одно сообщение")
+        if rendered is None:
+            await self.prefetch_promo_prices(promos)
+            rendered = self.render_bulk_notifications(promos)
+
+        # Паузы между сообщениями выдерживает очередь отправки (лимит на чат)
+        sent = 0
+        for chunk in rendered:
             try:
-                message = self.format_compact_promo_list(promos)
-
-                # Telegram ограничение: 4096 символов
-                if len(message) > 4096:
-                    logger.warning(f"⚠️ Сообщение слишком длинное ({len(message)} символов), разбиваем")
-                    # Разбиваем на части
-                    parts = self._split_long_message(message, promos)
-                    for part in parts:
-                        await self.bot.send_message(
-                            chat_id=chat_id,
-                            text=part,
-                            parse_mode="HTML",
-                            disable_web_page_preview=True
-                        )
-                        import asyncio
-                        await asyncio.sleep(0.5)
-                else:
-                    await self.bot.send_message(
-                        chat_id=chat_id,
-                        text=message,
-                        parse_mode="HTML",
-                        disable_web_page_preview=True
-                    )
-
-                logger.info(f"✅ Отправлено объединенное уведомление с {len(promos)} промоакциями")
+                await self._send_message(chat_id, chunk)
+                sent += 1
             except Exception as e:
-                logger.error(f"❌ Ошибка отправки объединенного сообщения: {e}")
+                logger.error(f"❌ Ошибка отправки уведомления в чат {chat_id}: {e}")
+
+        if len(promos) > 5:
+            logger.info(f"✅ Отправлено объединенное уведомление с {len(promos)} промоакциями")
         else:
-            # Если промоакций мало (≤5), отправляем по отдельности с полной информацией
-            logger.info(f"📤 Отправляем {len(promos)} промоакций по отдельности")
-            for i, promo in enumerate(promos, 1):
-                await self.send_promo_notification(chat_id, promo)
-                # Небольшая задержка между сообщениями чтобы не спамить
-                if i < len(promos):
-                    import asyncio
-                    await asyncio.sleep(0.5)
+            logger.info(f"📤 Отправлено {sent}/{len(rendered)} сообщений о промоакциях в чат {chat_id}")
 
     def _split_long_message(self, message: str, promos: List[Dict[str, Any]]) -> List[str]:
         """Разбивает длинное сообщение на части по 4000 символов"""
@@ -3353,7 +3582,8 @@ class NotificationService:
         promos: List[Dict],
         page: int,
         total_pages: int,
-        page_url: str = None
+        page_url: str = None,
+        token_prices: Optional[Dict[str, float]] = None
     ) -> str:
         """
         Форматирует страницу MEXC Launchpad (IEO/IDO) - покупка токенов со скидкой
@@ -3379,6 +3609,7 @@ class NotificationService:
             page: Номер страницы
             total_pages: Всего страниц
             page_url: URL страницы
+            token_prices: Цены токенов из prefetch_promo_prices (без них - только кэш)
         """
         try:
             from datetime import datetime
@@ -3475,15 +3706,10 @@ class NotificationService:
                 price_source = None
                 
                 if token:
-                    try:
-                        from utils.price_fetcher import get_price_fetcher
-                        price_fetcher = get_price_fetcher()
-                        real_market_price = price_fetcher.get_token_price(token)
-                        if real_market_price:
-                            price_source = "real"
-                            logger.debug(f"💰 {token}: реальная цена ${real_market_price:.6f}")
-                    except Exception as e:
-                        logger.debug(f"⚠️ PriceFetcher недоступен для {token}: {e}")
+                    real_market_price = self._lookup_price(token, token_prices)
+                    if real_market_price:
+                        price_source = "real"
+                        logger.debug(f"💰 {token}: реальная цена ${real_market_price:.6f}")
                 
                 # Fallback на цену биржи
                 taking_coins = raw_data.get('launchpadTakingCoins', [])
@@ -3881,25 +4107,15 @@ class NotificationService:
                     
                     return message
                 
-                # Получаем цены токенов
+                # Получаем цены токенов одной параллельной пачкой (вне event loop)
                 token_prices = {}
-                try:
-                    if self.price_fetcher:
-                        tokens_to_fetch = set()
-                        for project in projects:
-                            tokens_to_fetch.add(project.token_symbol)
-                            for pool in project.pools:
-                                tokens_to_fetch.add(pool.stake_coin)
-                        
-                        for token in tokens_to_fetch:
-                            try:
-                                price = self.price_fetcher.get_token_price(token, parser.EXCHANGE_NAME.lower())
-                                if price and price > 0:
-                                    token_prices[token] = price
-                            except:
-                                pass
-                except Exception as price_err:
-                    logger.warning(f"⚠️ Ошибка получения цен: {price_err}")
+                if self.price_fetcher:
+                    tokens_to_fetch = set()
+                    for project in projects:
+                        tokens_to_fetch.add(project.token_symbol)
+                        for pool in project.pools:
+                            tokens_to_fetch.add(pool.stake_coin)
+                    token_prices = await prefetch_prices(tokens_to_fetch, parser.EXCHANGE_NAME.lower())
                 
                 # Форматируем каждый проект
                 for idx, project in enumerate(projects):
@@ -4029,7 +4245,8 @@ class NotificationService:
         total_pages: int,
         page_url: str = None,
         special_parser: str = None,
-        exchange_name: str = None
+        exchange_name: str = None,
+        wait_prices: bool = False
     ) -> str:
         """
         Универсальный форматтер для всех Launchpool парсеров (Bybit, MEXC, Gate, etc.)
@@ -4041,6 +4258,7 @@ class NotificationService:
             page_url: URL страницы
             special_parser: Тип парсера (bybit_launchpool, mexc_launchpool, etc.)
             exchange_name: Название биржи для отображения
+            wait_prices: Загрузить недостающие цены до рендера (вызов из пула потоков)
         """
         try:
             from datetime import datetime
@@ -4158,26 +4376,13 @@ class NotificationService:
                     
                     return message
                 
-                # Получаем цены токенов
-                token_prices = {}
-                try:
-                    if self.price_fetcher:
-                        tokens_to_fetch = set()
-                        for project in projects:
-                            tokens_to_fetch.add(project.token_symbol)
-                            for pool in project.pools:
-                                tokens_to_fetch.add(pool.stake_coin)
-                        
-                        for token in tokens_to_fetch:
-                            try:
-                                # Используем exchange из парсера
-                                price = self.price_fetcher.get_token_price(token, parser.EXCHANGE_NAME.lower())
-                                if price and price > 0:
-                                    token_prices[token] = price
-                            except:
-                                pass
-                except Exception as price_err:
-                    logger.warning(f"⚠️ Ошибка получения цен: {price_err}")
+                # Цены токенов: из кэша, недостающие - сразу (wait_prices) или в фоне
+                tokens_to_fetch = set()
+                for project in projects:
+                    tokens_to_fetch.add(project.token_symbol)
+                    for pool in project.pools:
+                        tokens_to_fetch.add(pool.stake_coin)
+                token_prices = self._cached_prices(tokens_to_fetch, parser.EXCHANGE_NAME.lower(), wait=wait_prices)
                 
                 # Форматируем каждый проект
                 for idx, project in enumerate(projects):
@@ -4308,10 +4513,13 @@ class NotificationService:
         promos: List[Dict],
         page: int,
         total_pages: int,
-        page_url: str = None
+        page_url: str = None,
+        wait_prices: bool = False
     ) -> str:
         """
         Форматирует страницу Bybit Launchpool с USD эквивалентами
+
+        wait_prices - загрузить недостающие цены до рендера (вызов из пула потоков)
         """
         try:
             from parsers.bybit_launchpool_parser import BybitLaunchpoolParser
@@ -4358,27 +4566,13 @@ class NotificationService:
                     message += "📭 <i>Нет активных launchpool проектов</i>\n"
                     return message
                 
-                # Получаем цены токенов
-                token_prices = {}
-                try:
-                    if self.price_fetcher:
-                        # Собираем все токены для запроса цен
-                        tokens_to_fetch = set()
-                        for project in projects:
-                            tokens_to_fetch.add(project.token_symbol)
-                            for pool in project.pools:
-                                tokens_to_fetch.add(pool.stake_coin)
-                        
-                        # Получаем цены
-                        for token in tokens_to_fetch:
-                            try:
-                                price = self.price_fetcher.get_token_price(token, 'bybit')
-                                if price and price > 0:
-                                    token_prices[token] = price
-                            except:
-                                pass
-                except Exception as price_err:
-                    logger.warning(f"⚠️ Ошибка получения цен: {price_err}")
+                # Цены токенов: из кэша, недостающие - сразу (wait_prices) или в фоне
+                tokens_to_fetch = set()
+                for project in projects:
+                    tokens_to_fetch.add(project.token_symbol)
+                    for pool in project.pools:
+                        tokens_to_fetch.add(pool.stake_coin)
+                token_prices = self._cached_prices(tokens_to_fetch, 'bybit', wait=wait_prices)
                 
                 # Форматируем каждый проект
                 for idx, project in enumerate(projects):
@@ -4,7 +4,8 @@ import time
 import re
 from typing import List, Dict, Any, Optional
 from datetime import datetime
-from data.database import get_db, get_db_session, PromoHistory, ApiLink
+import config
+from data.database import get_db, get_db_session, sqlite_transaction, PromoHistory, ApiLink
 from parsers.universal_fallback_parser import UniversalFallbackParser
 from parsers.staking_parser import StakingParser
 from parsers.announcement_parser import AnnouncementParser
@@ -475,8 +476,13 @@ class ParserService:
             logger.error(f"❌ Ошибка в _check_weex_useragent: {e}", exc_info=True)
             return None
 
-    def check_for_new_promos(self, link_id: int, url: str) -> List[Dict[str, Any]]:
-        """Проверяет новые промоакции для указанной ссылки"""
+    def check_for_new_promos(self, link_id: int, url: str, recipients: List[int] = None) -> List[Dict[str, Any]]:
+        """
+        Проверяет новые промоакции для указанной ссылки
+
+        recipients - получатели уведомлений в outbox (по умолчанию все;
+        ручная проверка передает только инициатора)
+        """
         self.stats['total_checks'] += 1
         self.stats['last_check_time'] = time.time()
 
@@ -557,7 +563,7 @@ class ParserService:
 
                 # Сохраняем новые промоакции
                 logger.info(f"💾 Сохранение {len(new_promos)} новых промоакций в базу данных...")
-                saved_count = self._save_to_history(link_id, new_promos)
+                saved_count = self._save_to_history(link_id, new_promos, recipients)
                 self.stats['new_promos_found'] += saved_count
                 self.stats['successful_checks'] += 1
 
@@ -721,6 +727,9 @@ class ParserService:
                 if title_changes:
                     logger.info(f"   📝 Изменений названий: {len(title_changes)}")
 
+                # Обновлённые и удалённые промо пересчитываются в рейтинге ТОП
+                _mark_top_activity_dirty(promo_ids=list(current_promo_ids & all_existing_promo_ids) + list(outdated_ids))
+
                 return new_promos, title_changes
 
         except Exception as e:
@@ -1152,12 +1161,14 @@ class ParserService:
             logger.debug(f"⚠️ Ошибка расчёта USD для {amount} {token}: {e}")
             return None
     
-    def _save_to_history(self, link_id: int, promotions: List[Dict]) -> int:
-        """Сохраняет промоакции в историю с валидацией"""
+    def _save_to_history(self, link_id: int, promotions: List[Dict], recipients: List[int] = None) -> int:
+        """Сохраняет промоакции в историю с валидацией (recipients - получатели в outbox)"""
         saved_count = 0
+        saved_promos = []
 
         try:
-            with get_db_session() as db:
+            # Отдельная транзакция: история и outbox записываются атомарно
+            with sqlite_transaction() as db:
                 for promo in promotions:
                     try:
                         # Валидация перед сохранением
@@ -1220,15 +1231,25 @@ class ParserService:
                             raw_data=self._serialize_raw_data(promo.get('raw_data'))
                         )
                         db.add(history_item)
+                        saved_promos.append(promo)
                         saved_count += 1
 
                     except Exception as e:
                         logger.error(f"❌ Ошибка сохранения промоакции {promo.get('title')}: {e}")
                         continue
 
+                # Уведомления пишем в outbox той же транзакцией, что и историю:
+                # промо не может оказаться "просмотренным" без уведомления
+                if saved_promos and config.OUTBOX_ENABLED:
+                    from services.notification_outbox_service import enqueue_promos
+                    enqueue_promos(db, saved_promos, recipients)
+
                 # Явный commit для уверенности
                 db.commit()
                 logger.info(f"💾 Успешно сохранено {saved_count} промоакций")
+
+                # Обновляем рейтинг ТОП активностей (новые и обновлённые промо)
+                _mark_top_activity_dirty(promo_ids=[p.get('promo_id') for p in promotions])
                 
                 # Записываем историю участников для отслеживания изменений
                 try:
@@ -1571,7 +1592,9 @@ class ParserService:
                 'changed': bool,
                 'message': str,
                 'matched_content': str,
-                'strategy': str
+                'strategy': str,
+                'url': str,
+                'announcement_links': list  # Новые анонсы (или найденные по ключевым словам)
             }
         """
         try:
@@ -1630,7 +1653,17 @@ class ParserService:
                     return None
 
                 # Создаем парсер анонсов
-                parser = AnnouncementParser(url)
+                parser = AnnouncementParser(url, html_parser=config.ANNOUNCEMENT_HTML_PARSER)
+
+                # Для any_change/element_change - отпечатки уже замеченных анонсов
+                item_diff = (
+                    config.ANNOUNCEMENT_ITEM_DIFF_ENABLED
+                    and strategy in ('any_change', 'element_change')
+                )
+                known_items = None
+                if item_diff:
+                    from services.announcement_items import load_known_items
+                    known_items = load_known_items(db, link_id)
 
                 # Выполняем парсинг
                 logger.info(f"📡 Запуск парсинга анонсов...")
@@ -1640,7 +1673,9 @@ class ParserService:
                     keywords=keywords,
                     regex_pattern=regex_pattern,
                     css_selector=css_selector,
-                    use_browser=use_browser  # КРИТИЧНО: передаем флаг браузерного парсинга
+                    use_browser=use_browser,  # КРИТИЧНО: передаем флаг браузерного парсинга
+                    item_diff=item_diff,
+                    known_items=known_items
                 )
 
                 logger.info(f"📦 Результат парсинга:")
@@ -1652,6 +1687,9 @@ class ParserService:
                 # Обновляем последний снимок и время проверки в БД
                 link.announcement_last_snapshot = result['new_snapshot']
                 link.announcement_last_check = datetime.utcnow()
+                if result.get('items'):
+                    from services.announcement_items import save_announcement_items
+                    save_announcement_items(db, link_id, result['items'])
                 db.commit()
 
                 logger.info(f"✅ Снимок обновлен и сохранен в БД")
@@ -1664,7 +1702,8 @@ class ParserService:
                         'message': result['message'],
                         'matched_content': result['matched_content'],
                         'strategy': strategy,
-                        'url': url
+                        'url': url,
+                        'announcement_links': result.get('announcement_links', [])
                     }
                 else:
                     logger.info(f"ℹ️ Изменений не обнаружено")
@@ -1677,6 +1716,63 @@ class ParserService:
 
 # ========== ФУНКЦИИ ДЛЯ СТЕЙКИНГОВ ==========
 
+def _mark_top_activity_dirty(staking_ids: List[int] = None, promo_ids: List[str] = None) -> None:
+    """Помечает записи для пересчета в рейтинге ТОП активностей"""
+    try:
+        from services.top_activity_service import get_top_activity_service
+        leaderboard = get_top_activity_service().leaderboard
+        if staking_ids:
+            leaderboard.mark_stakings_dirty(staking_ids)
+        if promo_ids:
+            leaderboard.mark_promos_dirty(promo_ids)
+    except Exception as e:
+        logger.debug(f"⚠️ Не удалось обновить рейтинг ТОП: {e}")
+
+
+def _has_staking_changes(record, ignored=('last_updated',)) -> bool:
+    """Есть ли у записи реальные изменения полей (до flush; служебные поля не считаются)"""
+    from sqlalchemy import inspect as sa_inspect
+    return any(
+        attr.history.has_changes()
+        for attr in sa_inspect(record).attrs
+        if attr.key not in ignored
+    )
+
+
+def _load_existing_stakings(session, stakings: List[Dict[str, Any]]) -> Dict[tuple, Any]:
+    """
+    Загружает существующие записи StakingHistory для пачки стейкингов
+
+    Вместо запроса на каждый стейкинг - один запрос на биржу
+    (product_id запрашиваются частями из-за лимита параметров SQLite).
+
+    Returns:
+        Словарь {(exchange, product_id): StakingHistory}
+    """
+    from data.models import StakingHistory
+
+    product_ids_by_exchange: Dict[str, set] = {}
+    for staking in stakings:
+        exchange = staking.get('exchange')
+        product_id = staking.get('product_id')
+        if exchange and product_id:
+            product_ids_by_exchange.setdefault(exchange, set()).add(product_id)
+
+    existing_by_key = {}
+    for exchange, product_ids in product_ids_by_exchange.items():
+        product_ids = list(product_ids)
+        for i in range(0, len(product_ids), 500):
+            rows = session.query(StakingHistory).filter(
+                StakingHistory.exchange == exchange,
+                StakingHistory.product_id.in_(product_ids[i:i + 500])
+            ).all()
+            for row in rows:
+                existing_by_key[(row.exchange, row.product_id)] = row
+
+    logger.debug(f"📥 Загружено {len(existing_by_key)} существующих стейкингов для сверки")
+    return existing_by_key
+
+
 def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = None, min_apr: float = None) -> List[Dict[str, Any]]:
     """
     Проверяет стейкинги на новизну и сохраняет новые в БД
@@ -1713,6 +1809,11 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
             if link_id:
                 api_link = session.query(ApiLink).filter(ApiLink.id == link_id).first()
 
+            # RECONCILE: загружаем все существующие записи одним запросом и сравниваем в памяти
+            existing_by_key = _load_existing_stakings(session, stakings)
+            snapshot_candidates = []  # Записи, для которых нужен снимок
+            pending_db_ids = []  # (staking, record) - ID станет известен после flush
+
             for staking in stakings:
                 exchange = staking.get('exchange')
                 product_id = staking.get('product_id')
@@ -1721,11 +1822,8 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
                     logger.warning(f"⚠️ Пропуск стейкинга: отсутствует exchange или product_id")
                     continue
 
-                # Проверяем, есть ли уже в БД
-                existing = session.query(StakingHistory).filter(
-                    StakingHistory.exchange == exchange,
-                    StakingHistory.product_id == product_id
-                ).first()
+                # Проверяем, есть ли уже в БД (или уже добавлен в этой пачке)
+                existing = existing_by_key.get((exchange, product_id))
 
                 if existing:
                     # Стейкинг уже есть, обновляем данные
@@ -1787,7 +1885,7 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
                                 staking['_should_notify'] = True
                                 staking['_notification_type'] = stability_result['notification_type']
                                 staking['_notification_reason'] = stability_result['reason']
-                                staking['_staking_db_id'] = existing.id  # Сохраняем ID для mark_notification_sent
+                                pending_db_ids.append((staking, existing))  # ID для mark_notification_sent
                                 staking['_lock_type'] = existing.lock_type  # Тип блокировки
 
                                 # Дополнительные данные для форматирования уведомлений
@@ -1810,11 +1908,8 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
 
                     logger.debug(f"🔄 Обновлён стейкинг: {exchange} {staking.get('coin')} - {product_id}")
 
-                    # Синхронизируем изменения перед созданием снимка (без commit)
-                    session.flush()
-
-                    # Создаем снимок (если прошло >= 1 час)
-                    snapshot_service.create_snapshot(existing)
+                    # Снимок создается пачкой после цикла (если прошло >= 1 час)
+                    snapshot_candidates.append(existing)
 
                 else:
                     # Новый стейкинг!
@@ -1892,9 +1987,7 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
                     )
 
                     session.add(new_staking_record)
-
-                    # Синхронизируем чтобы получить ID (без commit)
-                    session.flush()
+                    existing_by_key[(exchange, product_id)] = new_staking_record
 
                     # Проверяем готовность к уведомлению
                     should_notify_now = False
@@ -1932,7 +2025,7 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
                         staking['_should_notify'] = True
                         staking['_notification_type'] = notification_type
                         staking['_lock_type'] = lock_type
-                        staking['_staking_db_id'] = new_staking_record.id  # Сохраняем ID для mark_notification_sent
+                        pending_db_ids.append((staking, new_staking_record))  # ID для mark_notification_sent
 
                         # Дополнительные данные для форматирования уведомлений
                         if lock_type == 'Flexible' and api_link:
@@ -1950,13 +2043,34 @@ def check_and_save_new_stakings(stakings: List[Dict[str, Any]], link_id: int = N
                             f"APR={apr}%, passes_filter={passes_filter}, should_notify={should_notify_now}, lock={lock_type}"
                         )
 
-                    # Создаем первый снимок для нового стейкинга
-                    snapshot_service.create_snapshot(new_staking_record)
+                    # Первый снимок для нового стейкинга создается пачкой после цикла
+                    snapshot_candidates.append(new_staking_record)
+
+            # Новые и реально изменённые записи - для пересчета рейтинга ТОП
+            changed_records = [
+                record for record in existing_by_key.values()
+                if record in session.new or _has_staking_changes(record)
+            ]
+
+            # Один flush на всю пачку: INSERT новых и UPDATE изменённых записей
+            session.flush()
+
+            for staking, record in pending_db_ids:
+                staking['_staking_db_id'] = record.id
+
+            # ID читаются до commit (после commit каждое обращение - отдельный SELECT)
+            changed_staking_ids = [record.id for record in changed_records]
+
+            # Снимки - одним bulk INSERT в той же транзакции
+            snapshot_service.create_snapshots_bulk(session, snapshot_candidates)
 
             # КРИТИЧНО: Один финальный commit в конце транзакции
             session.commit()
             logger.debug("✅ Транзакция успешно завершена")
 
+            # Обновляем рейтинг ТОП активностей (пересчет только изменённых записей)
+            _mark_top_activity_dirty(staking_ids=changed_staking_ids)
+
         except Exception as e:
             logger.error(f"❌ Ошибка в транзакции БД: {e}", exc_info=True)
             session.rollback()
@@ -80,6 +80,15 @@ DEFAULT_CHECK_INTERVAL = int(os.getenv('DEFAULT_CHECK_INTERVAL', '300'))
 MAX_CHECK_INTERVAL = int(os.getenv('MAX_CHECK_INTERVAL', '86400'))
 MIN_CHECK_INTERVAL = int(os.getenv('MIN_CHECK_INTERVAL', '60'))
 
+# =============================================================================
+# ANNOUNCEMENT PARSING CONFIGURATION (страницы анонсов)
+# =============================================================================
+ANNOUNCEMENT_HTML_PARSER = os.getenv('ANNOUNCEMENT_HTML_PARSER', 'auto')  # auto (lxml, если установлен) / lxml / html.parser
+ANNOUNCEMENT_FETCH_CACHE_TTL = float(os.getenv('ANNOUNCEMENT_FETCH_CACHE_TTL', '60'))  # сек, общая загрузка страницы для ссылок на один URL (0 - выкл)
+ANNOUNCEMENT_FETCH_CACHE_SIZE = int(os.getenv('ANNOUNCEMENT_FETCH_CACHE_SIZE', '20'))  # Разобранных страниц в памяти
+ANNOUNCEMENT_ITEM_DIFF_ENABLED = os.getenv('ANNOUNCEMENT_ITEM_DIFF_ENABLED', 'true').lower() == 'true'  # any_change/element_change: уведомлять только о новых анонсах
+ANNOUNCEMENT_ITEMS_KEEP = int(os.getenv('ANNOUNCEMENT_ITEMS_KEEP', '500'))  # Отпечатков анонсов на ссылку (старые удаляются)
+
 # =============================================================================
 # STAKING CONFIGURATION
 # =============================================================================
@@ -87,6 +96,9 @@ MIN_CHECK_INTERVAL = int(os.getenv('MIN_CHECK_INTERVAL', '60'))
 # Стейкинги с заполненностью выше этого порога не будут показываться
 MAX_POOL_FILL_PERCENTAGE = float(os.getenv('MAX_POOL_FILL_PERCENTAGE', '90.0'))
 
+# Максимум записей в in-memory карте времени последних снимков (staking_history_id -> время)
+SNAPSHOT_THROTTLE_MAX_SIZE = int(os.getenv('SNAPSHOT_THROTTLE_MAX_SIZE', '20000'))
+
 # =============================================================================
 # LOGGING CONFIGURATION
 # =============================================================================
@@ -97,6 +109,31 @@ LOG_FILE_PATH = os.getenv('LOG_FILE_PATH', 'logs/bot.log')
 LOG_MAX_SIZE_MB = int(os.getenv('LOG_MAX_SIZE_MB', '10'))  # Ротация при 10MB
 LOG_BACKUP_COUNT = int(os.getenv('LOG_BACKUP_COUNT', '5'))  # Хранить 5 старых файлов
 
+# =============================================================================
+# RETENTION CONFIGURATION (очистка и компактизация растущих таблиц)
+# =============================================================================
+RETENTION_ENABLED = os.getenv('RETENTION_ENABLED', 'true').lower() == 'true'
+RETENTION_INTERVAL_HOURS = float(os.getenv('RETENTION_INTERVAL_HOURS', '6'))  # Как часто запускать
+RETENTION_CHUNK_SIZE = int(os.getenv('RETENTION_CHUNK_SIZE', '500'))  # Строк на одну транзакцию удаления
+RETENTION_CHUNK_PAUSE = float(os.getenv('RETENTION_CHUNK_PAUSE', '0.05'))  # Пауза между пачками (сек)
+RETENTION_STAKING_SNAPSHOTS_DAYS = int(os.getenv('RETENTION_STAKING_SNAPSHOTS_DAYS', '30'))
+RETENTION_SNAPSHOT_DOWNSAMPLE_AFTER_DAYS = int(os.getenv('RETENTION_SNAPSHOT_DOWNSAMPLE_AFTER_DAYS', '3'))  # Старше - 1 снимок в день
+RETENTION_PARTICIPANTS_DAYS = int(os.getenv('RETENTION_PARTICIPANTS_DAYS', '7'))
+RETENTION_TELEGRAM_MESSAGES_DAYS = int(os.getenv('RETENTION_TELEGRAM_MESSAGES_DAYS', '30'))
+RETENTION_ROTATION_STATS_DAYS = int(os.getenv('RETENTION_ROTATION_STATS_DAYS', '30'))
+RETENTION_OUTBOX_DAYS = int(os.getenv('RETENTION_OUTBOX_DAYS', '7'))  # Отправленные/failed строки outbox
+RETENTION_INCREMENTAL_VACUUM_PAGES = int(os.getenv('RETENTION_INCREMENTAL_VACUUM_PAGES', '2000'))  # Страниц за запуск
+
+# =============================================================================
+# RAW DATA COMPRESSION (сжатие PromoHistory.raw_data)
+# =============================================================================
+RAW_DATA_COMPRESSION_ENABLED = os.getenv('RAW_DATA_COMPRESSION_ENABLED', 'true').lower() == 'true'
+RAW_DATA_COMPRESS_MIN_BYTES = int(os.getenv('RAW_DATA_COMPRESS_MIN_BYTES', '256'))  # Меньше - храним текстом
+RAW_DATA_COMPRESSION_LEVEL = int(os.getenv('RAW_DATA_COMPRESSION_LEVEL', '6'))  # Уровень zlib (1-9)
+RAW_DATA_MIGRATION_CHUNK_SIZE = int(os.getenv('RAW_DATA_MIGRATION_CHUNK_SIZE', '200'))  # Строк на транзакцию
+RAW_DATA_MIGRATION_PAUSE = float(os.getenv('RAW_DATA_MIGRATION_PAUSE', '0.05'))  # Пауза между пачками (сек)
+RAW_DATA_MIGRATION_DELAY = int(os.getenv('RAW_DATA_MIGRATION_DELAY', '120'))  # Старт через N сек после запуска бота
+
 # =============================================================================
 # EXECUTOR CONFIGURATION (для параллельного парсинга)
 # =============================================================================
@@ -125,6 +162,39 @@ CACHE_DEFAULT_TTL = float(os.getenv('CACHE_DEFAULT_TTL', '30.0'))  # TTL по у
 CACHE_LINKS_TTL = float(os.getenv('CACHE_LINKS_TTL', '30.0'))  # TTL для списка ссылок
 CACHE_PROMOS_TTL = float(os.getenv('CACHE_PROMOS_TTL', '60.0'))  # TTL для промоакций
 CACHE_STAKINGS_TTL = float(os.getenv('CACHE_STAKINGS_TTL', '60.0'))  # TTL для стейкингов
+CACHE_RENDERED_TTL = float(os.getenv('CACHE_RENDERED_TTL', '300.0'))  # TTL для отрендеренных уведомлений
+CACHE_PAGES_ENABLED = os.getenv('CACHE_PAGES_ENABLED', 'true').lower() == 'true'  # Кэш страниц стейкингов/промо
+CACHE_PAGES_TTL = float(os.getenv('CACHE_PAGES_TTL', '120.0'))  # TTL страницы (ограничивает устаревание "осталось N дней")
+
+# =============================================================================
+# USER STATE CONFIGURATION (состояние пользователей в обработчиках и FSM)
+# =============================================================================
+USER_STATE_MAX_USERS = int(os.getenv('USER_STATE_MAX_USERS', '1000'))  # Пользователей в каждом хранилище (LRU)
+USER_STATE_TTL = float(os.getenv('USER_STATE_TTL', '3600'))  # Состояние пагинации живет 1 час без обращений
+USER_SELECTION_TTL = float(os.getenv('USER_SELECTION_TTL', '86400'))  # Выбранная ссылка и навигация - сутки
+FSM_STORAGE = os.getenv('FSM_STORAGE', 'memory').lower()  # memory или sqlite (FSM переживает перезапуск)
+LAZY_HANDLERS_ENABLED = os.getenv('LAZY_HANDLERS_ENABLED', 'true').lower() == 'true'  # Разделы бота импортируются при первом обращении
+STARTUP_PARALLEL_ENABLED = os.getenv('STARTUP_PARALLEL_ENABLED', 'true').lower() == 'true'  # Независимые подсистемы инициализируются одновременно
+
+# =============================================================================
+# SEND QUEUE CONFIGURATION (лимиты Telegram на исходящие сообщения)
+# =============================================================================
+SEND_QUEUE_GLOBAL_RATE = float(os.getenv('SEND_QUEUE_GLOBAL_RATE', '25'))  # Сообщений/сек на бота (лимит Telegram ~30)
+SEND_QUEUE_CHAT_RATE = float(os.getenv('SEND_QUEUE_CHAT_RATE', '1.0'))  # Сообщений/сек в один личный чат
+SEND_QUEUE_CHAT_BURST = float(os.getenv('SEND_QUEUE_CHAT_BURST', '3'))  # Короткий всплеск в один чат
+SEND_QUEUE_GROUP_RATE_PER_MIN = float(os.getenv('SEND_QUEUE_GROUP_RATE_PER_MIN', '20'))  # Сообщений/мин в группу
+SEND_QUEUE_MAX_CONCURRENCY = int(os.getenv('SEND_QUEUE_MAX_CONCURRENCY', '10'))  # Одновременных запросов к API
+SEND_QUEUE_MAX_RETRIES = int(os.getenv('SEND_QUEUE_MAX_RETRIES', '3'))  # Повторов при RetryAfter/сетевых ошибках
+
+# =============================================================================
+# NOTIFICATION OUTBOX (надежная доставка уведомлений о промоакциях)
+# =============================================================================
+OUTBOX_ENABLED = os.getenv('OUTBOX_ENABLED', 'true').lower() == 'true'
+OUTBOX_GRACE_SECONDS = int(os.getenv('OUTBOX_GRACE_SECONDS', '30'))  # Фоновая досылка не раньше N сек после записи
+OUTBOX_POLL_INTERVAL = float(os.getenv('OUTBOX_POLL_INTERVAL', '15'))  # Проверка outbox каждые N сек
+OUTBOX_DRAIN_BATCH = int(os.getenv('OUTBOX_DRAIN_BATCH', '200'))  # Строк за один проход
+OUTBOX_MAX_ATTEMPTS = int(os.getenv('OUTBOX_MAX_ATTEMPTS', '8'))  # Попыток до статуса failed
+OUTBOX_RETRY_BASE_DELAY = float(os.getenv('OUTBOX_RETRY_BASE_DELAY', '30'))  # Пауза после 1-й неудачи (удваивается)
 
 # =============================================================================
 # PARALLEL PARSING CONFIGURATION (параллельный парсинг)
@@ -149,6 +219,10 @@ PARSER_TIMEOUT_BY_CATEGORY = {
     'launchpool': 180,  # Launchpool тоже тяжёлые (Bitget и др.)
 }
 
+# Кнопка "Обновить" в текущих стейкингах: сразу данные из БД, парсинг в фоне
+STAKINGS_SWR_ENABLED = os.getenv('STAKINGS_SWR_ENABLED', 'true').lower() == 'true'
+STAKINGS_REFRESH_TIMEOUT = float(os.getenv('STAKINGS_REFRESH_TIMEOUT', '600'))  # Ожидание фонового парсинга (с повторами)
+
 # =============================================================================
 # CIRCUIT BREAKER CONFIGURATION (защита от недоступных бирж)
 # =============================================================================
@@ -180,6 +254,15 @@ GRACEFUL_DEGRADATION_CHECK_INTERVAL = int(os.getenv('GRACEFUL_DEGRADATION_CHECK_
 # ВАЖНО: Telegram API настройки теперь хранятся в БД (TelegramSettings)
 # Настройте через бота: Меню → Обход блокировок → Telegram API
 TELEGRAM_PARSER_ENABLED = os.getenv('TELEGRAM_PARSER_ENABLED', 'false').lower() == 'true'
+TELEGRAM_CHANNELS_RELOAD_INTERVAL = int(os.getenv('TELEGRAM_CHANNELS_RELOAD_INTERVAL', '60'))  # сек, проверка изменений списка каналов
+TELEGRAM_DEDUP_WINDOW = int(os.getenv('TELEGRAM_DEDUP_WINDOW', '600'))  # сек, окно дедупликации сообщений между аккаунтами
+TELEGRAM_WRITE_BATCH_SIZE = int(os.getenv('TELEGRAM_WRITE_BATCH_SIZE', '50'))  # Сообщений в одной транзакции записи
+TELEGRAM_WRITE_FLUSH_INTERVAL = float(os.getenv('TELEGRAM_WRITE_FLUSH_INTERVAL', '1.0'))  # сек, максимум ожидания пакета
+TELEGRAM_WRITE_QUEUE_SIZE = int(os.getenv('TELEGRAM_WRITE_QUEUE_SIZE', '1000'))  # Очередь записи (дальше - ожидание БД)
+TELEGRAM_CATCHUP_ENABLED = os.getenv('TELEGRAM_CATCHUP_ENABLED', 'true').lower() == 'true'  # Догрузка пропущенных сообщений после переподключения
+TELEGRAM_CATCHUP_BATCH = int(os.getenv('TELEGRAM_CATCHUP_BATCH', '100'))  # Сообщений за один запрос догрузки
+TELEGRAM_CATCHUP_MAX_MESSAGES = int(os.getenv('TELEGRAM_CATCHUP_MAX_MESSAGES', '500'))  # Максимум догрузки на канал
+TELEGRAM_CURSOR_SAVE_INTERVAL = float(os.getenv('TELEGRAM_CURSOR_SAVE_INTERVAL', '30'))  # сек, сохранение курсоров каналов
 
 # Legacy support (для обратной совместимости, если кто-то использует старый способ)
 TELEGRAM_API_ID = os.getenv('TELEGRAM_API_ID')
@@ -0,0 +1,231 @@
+# data/data_version.py
+"""
+Версии данных для инвалидации кэшей отрендеренных страниц
+
+Каждая область данных (стейкинги, промоакции) имеет счетчики, которые
+увеличиваются при изменении строк ее таблиц. Версия входит в ключ
+кэша страницы, поэтому после изменения данных старые страницы просто
+перестают находиться и вытесняются по TTL/LRU.
+
+Счетчики ведутся по scope - части данных, которую показывает страница:
+- стейкинги: биржа строки (exchange в нижнем регистре); страница стейкингов
+  фильтрует по подстроке биржи, поэтому ее версия - сумма счетчиков всех
+  бирж, содержащих фильтр
+- промоакции: ссылка (api_link_id)
+Парсинг одной биржи не сбрасывает кэш страниц других бирж и ссылок.
+Изменения, scope которых неизвестен (ORM UPDATE/DELETE запросом, сырой SQL),
+увеличивают общий счетчик области - он входит в версию любой страницы.
+
+Изменения отслеживаются событиями SQLAlchemy (ORM flush и ORM UPDATE/DELETE).
+bulk_insert_mappings и сырой SQL событий не вызывают - такой код вызывает
+bump_data_version/bump_table_version сам (см. services/retention_service.py).
+Строки истории участников не знают своей ссылки - их версию увеличивает
+записывающий код (bump_promo_links_version по promo_id).
+"""
+
+import logging
+import threading
+from typing import Dict, Hashable, Iterable, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+logger = logging.getLogger(__name__)
+
+# Области данных
+STAKINGS = 'stakings'
+PROMOS = 'promos'
+
+# Таблица -> область данных (от снапшотов зависят дельты стейкингов,
+# от истории участников - статистика на страницах промоакций)
+TABLE_DOMAINS: Dict[str, str] = {
+    'staking_history': STAKINGS,
+    'staking_snapshots': STAKINGS,
+    'promo_history': PROMOS,
+    'promo_participants_history': PROMOS,
+}
+
+# Таблицы, версию которых увеличивает записывающий код (строка не знает scope)
+WRITER_VERSIONED_TABLES = {'promo_participants_history'}
+
+_SESSION_INFO_KEY = '_data_version_scopes'
+
+# Общий счетчик области (изменения без scope) и счетчики по scope
+_versions: Dict[str, int] = {}
+_scoped_versions: Dict[str, Dict[Hashable, int]] = {}
+_lock = threading.Lock()
+_installed = False
+
+
+def _scope_matches(scope: Hashable, row_scope: Hashable) -> bool:
+    if isinstance(scope, str):
+        # Как фильтр страницы стейкингов: exchange ILIKE '%scope%'
+        return isinstance(row_scope, str) and scope.lower() in row_scope
+    return scope == row_scope
+
+
+def get_data_version(domain: str, scope: Optional[Hashable] = None) -> int:
+    """
+    Текущая версия данных области для страницы
+
+    Args:
+        scope: Что показывает страница (фильтр биржи стейкингов, ID ссылки
+            промоакций); None - любые изменения области
+    """
+    with _lock:
+        version = _versions.get(domain, 0)
+        for row_scope, scope_version in _scoped_versions.get(domain, {}).items():
+            if scope is None or _scope_matches(scope, row_scope):
+                version += scope_version
+    return version
+
+
+def bump_data_version(domain: str, scope: Optional[Hashable] = None):
+    """Отметить изменение данных области (scope None - неизвестно, какой части)"""
+    with _lock:
+        if scope is None:
+            _versions[domain] = _versions.get(domain, 0) + 1
+        else:
+            scoped = _scoped_versions.setdefault(domain, {})
+            scoped[scope] = scoped.get(scope, 0) + 1
+    logger.debug(f"🔢 Версия данных {domain} ({scope if scope is not None else 'все'}) увеличена")
+
+
+def bump_table_version(table: str, scopes: Optional[Iterable[Hashable]] = None):
+    """
+    Отметить изменение таблицы (сырой SQL, bulk_insert_mappings)
+
+    Args:
+        scopes: Затронутые scope; None - вся область
+    """
+    domain = TABLE_DOMAINS.get(table)
+    if not domain:
+        return
+    if scopes is None:
+        bump_data_version(domain)
+        return
+    for scope in set(scopes):
+        bump_data_version(domain, scope)
+
+
+def track_bulk_write(session, table: str, scopes: Optional[Iterable[Hashable]] = None):
+    """
+    Изменение таблицы в сессии без событий ORM (bulk_insert_mappings)
+
+    Версия увеличивается сейчас и еще раз после commit/rollback сессии -
+    как для строк, записанных через flush.
+    """
+    domain = TABLE_DOMAINS.get(table)
+    if not domain:
+        return
+    pairs = {(domain, None)} if scopes is None else {(domain, scope) for scope in scopes}
+    session.info.setdefault(_SESSION_INFO_KEY, set()).update(pairs)
+    _bump_scopes(pairs)
+
+
+def staking_scope(exchange: Optional[str]) -> Optional[str]:
+    """Scope стейкинга/снимка по бирже"""
+    return exchange.lower() if exchange else None
+
+
+def bump_promo_links_version(session, promo_ids: Iterable[str]):
+    """
+    Отметить изменение данных промоакций (история участников) по promo_id
+
+    Ссылки промоакций берутся из promo_history тем же запросом в сессии
+    вызывающего кода; вызывать после commit записи.
+    """
+    from data.models import PromoHistory
+
+    promo_ids = list({promo_id for promo_id in promo_ids if promo_id})
+    if not promo_ids:
+        return
+    link_ids = set()
+    for i in range(0, len(promo_ids), 500):
+        link_ids.update(
+            link_id for (link_id,) in
+            session.query(PromoHistory.api_link_id).filter(
+                PromoHistory.promo_id.in_(promo_ids[i:i + 500])
+            ).distinct().all()
+        )
+    if not link_ids or None in link_ids:
+        # Промо без записи в истории (или без ссылки) - вся область
+        bump_table_version('promo_participants_history')
+    else:
+        bump_table_version('promo_participants_history', link_ids)
+
+
+def _instance_scope(obj) -> Optional[Tuple[str, Optional[Hashable]]]:
+    """(область, scope) строки ORM или None, если таблица не отслеживается"""
+    table = getattr(obj, '__tablename__', None)
+    domain = TABLE_DOMAINS.get(table)
+    if not domain or table in WRITER_VERSIONED_TABLES:
+        return None
+    if domain == STAKINGS:
+        return domain, staking_scope(getattr(obj, 'exchange', None))
+    return domain, getattr(obj, 'api_link_id', None)
+
+
+def _bump_scopes(scopes: Iterable[Tuple[str, Optional[Hashable]]]):
+    for domain, scope in set(scopes):
+        bump_data_version(domain, scope)
+
+
+def _after_flush(session: Session, flush_context):
+    scopes: Set[Tuple[str, Optional[Hashable]]] = set()
+    for obj in list(session.new) + list(session.deleted):
+        scope = _instance_scope(obj)
+        if scope:
+            scopes.add(scope)
+    for obj in session.dirty:
+        scope = _instance_scope(obj)
+        if scope and scope not in scopes and session.is_modified(obj, include_collections=False):
+            scopes.add(scope)
+
+    if scopes:
+        # Повторно увеличиваем версию после commit: страница, отрендеренная
+        # между flush и commit, не должна пережить фиксацию транзакции
+        session.info.setdefault(_SESSION_INFO_KEY, set()).update(scopes)
+        _bump_scopes(scopes)
+
+
+def _on_orm_execute(orm_execute_state):
+    if not (orm_execute_state.is_update or orm_execute_state.is_delete or orm_execute_state.is_insert):
+        return
+    # UPDATE/DELETE запросом: затронутые строки неизвестны - вся область
+    scopes = set()
+    for mapper in orm_execute_state.all_mappers:
+        domain = TABLE_DOMAINS.get(getattr(mapper.local_table, 'name', None))
+        if domain:
+            scopes.add((domain, None))
+    if scopes:
+        orm_execute_state.session.info.setdefault(_SESSION_INFO_KEY, set()).update(scopes)
+        _bump_scopes(scopes)
+
+
+def _after_commit(session: Session):
+    scopes = session.info.pop(_SESSION_INFO_KEY, None)
+    if scopes:
+        _bump_scopes(scopes)
+
+
+def _after_rollback(session: Session):
+    scopes = session.info.pop(_SESSION_INFO_KEY, None)
+    if scopes:
+        # Данные откатились к прежним - отрендеренное после flush тоже неверно
+        _bump_scopes(scopes)
+
+
+def install_data_version_tracking():
+    """Подписаться на события ORM (вызывается один раз при инициализации БД)"""
+    global _installed
+    with _lock:
+        if _installed:
+            return
+        _installed = True
+
+    event.listen(Session, 'after_flush', _after_flush)
+    event.listen(Session, 'do_orm_execute', _on_orm_execute)
+    event.listen(Session, 'after_commit', _after_commit)
+    event.listen(Session, 'after_rollback', _after_rollback)
+    logger.debug("🔢 Отслеживание версий данных включено")
@@ -1,9 +1,9 @@
 # data/database.py
 from __future__ import annotations
-from sqlalchemy import create_engine, Index, text
+from sqlalchemy import create_engine, event, Index, text
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker, scoped_session, joinedload
-from sqlalchemy.pool import StaticPool
+from sqlalchemy.pool import NullPool, StaticPool
 from contextlib import contextmanager
 from datetime import datetime, timedelta
 import logging
@@ -15,8 +15,11 @@ Base = declarative_base()
 from data.models import *
 
 # Глобальные объекты БД
+DATABASE_URL = 'sqlite:///data/database.db'
 _engine = None
 _SessionFactory = None
+_transaction_engine = None
+_TransactionSessionFactory = None
 _lock = threading.RLock()
 
 def init_database():
@@ -27,7 +30,7 @@ def init_database():
         if _engine is not None:
             return
             
-        database_url = 'sqlite:///data/database.db'
+        database_url = DATABASE_URL
         
         # Настройки для SQLite
         engine_kwargs = {
@@ -47,6 +50,10 @@ def init_database():
         _engine = create_engine(database_url, **engine_kwargs)
         _SessionFactory = sessionmaker(bind=_engine)
         
+        # Версии данных для кэша отрендеренных страниц (utils/page_cache.py)
+        from data.data_version import install_data_version_tracking
+        install_data_version_tracking()
+        
         # Создаем таблицы
         create_tables()
         initialize_default_settings()
@@ -62,6 +69,12 @@ def init_database():
             logging.warning(f"⚠️ Не удалось включить WAL режим: {e}")
             logging.info("✅ База данных инициализирована")
 
+def get_engine():
+    """Получить SQLAlchemy engine (инициализирует БД при необходимости)"""
+    if _engine is None:
+        init_database()
+    return _engine
+
 @contextmanager
 def get_db_session():
     """Контекстный менеджер для сессий БД"""
@@ -146,6 +159,59 @@ def transaction_session():
             if session:
                 session.close()
 
+def _get_transaction_session_factory():
+    """Фабрика сессий для sqlite_transaction: свое соединение на каждую сессию"""
+    global _transaction_engine, _TransactionSessionFactory
+
+    if _TransactionSessionFactory is None:
+        if _engine is None:
+            init_database()
+        with _lock:
+            if _TransactionSessionFactory is None:
+                engine = create_engine(
+                    DATABASE_URL,
+                    echo=False,
+                    poolclass=NullPool,
+                    connect_args={
+                        'check_same_thread': False,
+                        'timeout': 60.0,
+                        'isolation_level': None  # транзакциями управляем сами (BEGIN ниже)
+                    }
+                )
+
+                @event.listens_for(engine, 'begin')
+                def _begin_immediate(conn):
+                    # Блокировка на запись сразу: без "database is locked" при COMMIT
+                    conn.exec_driver_sql('BEGIN IMMEDIATE')
+
+                _transaction_engine = engine
+                _TransactionSessionFactory = sessionmaker(bind=engine)
+
+    return _TransactionSessionFactory
+
+@contextmanager
+def sqlite_transaction():
+    """
+    Сессия с настоящей транзакцией SQLite (BEGIN IMMEDIATE ... COMMIT/ROLLBACK)
+
+    Основное соединение (StaticPool) одно на все потоки и работает в
+    autocommit-режиме: BEGIN на нем не изолирует ничего - commit/rollback
+    любого другого потока зафиксирует или откатит чужую транзакцию.
+    Здесь сессия работает на отдельном соединении (NullPool), поэтому
+    session.commit()/rollback() касаются только ее запросов.
+    Нужна там, где несколько таблиц должны записаться вместе или не записаться вовсе.
+    """
+    session = _get_transaction_session_factory()()
+    try:
+        yield session
+        session.commit()
+    except Exception as e:
+        logging.error(f"❌ Ошибка в транзакции БД: {e}")
+        session.rollback()
+        raise
+    finally:
+        session.close()
+
 def atomic_operation(operation_func, *args, **kwargs):
     """Выполнение операции в транзакции с автоматическим retry"""
     with transaction_session() as session:
@@ -590,11 +656,14 @@ def cleanup_old_data():
         if not settings:
             return
             
-        # Очистка детальной статистики
+        # Очистка детальной статистики - пачками, вне этой транзакции
+        from services.retention_service import delete_in_chunks, format_db_time
         cutoff_date = datetime.utcnow() - timedelta(days=settings.stats_retention_days)
-        deleted_stats = session.query(RotationStats).filter(
-            RotationStats.timestamp < cutoff_date
-        ).delete()
+        deleted_stats = delete_in_chunks(
+            RotationStats.__tablename__,
+            'timestamp < :cutoff',
+            {'cutoff': format_db_time(cutoff_date)}
+        )
         
         # Архивация неактивных прокси
         archive_cutoff = datetime.utcnow() - timedelta(days=settings.archive_inactive_days)
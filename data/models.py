@@ -1,8 +1,10 @@
 # data/models.py
 from sqlalchemy import Column, Integer, String, Boolean, DateTime, Float, ForeignKey, Text, UniqueConstraint, Index
+from sqlalchemy.ext.hybrid import hybrid_property
 from sqlalchemy.orm import relationship
 from datetime import datetime
 from data.database import Base
+from data.raw_data_codec import CompressedJSONText, decode_raw_data
 import json
 
 class ApiLink(Base):
@@ -251,12 +253,38 @@ class PromoHistory(Base):
     
     # ПОЛЯ ДЛЯ MEXC LAUNCHPAD (полные данные API)
     promo_type = Column(String, nullable=True)  # Тип промо: mexc_launchpad, mexc_airdrop, okx_boost и т.д.
-    raw_data = Column(Text, nullable=True)  # JSON с полными данными из API
+    # JSON с полными данными из API. Хранится сжатым (см. data/raw_data_codec.py),
+    # распаковывается лениво через hybrid-свойство raw_data (в запросах - сама колонка)
+    _raw_data = Column('raw_data', CompressedJSONText, nullable=True)
     
     # ПОЛЕ ДЛЯ ОТСЛЕЖИВАНИЯ ИЗМЕНЕНИЙ НАЗВАНИЯ (Weex rewards)
     previous_title = Column(String, nullable=True)  # Предыдущее название для отслеживания изменений
     
     api_link = relationship("ApiLink", backref="promos")
+
+    @hybrid_property
+    def raw_data(self):
+        """JSON-строка raw_data (распаковывается при первом обращении)"""
+        stored = self._raw_data
+        cached = self.__dict__.get('_raw_data_decoded')
+        if cached is not None and cached[0] is stored:
+            return cached[1]
+        decoded = decode_raw_data(stored)
+        self.__dict__['_raw_data_decoded'] = (stored, decoded)
+        return decoded
+
+    @raw_data.setter
+    def raw_data(self, value):
+        # Не помечаем строку измененной, если JSON тот же
+        if value == self.raw_data:
+            return
+        self._raw_data = value
+        self.__dict__['_raw_data_decoded'] = (value, value)
+
+    @raw_data.expression
+    def raw_data(cls):
+        # PromoHistory.raw_data.isnot(None), filter(PromoHistory.raw_data ...) - по колонке
+        return cls._raw_data
     
     def get_estimated_winners(self) -> int:
         """Рассчитывает примерное количество призовых мест если не указано"""
@@ -689,4 +717,89 @@ class PromoParticipantsHistory(Base):
     # Индексы для быстрого поиска
     __table_args__ = (
         Index('idx_promo_history_lookup', 'exchange', 'promo_id', 'recorded_at'),
-    )
\ No newline at end of file
+    )
+
+class NotificationOutbox(Base):
+    """
+    Очередь исходящих уведомлений (transactional outbox)
+
+    Строки пишутся в той же транзакции, что и PromoHistory, поэтому
+    уведомление не теряется при перезапуске между сохранением и отправкой.
+    Одна строка = одна промоакция для одного получателя.
+    """
+    __tablename__ = 'notification_outbox'
+
+    id = Column(Integer, primary_key=True)
+
+    # Ключ идемпотентности: promo:{promo_id}:{chat_id}
+    idempotency_key = Column(String, nullable=False, unique=True)
+    chat_id = Column(Integer, nullable=False)
+    batch_id = Column(String, nullable=False)  # Одно сохранение = одна пачка (рендер как раньше)
+    promo_id = Column(String, nullable=True)
+    payload = Column(Text, nullable=False)  # JSON промоакции для форматтера
+
+    # Состояние доставки
+    status = Column(String, default='pending', nullable=False)  # pending, sending, sent, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    claim_token = Column(String, nullable=True)  # Кто забрал строку на отправку
+    last_error = Column(String, nullable=True)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    sent_at = Column(DateTime, nullable=True)
+
+    __table_args__ = (
+        Index('idx_outbox_status_due', 'status', 'next_attempt_at'),
+    )
+
+
+class FsmRecord(Base):
+    """
+    Состояние FSM aiogram (bot/fsm_storage.py, FSM_STORAGE=sqlite)
+
+    Одна строка на ключ хранилища (бот, чат, пользователь, destiny).
+    Строка удаляется, когда состояние сброшено и данные пусты.
+    """
+    __tablename__ = 'fsm_storage'
+
+    key = Column(String, primary_key=True)
+    state = Column(String, nullable=True)
+    data = Column(Text, nullable=True)  # JSON данных FSM
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class TelegramChannelCursor(Base):
+    """
+    Последнее обработанное сообщение Telegram-канала (services/telegram_catchup.py)
+
+    После переподключения или перезапуска пропущенные сообщения догружаются
+    начиная с last_message_id, а не всей историей канала.
+    """
+    __tablename__ = 'telegram_channel_cursors'
+
+    channel_id = Column(Integer, primary_key=True)  # ID канала Telethon (peer id, -100...)
+    channel_username = Column(String, nullable=True)
+    last_message_id = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class AnnouncementItem(Base):
+    """
+    Анонс, уже замеченный на странице анонсов (services/announcement_items.py)
+
+    Стратегии any_change/element_change сравнивают список анонсов страницы
+    с сохраненными отпечатками: уведомление отправляется только о новых
+    анонсах, а не о любом изменении HTML (баннеры, счетчики, время).
+    """
+    __tablename__ = 'announcement_items'
+    __table_args__ = (
+        UniqueConstraint('api_link_id', 'fingerprint', name='_announcement_link_fingerprint_uc'),
+    )
+
+    id = Column(Integer, primary_key=True)
+    api_link_id = Column(Integer, ForeignKey('api_links.id'), nullable=False, index=True)
+    fingerprint = Column(String, nullable=False)  # md5 канонического URL анонса (или заголовка)
+    title = Column(String, nullable=True)
+    url = Column(String, nullable=True)
+    item_date = Column(String, nullable=True)  # Дата с карточки анонса, как на странице
+    first_seen = Column(DateTime, default=datetime.utcnow, nullable=False)
+    last_seen = Column(DateTime, default=datetime.utcnow, nullable=False)  # Последняя проверка, где анонс был на странице
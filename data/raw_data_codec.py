@@ -0,0 +1,122 @@
+# data/raw_data_codec.py
+"""
+Кодек для хранения PromoHistory.raw_data в сжатом виде
+
+Формат значения в колонке:
+- str  - старый формат (JSON как есть), читается без изменений
+- bytes с маркером RAW_DATA_MAGIC + версия - zlib-сжатый JSON (UTF-8)
+
+Маркер с версией позволяет позже сменить алгоритм, не ломая чтение
+уже записанных строк. Небольшие значения не сжимаются - выигрыша нет.
+"""
+
+import logging
+import zlib
+from typing import Optional, Union
+
+from sqlalchemy.types import Text, TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+# Маркер сжатого значения: \x00 не встречается в JSON-тексте
+RAW_DATA_MAGIC = b'\x00RZ'
+RAW_DATA_CODEC_VERSION = 1
+RAW_DATA_PREFIX = RAW_DATA_MAGIC + bytes([RAW_DATA_CODEC_VERSION])
+
+# Значения по умолчанию (переопределяются через config)
+DEFAULT_COMPRESSION_ENABLED = True
+DEFAULT_MIN_SIZE = 256  # Байт: меньше - храним как текст
+DEFAULT_LEVEL = 6
+
+_settings = None
+
+
+def _get_settings() -> tuple:
+    """Настройки кодека из config (читаются один раз)"""
+    global _settings
+    if _settings is None:
+        try:
+            import config
+            _settings = (
+                getattr(config, 'RAW_DATA_COMPRESSION_ENABLED', DEFAULT_COMPRESSION_ENABLED),
+                getattr(config, 'RAW_DATA_COMPRESS_MIN_BYTES', DEFAULT_MIN_SIZE),
+                getattr(config, 'RAW_DATA_COMPRESSION_LEVEL', DEFAULT_LEVEL),
+            )
+        except Exception:
+            # Скрипты из dev/ могут работать с БД без полного окружения
+            _settings = (DEFAULT_COMPRESSION_ENABLED, DEFAULT_MIN_SIZE, DEFAULT_LEVEL)
+    return _settings
+
+
+def is_compressed(value: Union[str, bytes, None]) -> bool:
+    """Значение уже в сжатом формате"""
+    return isinstance(value, (bytes, bytearray)) and bytes(value[:len(RAW_DATA_MAGIC)]) == RAW_DATA_MAGIC
+
+
+def encode_raw_data(
+    value: Union[str, bytes, None],
+    min_size: int = None,
+    level: int = None
+) -> Union[str, bytes, None]:
+    """
+    Подготавливает raw_data к записи в БД
+
+    Args:
+        value: JSON-строка (или уже закодированное значение)
+        min_size: Минимальный размер (байт) для сжатия
+        level: Уровень zlib (1-9)
+
+    Returns:
+        bytes со сжатым JSON или исходная строка, если сжимать не нужно
+    """
+    if value is None or isinstance(value, (bytes, bytearray)):
+        return value
+
+    enabled, default_min_size, default_level = _get_settings()
+    if not enabled:
+        return value
+
+    data = value.encode('utf-8')
+    if len(data) < (default_min_size if min_size is None else min_size):
+        return value
+
+    return RAW_DATA_PREFIX + zlib.compress(data, default_level if level is None else level)
+
+
+def decode_raw_data(value: Union[str, bytes, None]) -> Optional[str]:
+    """
+    Возвращает JSON-строку raw_data из значения колонки
+
+    Raises:
+        ValueError: неизвестная версия кодека
+    """
+    if value is None or isinstance(value, str):
+        return value
+
+    value = bytes(value)
+    if not value.startswith(RAW_DATA_MAGIC):
+        # BLOB без маркера - просто текст в байтах
+        return value.decode('utf-8')
+
+    version = value[len(RAW_DATA_MAGIC)]
+    if version == 1:
+        return zlib.decompress(value[len(RAW_DATA_PREFIX):]).decode('utf-8')
+
+    raise ValueError(f"Неизвестная версия кодека raw_data: {version}")
+
+
+class CompressedJSONText(TypeDecorator):
+    """
+    Колонка TEXT, в которую большие значения пишутся сжатыми (BLOB)
+
+    При чтении значение НЕ распаковывается - это делает модель
+    при первом обращении к атрибуту (см. PromoHistory.raw_data).
+    """
+    impl = Text
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return encode_raw_data(value)
+
+    def process_result_value(self, value, dialect):
+        return value
@@ -0,0 +1,89 @@
+"""
+Бенчмарк разбора страниц анонсов: AnnouncementParser.parse_html на сохраненном HTML
+
+Для каждого бэкенда HtmlDocument (html.parser, lxml) и каждой стратегии
+замеряется время parse_html (лучшее из --runs) на страницах
+dev/test_data/*.html - без сети, только разбор и стратегия.
+Строка "только разбор" - построение дерева без стратегии.
+
+Запуск:
+    python dev/scripts/benchmark_announcement_parsing.py [файлы.html ...] [--runs N] [--url URL]
+"""
+import argparse
+import glob
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from parsers.announcement_parser import AnnouncementParser  # noqa: E402
+from parsers.html_document import LXML_AVAILABLE, HtmlDocument  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+CASES = [
+    ('any_change', 'any_change', {}),
+    ('any_change (анонсы)', 'any_change', {'item_diff': True, 'known_items': set()}),
+    ('element_change', 'element_change', {'css_selector': 'body'}),
+    ('any_keyword', 'any_keyword', {'keywords': ['listing', 'airdrop', 'launchpool']}),
+    ('any_keyword (fallback)', 'any_keyword', {'keywords': ['USDT', 'futures', 'MEXC']}),
+    ('all_keywords', 'all_keywords', {'keywords': ['USDT', 'futures']}),
+    ('regex', 'regex', {'regex_pattern': r'\bUSDT\b'}),
+]
+
+
+def best_time(func, runs: int) -> float:
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='HTML-файлы (по умолчанию dev/test_data/*.html)')
+    parser.add_argument('--runs', type=int, default=3, help='Повторов на замер (берется лучший)')
+    parser.add_argument('--url', default='https://www.mexc.co/announcements', help='URL страницы (выбор селекторов биржи)')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    files = args.files or sorted(glob.glob(os.path.join(ROOT, 'dev', 'test_data', '*.html')))
+    if not files:
+        print("❌ Нет HTML-файлов")
+        return
+    pages = []
+    for file_path in files:
+        with open(file_path, encoding='utf-8', errors='replace') as f:
+            pages.append(f.read())
+
+    backends = ['html.parser'] + (['lxml'] if LXML_AVAILABLE else [])
+    if not LXML_AVAILABLE:
+        print("ℹ️ lxml не установлен, замер только html.parser")
+
+    print(f"Страниц: {len(pages)} ({sum(len(html) for html in pages) / 1024:.0f} KB), повторов: {args.runs}")
+    print(f"{'мс на все страницы':28}" + ''.join(f"{backend:>14}" for backend in backends))
+
+    rows = [('только разбор', lambda backend, html: HtmlDocument(html, backend))]
+    for title, strategy, options in CASES:
+        rows.append((title, lambda backend, html, strategy=strategy, options=options: (
+            AnnouncementParser(args.url, html_parser=backend).parse_html(
+                html, strategy=strategy, last_snapshot='-', **options
+            )
+        )))
+
+    for title, func in rows:
+        line = f"{title:28}"
+        for backend in backends:
+            total = sum(best_time(lambda: func(backend, html), args.runs) for html in pages)
+            line += f"{total * 1000:>14.1f}"
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+"""
+Бенчмарк извлечения полей промоакции: перебор кандидатов vs скомпилированный план
+
+Для каждого JSON из dev/test_data берутся объекты, похожие на промоакции
+(UniversalParser._find_all_objects), и замеряется (лучшее из --runs):
+- "перебор" - как раньше в _create_promo_from_object: на каждое поле словарь
+  ключей в нижнем регистре и перебор всех кандидатов
+- "план" - FieldExtractor из PROMO_FIELD_KEYS (план на набор ключей объекта)
+Результаты обоих способов сравниваются - расхождение выводится как ошибка.
+
+Запуск:
+    python dev/scripts/benchmark_promo_fields.py [файлы.json ...] [--runs N]
+"""
+import argparse
+import glob
+import json
+import logging
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from parsers.field_extractor import FieldExtractor  # noqa: E402
+from parsers.universal_parser import PROMO_FIELD_KEYS, UniversalParser  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def extract_by_scan(obj: dict) -> dict:
+    """Поля промоакции перебором кандидатов (прежний _get_value на каждое поле)"""
+    result = {}
+    for field, candidates in PROMO_FIELD_KEYS:
+        obj_lower = {k.lower(): v for k, v in obj.items()}
+        for key in candidates:
+            key_lower = key.lower()
+            if key_lower in obj_lower:
+                value = obj_lower[key_lower]
+                if value is not None and str(value).strip():
+                    result[field] = value
+                    break
+    return result
+
+
+def best_time(func, runs: int) -> float:
+    best = None
+    for _ in range(runs):
+        started = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('files', nargs='*', help='JSON-файлы (по умолчанию dev/test_data/*.json)')
+    parser.add_argument('--runs', type=int, default=20, help='Повторов на замер (берется лучший)')
+    args = parser.parse_args()
+
+    logging.disable(logging.CRITICAL)
+
+    files = args.files or sorted(glob.glob(os.path.join(ROOT, 'dev', 'test_data', '*.json')))
+    if not files:
+        print("❌ Нет JSON-файлов")
+        return
+
+    finder = UniversalParser('https://example.com')
+    print(f"{'файл':36}{'объектов':>10}{'планов':>8}{'перебор, мс':>14}{'план, мс':>12}{'ускорение':>12}")
+
+    total_scan = total_plan = 0.0
+    for file_path in files:
+        with open(file_path, encoding='utf-8') as f:
+            data = json.load(f)
+        objects = finder._find_all_objects(data)
+        if not objects:
+            continue
+
+        # Новый экстрактор на файл: планы компилируются при сверке, замер - на готовых планах
+        extractor = FieldExtractor(PROMO_FIELD_KEYS)
+        mismatches = sum(1 for obj in objects if extractor.extract(obj) != extract_by_scan(obj))
+
+        scan = best_time(lambda: [extract_by_scan(obj) for obj in objects], args.runs)
+        plan = best_time(lambda: [extractor.extract(obj) for obj in objects], args.runs)
+        total_scan += scan
+        total_plan += plan
+
+        name = os.path.basename(file_path)
+        line = f"{name[:35]:36}{len(objects):>10}{extractor.get_stats()['plans']:>8}{scan * 1000:>14.2f}{plan * 1000:>12.2f}{scan / plan:>11.1f}x"
+        if mismatches:
+            line += f"  ❌ расхождений: {mismatches}"
+        print(line)
+
+    if total_plan:
+        print(f"{'всего':54}{total_scan * 1000:>14.2f}{total_plan * 1000:>12.2f}{total_scan / total_plan:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,184 @@
+"""
+Бенчмарк сжатия PromoHistory.raw_data: размер БД и задержка чтения
+
+Работает на копии БД (оригинал не меняется):
+1. замеряет размер и время чтения raw_data в текстовом формате
+2. сжимает raw_data кодеком из data/raw_data_codec.py, делает VACUUM
+3. замеряет то же самое для сжатого формата
+
+Если в БД нет promo_history.raw_data, создается синтетическая таблица
+из JSON-файлов dev/test_data.
+
+Запуск:
+    python dev/scripts/benchmark_raw_data_compression.py [путь_к_бд] [--rows N]
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+
+from data.raw_data_codec import encode_raw_data, decode_raw_data, is_compressed  # noqa: E402
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+
+def db_size(path: str) -> int:
+    conn = sqlite3.connect(path)
+    page_size = conn.execute('PRAGMA page_size').fetchone()[0]
+    page_count = conn.execute('PRAGMA page_count').fetchone()[0]
+    conn.close()
+    return page_size * page_count
+
+
+def raw_data_bytes(conn: sqlite3.Connection) -> int:
+    return conn.execute(
+        "SELECT COALESCE(SUM(length(CAST(raw_data AS BLOB))), 0) FROM promo_history"
+    ).fetchone()[0]
+
+
+def build_synthetic_db(path: str, rows: int):
+    """Синтетическая promo_history из dev/test_data/*.json"""
+    samples = []
+    for file_path in sorted(glob.glob(os.path.join(ROOT, 'dev', 'test_data', '*.json'))):
+        try:
+            with open(file_path, encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception:
+            continue
+        items = data if isinstance(data, list) else [data]
+        for item in items:
+            samples.append(json.dumps(item, ensure_ascii=False, default=str))
+
+    if not samples:
+        samples = [json.dumps({'pools': [{'coin': 'USDT', 'apr': 10.5}] * 20}, ensure_ascii=False)]
+
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE promo_history (id INTEGER PRIMARY KEY, promo_id TEXT, "
+        "exchange TEXT, title TEXT, raw_data TEXT)"
+    )
+    conn.executemany(
+        "INSERT INTO promo_history (promo_id, exchange, title, raw_data) VALUES (?, ?, ?, ?)",
+        [(f'bench_{i}', 'bench', f'Promo {i}', samples[i % len(samples)]) for i in range(rows)]
+    )
+    conn.commit()
+    conn.close()
+
+
+def measure_reads(path: str, repeats: int = 3) -> dict:
+    """Время полного чтения raw_data и чтения одной записи по id"""
+    conn = sqlite3.connect(path)
+    ids = [row[0] for row in conn.execute("SELECT id FROM promo_history WHERE raw_data IS NOT NULL")]
+
+    full = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for (raw,) in conn.execute("SELECT raw_data FROM promo_history WHERE raw_data IS NOT NULL"):
+            json.loads(decode_raw_data(raw))
+        full.append(time.perf_counter() - started)
+
+    sample_ids = ids[::max(1, len(ids) // 200)] or ids
+    started = time.perf_counter()
+    for row_id in sample_ids:
+        raw = conn.execute("SELECT raw_data FROM promo_history WHERE id = ?", (row_id,)).fetchone()[0]
+        json.loads(decode_raw_data(raw))
+    point = (time.perf_counter() - started) / max(1, len(sample_ids))
+
+    # Только распаковка, без SQLite и json.loads
+    values = [row[0] for row in conn.execute("SELECT raw_data FROM promo_history WHERE raw_data IS NOT NULL")]
+    started = time.perf_counter()
+    for raw in values:
+        decode_raw_data(raw)
+    decode_only = time.perf_counter() - started
+
+    conn.close()
+    return {
+        'rows': len(ids),
+        'full_scan_ms': min(full) * 1000,
+        'point_read_us': point * 1_000_000,
+        'decode_only_ms': decode_only * 1000,
+    }
+
+
+def compress_all(path: str) -> int:
+    conn = sqlite3.connect(path)
+    rows = conn.execute("SELECT id, raw_data FROM promo_history WHERE typeof(raw_data) = 'text'").fetchall()
+    updates = []
+    for row_id, raw in rows:
+        encoded = encode_raw_data(raw)
+        if is_compressed(encoded):
+            updates.append((encoded, row_id))
+    conn.executemany("UPDATE promo_history SET raw_data = ? WHERE id = ?", updates)
+    conn.commit()
+    conn.execute("VACUUM")
+    conn.close()
+    return len(updates)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('db_path', nargs='?', default=os.path.join(ROOT, 'data', 'database.db'))
+    parser.add_argument('--rows', type=int, default=5000, help='Строк для синтетической БД')
+    args = parser.parse_args()
+
+    tmp_dir = tempfile.mkdtemp(prefix='raw_data_bench_')
+    work_db = os.path.join(tmp_dir, 'bench.db')
+
+    try:
+        has_table = False
+        if os.path.exists(args.db_path):
+            shutil.copyfile(args.db_path, work_db)
+            conn = sqlite3.connect(work_db)
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(promo_history)")}
+            has_table = 'raw_data' in columns
+            conn.close()
+
+        if not has_table:
+            print(f"ℹ️ promo_history.raw_data не найдена, синтетическая БД на {args.rows} строк")
+            if os.path.exists(work_db):
+                os.remove(work_db)
+            build_synthetic_db(work_db, args.rows)
+        else:
+            print(f"📂 Копия БД: {args.db_path}")
+
+        conn = sqlite3.connect(work_db)
+        conn.execute("VACUUM")
+        text_bytes = raw_data_bytes(conn)
+        conn.close()
+        text_size = db_size(work_db)
+        text_reads = measure_reads(work_db)
+
+        started = time.perf_counter()
+        converted = compress_all(work_db)
+        compress_time = time.perf_counter() - started
+
+        conn = sqlite3.connect(work_db)
+        zlib_bytes = raw_data_bytes(conn)
+        conn.close()
+        zlib_size = db_size(work_db)
+        zlib_reads = measure_reads(work_db)
+
+        print(f"\nСтрок с raw_data: {text_reads['rows']}, сжато: {converted} ({compress_time:.2f}с, включая VACUUM)")
+        print(f"{'':24}{'TEXT':>14}{'ZLIB':>14}")
+        print(f"{'raw_data, KB':24}{text_bytes / 1024:>14.0f}{zlib_bytes / 1024:>14.0f}")
+        print(f"{'Размер БД, KB':24}{text_size / 1024:>14.0f}{zlib_size / 1024:>14.0f}")
+        for key, title in (
+            ('full_scan_ms', 'Полное чтение, мс'),
+            ('point_read_us', 'Чтение по id, мкс'),
+            ('decode_only_ms', 'Только decode, мс'),
+        ):
+            print(f"{title:24}{text_reads[key]:>14.2f}{zlib_reads[key]:>14.2f}")
+
+    finally:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,123 @@
+"""
+Профиль импорта при старте: сколько стоит каждый модуль
+
+Запускает `python -X importtime -c "import <модуль>"` в отдельном процессе
+(чистый кэш модулей) и печатает:
+1. общее время импорта
+2. сторонние пакеты по собственному времени (self) и кто из модулей
+   проекта первым их подтянул
+3. модули проекта по суммарному времени (cumulative, с зависимостями)
+
+Нужны переменные окружения, с которыми импортируется config.py
+(BOT_TOKEN, ADMIN_CHAT_ID) - как при обычном запуске бота.
+
+Запуск:
+    python dev/scripts/profile_imports.py [модуль] [--top N] [--runs N]
+
+    python dev/scripts/profile_imports.py                 # main (старт бота)
+    python dev/scripts/profile_imports.py bot.handlers --top 30
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import Dict, List, Tuple
+
+ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..'))
+
+# Пакеты и модули проекта (остальное - сторонние/стандартная библиотека)
+PROJECT_TOP_LEVEL = {'bot', 'data', 'utils', 'services', 'parsers', 'config', 'main'}
+
+
+def run_importtime(module: str) -> List[Tuple[int, int, str, int]]:
+    """
+    Returns:
+        [(self_us, cumulative_us, модуль, глубина)] в порядке вывода importtime
+    """
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+        cwd=ROOT,
+        capture_output=True,
+        text=True,
+        encoding='utf-8',
+        errors='replace'
+    )
+    rows = []
+    errors = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:'):
+            errors.append(line)
+            continue
+        if 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line.split(':', 1)[1].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        rows.append((int(self_us), int(cumulative_us), name.strip(), depth))
+
+    if result.returncode != 0:
+        print('\n'.join(errors[-15:]))
+        raise SystemExit(f"❌ Импорт {module} завершился с ошибкой (код {result.returncode})")
+    return rows
+
+
+def first_importer(rows: List[Tuple[int, int, str, int]], index: int) -> str:
+    """Ближайший модуль проекта выше по дереву импорта"""
+    depth = rows[index][3]
+    for _, _, name, row_depth in rows[index + 1:]:
+        if row_depth < depth:
+            if name.split('.')[0] in PROJECT_TOP_LEVEL:
+                return name
+            depth = row_depth
+    return '-'
+
+
+def build_report(rows: List[Tuple[int, int, str, int]]) -> Dict[str, object]:
+    total_us = sum(row[0] for row in rows)
+
+    packages: Dict[str, int] = {}
+    package_importer: Dict[str, str] = {}
+    project: List[Tuple[int, int, str]] = []
+
+    for index, (self_us, cumulative_us, name, _) in enumerate(rows):
+        top = name.split('.')[0]
+        if top in PROJECT_TOP_LEVEL:
+            project.append((cumulative_us, self_us, name))
+            continue
+        packages[top] = packages.get(top, 0) + self_us
+        if top not in package_importer and name == top:
+            package_importer[top] = first_importer(rows, index)
+
+    return {
+        'total_us': total_us,
+        'packages': sorted(packages.items(), key=lambda item: -item[1]),
+        'package_importer': package_importer,
+        'project': sorted(project, reverse=True),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('module', nargs='?', default='main')
+    parser.add_argument('--top', type=int, default=20, help='Строк в каждой таблице')
+    parser.add_argument('--runs', type=int, default=3, help='Прогонов (берется самый быстрый)')
+    args = parser.parse_args()
+
+    reports = [build_report(run_importtime(args.module)) for _ in range(max(1, args.runs))]
+    totals = [report['total_us'] / 1000 for report in reports]
+    report = min(reports, key=lambda item: item['total_us'])
+
+    print(f"\n⏱ import {args.module}: {min(totals):.0f} мс "
+          f"(прогоны: {', '.join(f'{total:.0f}' for total in totals)} мс)")
+
+    print(f"\n{'Сторонние пакеты':32}{'self, мс':>10}  Первым импортирует")
+    for package, self_us in report['packages'][:args.top]:
+        importer = report['package_importer'].get(package, '-')
+        print(f"{package:32}{self_us / 1000:>10.1f}  {importer}")
+
+    print(f"\n{'Модули проекта':48}{'cumul, мс':>10}{'self, мс':>10}")
+    for cumulative_us, self_us, name in report['project'][:args.top]:
+        print(f"{name:48}{cumulative_us / 1000:>10.1f}{self_us / 1000:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
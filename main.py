@@ -1,11 +1,14 @@
-﻿import asyncio
+﻿import time
+_IMPORTS_STARTED = time.perf_counter()  # Для замера времени импорта при старте
+
+import asyncio
 import logging
 from aiogram import Bot, Dispatcher
 from aiogram.fsm.storage.memory import MemoryStorage
 from bot.handlers import router
-from bot.telegram_account_handlers import router as telegram_account_router
-from bot.exchange_credentials_handlers import router as exchange_credentials_router
-from data.database import init_database, get_db_session, ApiLink
+from bot.lazy_router import LazyRouter
+from bot.states import TelegramAccountStates, ExchangeCredentialsStates
+from data.database import init_database, get_db_session, run_in_db_executor, sqlite_transaction, ApiLink
 from data.models import StakingHistory, PromoHistory
 from utils.launchpool_filter import filter_launchpool_projects, get_link_launchpool_filters
 from services.stability_tracker_service import StabilityTrackerService
@@ -14,7 +17,7 @@ from bot.notification_service import NotificationService
 from bot.bot_manager import bot_manager
 from apscheduler.schedulers.asyncio import AsyncIOScheduler
 from apscheduler.triggers.interval import IntervalTrigger
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 import os
 import signal
 import sys
@@ -35,9 +38,18 @@ from services.parsing_worker import (
 )
 from utils.parsing_queue import TaskPriority, ParsingTask
 
+# Очередь исходящих сообщений с лимитами Telegram
+from utils.send_queue import get_send_queue, shutdown_send_queue
+
+# Outbox уведомлений (at-least-once доставка после перезапусков)
+from services.notification_outbox_service import init_outbox_service, OUTBOX_MESSAGE_KEY
+
 # Circuit Breaker для защиты от недоступных бирж
 from utils.circuit_breaker import init_circuit_breaker, get_circuit_breaker
 
+# Оркестратор запуска (параллельная инициализация подсистем)
+from utils.startup_orchestrator import StartupOrchestrator
+
 # Resource Monitor для мониторинга ресурсов
 from utils.resource_monitor import init_resource_monitor, shutdown_resource_monitor, get_resource_monitor
 
@@ -46,6 +58,7 @@ from utils.logging_config import setup_logging
 setup_logging()
 
 logger = logging.getLogger(__name__)
+logger.info(f"⏱ Импорт модулей бота: {time.perf_counter() - _IMPORTS_STARTED:.2f}с")
 
 class CryptoPromoBot:
     def __init__(self):
@@ -55,15 +68,39 @@ class CryptoPromoBot:
         self.parser_service = None
         self.notification_service = None
         self.worker_pool = None  # Пул воркеров для параллельного парсинга
+        self.notification_outbox = None  # Outbox уведомлений (надежная доставка)
         self.telegram_monitor = None  # Telegram Monitor
         self.telegram_monitor_task = None  # Задача мониторинга Telegram
+        self.startup_stats = None  # Время этапов инициализации (utils/startup_orchestrator.py)
         self.YOUR_CHAT_ID = config.ADMIN_CHAT_ID
         self.notification_recipients = config.ALL_NOTIFICATION_RECIPIENTS  # Все получатели уведомлений
         self._shutdown_event = asyncio.Event()
 
     async def init_services(self):
-        """Инициализация всех сервисов"""
-        from data.database import init_database, DatabaseMigration
+        """
+        Инициализация всех сервисов
+
+        Подсистемы объявлены этапами с зависимостями (utils/startup_orchestrator.py):
+        независимые (проверка Playwright и запуск браузеров, БД и миграции,
+        Resource Monitor) выполняются одновременно.
+        """
+        startup = StartupOrchestrator()
+        startup.add_stage('playwright', self._init_playwright, required=False)
+        startup.add_stage('browser_pool', self._init_browser_pool, depends_on=('playwright',), required=False)
+        startup.add_stage('database', self._init_database)
+        startup.add_stage('circuit_breaker', self._init_circuit_breaker, required=False)
+        startup.add_stage('resource_monitor', self._init_resource_monitor, required=False)
+        startup.add_stage('dispatcher', self._init_dispatcher, depends_on=('database',))
+        startup.add_stage('telegram_monitor', self._init_telegram_monitor, depends_on=('dispatcher',), required=False)
+        startup.add_stage('worker_pool', self._init_worker_pool, depends_on=('dispatcher',), required=False)
+        await startup.run()
+        self.startup_stats = startup.get_stats()
+
+        # Настройка обработчиков завершения
+        self._setup_signal_handlers()
+
+    def _init_playwright(self):
+        """Проверка Playwright (блокирующая: может запустить установку браузеров)"""
         from utils.playwright_checker import ensure_playwright_ready
 
         # Проверка Playwright ПЕРЕД инициализацией (критично для browser_parser)
@@ -73,29 +110,56 @@ class CryptoPromoBot:
             logger.error("🔧 Парсинг через браузер (browser_parser) будет недоступен")
             logger.error("💡 Решение: Запустите 'playwright install chromium'")
             # НЕ прерываем запуск - остальные парсеры могут работать
-        else:
-            logger.info("✅ Playwright готов к работе")
-            
-            # Инициализируем пул браузеров если включен
-            if config.BROWSER_POOL_ENABLED:
-                try:
-                    await init_browser_pool()
-                    logger.info(f"🌐 Browser Pool запущен (размер: {config.BROWSER_POOL_SIZE})")
-                except Exception as e:
-                    logger.error(f"⚠️ Не удалось запустить Browser Pool: {e}")
-                    logger.info("ℹ️ Будет использоваться стандартный browser_parser")
+            raise RuntimeError("Playwright не готов к работе")
+        logger.info("✅ Playwright готов к работе")
+
+    async def _init_browser_pool(self):
+        # Инициализируем пул браузеров если включен
+        if not config.BROWSER_POOL_ENABLED:
+            return
+        try:
+            await init_browser_pool()
+            logger.info(f"🌐 Browser Pool запущен (размер: {config.BROWSER_POOL_SIZE})")
+        except Exception as e:
+            logger.error(f"⚠️ Не удалось запустить Browser Pool: {e}")
+            logger.info("ℹ️ Будет использоваться стандартный browser_parser")
+
+    def _init_database(self):
+        """БД, миграции и прогрев данных из БД (блокирующие, в отдельном потоке)"""
+        from data.database import init_database, DatabaseMigration
 
         init_database()
-        
+
         # Запуск миграций
         migration_runner = DatabaseMigration()
         migration_runner.run_migrations()
 
+        # Режим incremental auto_vacuum для возврата места после retention
+        if config.RETENTION_ENABLED:
+            from services.retention_service import RetentionService
+            RetentionService.ensure_incremental_auto_vacuum()
+
+        # Загружаем время последних снимков стейкингов (троттлинг без запросов к БД)
+        try:
+            from services.staking_snapshot_service import warm_up_snapshot_throttle
+            warm_up_snapshot_throttle()
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить карту снимков: {e}")
+
+    async def _init_dispatcher(self):
+        """Бот, диспетчер, сервисы, middleware и роутеры"""
         self.bot = Bot(token=config.BOT_TOKEN)
-        storage = MemoryStorage()
+        if config.FSM_STORAGE == 'sqlite':
+            from bot.fsm_storage import SQLiteStorage
+            storage = SQLiteStorage()
+            logger.info("💾 FSM хранится в SQLite (переживает перезапуск)")
+        else:
+            storage = MemoryStorage()
         self.dp = Dispatcher(storage=storage)
         self.parser_service = ParserService()
         self.notification_service = NotificationService(self.bot)
+        if config.OUTBOX_ENABLED:
+            self.notification_outbox = init_outbox_service(self.notification_service)
 
         # Подключаем middleware для проверки администратора (ВАЖНО: первым!)
         from utils.admin_middleware import AdminMiddleware
@@ -108,7 +172,32 @@ class CryptoPromoBot:
         self.dp.callback_query.middleware(DebounceMiddleware())
         logger.info(f"🛡️ Debounce middleware включен ({config.DEBOUNCE_SECONDS}с)")
 
-        # Инициализация Telegram Monitor (если включен)
+        # Регистрируем роутеры (Telegram аккаунты ПЕРВЫМИ для перехвата bypass_telegram).
+        # Разделы кроме основного импортируются при первом обращении (bot/lazy_router.py)
+        self.dp.include_router(LazyRouter(
+            'bot.telegram_account_handlers',
+            callback_prefixes=('bypass_telegram', 'tg_'),
+            states=(TelegramAccountStates,)
+        ))
+        self.dp.include_router(LazyRouter(
+            'bot.exchange_credentials_handlers',
+            callback_prefixes=('exchange_cred_', 'exchange_select_'),
+            states=(ExchangeCredentialsStates,)
+        ))
+        self.dp.include_router(router)
+        
+        # Роутер фьючерсов ПОСЛЕДНИМ (чтобы не перехватывать другие команды):
+        # его F.text ловит любой необработанный текст, поэтому грузится на первое такое сообщение
+        self.dp.include_router(LazyRouter(
+            'bot.futures_handlers',
+            'futures_router',
+            callback_prefixes=('futures:',),
+            any_message=True
+        ))
+
+    async def _init_telegram_monitor(self):
+        # Инициализация Telegram Monitor (если включен).
+        # Подключение клиентов Telethon - в фоне после запуска (start)
         if config.TELEGRAM_PARSER_ENABLED:
             from services.telegram_monitor import TelegramMonitor
             self.telegram_monitor = TelegramMonitor(self.bot)
@@ -116,6 +205,7 @@ class CryptoPromoBot:
         else:
             logger.info("ℹ️ Telegram Parser отключен (TELEGRAM_PARSER_ENABLED=false)")
 
+    def _init_circuit_breaker(self):
         # Инициализация Circuit Breaker для защиты от недоступных бирж
         if getattr(config, 'CIRCUIT_BREAKER_ENABLED', True):
             init_circuit_breaker()
@@ -123,7 +213,8 @@ class CryptoPromoBot:
                 f"🔌 Circuit Breaker включен (threshold={config.CIRCUIT_BREAKER_FAILURE_THRESHOLD}, "
                 f"recovery={config.CIRCUIT_BREAKER_RECOVERY_TIMEOUT}s)"
             )
-        
+
+    async def _init_resource_monitor(self):
         # Инициализация Resource Monitor для мониторинга ресурсов
         if getattr(config, 'RESOURCE_MONITOR_ENABLED', True):
             try:
@@ -138,6 +229,7 @@ class CryptoPromoBot:
             except Exception as e:
                 logger.warning(f"⚠️ Не удалось запустить Resource Monitor: {e}")
 
+    async def _init_worker_pool(self):
         # Инициализация Worker Pool для параллельного парсинга
         if config.PARALLEL_PARSING_ENABLED:
             try:
@@ -153,18 +245,6 @@ class CryptoPromoBot:
         else:
             logger.info("ℹ️ Параллельный парсинг отключен (PARALLEL_PARSING_ENABLED=false)")
 
-        # Регистрируем роутеры (telegram_account_router ПЕРВЫМ для перехвата bypass_telegram)
-        self.dp.include_router(telegram_account_router)
-        self.dp.include_router(exchange_credentials_router)
-        self.dp.include_router(router)
-        
-        # Регистрируем роутер фьючерсов ПОСЛЕДНИМ (чтобы не перехватывать другие команды)
-        from bot.futures_handlers import setup_futures_handlers
-        setup_futures_handlers(self.dp)
-
-        # Настройка обработчиков завершения
-        self._setup_signal_handlers()
-
     def _setup_signal_handlers(self):
         """Настройка обработчиков сигналов для graceful shutdown"""
         try:
@@ -182,22 +262,68 @@ class CryptoPromoBot:
         """
         Отправляет сообщение ВСЕМ получателям уведомлений.
         Используется для рассылки новых промоакций.
+
+        Чаты отправляются параллельно через очередь с лимитами Telegram.
         """
-        for chat_id in self.notification_recipients:
-            try:
-                await self.bot.send_message(chat_id, message, parse_mode=parse_mode, disable_web_page_preview=True)
-            except Exception as e:
-                logger.warning(f"⚠️ Не удалось отправить сообщение в чат {chat_id}: {e}")
+        send_queue = get_send_queue()
+        chat_ids = list(self.notification_recipients)
+        results = await asyncio.gather(
+            *(
+                send_queue.send(self.bot, chat_id, message, parse_mode=parse_mode, disable_web_page_preview=True)
+                for chat_id in chat_ids
+            ),
+            return_exceptions=True
+        )
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Не удалось отправить сообщение в чат {chat_id}: {result}")
 
     async def send_notifications_to_all(self, promos):
         """
-        Отправляет уведомления о промоакциях ВСЕМ получателям.
+        Отправляет уведомления о промоакциях ВСЕМ получателям (параллельно по чатам).
+
+        Сообщения рендерятся один раз и одни и те же части уходят во все чаты.
         """
-        for chat_id in self.notification_recipients:
-            try:
-                await self.notification_service.send_bulk_notifications(chat_id, promos)
-            except Exception as e:
-                logger.warning(f"⚠️ Не удалось отправить уведомления в чат {chat_id}: {e}")
+        if not promos:
+            return
+
+        # Промо, записанные в outbox, доставляет outbox (с отметкой об отправке)
+        if self.notification_outbox:
+            promos = await self.notification_outbox.deliver_promos(promos)
+            if not promos:
+                return
+
+        await self.notification_service.prefetch_promo_prices(promos)
+        rendered = self.notification_service.render_bulk_notifications(promos)
+        chat_ids = list(self.notification_recipients)
+        results = await asyncio.gather(
+            *(
+                self.notification_service.send_bulk_notifications(chat_id, promos, rendered=rendered)
+                for chat_id in chat_ids
+            ),
+            return_exceptions=True
+        )
+        for chat_id, result in zip(chat_ids, results):
+            if isinstance(result, Exception):
+                logger.warning(f"⚠️ Не удалось отправить уведомления в чат {chat_id}: {result}")
+
+        stats = get_send_queue().get_stats()
+        logger.debug(
+            f"📮 SendQueue: в очереди {stats['queue_depth']}, "
+            f"задержка avg {stats['latency_avg_ms']}мс / p95 {stats['latency_p95_ms']}мс"
+        )
+
+    async def _send_new_promos_to_requester(self, chat_id: int, promos):
+        """
+        Уведомления о промо, найденных ручной проверкой - только инициатору.
+
+        Ручная проверка записывает промо в outbox только для chat_id
+        (check_for_new_promos(..., recipients=[chat_id])).
+        """
+        if self.notification_outbox:
+            promos = await self.notification_outbox.deliver_promos(promos)
+        if promos:
+            await self.notification_service.send_bulk_notifications(chat_id, promos)
 
     async def _handle_parsing_result(self, task: ParsingTask, result: dict):
         """
@@ -309,11 +435,14 @@ class CryptoPromoBot:
                     if title_changes:
                         logger.info(f"📝 Отправка {len(title_changes)} уведомлений об изменениях названий")
                         for change in title_changes:
-                            for chat_id in self.notification_recipients:
-                                try:
-                                    await self.notification_service.send_title_change_notification(chat_id, change)
-                                except Exception as e:
-                                    logger.warning(f"⚠️ Не удалось отправить уведомление об изменении названия в чат {chat_id}: {e}")
+                            # send_title_change_notification сам логирует ошибки
+                            await asyncio.gather(
+                                *(
+                                    self.notification_service.send_title_change_notification(chat_id, change)
+                                    for chat_id in self.notification_recipients
+                                ),
+                                return_exceptions=True
+                            )
                     
         except Exception as e:
             logger.error(f"❌ Ошибка обработки результата парсинга: {e}", exc_info=True)
@@ -358,6 +487,47 @@ class CryptoPromoBot:
             logger.error(f"❌ Ошибка подсчета промоакций: {e}")
             return 0
 
+    @staticmethod
+    def _save_new_launchpool_projects(link_id: int, display_name: str, entries: list) -> list:
+        """
+        Сохранить новые launchpool-проекты в историю и уведомления о них в outbox
+
+        Одна транзакция на проверку ссылки, как в ParserService._save_to_history:
+        проект не может оказаться в истории без уведомления.
+
+        Args:
+            entries: [{'promo_id', 'status', 'title', OUTBOX_MESSAGE_KEY}]
+
+        Returns:
+            Новые entries (с пачкой outbox, если outbox включен)
+        """
+        with sqlite_transaction() as db:
+            existing = {
+                promo_id for (promo_id,) in db.query(PromoHistory.promo_id).filter(
+                    PromoHistory.promo_id.in_([entry['promo_id'] for entry in entries])
+                ).all()
+            }
+            new_entries = []
+            for entry in entries:
+                if entry['promo_id'] in existing:
+                    continue
+                existing.add(entry['promo_id'])
+                db.add(PromoHistory(
+                    api_link_id=link_id,
+                    promo_id=entry['promo_id'],
+                    exchange=display_name,
+                    title=entry['title'],
+                    status=entry['status'],
+                    promo_type='launchpool'
+                ))
+                new_entries.append(entry)
+
+            if new_entries and config.OUTBOX_ENABLED:
+                from services.notification_outbox_service import enqueue_promos
+                enqueue_promos(db, new_entries)
+
+        return new_entries
+
     async def smart_auto_check(self):
         """
         Умная автоматическая проверка - ТОЛЬКО АКТИВНЫЕ ссылки.
@@ -707,49 +877,43 @@ class CryptoPromoBot:
                             min_user_limit_usd=filters.get('min_user_limit_usd', 0)
                         )
                         
-                        # Проверяем на новые проекты (сравниваем с историей)
-                        new_projects = []
+                        # Уведомления готовим заранее: новые проекты пишутся в историю
+                        # и outbox одной транзакцией
+                        entries = []
                         for project in filtered_projects:
-                            promo_id = f"{special_parser}_{project.token_symbol}"
-                            with get_db_session() as db:
-                                existing = db.query(PromoHistory).filter(
-                                    PromoHistory.promo_id == promo_id
-                                ).first()
-                                if not existing:
-                                    new_projects.append(project)
-                                    # Сохраняем в историю
-                                    history = PromoHistory(
-                                        api_link_id=link_data['id'],
-                                        promo_id=promo_id,
-                                        exchange=display_name,
-                                        title=f"{project.token_symbol} - {project.token_name}",
-                                        status=project.status,
-                                        promo_type='launchpool'
-                                    )
-                                    db.add(history)
-                                    db.commit()
-                        
+                            message = f"🌊 <b>НОВЫЙ {display_name.upper()}</b>\n\n"
+                            message += f"🪙 <b>{project.token_symbol}</b> - {project.token_name}\n"
+                            message += f"📊 Статус: {project.get_status_text()}\n"
+                            if project.pools:
+                                max_apr = max([p.apr for p in project.pools if p.apr > 0], default=0)
+                                if max_apr > 0:
+                                    message += f"📈 Макс. APR: {max_apr:.0f}%\n"
+                                stake_coins = set(p.stake_coin for p in project.pools if p.stake_coin)
+                                if stake_coins:
+                                    message += f"💰 Стейк монеты: {', '.join(stake_coins)}\n"
+                            entries.append({
+                                'promo_id': f"{special_parser}_{project.token_symbol}",
+                                'title': f"{project.token_symbol} - {project.token_name}",
+                                'status': project.status,
+                                OUTBOX_MESSAGE_KEY: message
+                            })
+
+                        # Проверяем на новые проекты (сравниваем с историей)
+                        new_projects = await run_in_db_executor(
+                            self._save_new_launchpool_projects, link_data['id'], display_name, entries
+                        ) if entries else []
+
                         # Отправляем уведомления о новых проектах
                         if new_projects:
                             logger.info(f"🎉 {display_name}: {len(new_projects)} НОВЫХ проектов!")
-                            for project in new_projects:
-                                message = f"🌊 <b>НОВЫЙ {display_name.upper()}</b>\n\n"
-                                message += f"🪙 <b>{project.token_symbol}</b> - {project.token_name}\n"
-                                message += f"📊 Статус: {project.get_status_text()}\n"
-                                if project.pools:
-                                    max_apr = max([p.apr for p in project.pools if p.apr > 0], default=0)
-                                    if max_apr > 0:
-                                        message += f"📈 Макс. APR: {max_apr:.0f}%\n"
-                                    stake_coins = set(p.stake_coin for p in project.pools if p.stake_coin)
-                                    if stake_coins:
-                                        message += f"💰 Стейк монеты: {', '.join(stake_coins)}\n"
-                                
-                                for chat_id in self.notification_recipients:
-                                    try:
-                                        await self.bot.send_message(chat_id, message, parse_mode='HTML')
-                                    except Exception as e:
-                                        logger.warning(f"⚠️ Не удалось отправить в {chat_id}: {e}")
-                            
+                            # Записанные в outbox доставляет outbox, остальные - напрямую
+                            if self.notification_outbox:
+                                new_projects_direct = await self.notification_outbox.deliver_promos(new_projects)
+                            else:
+                                new_projects_direct = new_projects
+                            for entry in new_projects_direct:
+                                await self.send_to_all_recipients(entry[OUTBOX_MESSAGE_KEY])
+
                             total_new_promos += len(new_projects)
                         
                         if filtered_projects:
@@ -1071,7 +1235,8 @@ class CryptoPromoBot:
                         get_executor(),
                         self.parser_service.check_for_new_promos,
                         link_data['id'],
-                        link_data['url']
+                        link_data['url'],
+                        [chat_id]
                     )
 
                     count_after = self._get_promo_count_for_link(link_data['id'])
@@ -1087,7 +1252,7 @@ class CryptoPromoBot:
                     })
 
                     if new_promos:
-                        await self.notification_service.send_bulk_notifications(chat_id, new_promos)
+                        await self._send_new_promos_to_requester(chat_id, new_promos)
                         total_new_promos += new_count
 
                 # Обновляем время проверки
@@ -1594,12 +1759,12 @@ class CryptoPromoBot:
                 # Синхронный вызов в отдельном потоке (используем глобальный executor)
                 loop = asyncio.get_event_loop()
                 new_promos = await loop.run_in_executor(
-                    get_executor(), self.parser_service.check_for_new_promos, link_data['id'], link_data['url']
+                    get_executor(), self.parser_service.check_for_new_promos, link_data['id'], link_data['url'], [chat_id]
                 )
 
                 # Отправляем уведомления
                 if new_promos:
-                    await self.notification_service.send_bulk_notifications(chat_id, new_promos)
+                    await self._send_new_promos_to_requester(chat_id, new_promos)
                     await self.bot.send_message(chat_id, f"✅ Найдено {len(new_promos)} новых промоакций в ссылке '{link_data['name']}'")
                 else:
                     await self.bot.send_message(chat_id, f"ℹ️ В ссылке '{link_data['name']}' новых промоакций не найдено")
@@ -1615,6 +1780,17 @@ class CryptoPromoBot:
             logger.error(f"❌ Ошибка принудительной проверки ссылки {link_id}: {e}")
             await self.bot.send_message(chat_id, f"❌ Ошибка при проверке ссылки")
 
+    @staticmethod
+    def purge_user_states():
+        """Удаляет просроченные состояния пользователей и пишет статистику хранилищ"""
+        from utils.user_state_store import purge_all_expired, get_user_state_stats
+
+        removed = purge_all_expired()
+        summary = ', '.join(
+            f"{stats['name']} {stats['size']}/{stats['max_size']}" for stats in get_user_state_stats()
+        )
+        logger.debug(f"🧹 UserState: удалено просроченных {removed}; {summary}")
+
     def setup_scheduler(self):
         """Настройка планировщика"""
         self.scheduler = AsyncIOScheduler()
@@ -1625,6 +1801,36 @@ class CryptoPromoBot:
             max_instances=1
         )
 
+        # Retention: очистка и даунсэмплинг растущих таблиц
+        if config.RETENTION_ENABLED:
+            from services.retention_service import get_retention_service
+            self.scheduler.add_job(
+                get_retention_service().run,
+                trigger=IntervalTrigger(hours=config.RETENTION_INTERVAL_HOURS),
+                id='retention',
+                max_instances=1
+            )
+
+        # Просроченные состояния пагинации/выбора пользователей (TTL простоя)
+        if config.USER_STATE_TTL > 0:
+            self.scheduler.add_job(
+                self.purge_user_states,
+                trigger=IntervalTrigger(seconds=max(60, config.USER_STATE_TTL)),
+                id='user_state_purge',
+                max_instances=1
+            )
+
+        # Однократное фоновое сжатие старых raw_data (новые записи сжимаются сразу)
+        if config.RAW_DATA_COMPRESSION_ENABLED:
+            from services.raw_data_migration_service import get_raw_data_migration_service
+            self.scheduler.add_job(
+                get_raw_data_migration_service().run,
+                trigger='date',
+                run_date=datetime.now() + timedelta(seconds=config.RAW_DATA_MIGRATION_DELAY),
+                id='raw_data_migration',
+                max_instances=1
+            )
+
     async def start(self):
         """Запуск бота"""
         try:
@@ -1632,6 +1838,10 @@ class CryptoPromoBot:
             self.setup_scheduler()
             self.scheduler.start()
 
+            # Outbox: досылаем уведомления, не ушедшие до перезапуска
+            if self.notification_outbox:
+                await self.notification_outbox.start()
+
             # Запускаем Telegram Monitor в фоновом режиме (если включен)
             if self.telegram_monitor:
                 logger.info("🚀 Запуск Telegram Monitor в фоновом режиме...")
@@ -1673,6 +1883,19 @@ class CryptoPromoBot:
             except Exception as e:
                 logger.warning(f"⚠️ Ошибка остановки Worker Pool: {e}")
 
+        # Останавливаем outbox (неотправленное останется в БД до следующего запуска)
+        if self.notification_outbox:
+            try:
+                await self.notification_outbox.stop()
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка остановки Outbox: {e}")
+
+        # Досылаем очередь уведомлений
+        try:
+            await shutdown_send_queue()
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка остановки SendQueue: {e}")
+
         # Останавливаем Browser Pool (если запущен)
         if config.BROWSER_POOL_ENABLED:
             try:
@@ -6,12 +6,40 @@
 import re
 import hashlib
 import logging
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Set
+from urllib.parse import urljoin, urlparse, parse_qsl, urlencode
 from bs4 import BeautifulSoup
 from .base_parser import BaseParser
+from .html_document import HtmlDocument, resolve_html_parser
+from utils.keyword_matcher import get_keyword_matcher
+from utils.fetch_cache import get_fetch_cache
 
 logger = logging.getLogger(__name__)
 
+# Ссылки на отдельный анонс (статью) - по пути URL
+ITEM_URL_HINTS = (
+    'announcement', 'article', 'news', 'notice', 'detail', 'post', 'blog',
+    'event', 'activity', 'campaign', 'promotion', 'listing', '/hc/'
+)
+# Короче - кнопки и пункты меню, а не заголовки анонсов
+ITEM_MIN_TITLE_LENGTH = 12
+# Меньше анонсов на всей странице - страница не похожа на список, сравниваем hash
+ITEM_MIN_COUNT = 3
+# Сколько знакомых анонсов должно оставаться видимым, чтобы "ни один не совпал"
+# считался сменой верстки. Элемент с 1-4 анонсами (или короткий список)
+# полностью обновляется обычным образом - это новые анонсы
+ITEM_LAYOUT_CHANGE_MIN = 5
+# Селектор вида a[href*="..."] - проверяется по уже собранным ссылкам страницы
+HREF_SELECTOR = re.compile(r'a\[href\*="([^"]+)"\]')
+# Дата на карточке анонса: 2025-01-31, 31.01.2025, 01/31/2025, Jan 31, 2025, 31 Jan 2025 (+ время)
+_MONTHS = r'(?:Jan|Feb|Mar|Apr|May|Jun|Jul|Aug|Sep|Oct|Nov|Dec)[a-z]*\.?'
+ITEM_DATE_PATTERN = re.compile(
+    r'\b(?:\d{4}[-/.]\d{1,2}[-/.]\d{1,2}|\d{1,2}[-/.]\d{1,2}[-/.]\d{4}'
+    rf'|{_MONTHS} \d{{1,2}},? \d{{4}}|\d{{1,2}} {_MONTHS},? \d{{4}})'
+    r'(?:,?[ T]\d{1,2}:\d{2}(?::\d{2})?)?',
+    re.IGNORECASE
+)
+
 
 class AnnouncementParser(BaseParser):
     """
@@ -21,10 +49,16 @@ class AnnouncementParser(BaseParser):
     - any_keyword: Поиск любого из ключевых слов
     - all_keywords: Все ключевые слова должны присутствовать
     - regex: Поиск по регулярному выражению
+
+    Страница разбирается в дерево один раз (HtmlDocument), стратегии и
+    извлечение ссылок работают с ним. Загруженное дерево общее для всех
+    ссылок на тот же URL (utils/fetch_cache.py): каждая применяет к нему
+    только свою стратегию.
     """
 
-    def __init__(self, url: str):
+    def __init__(self, url: str, html_parser: Optional[str] = None):
         super().__init__(url)
+        self.html_parser = html_parser  # 'auto' / 'lxml' / 'html.parser' (None - auto)
         self.strategies = {
             'any_change': self._strategy_any_change,
             'element_change': self._strategy_element_change,
@@ -40,7 +74,9 @@ class AnnouncementParser(BaseParser):
         keywords: Optional[List[str]] = None,
         regex_pattern: Optional[str] = None,
         css_selector: Optional[str] = None,
-        use_browser: bool = False
+        use_browser: bool = False,
+        item_diff: bool = False,
+        known_items: Optional[Set[str]] = None
     ) -> Dict[str, Any]:
         """
         Парсинг анонсов с использованием выбранной стратегии
@@ -52,13 +88,17 @@ class AnnouncementParser(BaseParser):
             regex_pattern: Регулярное выражение (для стратегии regex)
             css_selector: CSS селектор (для стратегии element_change)
             use_browser: Использовать браузерный парсер (Playwright) для динамических страниц
+            item_diff: any_change/element_change сравнивают список анонсов, а не hash
+            known_items: Отпечатки уже замеченных анонсов (None - анонсы еще не сохранялись)
 
         Returns:
             {
                 'changed': bool,  # Были ли изменения
                 'new_snapshot': str,  # Новый снимок для сохранения
                 'matched_content': str,  # Найденный контент (если есть)
-                'message': str  # Сообщение о результате
+                'message': str,  # Сообщение о результате
+                'items': list,  # Анонсы страницы (только при сравнении по анонсам)
+                'new_items': list  # Новые анонсы (только при сравнении по анонсам)
             }
         """
         try:
@@ -77,50 +117,29 @@ class AnnouncementParser(BaseParser):
                     'message': f"Неизвестная стратегия: {strategy}"
                 }
 
-            # Получаем HTML страницы (браузерный или обычный парсинг)
-            if use_browser:
-                logger.info(f"🌐 Используем браузерный парсер (Playwright)")
-                html_content = self._fetch_with_browser()
-                
-                if not html_content:
-                    logger.error(f"❌ Браузерный парсер не смог загрузить страницу")
-                    return {
-                        'changed': False,
-                        'new_snapshot': last_snapshot,
-                        'matched_content': None,
-                        'message': "Не удалось загрузить страницу через браузер"
-                    }
-            else:
-                logger.debug(f"📡 Загрузка HTML страницы через HTTP...")
-                response = self.make_request(self.url, timeout=(10, 30))
-
-                if not response:
-                    logger.error(f"❌ Не удалось загрузить страницу")
-                    return {
-                        'changed': False,
-                        'new_snapshot': last_snapshot,
-                        'matched_content': None,
-                        'message': "Не удалось загрузить страницу"
-                    }
-
-                response.raise_for_status()
-                html_content = response.text
-            
-            logger.info(f"✅ HTML загружен ({len(html_content)} байт)")
+            # Получаем разобранную страницу (браузерный или обычный парсинг);
+            # другие ссылки на этот URL за последние секунды уже могли ее загрузить
+            fetch_key = (self.url, 'browser' if use_browser else 'http', resolve_html_parser(self.html_parser))
+            document = get_fetch_cache().get_or_load(fetch_key, lambda: self._load_document(use_browser))
 
-            # Парсим HTML
-            soup = BeautifulSoup(html_content, 'html.parser')
+            if document is None:
+                return {
+                    'changed': False,
+                    'new_snapshot': last_snapshot,
+                    'matched_content': None,
+                    'message': "Не удалось загрузить страницу через браузер" if use_browser else "Не удалось загрузить страницу"
+                }
 
-            # Выполняем выбранную стратегию
-            strategy_func = self.strategies[strategy]
-            result = strategy_func(
-                soup=soup,
-                html_content=html_content,
+            result = self._apply_strategy(
+                document,
+                strategy=strategy,
                 last_snapshot=last_snapshot,
                 keywords=keywords,
                 regex_pattern=regex_pattern,
                 css_selector=css_selector,
-                use_browser=use_browser  # Передаем флаг браузерного парсинга
+                use_browser=use_browser,  # Передаем флаг браузерного парсинга
+                item_diff=item_diff,
+                known_items=known_items
             )
 
             logger.info(f"✅ Парсинг завершен: {result['message']}")
@@ -135,27 +154,82 @@ class AnnouncementParser(BaseParser):
                 'message': f"Ошибка парсинга: {str(e)}"
             }
 
+    def _load_document(self, use_browser: bool) -> Optional[HtmlDocument]:
+        """Загрузить и разобрать страницу. Returns: None, если страница не загрузилась"""
+        if use_browser:
+            logger.info(f"🌐 Используем браузерный парсер (Playwright)")
+            html_content = self._fetch_with_browser()
+
+            if not html_content:
+                logger.error(f"❌ Браузерный парсер не смог загрузить страницу")
+                return None
+        else:
+            logger.debug(f"📡 Загрузка HTML страницы через HTTP...")
+            response = self.make_request(self.url, timeout=(10, 30))
+
+            if not response:
+                logger.error(f"❌ Не удалось загрузить страницу")
+                return None
+
+            response.raise_for_status()
+            html_content = response.text
+
+        logger.info(f"✅ HTML загружен ({len(html_content)} байт)")
+        document = HtmlDocument(html_content, self.html_parser)
+        logger.debug(f"   HTML разобран ({document.parser})")
+        return document
+
+    def parse_html(self, html_content: str, strategy: str, **options) -> Dict[str, Any]:
+        """
+        Выполнить стратегию на уже загруженном HTML
+
+        Args:
+            html_content: HTML страницы
+            strategy: Название стратегии
+            **options: Остальные аргументы parse (last_snapshot, keywords, ...)
+        """
+        return self._apply_strategy(HtmlDocument(html_content, self.html_parser), strategy, **options)
+
+    def _apply_strategy(self, document: HtmlDocument, strategy: str, **options) -> Dict[str, Any]:
+        """Стратегия на разобранной странице (дерево может быть общим - не изменять)"""
+        return self.strategies[strategy](
+            document=document,
+            soup=document.soup,
+            html_content=document.html,
+            **options
+        )
+
     def _strategy_any_change(
         self,
         soup: BeautifulSoup,
         html_content: str,
         last_snapshot: Optional[str] = None,
+        item_diff: bool = False,
+        known_items: Optional[Set[str]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Стратегия 1: Отслеживание любых изменений на странице
-        Сравнивает hash всей страницы
+        Сравнивает hash всей страницы или, при item_diff, список анонсов на ней
         """
         logger.info(f"🔍 Стратегия: Отслеживание любых изменений")
 
-        # Удаляем динамические элементы перед хэшированием
-        # (даты, времена, токены сессий и т.д.)
-        clean_html = self._clean_html(html_content)
+        # Текст страницы без скриптов, стилей и комментариев
+        # (токены сессий, данные для JS и т.д. в hash не попадают)
+        document: HtmlDocument = kwargs['document']
+        clean_html = document.clean_text
 
         # Создаем hash страницы
         page_hash = hashlib.md5(clean_html.encode('utf-8')).hexdigest()
         logger.debug(f"   Новый hash: {page_hash}")
 
+        if item_diff:
+            items = self.extract_announcement_items(document)
+            if len(items) >= ITEM_MIN_COUNT:
+                logger.info(f"   Анонсов на странице: {len(items)} - сравниваем по анонсам")
+                return self._diff_items(items, known_items, page_hash)
+            logger.debug(f"   Список анонсов не найден ({len(items)}) - сравниваем hash страницы")
+
         # Если нет предыдущего снимка - это первая проверка
         if not last_snapshot:
             logger.info(f"   Первая проверка - сохраняем снимок")
@@ -191,11 +265,14 @@ class AnnouncementParser(BaseParser):
         html_content: str,
         last_snapshot: Optional[str] = None,
         css_selector: Optional[str] = None,
+        item_diff: bool = False,
+        known_items: Optional[Set[str]] = None,
         **kwargs
     ) -> Dict[str, Any]:
         """
         Стратегия 2: Отслеживание изменений в конкретном элементе
-        Сравнивает hash содержимого элемента по CSS селектору
+        Сравнивает hash содержимого элемента по CSS селектору или, при item_diff,
+        список анонсов внутри элемента
         """
         logger.info(f"🎯 Стратегия: Отслеживание изменений в элементе")
         logger.info(f"   CSS селектор: {css_selector}")
@@ -230,6 +307,13 @@ class AnnouncementParser(BaseParser):
             element_hash = hashlib.md5(element_content.encode('utf-8')).hexdigest()
             logger.debug(f"   Новый hash элемента: {element_hash}")
 
+            if item_diff:
+                # Элемент выбран пользователем - достаточно одного анонса
+                items = self.extract_announcement_items(element)
+                if items:
+                    logger.info(f"   Анонсов в элементе: {len(items)} - сравниваем по анонсам")
+                    return self._diff_items(items, known_items, element_hash)
+
             # Если нет предыдущего снимка - это первая проверка
             if not last_snapshot:
                 logger.info(f"   Первая проверка - сохраняем снимок")
@@ -268,6 +352,161 @@ class AnnouncementParser(BaseParser):
                 'message': f'Ошибка поиска элемента: {str(e)}'
             }
 
+    def extract_announcement_items(self, root) -> List[Dict[str, Any]]:
+        """
+        Список анонсов страницы (или элемента) в порядке появления
+
+        Анонс - ссылка, путь которой похож на статью (ITEM_URL_HINTS), с
+        заголовком не короче ITEM_MIN_TITLE_LENGTH символов. Отпечаток - md5
+        канонического URL: баннеры, счетчики и правка заголовка не делают
+        анонс новым.
+
+        Args:
+            root: HtmlDocument (вся страница) или элемент дерева
+
+        Returns:
+            [{'fingerprint': str, 'title': str, 'url': str, 'date': str или None}]
+        """
+        page_path = urlparse(self.url).path.rstrip('/')
+        items: Dict[str, Dict[str, Any]] = {}
+
+        anchors = root.links if isinstance(root, HtmlDocument) else root.find_all('a', href=True)
+        for anchor in anchors:
+            href = anchor['href'].strip()
+            if not href or href.startswith(('#', 'javascript:', 'mailto:', 'tel:')):
+                continue
+
+            url = urljoin(self.url, href)
+            parsed = urlparse(url)
+            path = parsed.path.rstrip('/')
+            if not path or path == page_path:
+                continue
+            if not any(hint in path.lower() for hint in ITEM_URL_HINTS):
+                continue
+
+            title = ' '.join(anchor.get_text(' ', strip=True).split()) or anchor.get('title', '').strip()
+            if len(title) < ITEM_MIN_TITLE_LENGTH:
+                continue
+
+            # Канонический URL: без схемы, фрагмента и utm-меток, параметры по порядку
+            query = urlencode(sorted(
+                (key, value) for key, value in parse_qsl(parsed.query)
+                if not key.lower().startswith('utm_')
+            ))
+            canonical = f"{parsed.netloc.lower()}{path}" + (f"?{query}" if query else '')
+            fingerprint = hashlib.md5(canonical.encode('utf-8')).hexdigest()
+
+            item = items.get(fingerprint)
+            if item is not None:
+                # Одна статья может быть ссылкой и на картинке, и на заголовке
+                if len(title) > len(item['title']):
+                    item['title'] = title[:300]
+                continue
+
+            items[fingerprint] = {
+                'fingerprint': fingerprint,
+                'title': title[:300],
+                'url': url,
+                'date': self._find_item_date(anchor),
+            }
+
+        return list(items.values())
+
+    def _find_item_date(self, anchor) -> Optional[str]:
+        """Дата анонса: в тексте ссылки или в ближайшей карточке вокруг нее"""
+        href = anchor.get('href')
+        node = anchor
+        for _ in range(4):
+            if node is None:
+                break
+            if node is not anchor and any(other.get('href') != href for other in node.find_all('a', href=True)):
+                # Поднялись до списка анонсов - дата может быть чужой
+                break
+            text = node.get_text(' ', strip=True)
+            if len(text) > 500:
+                break
+            match = ITEM_DATE_PATTERN.search(text)
+            if match:
+                return match.group(0)
+            node = node.parent
+        return None
+
+    def _diff_items(
+        self,
+        items: List[Dict[str, Any]],
+        known_items: Optional[Set[str]],
+        snapshot: str
+    ) -> Dict[str, Any]:
+        """
+        Сравнение анонсов с уже замеченными
+
+        Args:
+            items: Анонсы страницы (extract_announcement_items)
+            known_items: Отпечатки замеченных анонсов (None - первая проверка)
+            snapshot: hash страницы/элемента для announcement_last_snapshot
+        """
+        result = {'new_snapshot': snapshot, 'items': items, 'new_items': []}
+
+        if known_items is None:
+            logger.info(f"   Первая проверка - сохраняем {len(items)} анонсов")
+            return {
+                **result,
+                'changed': False,
+                'matched_content': None,
+                'message': f'Первая проверка - сохранено анонсов: {len(items)}'
+            }
+
+        new_items = [item for item in items if item['fingerprint'] not in known_items]
+
+        if not new_items:
+            logger.info(f"   Новых анонсов нет")
+            return {
+                **result,
+                'changed': False,
+                'matched_content': None,
+                'message': 'Новых анонсов нет'
+            }
+
+        expected_visible = min(len(known_items), len(items))
+        if (len(new_items) == len(items) and len(items) >= ITEM_MIN_COUNT
+                and expected_visible >= ITEM_LAYOUT_CHANGE_MIN):
+            # Ни одного знакомого анонса в длинном списке: сменилась верстка или
+            # адреса статей. Запоминаем текущий список заново, чтобы не разослать всю страницу
+            logger.warning(
+                f"   ⚠️ Ни один из {len(items)} анонсов не совпал с сохраненными - "
+                f"список анонсов сохранен заново"
+            )
+            return {
+                **result,
+                'changed': False,
+                'matched_content': None,
+                'message': f'Список анонсов обновлен (анонсов: {len(items)})'
+            }
+
+        logger.info(f"   ✅ Новых анонсов: {len(new_items)}")
+        for item in new_items[:5]:
+            logger.info(f"      • {item['title'][:100]}")
+
+        return {
+            **result,
+            'changed': True,
+            'new_items': new_items,
+            'matched_content': '\n'.join(
+                f"{item['title']} ({item['date']})" if item['date'] else item['title']
+                for item in new_items
+            )[:500],
+            'message': f'Новых анонсов: {len(new_items)}',
+            'announcement_links': [
+                {
+                    'title': item['title'],
+                    'url': item['url'],
+                    'matched_keywords': [],
+                    'description': item['date'] or ''
+                }
+                for item in new_items
+            ]
+        }
+
     def _strategy_any_keyword(
         self,
         soup: BeautifulSoup,
@@ -292,20 +531,19 @@ class AnnouncementParser(BaseParser):
             }
 
         # Получаем текст всей страницы
-        page_text = soup.get_text().lower()
+        document: HtmlDocument = kwargs['document']
+        page_text = document.text
 
-        # Ищем совпадения
-        matched_keywords = []
-        for keyword in keywords:
-            if keyword.lower() in page_text:
-                matched_keywords.append(keyword)
-                logger.debug(f"   ✅ Найдено: {keyword}")
+        # Ищем совпадения (набор слов скомпилирован один раз, текст - один проход)
+        matched_keywords = get_keyword_matcher(keywords).find_all(page_text)
+        for keyword in matched_keywords:
+            logger.debug(f"   ✅ Найдено: {keyword}")
 
         if matched_keywords:
             logger.info(f"   ✅ Найдено {len(matched_keywords)} ключевых слов")
             
             # Извлекаем ссылки на анонсы, содержащие ключевые слова
-            announcement_links = self._extract_announcement_links(soup, keywords)
+            announcement_links = self._extract_announcement_links(document, keywords)
             
             result = {
                 'changed': True,
@@ -322,7 +560,7 @@ class AnnouncementParser(BaseParser):
                 logger.warning(f"   ⚠️ Ключевые слова найдены, но ссылки на анонсы не извлечены")
                 logger.warning(f"   💡 Возможно, страница использует динамический контент или нестандартную структуру")
                 # Добавляем отладочную информацию
-                total_links = len(soup.find_all('a', href=True))
+                total_links = len(document.links)
                 logger.warning(f"   📊 Всего ссылок на странице: {total_links}")
                 logger.warning(f"   🌐 Браузерный парсинг: {'включен' if use_browser else 'ВЫКЛЮЧЕН'}")
                 
@@ -366,19 +604,17 @@ class AnnouncementParser(BaseParser):
             }
 
         # Получаем текст всей страницы
-        page_text = soup.get_text().lower()
+        page_text = kwargs['document'].text
 
         # Проверяем наличие всех ключевых слов
-        matched_keywords = []
-        missing_keywords = []
+        matched_keywords = get_keyword_matcher(keywords).find_all(page_text)
+        found = set(matched_keywords)
+        missing_keywords = [keyword for keyword in keywords if keyword not in found]
 
-        for keyword in keywords:
-            if keyword.lower() in page_text:
-                matched_keywords.append(keyword)
-                logger.debug(f"   ✅ Найдено: {keyword}")
-            else:
-                missing_keywords.append(keyword)
-                logger.debug(f"   ❌ Не найдено: {keyword}")
+        for keyword in matched_keywords:
+            logger.debug(f"   ✅ Найдено: {keyword}")
+        for keyword in missing_keywords:
+            logger.debug(f"   ❌ Не найдено: {keyword}")
 
         if len(matched_keywords) == len(keywords):
             logger.info(f"   ✅ Все ключевые слова найдены!")
@@ -424,7 +660,7 @@ class AnnouncementParser(BaseParser):
             pattern = re.compile(regex_pattern, re.IGNORECASE)
 
             # Получаем текст страницы
-            page_text = soup.get_text()
+            page_text = kwargs['document'].text
 
             # Ищем совпадения
             matches = pattern.findall(page_text)
@@ -582,12 +818,12 @@ class AnnouncementParser(BaseParser):
             logger.warning(f"⚠️ Ошибка при загрузке: {e}")
             return None
 
-    def _extract_announcement_links(self, soup: BeautifulSoup, keywords: List[str]) -> List[Dict[str, str]]:
+    def _extract_announcement_links(self, document: HtmlDocument, keywords: List[str]) -> List[Dict[str, str]]:
         """
         Извлекает ссылки на анонсы, которые содержат указанные ключевые слова
         
         Args:
-            soup: Объект BeautifulSoup для парсинга
+            document: Разобранная страница
             keywords: Список ключевых слов для поиска
             
         Returns:
@@ -595,6 +831,7 @@ class AnnouncementParser(BaseParser):
             [{'title': 'Заголовок', 'url': 'https://...', 'matched_keywords': ['keyword1'], 'description': '...'}]
         """
         announcement_links = []
+        keyword_matcher = get_keyword_matcher(keywords)
         
         # Паттерны для различных бирж
         link_patterns = {
@@ -645,14 +882,18 @@ class AnnouncementParser(BaseParser):
         if not exchange:
             logger.debug("   ⚠️ Неизвестная биржа, используем общий паттерн")
             # Общий паттерн для любых ссылок
-            all_links = soup.find_all('a', href=True)
+            all_links = document.links
             logger.info(f"   📊 Найдено {len(all_links)} ссылок на странице")
         else:
             # Ищем ссылки по специфичным селекторам
             config = link_patterns[exchange]
             all_links = []
             for selector in config['selectors']:
-                found = soup.select(selector)
+                href_match = HREF_SELECTOR.fullmatch(selector)
+                if href_match:
+                    found = document.links_containing(href_match.group(1))
+                else:
+                    found = document.soup.select(selector)
                 all_links.extend(found)
                 logger.debug(f"   🔍 Селектор '{selector}': найдено {len(found)} ссылок")
             
@@ -706,7 +947,7 @@ class AnnouncementParser(BaseParser):
                         parent = link.find_parent(['div', 'article', 'li', 'section'])
                     
                     if parent:
-                        parent_text = parent.get_text(separator=' ', strip=True)
+                        parent_text = document.node_text(parent)
                         # Ищем описание (обычно в <p>, <span>, или <div> внутри контейнера)
                         desc_elem = parent.find(['p', 'span', 'div'], recursive=True)
                         if desc_elem and desc_elem != link:
@@ -715,14 +956,11 @@ class AnnouncementParser(BaseParser):
                     # Для неизвестных бирж берем ближайшего родителя
                     parent = link.find_parent(['div', 'article', 'li'])
                     if parent:
-                        parent_text = parent.get_text(separator=' ', strip=True)
+                        parent_text = document.node_text(parent)
                 
                 # Проверяем ключевые слова в тексте ссылки и родительском контейнере
-                search_text = (link_text + ' ' + parent_text).lower()
-                matched = []
-                for keyword in keywords:
-                    if keyword.lower() in search_text:
-                        matched.append(keyword)
+                search_text = link_text + ' ' + parent_text
+                matched = keyword_matcher.find_all(search_text)
                 
                 # Если нашли совпадения, добавляем ссылку
                 if matched:
@@ -753,19 +991,19 @@ class AnnouncementParser(BaseParser):
         # попробуем найти ВСЕ ссылки на странице и проверить их контекст
         if len(announcement_links) == 0:
             logger.warning(f"   ⚠️ Не найдено ссылок через селекторы, пробуем fallback...")
-            fallback_links = self._extract_links_fallback(soup, keywords, link_patterns.get(exchange, {}))
+            fallback_links = self._extract_links_fallback(document, keywords, link_patterns.get(exchange, {}))
             announcement_links.extend(fallback_links)
         
         # SUPER FALLBACK: Если и fallback не помог, пробуем последний способ
         if len(announcement_links) == 0:
             logger.warning(f"   ⚠️ Fallback не помог, пробуем SUPER FALLBACK (поиск по всем ссылкам)...")
-            super_fallback_links = self._extract_links_super_fallback(soup, keywords, link_patterns.get(exchange, {}))
+            super_fallback_links = self._extract_links_super_fallback(document, keywords, link_patterns.get(exchange, {}))
             announcement_links.extend(super_fallback_links)
         
         # Ограничиваем количество ссылок (топ-10)
         return announcement_links[:10]
     
-    def _extract_links_fallback(self, soup: BeautifulSoup, keywords: List[str], exchange_config: dict) -> List[Dict[str, str]]:
+    def _extract_links_fallback(self, document: HtmlDocument, keywords: List[str], exchange_config: dict) -> List[Dict[str, str]]:
         """
         Fallback метод для поиска ссылок, когда основные селекторы не дают результата.
         Ищет ВСЕ текстовые блоки с ключевыми словами и пытается найти рядом ссылки.
@@ -777,7 +1015,7 @@ class AnnouncementParser(BaseParser):
         # Ищем все элементы, содержащие ключевые слова
         for keyword in keywords:
             # Ищем все элементы с текстом, содержащим ключевое слово
-            elements = soup.find_all(string=lambda text: text and keyword.lower() in text.lower())
+            elements = document.strings_containing(keyword)
             
             logger.debug(f"   🔍 Найдено {len(elements)} элементов с ключевым словом '{keyword}'")
             
@@ -904,7 +1142,7 @@ class AnnouncementParser(BaseParser):
         logger.info(f"   📊 FALLBACK результат: найдено {len(announcement_links)} ссылок")
         return announcement_links[:10]
     
-    def _extract_links_super_fallback(self, soup: BeautifulSoup, keywords: List[str], exchange_config: dict) -> List[Dict[str, str]]:
+    def _extract_links_super_fallback(self, document: HtmlDocument, keywords: List[str], exchange_config: dict) -> List[Dict[str, str]]:
         """
         SUPER FALLBACK: Последний шанс найти ссылки.
         Берет ВСЕ ссылки на странице и проверяет, есть ли рядом ключевые слова.
@@ -914,11 +1152,13 @@ class AnnouncementParser(BaseParser):
         seen_urls = set()
         
         # Находим ВСЕ ссылки на странице
-        all_links = soup.find_all('a', href=True)
+        all_links = document.links
         logger.info(f"   📊 Найдено {len(all_links)} ссылок на странице")
         
-        # Объединяем ключевые слова в одну строку для поиска
-        keywords_lower = [kw.lower() for kw in keywords]
+        # Набор ключевых слов компилируется один раз на все контейнеры
+        keyword_matcher = get_keyword_matcher(keywords)
+        # Внешний контейнер обычно общий для многих ссылок - ищем в нем один раз
+        container_matches: Dict[int, tuple] = {}
         
         for link in all_links:
             try:
@@ -956,14 +1196,14 @@ class AnnouncementParser(BaseParser):
                     else:
                         break
                 
-                # Получаем весь текст из контейнера
-                container_text = container.get_text(separator=' ', strip=True).lower()
-                
-                # Проверяем, содержит ли контейнер хотя бы одно ключевое слово
-                matched_keywords = []
-                for keyword in keywords:
-                    if keyword.lower() in container_text:
-                        matched_keywords.append(keyword)
+                # Получаем весь текст из контейнера и проверяем, содержит ли
+                # он хотя бы одно ключевое слово
+                cached = container_matches.get(id(container))
+                if cached is None:
+                    container_text = document.node_text(container).lower()
+                    cached = (container_text, keyword_matcher.find_all(container_text))
+                    container_matches[id(container)] = cached
+                container_text, matched_keywords = cached
                 
                 if matched_keywords:
                     # Нашли совпадение! Извлекаем информацию
@@ -1009,24 +1249,3 @@ class AnnouncementParser(BaseParser):
         
         logger.info(f"   📊 SUPER FALLBACK результат: найдено {len(announcement_links)} ссылок")
         return announcement_links[:10]
-
-    def _clean_html(self, html: str) -> str:
-        """
-        Очистка HTML от динамических элементов перед хэшированием
-        """
-        # Удаляем скрипты и стили
-        soup = BeautifulSoup(html, 'html.parser')
-        for script in soup(['script', 'style']):
-            script.decompose()
-
-        # Удаляем комментарии
-        for comment in soup.findAll(text=lambda text: isinstance(text, str) and text.startswith('<!--')):
-            comment.extract()
-
-        # Получаем очищенный текст
-        clean_text = soup.get_text()
-
-        # Удаляем лишние пробелы
-        clean_text = re.sub(r'\s+', ' ', clean_text).strip()
-
-        return clean_text
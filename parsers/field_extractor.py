@@ -0,0 +1,106 @@
+"""
+Скомпилированное извлечение полей промоакции из JSON-объектов (UniversalParser)
+
+_create_promo_from_object ищет ~30 полей промоакции, у каждого - список
+ключей-кандидатов (title: name/title/campaignName/...). Раньше на каждое
+поле строился словарь ключей объекта в нижнем регистре и перебирались все
+кандидаты - ~30 словарей и сотни lower() на один объект.
+
+Объекты одного ответа API устроены одинаково, поэтому соответствие
+"поле промоакции -> ключи объекта" считается один раз на набор ключей
+объекта (план) и кэшируется. Для следующих объектов с тем же набором ключей
+извлечение - проход по готовому плану: только поиск значения по ключу и
+проверка на пустоту.
+
+Семантика как у UniversalParser._get_value:
+- ключи сравниваются без учета регистра (при совпадении в нижнем регистре
+  побеждает последний ключ объекта)
+- берется первое непустое значение в порядке кандидатов (None и строки из
+  пробелов пропускаются)
+
+Использование:
+    extractor = FieldExtractor((('title', ('name', 'title')), ...))
+    fields = extractor.extract(obj)   # {'title': ...} - только найденные поля
+"""
+import logging
+import threading
+from typing import Any, Dict, Iterable, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Сколько планов (наборов ключей объектов) хранить на один экстрактор
+MAX_PLANS = 1024
+
+# Значения JSON, у которых str() никогда не бывает пустым
+_ALWAYS_FILLED = (int, float, bool, list, dict)
+
+
+def is_filled(value: Any) -> bool:
+    """value is not None and str(value).strip() - без str() для чисел, списков и словарей"""
+    if value is None:
+        return False
+    if isinstance(value, str):
+        return bool(value.strip())
+    if isinstance(value, _ALWAYS_FILLED):
+        return True
+    return bool(str(value).strip())
+
+
+def lower_key_map(keys: Iterable[str]) -> Dict[str, str]:
+    """Ключ в нижнем регистре -> исходный ключ объекта (последний при совпадении)"""
+    return {str(key).lower(): key for key in keys}
+
+
+class FieldExtractor:
+    """Поля промоакции по спискам ключей-кандидатов, план - на набор ключей объекта"""
+
+    def __init__(self, fields: Sequence[Tuple[str, Sequence[str]]], max_plans: int = MAX_PLANS):
+        # Кандидаты в нижнем регистре без повторов (повтор дал бы то же значение)
+        self.fields: Tuple[Tuple[str, Tuple[str, ...]], ...] = tuple(
+            (field, tuple(dict.fromkeys(key.lower() for key in candidates)))
+            for field, candidates in fields
+        )
+        self.max_plans = max_plans
+        self._plans: Dict[Tuple, Tuple[Tuple[str, Tuple[str, ...]], ...]] = {}
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'compiled': 0,
+        }
+
+    def _plan(self, obj: Dict) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+        """План для набора ключей объекта: (поле, ключи объекта в порядке кандидатов)"""
+        shape = tuple(obj)
+        plan = self._plans.get(shape)
+        if plan is not None:
+            return plan
+
+        lookup = lower_key_map(shape)
+        plan = tuple(
+            (field, sources) for field, sources in (
+                (field, tuple(lookup[key] for key in candidates if key in lookup))
+                for field, candidates in self.fields
+            ) if sources
+        )
+        with self._lock:
+            if len(self._plans) >= self.max_plans:
+                # Схем ответов немного; переполнение - объекты с произвольными ключами
+                self._plans.clear()
+            self._plans[shape] = plan
+            self._stats['compiled'] += 1
+        return plan
+
+    def extract(self, obj: Dict) -> Dict[str, Any]:
+        """Найденные поля в порядке self.fields (поля без значения не попадают)"""
+        result = {}
+        for field, sources in self._plan(obj):
+            for source in sources:
+                value = obj[source]
+                if is_filled(value):
+                    result[field] = value
+                    break
+        return result
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'plans': len(self._plans)}
@@ -0,0 +1,117 @@
+"""
+HTML-страница, разобранная один раз для всех проходов AnnouncementParser
+
+Раньше страница анонсов разбиралась дважды (дерево для стратегии и еще раз
+в _clean_html), а извлечение ссылок, fallback и super fallback заново
+обходили дерево: find_all по всем ссылкам, find_all по тексту на каждое
+ключевое слово, get_text одного и того же контейнера на каждую ссылку.
+
+HtmlDocument держит одно дерево и лениво считает производные от него:
+- soup - дерево BeautifulSoup (lxml, если установлен, иначе html.parser)
+- text - текст страницы (get_text: без script/style и комментариев)
+- clean_text - text со схлопнутыми пробелами (hash для any_change)
+- links - все <a href> в порядке документа
+- strings - все текстовые узлы с их lower() (поиск ключевых слов)
+- node_text(node) - текст узла, один раз на узел
+
+Использование:
+    document = HtmlDocument(html_content)
+    page_hash = md5(document.clean_text)
+    for link in document.links_containing('/support/announcement/'): ...
+"""
+import logging
+import re
+from typing import Dict, List, Optional, Tuple
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+try:
+    import lxml  # noqa: F401
+    LXML_AVAILABLE = True
+except ImportError:
+    LXML_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+HTML_PARSERS = ('auto', 'lxml', 'html.parser')
+
+_lxml_warning_logged = False
+
+
+def resolve_html_parser(name: Optional[str] = None) -> str:
+    """
+    Бэкенд BeautifulSoup по настройке ('auto', 'lxml', 'html.parser')
+
+    auto - lxml, если установлен (быстрее в 1.5-2 раза на больших страницах).
+    """
+    global _lxml_warning_logged
+    name = (name or 'auto').lower()
+    if name not in HTML_PARSERS:
+        logger.warning(f"⚠️ Неизвестный HTML-парсер '{name}', используем auto")
+        name = 'auto'
+    if name == 'html.parser':
+        return name
+    if LXML_AVAILABLE:
+        return 'lxml'
+    if name == 'lxml' and not _lxml_warning_logged:
+        _lxml_warning_logged = True
+        logger.warning("⚠️ lxml не установлен, HTML разбирается html.parser")
+    return 'html.parser'
+
+
+class HtmlDocument:
+    """Дерево страницы и кэш производных от него"""
+
+    def __init__(self, html: str, parser: Optional[str] = None):
+        self.html = html
+        self.parser = resolve_html_parser(parser)
+        self.soup = BeautifulSoup(html, self.parser)
+
+        self._text: Optional[str] = None
+        self._clean_text: Optional[str] = None
+        self._links: Optional[List[Tag]] = None
+        self._strings: Optional[List[Tuple[NavigableString, str]]] = None
+        self._node_texts: Dict[int, str] = {}
+
+    @property
+    def text(self) -> str:
+        if self._text is None:
+            self._text = self.soup.get_text()
+        return self._text
+
+    @property
+    def clean_text(self) -> str:
+        """Текст страницы без лишних пробелов (для hash страницы)"""
+        if self._clean_text is None:
+            self._clean_text = re.sub(r'\s+', ' ', self.text).strip()
+        return self._clean_text
+
+    @property
+    def links(self) -> List[Tag]:
+        if self._links is None:
+            self._links = self.soup.find_all('a', href=True)
+        return self._links
+
+    def links_containing(self, substring: str) -> List[Tag]:
+        """Ссылки, в href которых есть substring (как селектор a[href*="..."])"""
+        return [link for link in self.links if substring in link.get('href', '')]
+
+    @property
+    def strings(self) -> List[Tuple[NavigableString, str]]:
+        if self._strings is None:
+            self._strings = [(string, string.lower()) for string in self.soup.find_all(string=True) if string]
+        return self._strings
+
+    def strings_containing(self, keyword: str) -> List[NavigableString]:
+        """Текстовые узлы, содержащие keyword без учета регистра"""
+        keyword = keyword.lower()
+        return [string for string, lowered in self.strings if keyword in lowered]
+
+    def node_text(self, node: Tag) -> str:
+        """node.get_text(separator=' ', strip=True), один раз на узел"""
+        key = id(node)
+        text = self._node_texts.get(key)
+        if text is None:
+            text = node.get_text(separator=' ', strip=True)
+            self._node_texts[key] = text
+        return text
@@ -0,0 +1,174 @@
+"""
+Выученные пути к промоакциям в JSON-ответах API (UniversalParser)
+
+Без кэша parse_json_data на каждом опросе рекурсивно обходит весь ответ и
+для каждого вложенного объекта проверяет все ключи (_has_promo_fields),
+хотя структура ответа ссылки почти никогда не меняется.
+
+После полного поиска запоминаются пути, где нашлись промоакции
+(('data', 'list', LIST_ITEM) - индексы списков обобщены). Следующие опросы
+с тем же URL и теми же ключами верхнего уровня идут только по этим путям:
+обход в том же порядке, что и полный поиск, объекты на путях проверяются
+тем же _has_promo_fields, остальные ветки ответа не посещаются.
+
+Полный поиск выполняется снова, если:
+- по сохраненным путям не нашлось ни одного объекта (структура изменилась)
+- пути использованы REDISCOVER_EVERY раз подряд (подхватить новые пути)
+
+Использование:
+    cache = get_json_path_cache()
+    key = schema_key(url, data)
+    items = cache.find(key, data, has_promo_fields)
+    if not items:
+        found_paths = {}
+        items = find_all_objects(data, found_paths=found_paths)
+        cache.learn(key, found_paths)
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Iterable, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Сегмент пути "любой элемент списка" (ключи JSON-объектов - всегда строки)
+LIST_ITEM = None
+# Через сколько опросов по сохраненным путям выполнить полный поиск
+REDISCOVER_EVERY = 100
+# Сколько схем ответов хранить (URL x ключи верхнего уровня)
+MAX_SCHEMAS = 500
+
+
+def schema_key(url: str, data: Any) -> Tuple:
+    """Ключ схемы: URL и ключи верхнего уровня ответа"""
+    if isinstance(data, dict):
+        return (url, tuple(sorted(data.keys())))
+    return (url, type(data).__name__)
+
+
+class _PathNode:
+    """Узел дерева путей: emit - объект на этом пути может быть промоакцией"""
+
+    __slots__ = ('emit', 'children')
+
+    def __init__(self):
+        self.emit = False
+        self.children: Dict[Optional[str], '_PathNode'] = {}
+
+
+class PathSchema:
+    """Сохраненные пути одной схемы ответа"""
+
+    def __init__(self, paths: Iterable[Tuple]):
+        self.paths: List[Tuple] = list(paths)
+        self.root = _PathNode()
+        for path in self.paths:
+            node = self.root
+            for segment in path:
+                node = node.children.setdefault(segment, _PathNode())
+            node.emit = True
+        self.uses = 0
+
+    def collect(self, data: Any, predicate: Callable[[Dict], bool]) -> List[Dict]:
+        """Объекты на сохраненных путях (в порядке полного обхода)"""
+        found: List[Dict] = []
+        self._collect(data, self.root, predicate, found)
+        return found
+
+    def _collect(self, data: Any, node: _PathNode, predicate: Callable[[Dict], bool], found: List[Dict]):
+        if isinstance(data, dict):
+            if node.emit and predicate(data):
+                found.append(data)
+            if node.children:
+                for key, value in data.items():
+                    child = node.children.get(key)
+                    if child is not None:
+                        self._collect(value, child, predicate, found)
+        elif isinstance(data, list):
+            child = node.children.get(LIST_ITEM)
+            if child is not None:
+                for item in data:
+                    self._collect(item, child, predicate, found)
+
+
+class JsonPathCache:
+    """Схемы ответов по ключу schema_key"""
+
+    def __init__(self, max_schemas: int = MAX_SCHEMAS, rediscover_every: int = REDISCOVER_EVERY):
+        self.max_schemas = max_schemas
+        self.rediscover_every = rediscover_every
+        self._schemas: "OrderedDict[Hashable, PathSchema]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'stale': 0,
+            'revalidations': 0,
+        }
+
+    def find(self, key: Hashable, data: Any, predicate: Callable[[Dict], bool]) -> Optional[List[Dict]]:
+        """
+        Объекты по сохраненным путям
+
+        Returns:
+            Найденные объекты или None - нужен полный поиск
+        """
+        with self._lock:
+            schema = self._schemas.get(key)
+            if schema is None:
+                self._stats['misses'] += 1
+                return None
+            self._schemas.move_to_end(key)
+            if schema.uses >= self.rediscover_every:
+                self._stats['revalidations'] += 1
+                return None
+            schema.uses += 1
+
+        items = schema.collect(data, predicate)
+        with self._lock:
+            if items:
+                self._stats['hits'] += 1
+            else:
+                self._stats['stale'] += 1
+        if not items:
+            logger.info(f"🔄 Пути промоакций устарели ({len(schema.paths)}), полный поиск")
+        return items or None
+
+    def learn(self, key: Hashable, paths: Iterable[Tuple]):
+        """Сохранить пути, найденные полным поиском (пусто - забыть схему)"""
+        schema = PathSchema(paths)
+        with self._lock:
+            if not schema.paths:
+                self._schemas.pop(key, None)
+                return
+            self._schemas[key] = schema
+            self._schemas.move_to_end(key)
+            while len(self._schemas) > self.max_schemas:
+                self._schemas.popitem(last=False)
+        logger.debug(f"📍 Запомнено путей промоакций: {len(schema.paths)}")
+
+    def clear(self):
+        with self._lock:
+            self._schemas.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {**self._stats, 'schemas': len(self._schemas)}
+
+
+# Глобальный кэш путей
+_json_path_cache: Optional[JsonPathCache] = None
+_json_path_cache_lock = threading.Lock()
+
+
+def get_json_path_cache() -> JsonPathCache:
+    """Получить глобальный экземпляр JsonPathCache (singleton)"""
+    global _json_path_cache
+
+    if _json_path_cache is None:
+        with _json_path_cache_lock:
+            if _json_path_cache is None:
+                _json_path_cache = JsonPathCache()
+
+    return _json_path_cache
@@ -13,6 +13,8 @@ from telethon.errors import (
 from telethon.tl.types import Channel, User
 import asyncio
 
+from utils.keyword_matcher import get_keyword_matcher
+
 logger = logging.getLogger(__name__)
 
 class TelegramParser:
@@ -409,14 +411,8 @@ class TelegramParser:
         if not text or not keywords:
             return []
 
-        text_lower = text.lower()
-        matched = []
-
-        for keyword in keywords:
-            if keyword.lower() in text_lower:
-                matched.append(keyword)
-
-        return matched
+        # Набор слов компилируется один раз (кэш по набору), текст - один проход
+        return get_keyword_matcher(keywords).find_all(text)
 
     def extract_links(self, text: str) -> List[str]:
         """Извлечение ссылок из текста"""
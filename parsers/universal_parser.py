@@ -3,12 +3,170 @@ import logging
 import hashlib
 import requests
 from datetime import datetime
+from functools import lru_cache
 from typing import List, Dict, Any, Optional
 from .base_parser import BaseParser
+from .field_extractor import FieldExtractor, is_filled, lower_key_map
+from .json_path_cache import LIST_ITEM, get_json_path_cache, schema_key
 from utils.url_template_builder import get_url_builder
 
 logger = logging.getLogger(__name__)
 
+# РАСШИРЕННЫЙ список ключевых слов полей промоакций для разных бирж
+PROMO_KEYWORDS = (
+    # Общие поля
+    'name', 'title', 'description', 'reward', 'prize', 'token',
+    'start', 'end', 'url', 'link', 'id', 'code', 'campaign',
+    'promotion', 'activity', 'event', 'launchpad', 'staking',
+    'coin', 'symbol', 'amount', 'pool', 'time', 'date',
+    # Специфичные поля Gate.io
+    'currency', 'participants', 'icon', 'status', 'phase',
+    'registered', 'rewards', 'exchange', 'lottery', 'rule',
+    # Дополнительные поля для других бирж
+    'airdrop', 'candydrop', 'trading', 'snapshot', 'allocation'
+)
+
+
+@lru_cache(maxsize=4096)
+def _is_promo_key(key: str) -> bool:
+    """Похож ли ключ на поле промоакции (имена ключей повторяются - считаем один раз)"""
+    key_lower = str(key).lower()
+    return any(keyword in key_lower for keyword in PROMO_KEYWORDS)
+
+
+@lru_cache(maxsize=1024)
+def _lower_key_map(keys: tuple) -> Dict[str, str]:
+    """Ключи объекта в нижнем регистре (один раз на набор ключей)"""
+    return lower_key_map(keys)
+
+
+# Поля промоакции и ключи-кандидаты в объектах API разных бирж
+# (первое непустое значение по порядку, без учета регистра ключей)
+PROMO_FIELD_KEYS = (
+    # Title: ищем в максимально широком списке (Bybit, MEXC, Binance, Gate.io и др.)
+    ('title', (
+        'name', 'title', 'campaignName', 'activityName', 'projectName',
+        'activityCurrencyFullName',  # MEXC: полное название токена промоакции
+        'tokenFullName', 'activityCoinFullName', 'coinFullName',  # Полные названия токенов
+        'eventName', 'promotionName', 'launchpadName'
+    )),
+    # Description
+    ('description', (
+        'description', 'desc', 'details', 'info', 'introduction',
+        'content', 'remark', 'note', 'summary'
+    )),
+    # Prize pool
+    ('total_prize_pool', (
+        'totalPrizePool', 'reward', 'prize', 'amount', 'prizePool', 'totalReward',
+        'rewardAmount', 'totalAmount', 'poolSize',
+        'total_rewards'  # Gate.io CandyDrop
+    )),
+    # Prize pool USD (Gate.io CandyDrop и др.)
+    ('total_prize_pool_usd', (
+        'total_rewards_usdt', 'totalRewardsUsdt', 'prizePoolUsdt',
+        'totalAmountUsdt', 'poolValueUsd'
+    )),
+    # Max reward per user (Gate.io CandyDrop и др.)
+    ('user_max_rewards', (
+        'user_max_rewards', 'userMaxRewards', 'maxRewardPerUser',
+        'perUserMaxReward', 'maxPrize'
+    )),
+    ('user_max_rewards_usd', (
+        'user_max_rewards_usdt', 'userMaxRewardsUsdt', 'maxRewardPerUserUsdt'
+    )),
+    # Exchange rate (Gate.io CandyDrop)
+    ('exchange_rate', (
+        'exchange_rate', 'exchangeRate', 'price', 'tokenPrice', 'rate'
+    )),
+    # Conditions/Rules (Gate.io CandyDrop rule_name)
+    ('conditions', (
+        'rule_name', 'ruleName', 'rules', 'conditions', 'requirements',
+        'participationRules', 'eligibility'
+    )),
+    # Phase/Wave number (Gate.io CandyDrop)
+    ('phase', (
+        'phase', 'wave', 'round', 'batch', 'period'
+    )),
+    # Award token: расширенный список для разных бирж
+    ('award_token', (
+        'activityCurrency',  # MEXC: символ токена промоакции
+        'token', 'coin', 'symbol', 'currency',  # Общие
+        'activityCoin', 'awardToken', 'rewardToken',  # MEXC, Binance
+        'tradeCoin', 'targetCoin', 'assetSymbol',  # Gate.io, OKX
+        'currencyId', 'coinSymbol', 'tokenSymbol'  # Другие биржи
+    )),
+    # Participants
+    ('participants_count', (
+        'participants', 'users', 'joiners', 'totalUsers',
+        'participantCount', 'userCount', 'joinedUsers'
+    )),
+    # Time (расширенный поиск для Bybit)
+    ('start_time', (
+        'start_time', 'startTime', 'start', 'startDate', 'beginTime', 'openTime',
+        'startTimestamp', 'beginTimestamp',
+        'depositStart', 'applyStart'  # Bybit Token Splash
+    )),
+    ('end_time', (
+        'end_time', 'endTime', 'end', 'endDate', 'expireTime', 'closeTime',
+        'endTimestamp', 'expireTimestamp',
+        'depositEnd', 'applyEnd'  # Bybit Token Splash
+    )),
+    # Links
+    ('link', (
+        'url', 'link', 'detailUrl', 'jumpUrl', 'joinUrl',
+        'campaignUrl', 'activityUrl', 'projectUrl', 'href'
+    )),
+    # Icon/Image
+    ('icon', (
+        'icon', 'iconUrl', 'imageUrl', 'logo', 'logoUrl',
+        'tokenIcon', 'coinIcon', 'img', 'image', 'thumbnail'
+    )),
+    # Дополнительные поля для генерации URL
+    ('navName', (
+        'navName', 'slug', 'projectSlug', 'projectCode', 'code'
+    )),
+    ('homeName', (
+        'homeName', 'shortName', 'projectShortName'
+    )),
+    # НОВЫЕ ПОЛЯ ДЛЯ ДЕТАЛЬНОЙ ИНФОРМАЦИИ (Bybit и др.)
+    ('winners_count', (
+        'winnersCount', 'winners', 'prizeCount', 'rewardCount',
+        'totalWinners', 'luckyCount', 'winnerCount'
+    )),
+    ('reward_per_winner', (
+        'rewardPerWinner', 'prizePerUser', 'amountPerWinner',
+        'rewardAmount', 'perUserReward', 'unitPrize'
+    )),
+    ('status', (
+        'status', 'state', 'taskStatus', 'projectStatus',
+        'activityStatus', 'activity_status', 'campaignStatus'  # activity_status для Gate.io CandyDrop
+    )),
+    ('reward_type', (
+        'rewardType', 'prizeType', 'awardType', 'distributionType',
+        'reward_type'  # Gate.io CandyDrop (это массив!)
+    )),
+    ('task_type', (
+        'taskType', 'activityType', 'campaignType', 'type'
+    )),
+    ('publish_time', (
+        'publishTime', 'announceTime', 'resultTime', 'drawTime'
+    )),
+    # Новые поля для торговых условий (Bybit Token Splash Trading)
+    ('min_trade_amount', (
+        'minTradeAmount', 'minimumTrade', 'tradeThreshold', 'minVolume'
+    )),
+    ('trade_token', (
+        'tradeToken', 'tradingToken', 'targetToken'
+    )),
+    ('splash_type', (
+        'splashType', 'tokenSplashType'
+    )),  # trading или regular
+)
+
+# Извлечение полей скомпилировано на набор ключей объекта (parsers/field_extractor.py)
+_PROMO_FIELDS = FieldExtractor(PROMO_FIELD_KEYS)
+
+
 class UniversalParser(BaseParser):
     def __init__(self, url: str):
         super().__init__(url)  # ✅ Передаем url в родительский класс
@@ -224,10 +382,20 @@ class UniversalParser(BaseParser):
                 logger.info(f"🎯 Обнаружен MEXC Launchpad API, используем специализированный парсер")
                 return self._parse_mexc_launchpad(data)
             
-            # Автоматически находим промоакции в JSON
-            logger.info(f"🔍 Поиск объектов-промоакций в JSON структуре...")
-            all_items = self._find_all_objects(data)
-            logger.info(f"📊 Найдено {len(all_items)} потенциальных объектов-промоакций")
+            # Сначала идем по путям, где промоакции нашлись в прошлый раз
+            path_cache = get_json_path_cache()
+            cache_key = schema_key(self.url, data)
+            all_items = path_cache.find(cache_key, data, self._has_promo_fields)
+
+            if all_items:
+                logger.info(f"⚡ Объекты-промоакции по сохраненным путям: {len(all_items)}")
+            else:
+                # Автоматически находим промоакции в JSON
+                logger.info(f"🔍 Поиск объектов-промоакций в JSON структуре...")
+                found_paths: Dict[tuple, None] = {}
+                all_items = self._find_all_objects(data, found_paths=found_paths)
+                path_cache.learn(cache_key, found_paths)
+                logger.info(f"📊 Найдено {len(all_items)} потенциальных объектов-промоакций")
 
             promotions = []
 
@@ -252,8 +420,19 @@ class UniversalParser(BaseParser):
             logger.error(f"❌ Ошибка парсинга JSON данных: {e}", exc_info=True)
             return []
 
-    def _find_all_objects(self, data: Any, depth: int = 0) -> List[Dict]:
-        """Рекурсивно находит все объекты в JSON структуре"""
+    def _find_all_objects(
+        self,
+        data: Any,
+        depth: int = 0,
+        path: tuple = (),
+        found_paths: Optional[Dict[tuple, None]] = None
+    ) -> List[Dict]:
+        """
+        Рекурсивно находит все объекты в JSON структуре
+
+        found_paths (если передан) собирает пути найденных объектов
+        для json_path_cache (индексы списков - LIST_ITEM).
+        """
         objects = []
 
         if depth > 5:  # Защита от бесконечной рекурсии
@@ -263,15 +442,17 @@ class UniversalParser(BaseParser):
             # Если у объекта есть поля похожие на промоакцию - добавляем
             if self._has_promo_fields(data):
                 objects.append(data)
+                if found_paths is not None:
+                    found_paths[path] = None
 
             # Рекурсивно проверяем все значения
-            for value in data.values():
-                objects.extend(self._find_all_objects(value, depth + 1))
+            for key, value in data.items():
+                objects.extend(self._find_all_objects(value, depth + 1, path + (key,), found_paths))
 
         elif isinstance(data, list):
             # Обрабатываем каждый элемент массива
             for item in data:
-                objects.extend(self._find_all_objects(item, depth + 1))
+                objects.extend(self._find_all_objects(item, depth + 1, path + (LIST_ITEM,), found_paths))
 
         return objects
 
@@ -280,25 +461,14 @@ class UniversalParser(BaseParser):
         if not isinstance(obj, dict):
             return False
 
-        # РАСШИРЕННЫЙ список ключевых слов для разных бирж
-        promo_keywords = [
-            # Общие поля
-            'name', 'title', 'description', 'reward', 'prize', 'token',
-            'start', 'end', 'url', 'link', 'id', 'code', 'campaign',
-            'promotion', 'activity', 'event', 'launchpad', 'staking',
-            'coin', 'symbol', 'amount', 'pool', 'time', 'date',
-            # Специфичные поля Gate.io
-            'currency', 'participants', 'icon', 'status', 'phase',
-            'registered', 'rewards', 'exchange', 'lottery', 'rule',
-            # Дополнительные поля для других бирж
-            'airdrop', 'candydrop', 'trading', 'snapshot', 'allocation'
-        ]
-
-        # Считаем сколько промо-ключей есть в объекте
-        promo_keys_count = sum(1 for key in obj.keys() if any(kw in key.lower() for kw in promo_keywords))
-
         # Если есть хотя бы 2 промо-ключа, считаем это промоакцией
-        return promo_keys_count >= 2
+        promo_keys_count = 0
+        for key in obj:
+            if _is_promo_key(key):
+                promo_keys_count += 1
+                if promo_keys_count >= 2:
+                    return True
+        return False
 
     def _create_promo_from_object(self, obj: Dict) -> Dict[str, Any]:
         """Создает стандартизированную промоакцию из любого объекта"""
@@ -326,124 +496,7 @@ class UniversalParser(BaseParser):
             promo_data = {
                 'exchange': exchange_name,
                 'promo_id': promo_id,
-                # Title: ищем в максимально широком списке (Bybit, MEXC, Binance, Gate.io и др.)
-                'title': self._get_value(obj, [
-                    'name', 'title', 'campaignName', 'activityName', 'projectName',
-                    'activityCurrencyFullName',  # MEXC: полное название токена промоакции
-                    'tokenFullName', 'activityCoinFullName', 'coinFullName',  # Полные названия токенов
-                    'eventName', 'promotionName', 'launchpadName'
-                ]),
-                # Description
-                'description': self._get_value(obj, [
-                    'description', 'desc', 'details', 'info', 'introduction',
-                    'content', 'remark', 'note', 'summary'
-                ]),
-                # Prize pool
-                'total_prize_pool': self._get_value(obj, [
-                    'totalPrizePool', 'reward', 'prize', 'amount', 'prizePool', 'totalReward',
-                    'rewardAmount', 'totalAmount', 'poolSize',
-                    'total_rewards'  # Gate.io CandyDrop
-                ]),
-                # Prize pool USD (Gate.io CandyDrop и др.)
-                'total_prize_pool_usd': self._get_value(obj, [
-                    'total_rewards_usdt', 'totalRewardsUsdt', 'prizePoolUsdt', 
-                    'totalAmountUsdt', 'poolValueUsd'
-                ]),
-                # Max reward per user (Gate.io CandyDrop и др.)
-                'user_max_rewards': self._get_value(obj, [
-                    'user_max_rewards', 'userMaxRewards', 'maxRewardPerUser',
-                    'perUserMaxReward', 'maxPrize'
-                ]),
-                'user_max_rewards_usd': self._get_value(obj, [
-                    'user_max_rewards_usdt', 'userMaxRewardsUsdt', 'maxRewardPerUserUsdt'
-                ]),
-                # Exchange rate (Gate.io CandyDrop)
-                'exchange_rate': self._get_value(obj, [
-                    'exchange_rate', 'exchangeRate', 'price', 'tokenPrice', 'rate'
-                ]),
-                # Conditions/Rules (Gate.io CandyDrop rule_name)
-                'conditions': self._get_value(obj, [
-                    'rule_name', 'ruleName', 'rules', 'conditions', 'requirements',
-                    'participationRules', 'eligibility'
-                ]),
-                # Phase/Wave number (Gate.io CandyDrop)
-                'phase': self._get_value(obj, [
-                    'phase', 'wave', 'round', 'batch', 'period'
-                ]),
-                # Award token: расширенный список для разных бирж
-                'award_token': self._get_value(obj, [
-                    'activityCurrency',  # MEXC: символ токена промоакции
-                    'token', 'coin', 'symbol', 'currency',  # Общие
-                    'activityCoin', 'awardToken', 'rewardToken',  # MEXC, Binance
-                    'tradeCoin', 'targetCoin', 'assetSymbol',  # Gate.io, OKX
-                    'currencyId', 'coinSymbol', 'tokenSymbol'  # Другие биржи
-                ]),
-                # Participants
-                'participants_count': self._get_value(obj, [
-                    'participants', 'users', 'joiners', 'totalUsers',
-                    'participantCount', 'userCount', 'joinedUsers'
-                ]),
-                # Time (расширенный поиск для Bybit)
-                'start_time': self._get_value(obj, [
-                    'start_time', 'startTime', 'start', 'startDate', 'beginTime', 'openTime',
-                    'startTimestamp', 'beginTimestamp',
-                    'depositStart', 'applyStart'  # Bybit Token Splash
-                ]),
-                'end_time': self._get_value(obj, [
-                    'end_time', 'endTime', 'end', 'endDate', 'expireTime', 'closeTime',
-                    'endTimestamp', 'expireTimestamp',
-                    'depositEnd', 'applyEnd'  # Bybit Token Splash
-                ]),
-                # Links
-                'link': self._get_value(obj, [
-                    'url', 'link', 'detailUrl', 'jumpUrl', 'joinUrl',
-                    'campaignUrl', 'activityUrl', 'projectUrl', 'href'
-                ]),
-                # Icon/Image
-                'icon': self._get_value(obj, [
-                    'icon', 'iconUrl', 'imageUrl', 'logo', 'logoUrl',
-                    'tokenIcon', 'coinIcon', 'img', 'image', 'thumbnail'
-                ]),
-                # Дополнительные поля для генерации URL
-                'navName': self._get_value(obj, [
-                    'navName', 'slug', 'projectSlug', 'projectCode', 'code'
-                ]),
-                'homeName': self._get_value(obj, [
-                    'homeName', 'shortName', 'projectShortName'
-                ]),
-                # НОВЫЕ ПОЛЯ ДЛЯ ДЕТАЛЬНОЙ ИНФОРМАЦИИ (Bybit и др.)
-                'winners_count': self._get_value(obj, [
-                    'winnersCount', 'winners', 'prizeCount', 'rewardCount',
-                    'totalWinners', 'luckyCount', 'winnerCount'
-                ]),
-                'reward_per_winner': self._get_value(obj, [
-                    'rewardPerWinner', 'prizePerUser', 'amountPerWinner',
-                    'rewardAmount', 'perUserReward', 'unitPrize'
-                ]),
-                'status': self._get_value(obj, [
-                    'status', 'state', 'taskStatus', 'projectStatus',
-                    'activityStatus', 'activity_status', 'campaignStatus'  # activity_status для Gate.io CandyDrop
-                ]),
-                'reward_type': self._get_value(obj, [
-                    'rewardType', 'prizeType', 'awardType', 'distributionType',
-                    'reward_type'  # Gate.io CandyDrop (это массив!)
-                ]),
-                'task_type': self._get_value(obj, [
-                    'taskType', 'activityType', 'campaignType', 'type'
-                ]),
-                'publish_time': self._get_value(obj, [
-                    'publishTime', 'announceTime', 'resultTime', 'drawTime'
-                ]),
-                # Новые поля для торговых условий (Bybit Token Splash Trading)
-                'min_trade_amount': self._get_value(obj, [
-                    'minTradeAmount', 'minimumTrade', 'tradeThreshold', 'minVolume'
-                ]),
-                'trade_token': self._get_value(obj, [
-                    'tradeToken', 'tradingToken', 'targetToken'
-                ]),
-                'splash_type': self._get_value(obj, [
-                    'splashType', 'tokenSplashType'
-                ]),  # trading или regular
+                **_PROMO_FIELDS.extract(obj),
                 'raw_data': obj  # Сохраняем исходные данные
             }
 
@@ -567,14 +620,14 @@ class UniversalParser(BaseParser):
 
         Пропускает ключи с None или пустыми значениями, чтобы найти первое валидное значение.
         """
-        obj_lower = {k.lower(): v for k, v in obj.items()}
+        lookup = _lower_key_map(tuple(obj))
 
         for key in keys:
-            key_lower = key.lower()
-            if key_lower in obj_lower:
-                value = obj_lower[key_lower]
+            source = lookup.get(key.lower())
+            if source is not None:
+                value = obj[source]
                 # Пропускаем None и пустые строки, ищем первое валидное значение
-                if value is not None and str(value).strip():
+                if is_filled(value):
                     return value
         return None
 
@@ -0,0 +1,107 @@
+"""
+Отпечатки анонсов для сравнения страниц анонсов по отдельным анонсам
+
+AnnouncementParser (стратегии any_change/element_change) извлекает со
+страницы список анонсов; здесь хранятся отпечатки уже замеченных
+(таблица announcement_items), чтобы уведомлять только о новых.
+
+- load_known_items: None, если для ссылки анонсы еще не сохранялись
+  (первая проверка или ссылка раньше сравнивалась по hash) - парсер
+  только запоминает текущий список
+- save_announcement_items: добавляет новые отпечатки, обновляет last_seen
+  у анонсов, которые есть на странице, и оставляет на ссылку не больше
+  ANNOUNCEMENT_ITEMS_KEEP самых свежих (анонс, висящий на странице,
+  не удаляется и не станет "новым" повторно)
+
+Функции работают в сессии вызывающего кода (commit - за ним).
+
+Использование:
+    known = load_known_items(db, link_id)
+    result = parser.parse(..., item_diff=True, known_items=known)
+    if 'items' in result:
+        save_announcement_items(db, link_id, result['items'])
+"""
+import logging
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Set
+
+from data.models import AnnouncementItem
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def load_known_items(db, link_id: int) -> Optional[Set[str]]:
+    """Отпечатки замеченных анонсов ссылки (None - еще не сохранялись)"""
+    fingerprints = {
+        fingerprint for (fingerprint,) in
+        db.query(AnnouncementItem.fingerprint).filter(AnnouncementItem.api_link_id == link_id).all()
+    }
+    return fingerprints or None
+
+
+def save_announcement_items(db, link_id: int, items: List[Dict[str, Any]]) -> int:
+    """
+    Сохранить анонсы текущей проверки
+
+    Returns:
+        Сколько анонсов добавлено
+    """
+    if not items:
+        return 0
+
+    now = datetime.utcnow()
+    fingerprints = [item['fingerprint'] for item in items]
+    existing = {
+        fingerprint for (fingerprint,) in
+        db.query(AnnouncementItem.fingerprint).filter(
+            AnnouncementItem.api_link_id == link_id,
+            AnnouncementItem.fingerprint.in_(fingerprints)
+        ).all()
+    }
+
+    if existing:
+        db.query(AnnouncementItem).filter(
+            AnnouncementItem.api_link_id == link_id,
+            AnnouncementItem.fingerprint.in_(existing)
+        ).update({AnnouncementItem.last_seen: now}, synchronize_session=False)
+
+    added = 0
+    for item in items:
+        if item['fingerprint'] in existing:
+            continue
+        existing.add(item['fingerprint'])
+        db.add(AnnouncementItem(
+            api_link_id=link_id,
+            fingerprint=item['fingerprint'],
+            title=item.get('title'),
+            url=item.get('url'),
+            item_date=item.get('date'),
+            first_seen=now,
+            last_seen=now
+        ))
+        added += 1
+
+    if added:
+        db.flush()
+        _prune(db, link_id)
+        logger.debug(f"💾 Анонсов сохранено для ссылки {link_id}: {added}")
+    return added
+
+
+def _prune(db, link_id: int):
+    """Оставить не больше ANNOUNCEMENT_ITEMS_KEEP самых свежих анонсов ссылки"""
+    keep = config.ANNOUNCEMENT_ITEMS_KEEP
+    stale_ids = [
+        item_id for (item_id,) in
+        db.query(AnnouncementItem.id)
+        .filter(AnnouncementItem.api_link_id == link_id)
+        .order_by(AnnouncementItem.last_seen.desc(), AnnouncementItem.id.desc())
+        .offset(keep)
+        .all()
+    ]
+    if stale_ids:
+        db.query(AnnouncementItem).filter(
+            AnnouncementItem.id.in_(stale_ids)
+        ).delete(synchronize_session=False)
+        logger.debug(f"🧹 Удалено старых анонсов ссылки {link_id}: {len(stale_ids)}")
@@ -0,0 +1,397 @@
+# services/notification_outbox_service.py
+"""
+Transactional outbox для уведомлений о новых промоакциях
+
+Гарантия доставки at-least-once:
+1. ParserService._save_to_history в той же транзакции, что и PromoHistory,
+   пишет строки notification_outbox (промо x получатель) - enqueue_promos()
+2. Живой путь: main.send_notifications_to_all сразу забирает строки своей
+   пачки (deliver_promos) и отправляет через очередь Telegram
+3. Фоновый drain-цикл досылает всё, что не ушло: после рестарта, сбоя
+   посреди рассылки или ошибки отправки (с экспоненциальной паузой)
+
+Строка "забирается" атомарным UPDATE status pending -> sending с claim_token,
+поэтому живой путь и drain-цикл не отправят одно и то же дважды.
+Строки, зависшие в sending после падения процесса, при старте
+возвращаются в pending (recover).
+"""
+
+import asyncio
+import json
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+from uuid import uuid4
+
+from sqlalchemy import func
+
+import config
+from data.database import get_db_session, run_in_db_executor
+from data.models import NotificationOutbox
+
+logger = logging.getLogger(__name__)
+
+STATUS_PENDING = 'pending'
+STATUS_SENDING = 'sending'
+STATUS_SENT = 'sent'
+STATUS_FAILED = 'failed'
+
+# Ключ в dict промоакции: пачка outbox, в которую она записана
+OUTBOX_BATCH_KEY = '_outbox_batch'
+# Ключ в dict промоакции: готовый текст уведомления (launchpool-проекты из main.py),
+# отправляется как есть вместо render_bulk_notifications
+OUTBOX_MESSAGE_KEY = '_outbox_message'
+
+
+def outbox_key(promo_id: str, chat_id: int) -> str:
+    """Ключ идемпотентности: одна промоакция - одно уведомление на чат"""
+    return f"promo:{promo_id}:{chat_id}"
+
+
+def enqueue_promos(session, promos: List[Dict[str, Any]], recipients: List[int] = None) -> Optional[str]:
+    """
+    Добавить уведомления о промоакциях в outbox (в текущей сессии, без commit)
+
+    Вызывается до commit сохранения в PromoHistory, чтобы история и
+    уведомления записались одной транзакцией.
+
+    Returns:
+        batch_id пачки (также проставляется в promo[OUTBOX_BATCH_KEY])
+    """
+    recipients = config.ALL_NOTIFICATION_RECIPIENTS if recipients is None else recipients
+    promos = [p for p in promos if p.get('promo_id')]
+    if not promos or not recipients:
+        return None
+
+    batch_id = uuid4().hex
+    now = datetime.utcnow()
+    available_at = now + timedelta(seconds=config.OUTBOX_GRACE_SECONDS)
+
+    keys = [outbox_key(p['promo_id'], chat_id) for p in promos for chat_id in recipients]
+    existing = {
+        row.idempotency_key: row
+        for row in session.query(NotificationOutbox).filter(NotificationOutbox.idempotency_key.in_(keys)).all()
+    } if keys else {}
+
+    for promo in promos:
+        payload = json.dumps(
+            {k: v for k, v in promo.items() if k != OUTBOX_BATCH_KEY},
+            ensure_ascii=False, default=str
+        )
+        for chat_id in recipients:
+            key = outbox_key(promo['promo_id'], chat_id)
+            row = existing.get(key)
+            if row is None:
+                session.add(NotificationOutbox(
+                    idempotency_key=key,
+                    chat_id=chat_id,
+                    batch_id=batch_id,
+                    promo_id=promo['promo_id'],
+                    payload=payload,
+                    status=STATUS_PENDING,
+                    attempts=0,
+                    next_attempt_at=available_at,
+                    created_at=now
+                ))
+            else:
+                # Промо удаляли из истории и нашли снова - уведомляем заново
+                row.batch_id = batch_id
+                row.payload = payload
+                row.status = STATUS_PENDING
+                row.attempts = 0
+                row.claim_token = None
+                row.last_error = None
+                row.next_attempt_at = available_at
+                row.sent_at = None
+
+        promo[OUTBOX_BATCH_KEY] = batch_id
+
+    return batch_id
+
+
+class NotificationOutboxService:
+    """Доставка уведомлений из outbox"""
+
+    def __init__(self, notification_service):
+        self.notification_service = notification_service
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+        self._running = False
+        # Живые dict промоакций по batch_id (точнее, чем JSON из payload)
+        self._live_batches: "OrderedDict[str, Dict[str, Dict[str, Any]]]" = OrderedDict()
+        self._stats = {
+            'total_sent': 0,
+            'total_failed': 0,
+            'total_retries': 0,
+            'total_recovered': 0,
+        }
+
+    # ========== ЗАПУСК ==========
+
+    async def start(self):
+        """Вернуть зависшие строки в очередь и запустить drain-цикл"""
+        recovered = await run_in_db_executor(self.recover)
+        if recovered:
+            self._stats['total_recovered'] += recovered
+            logger.info(f"📬 Outbox: {recovered} уведомлений возвращено в очередь после перезапуска")
+
+        self._running = True
+        self._task = asyncio.create_task(self._drain_loop())
+        logger.info("📬 Outbox запущен")
+
+    async def stop(self):
+        self._running = False
+        self._wakeup.set()
+        if self._task:
+            try:
+                await asyncio.wait_for(self._task, timeout=10)
+            except (asyncio.TimeoutError, asyncio.CancelledError):
+                self._task.cancel()
+            self._task = None
+
+    def wake(self):
+        """Разбудить drain-цикл"""
+        self._wakeup.set()
+
+    async def _drain_loop(self):
+        while self._running:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=config.OUTBOX_POLL_INTERVAL)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            if not self._running:
+                break
+
+            try:
+                while self._running and await self.drain() >= config.OUTBOX_DRAIN_BATCH:
+                    pass
+            except Exception as e:
+                logger.error(f"❌ Ошибка drain outbox: {e}", exc_info=True)
+
+    # ========== ДОСТАВКА ==========
+
+    async def deliver_promos(self, promos: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Немедленно отправить уведомления пачек, в которые записаны promos
+
+        Returns:
+            Промоакции без записи в outbox - их нужно отправить напрямую
+        """
+        batch_ids = []
+        not_in_outbox = []
+        for promo in promos:
+            batch_id = promo.get(OUTBOX_BATCH_KEY)
+            if not batch_id:
+                not_in_outbox.append(promo)
+                continue
+            if batch_id not in self._live_batches:
+                self._live_batches[batch_id] = {}
+                batch_ids.append(batch_id)
+            self._live_batches[batch_id][promo['promo_id']] = promo
+
+        while len(self._live_batches) > 100:
+            self._live_batches.popitem(last=False)
+
+        if batch_ids:
+            rows = await run_in_db_executor(self.claim, batch_ids=batch_ids)
+            await self._deliver(rows)
+
+        return not_in_outbox
+
+    async def drain(self) -> int:
+        """Отправить одну порцию просроченных строк. Returns: сколько строк забрано"""
+        rows = await run_in_db_executor(self.claim)
+        if rows:
+            logger.info(f"📬 Outbox: досылаем {len(rows)} уведомлений")
+            await self._deliver(rows)
+        return len(rows)
+
+    async def _deliver(self, rows: List[Dict[str, Any]]):
+        """Отправить забранные строки: чаты параллельно, пачки внутри чата по порядку"""
+        by_chat: Dict[int, "OrderedDict[str, List[Dict[str, Any]]]"] = {}
+        for row in rows:
+            by_chat.setdefault(row['chat_id'], OrderedDict()).setdefault(row['batch_id'], []).append(row)
+
+        # Цены для всех пачек одной загрузкой до рендера
+        try:
+            await self.notification_service.prefetch_promo_prices([self._row_promo(row) for row in rows])
+        except Exception as e:
+            logger.debug(f"⚠️ Outbox: цены не загружены заранее: {e}")
+
+        await asyncio.gather(
+            *(self._deliver_chat(chat_id, batches) for chat_id, batches in by_chat.items()),
+            return_exceptions=True
+        )
+
+    async def _deliver_chat(self, chat_id: int, batches: "OrderedDict[str, List[Dict[str, Any]]]"):
+        for batch_id, batch_rows in batches.items():
+            ids = [row['id'] for row in batch_rows]
+            try:
+                promos = [self._row_promo(row) for row in batch_rows]
+                chunks = [
+                    chunk
+                    for promo in promos if promo.get(OUTBOX_MESSAGE_KEY)
+                    for chunk in self.notification_service.split_message_chunks(promo[OUTBOX_MESSAGE_KEY])
+                ]
+                chunks += self.notification_service.render_bulk_notifications(
+                    [promo for promo in promos if not promo.get(OUTBOX_MESSAGE_KEY)]
+                )
+                await self.notification_service.send_rendered(chat_id, chunks)
+
+            except Exception as e:
+                logger.warning(f"⚠️ Outbox: не удалось отправить {len(ids)} уведомлений в чат {chat_id}: {e}")
+                failed = await run_in_db_executor(self.mark_failed, batch_rows, str(e))
+                self._stats['total_failed'] += failed
+                self._stats['total_retries'] += len(ids) - failed
+                continue
+
+            await run_in_db_executor(self.mark_sent, ids)
+            self._stats['total_sent'] += len(ids)
+
+    def _row_promo(self, row: Dict[str, Any]) -> Dict[str, Any]:
+        live = self._live_batches.get(row['batch_id'], {}).get(row['promo_id'])
+        if live is not None:
+            return live
+        return json.loads(row['payload'])
+
+    # ========== БД (вызываются в DB executor) ==========
+
+    @staticmethod
+    def claim(batch_ids: List[str] = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Атомарно забрать строки на отправку (pending -> sending)
+
+        Args:
+            batch_ids: Забрать строки этих пачек (живой путь, без учета grace)
+            limit: Максимум строк для drain
+        """
+        token = uuid4().hex
+        now = datetime.utcnow()
+
+        with get_db_session() as db:
+            query = db.query(NotificationOutbox.id).filter(NotificationOutbox.status == STATUS_PENDING)
+            if batch_ids:
+                query = query.filter(NotificationOutbox.batch_id.in_(batch_ids))
+            else:
+                query = query.filter(NotificationOutbox.next_attempt_at <= now)
+            query = query.order_by(NotificationOutbox.id)
+            if not batch_ids:
+                query = query.limit(limit or config.OUTBOX_DRAIN_BATCH)
+            ids = [row[0] for row in query.all()]
+            if not ids:
+                return []
+
+            db.query(NotificationOutbox).filter(
+                NotificationOutbox.id.in_(ids),
+                NotificationOutbox.status == STATUS_PENDING
+            ).update({
+                NotificationOutbox.status: STATUS_SENDING,
+                NotificationOutbox.claim_token: token,
+                NotificationOutbox.attempts: NotificationOutbox.attempts + 1,
+            }, synchronize_session=False)
+            db.commit()
+
+            rows = db.query(NotificationOutbox).filter(
+                NotificationOutbox.claim_token == token,
+                NotificationOutbox.status == STATUS_SENDING
+            ).order_by(NotificationOutbox.id).all()
+
+            return [
+                {
+                    'id': row.id,
+                    'chat_id': row.chat_id,
+                    'batch_id': row.batch_id,
+                    'promo_id': row.promo_id,
+                    'payload': row.payload,
+                    'attempts': row.attempts,
+                }
+                for row in rows
+            ]
+
+    @staticmethod
+    def mark_sent(ids: List[int]):
+        with get_db_session() as db:
+            db.query(NotificationOutbox).filter(NotificationOutbox.id.in_(ids)).update({
+                NotificationOutbox.status: STATUS_SENT,
+                NotificationOutbox.sent_at: datetime.utcnow(),
+                NotificationOutbox.claim_token: None,
+                NotificationOutbox.last_error: None,
+            }, synchronize_session=False)
+            db.commit()
+
+    @staticmethod
+    def mark_failed(rows: List[Dict[str, Any]], error: str) -> int:
+        """
+        Вернуть строки в очередь с экспоненциальной паузой
+
+        Returns:
+            Сколько строк исчерпали попытки (status failed)
+        """
+        now = datetime.utcnow()
+        failed = 0
+
+        with get_db_session() as db:
+            for row in rows:
+                if row['attempts'] >= config.OUTBOX_MAX_ATTEMPTS:
+                    status = STATUS_FAILED
+                    failed += 1
+                else:
+                    status = STATUS_PENDING
+                delay = min(config.OUTBOX_RETRY_BASE_DELAY * 2 ** (row['attempts'] - 1), 3600)
+                db.query(NotificationOutbox).filter(NotificationOutbox.id == row['id']).update({
+                    NotificationOutbox.status: status,
+                    NotificationOutbox.claim_token: None,
+                    NotificationOutbox.last_error: error[:500],
+                    NotificationOutbox.next_attempt_at: now + timedelta(seconds=delay),
+                }, synchronize_session=False)
+            db.commit()
+
+        if failed:
+            logger.error(f"❌ Outbox: {failed} уведомлений не доставлено после {config.OUTBOX_MAX_ATTEMPTS} попыток")
+        return failed
+
+    @staticmethod
+    def recover() -> int:
+        """Строки, зависшие в sending (процесс упал во время отправки) -> pending"""
+        with get_db_session() as db:
+            count = db.query(NotificationOutbox).filter(
+                NotificationOutbox.status == STATUS_SENDING
+            ).update({
+                NotificationOutbox.status: STATUS_PENDING,
+                NotificationOutbox.claim_token: None,
+                NotificationOutbox.next_attempt_at: datetime.utcnow(),
+            }, synchronize_session=False)
+            db.commit()
+            return count
+
+    # ========== СТАТИСТИКА ==========
+
+    @staticmethod
+    def _count_by_status() -> Dict[str, int]:
+        with get_db_session() as db:
+            rows = db.query(NotificationOutbox.status, func.count(NotificationOutbox.id)).group_by(
+                NotificationOutbox.status
+            ).all()
+            return {status: count for status, count in rows}
+
+    async def get_stats(self) -> Dict[str, Any]:
+        """Статистика outbox (счетчики процесса + строки по статусам)"""
+        return {**self._stats, 'by_status': await run_in_db_executor(self._count_by_status)}
+
+
+# Глобальный экземпляр сервиса
+_outbox_service: Optional[NotificationOutboxService] = None
+
+
+def init_outbox_service(notification_service) -> NotificationOutboxService:
+    """Создать глобальный экземпляр outbox"""
+    global _outbox_service
+    _outbox_service = NotificationOutboxService(notification_service)
+    return _outbox_service
+
+
+def get_outbox_service() -> Optional[NotificationOutboxService]:
+    """Получить глобальный экземпляр outbox (None если не инициализирован)"""
+    return _outbox_service
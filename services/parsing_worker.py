@@ -487,6 +487,24 @@ class ParsingWorkerPool:
             **kwargs
         )
     
+    async def wait_task(self, task_id: str, timeout: float = None) -> ParsingTask:
+        """
+        Дождаться окончательного результата задачи (с учётом повторов).
+        
+        Raises:
+            asyncio.TimeoutError: задача не завершилась за timeout
+            asyncio.CancelledError: задача отменена (очистка/остановка очереди)
+        """
+        if not self._queue:
+            raise RuntimeError("WorkerPool не запущен")
+        
+        # shield: таймаут ожидающего не отменяет future, общий для всех ожидающих
+        return await asyncio.wait_for(asyncio.shield(self._queue.wait_task(task_id)), timeout=timeout)
+    
+    @property
+    def is_running(self) -> bool:
+        return self._running
+    
     async def add_links(
         self,
         links_data: List[Dict[str, Any]],
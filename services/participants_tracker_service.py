@@ -2,9 +2,12 @@
 Сервис для отслеживания истории участников промоакций
 """
 import logging
+from bisect import bisect_left, bisect_right
 from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Tuple
+from sqlalchemy import func, or_
 from data.database import get_db_session
+from data.data_version import bump_promo_links_version
 from data.models import PromoParticipantsHistory
 
 logger = logging.getLogger(__name__)
@@ -15,6 +18,14 @@ class ParticipantsTrackerService:
     
     # Интервалы для отчётов (в часах)
     TRACKING_INTERVALS = [6, 12, 24]
+
+    # Окно поиска записи вокруг целевого времени (±часов)
+    WINDOW_TOLERANCE_HOURS = 2
+    # Максимальная "давность" fallback-записи до целевого времени (часов)
+    FALLBACK_MAX_AGE_HOURS = 3
+
+    # Лимит параметров в IN (...) для SQLite
+    _IN_CHUNK_SIZE = 500
     
     @staticmethod
     def record_participants(exchange: str, promo_id: str, participants: int, title: str = None) -> bool:
@@ -48,6 +59,7 @@ class ParticipantsTrackerService:
                         if title:
                             recent.promo_title = title
                         db.commit()
+                        bump_promo_links_version(db, [promo_id])
                         logger.debug(f"📊 Обновлена запись: {exchange}/{promo_id} = {participants}")
                     return True
                 
@@ -61,6 +73,7 @@ class ParticipantsTrackerService:
                 )
                 db.add(record)
                 db.commit()
+                bump_promo_links_version(db, [promo_id])
                 logger.debug(f"📊 Новая запись: {exchange}/{promo_id} = {participants}")
                 return True
                 
@@ -87,97 +100,151 @@ class ParticipantsTrackerService:
                 'last_update': {'count': 8500, 'diff': 72, 'time_ago': '15 мин.'}
             }
         """
+        stats = ParticipantsTrackerService.get_participants_stats_batch(exchange, [promo_id])
+        return stats.get(promo_id, {})
+    
+    @staticmethod
+    def get_participants_stats_batch(exchange: str, promo_ids: List[str]) -> Dict[str, Dict[str, any]]:
+        """
+        Получить статистику участников сразу для набора промо одним запросом
+        
+        Оконный запрос возвращает по каждому промо две последние записи
+        (текущая и предыдущая) и все записи в горизонте самого длинного
+        интервала; дельты по всем интервалам считаются в памяти.
+        
+        Args:
+            exchange: Название биржи
+            promo_ids: Список ID промо
+            
+        Returns:
+            Словарь {promo_id: stats} в формате get_participants_stats
+            (промо без истории в результат не попадают)
+        """
+        promo_ids = list({pid for pid in promo_ids if pid})
+        if not promo_ids:
+            return {}
+        
         try:
+            now = datetime.utcnow()
+            horizon = now - timedelta(
+                hours=max(ParticipantsTrackerService.TRACKING_INTERVALS)
+                + ParticipantsTrackerService.FALLBACK_MAX_AGE_HOURS
+            )
+            
+            records_by_promo: Dict[str, List[Tuple[int, int, datetime]]] = {}
+            
             with get_db_session() as db:
-                now = datetime.utcnow()
-                
-                # Получаем последнюю (текущую) запись
-                current_record = db.query(PromoParticipantsHistory).filter(
-                    PromoParticipantsHistory.exchange == exchange,
-                    PromoParticipantsHistory.promo_id == promo_id
-                ).order_by(PromoParticipantsHistory.recorded_at.desc()).first()
-                
-                if not current_record:
-                    return {}
-                
-                current_count = current_record.participants_count
-                result = {'current': current_count}
-                
-                # Статистика за каждый интервал
-                for hours in ParticipantsTrackerService.TRACKING_INTERVALS:
-                    time_ago = now - timedelta(hours=hours)
+                chunk_size = ParticipantsTrackerService._IN_CHUNK_SIZE
+                for i in range(0, len(promo_ids), chunk_size):
+                    chunk = promo_ids[i:i + chunk_size]
                     
-                    # Ищем ближайшую запись к этому времени (в пределах ±2 часа)
-                    # Это гарантирует, что мы не используем одну и ту же старую запись для всех интервалов
-                    tolerance_hours = 2
-                    time_window_start = time_ago - timedelta(hours=tolerance_hours)
-                    time_window_end = time_ago + timedelta(hours=tolerance_hours)
-                    
-                    record = db.query(PromoParticipantsHistory).filter(
+                    ranked = db.query(
+                        PromoParticipantsHistory.id.label('id'),
+                        PromoParticipantsHistory.promo_id.label('promo_id'),
+                        PromoParticipantsHistory.participants_count.label('participants_count'),
+                        PromoParticipantsHistory.recorded_at.label('recorded_at'),
+                        func.row_number().over(
+                            partition_by=PromoParticipantsHistory.promo_id,
+                            order_by=(
+                                PromoParticipantsHistory.recorded_at.desc(),
+                                PromoParticipantsHistory.id.desc()
+                            )
+                        ).label('rn')
+                    ).filter(
                         PromoParticipantsHistory.exchange == exchange,
-                        PromoParticipantsHistory.promo_id == promo_id,
-                        PromoParticipantsHistory.recorded_at >= time_window_start,
-                        PromoParticipantsHistory.recorded_at <= time_window_end
-                    ).order_by(PromoParticipantsHistory.recorded_at.asc()).first()
-                    
-                    # Если не нашли в узком окне, берем ближайшую до целевого времени
-                    if not record:
-                        record = db.query(PromoParticipantsHistory).filter(
-                            PromoParticipantsHistory.exchange == exchange,
-                            PromoParticipantsHistory.promo_id == promo_id,
-                            PromoParticipantsHistory.recorded_at <= time_ago
-                        ).order_by(PromoParticipantsHistory.recorded_at.desc()).first()
-                        
-                        # Если запись слишком старая (более 3 часов до целевого времени), пропускаем
-                        if record and (time_ago - record.recorded_at) > timedelta(hours=3):
-                            record = None
-                    
-                    if record:
-                        old_count = record.participants_count
-                        diff = current_count - old_count
-                        percent = (diff / old_count * 100) if old_count > 0 else 0
-                        
-                        result[f'{hours}h'] = {
-                            'count': old_count,
-                            'diff': diff,
-                            'percent': round(percent, 1)
-                        }
-                
-                # Предпоследняя запись для "с последнего обновления"
-                prev_record = db.query(PromoParticipantsHistory).filter(
-                    PromoParticipantsHistory.exchange == exchange,
-                    PromoParticipantsHistory.promo_id == promo_id,
-                    PromoParticipantsHistory.id != current_record.id
-                ).order_by(PromoParticipantsHistory.recorded_at.desc()).first()
-                
-                if prev_record:
-                    diff = current_count - prev_record.participants_count
-                    time_diff = now - prev_record.recorded_at
+                        PromoParticipantsHistory.promo_id.in_(chunk)
+                    ).subquery()
                     
-                    # Форматируем время назад
-                    if time_diff.days > 0:
-                        time_ago_str = f"{time_diff.days} дн."
-                    elif time_diff.seconds >= 3600:
-                        time_ago_str = f"{time_diff.seconds // 3600} ч."
-                    else:
-                        time_ago_str = f"{time_diff.seconds // 60} мин."
+                    rows = db.query(
+                        ranked.c.id, ranked.c.promo_id, ranked.c.participants_count, ranked.c.recorded_at
+                    ).filter(
+                        or_(ranked.c.rn <= 2, ranked.c.recorded_at >= horizon)
+                    ).all()
                     
-                    result['last_update'] = {
-                        'count': prev_record.participants_count,
-                        'diff': diff,
-                        'time_ago': time_ago_str
-                    }
-                
-                return result
-                
+                    for row_id, promo_id, count, recorded_at in rows:
+                        records_by_promo.setdefault(promo_id, []).append((row_id, count, recorded_at))
+            
+            result = {}
+            for promo_id, records in records_by_promo.items():
+                # Сортировка по времени (как ORDER BY recorded_at, id)
+                records.sort(key=lambda r: (r[2], r[0]))
+                result[promo_id] = ParticipantsTrackerService._build_stats(records, now)
+            
+            return result
+            
         except Exception as e:
             logger.error(f"❌ Ошибка получения статистики участников: {e}")
             return {}
     
+    @staticmethod
+    def _build_stats(records: List[Tuple[int, int, datetime]], now: datetime) -> Dict[str, any]:
+        """
+        Посчитать статистику по отсортированным записям (id, count, recorded_at) одного промо
+        """
+        if not records:
+            return {}
+        
+        times = [r[2] for r in records]
+        current_count = records[-1][1]
+        result = {'current': current_count}
+        
+        tolerance = timedelta(hours=ParticipantsTrackerService.WINDOW_TOLERANCE_HOURS)
+        max_age = timedelta(hours=ParticipantsTrackerService.FALLBACK_MAX_AGE_HOURS)
+        
+        # Статистика за каждый интервал
+        for hours in ParticipantsTrackerService.TRACKING_INTERVALS:
+            time_ago = now - timedelta(hours=hours)
+            record = None
+            
+            # Ищем самую раннюю запись в окне ±2 часа от целевого времени
+            # Это гарантирует, что мы не используем одну и ту же старую запись для всех интервалов
+            idx = bisect_left(times, time_ago - tolerance)
+            if idx < len(records) and times[idx] <= time_ago + tolerance:
+                record = records[idx]
+            else:
+                # Если не нашли в узком окне, берем ближайшую до целевого времени
+                idx = bisect_right(times, time_ago) - 1
+                # Если запись слишком старая (более 3 часов до целевого времени), пропускаем
+                if idx >= 0 and (time_ago - times[idx]) <= max_age:
+                    record = records[idx]
+            
+            if record:
+                old_count = record[1]
+                diff = current_count - old_count
+                percent = (diff / old_count * 100) if old_count > 0 else 0
+                
+                result[f'{hours}h'] = {
+                    'count': old_count,
+                    'diff': diff,
+                    'percent': round(percent, 1)
+                }
+        
+        # Предпоследняя запись для "с последнего обновления"
+        if len(records) >= 2:
+            prev_count, prev_time = records[-2][1], records[-2][2]
+            diff = current_count - prev_count
+            time_diff = now - prev_time
+            
+            # Форматируем время назад
+            if time_diff.days > 0:
+                time_ago_str = f"{time_diff.days} дн."
+            elif time_diff.seconds >= 3600:
+                time_ago_str = f"{time_diff.seconds // 3600} ч."
+            else:
+                time_ago_str = f"{time_diff.seconds // 60} мин."
+            
+            result['last_update'] = {
+                'count': prev_count,
+                'diff': diff,
+                'time_ago': time_ago_str
+            }
+        
+        return result
+    
     @staticmethod
     def record_batch(exchange: str, promos: List[Dict]) -> int:
         """
-        Записать участников для нескольких промо сразу
+        Записать участников для нескольких промо сразу (одна транзакция)
         
         Args:
             exchange: Название биржи
@@ -186,7 +253,8 @@ class ParticipantsTrackerService:
         Returns:
             Количество записанных
         """
-        count = 0
+        # Нормализуем входные данные (последнее значение для promo_id побеждает)
+        items: Dict[str, Tuple[int, Optional[str]]] = {}
         for promo in promos:
             promo_id = promo.get('promo_id')
             # Поддерживаем оба варианта названия поля
@@ -196,12 +264,71 @@ class ParticipantsTrackerService:
             if promo_id and participants:
                 try:
                     participants_int = int(float(str(participants).replace(',', '').replace(' ', '')))
-                    if ParticipantsTrackerService.record_participants(exchange, promo_id, participants_int, title):
-                        count += 1
+                    items[promo_id] = (participants_int, title)
                 except (ValueError, TypeError):
                     pass
         
-        return count
+        if not items:
+            return 0
+        
+        try:
+            with get_db_session() as db:
+                now = datetime.utcnow()
+                five_minutes_ago = now - timedelta(minutes=5)
+                promo_ids = list(items.keys())
+                
+                # Недавние записи (последние 5 минут) для всех промо одним запросом
+                recent_by_promo = {}
+                chunk_size = ParticipantsTrackerService._IN_CHUNK_SIZE
+                for i in range(0, len(promo_ids), chunk_size):
+                    recent_rows = db.query(PromoParticipantsHistory).filter(
+                        PromoParticipantsHistory.exchange == exchange,
+                        PromoParticipantsHistory.promo_id.in_(promo_ids[i:i + chunk_size]),
+                        PromoParticipantsHistory.recorded_at >= five_minutes_ago
+                    ).all()
+                    for row in recent_rows:
+                        recent_by_promo.setdefault(row.promo_id, row)
+                
+                new_records = []
+                changed_ids = []
+                for promo_id, (participants, title) in items.items():
+                    recent = recent_by_promo.get(promo_id)
+                    if recent:
+                        # Обновляем существующую запись если изменилось кол-во
+                        if recent.participants_count != participants:
+                            changed_ids.append(promo_id)
+                            recent.participants_count = participants
+                            recent.recorded_at = now
+                            if title:
+                                recent.promo_title = title
+                        continue
+                    
+                    new_records.append({
+                        'exchange': exchange,
+                        'promo_id': promo_id,
+                        'promo_title': title,
+                        'participants_count': participants,
+                        'recorded_at': now
+                    })
+                
+                if new_records:
+                    db.bulk_insert_mappings(PromoParticipantsHistory, new_records)
+                db.commit()
+
+                # bulk_insert_mappings не вызывает событий ORM - версию страниц промо увеличиваем сами
+                changed_ids.extend(record['promo_id'] for record in new_records)
+                if changed_ids:
+                    bump_promo_links_version(db, changed_ids)
+                
+                logger.debug(
+                    f"📊 {exchange}: записано {len(items)} промо "
+                    f"(новых {len(new_records)}, обновлено {len(items) - len(new_records)})"
+                )
+                return len(items)
+                
+        except Exception as e:
+            logger.error(f"❌ Ошибка пакетной записи участников: {e}")
+            return 0
     
     @staticmethod
     def cleanup_old_records(days: int = 7) -> int:
@@ -215,16 +342,18 @@ class ParticipantsTrackerService:
             Количество удалённых записей
         """
         try:
-            with get_db_session() as db:
-                cutoff = datetime.utcnow() - timedelta(days=days)
-                
-                deleted = db.query(PromoParticipantsHistory).filter(
-                    PromoParticipantsHistory.recorded_at < cutoff
-                ).delete()
-                
-                db.commit()
-                logger.info(f"🧹 Удалено {deleted} старых записей истории участников")
-                return deleted
+            from services.retention_service import delete_in_chunks, format_db_time
+            
+            # Удаляем пачками, чтобы не блокировать БД одной большой транзакцией
+            cutoff = datetime.utcnow() - timedelta(days=days)
+            deleted = delete_in_chunks(
+                PromoParticipantsHistory.__tablename__,
+                'recorded_at < :cutoff',
+                {'cutoff': format_db_time(cutoff)}
+            )
+            
+            logger.info(f"🧹 Удалено {deleted} старых записей истории участников")
+            return deleted
                 
         except Exception as e:
             logger.error(f"❌ Ошибка очистки истории: {e}")
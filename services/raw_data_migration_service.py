@@ -0,0 +1,151 @@
+# services/raw_data_migration_service.py
+"""
+Фоновая миграция PromoHistory.raw_data в сжатый формат
+
+Новые и обновляемые записи сжимаются кодеком автоматически
+(data/raw_data_codec.py). Этот сервис пачками дожимает старые строки,
+где raw_data еще хранится обычным текстом. Каждая пачка - отдельная
+короткая транзакция в DB executor, между пачками отдаем event loop.
+"""
+
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Optional
+
+from sqlalchemy import text
+
+import config
+from data.database import get_engine, run_in_db_executor
+from data.raw_data_codec import encode_raw_data, is_compressed
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RawDataMigrationResult:
+    """Итог миграции"""
+    rows: int = 0
+    chunks: int = 0
+    bytes_before: int = 0
+    bytes_after: int = 0
+    duration: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def ratio(self) -> float:
+        return self.bytes_after / self.bytes_before if self.bytes_before else 1.0
+
+
+class RawDataMigrationService:
+    """Пакетное сжатие существующих raw_data в promo_history"""
+
+    def __init__(self, chunk_size: int = None, pause: float = None):
+        self.chunk_size = chunk_size or config.RAW_DATA_MIGRATION_CHUNK_SIZE
+        self.pause = config.RAW_DATA_MIGRATION_PAUSE if pause is None else pause
+        self.last_result: Optional[RawDataMigrationResult] = None
+        self._running = False
+
+    async def run(self) -> RawDataMigrationResult:
+        """Сжать все несжатые raw_data (не блокирует event loop)"""
+        if self._running:
+            logger.info("⏭️ Миграция raw_data уже выполняется, пропускаем")
+            return self.last_result or RawDataMigrationResult()
+
+        self._running = True
+        result = RawDataMigrationResult()
+        started = time.monotonic()
+        last_id = 0
+
+        try:
+            while True:
+                converted, last_id, before, after = await run_in_db_executor(
+                    self.compress_chunk, last_id, self.chunk_size
+                )
+                result.chunks += 1
+                result.rows += converted
+                result.bytes_before += before
+                result.bytes_after += after
+                if last_id is None:
+                    break
+                await asyncio.sleep(self.pause)
+
+            if result.rows:
+                # Отдаем освободившиеся страницы ОС
+                from services.retention_service import RetentionService
+                await run_in_db_executor(RetentionService.incremental_vacuum)
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка миграции raw_data: {e}")
+            result.error = str(e)
+
+        finally:
+            self._running = False
+
+        result.duration = time.monotonic() - started
+        self.last_result = result
+
+        if result.rows:
+            logger.info(
+                f"🗜️ raw_data сжато: {result.rows} строк, "
+                f"{result.bytes_before / 1024:.0f}KB -> {result.bytes_after / 1024:.0f}KB "
+                f"({result.ratio:.0%}) за {result.duration:.1f}с"
+            )
+        return result
+
+    @staticmethod
+    def compress_chunk(after_id: int, chunk_size: int) -> tuple:
+        """
+        Сжимает одну пачку строк с id > after_id
+
+        Returns:
+            (сжато строк, последний id или None если строк больше нет,
+             байт до, байт после)
+        """
+        select_sql = text(
+            "SELECT id, raw_data FROM promo_history "
+            "WHERE id > :after_id AND typeof(raw_data) = 'text' "
+            "ORDER BY id LIMIT :limit"
+        )
+        # raw_data = :old - не затираем значение, обновленное парсером между SELECT и UPDATE
+        update_sql = text(
+            "UPDATE promo_history SET raw_data = :new WHERE id = :id AND raw_data = :old"
+        )
+
+        converted = 0
+        before = 0
+        after = 0
+
+        with get_engine().begin() as conn:
+            rows = conn.execute(select_sql, {'after_id': after_id, 'limit': chunk_size}).fetchall()
+            if not rows:
+                return 0, None, 0, 0
+
+            updates = []
+            for row_id, raw in rows:
+                encoded = encode_raw_data(raw)
+                if not is_compressed(encoded):
+                    continue
+                updates.append({'id': row_id, 'new': encoded, 'old': raw})
+                before += len(raw.encode('utf-8'))
+                after += len(encoded)
+
+            if updates:
+                conn.execute(update_sql, updates)
+                converted = len(updates)
+
+        last_id = rows[-1][0] if len(rows) == chunk_size else None
+        return converted, last_id, before, after
+
+
+# Глобальный экземпляр сервиса
+_raw_data_migration_service: Optional[RawDataMigrationService] = None
+
+
+def get_raw_data_migration_service() -> RawDataMigrationService:
+    """Получить глобальный экземпляр сервиса миграции raw_data"""
+    global _raw_data_migration_service
+    if _raw_data_migration_service is None:
+        _raw_data_migration_service = RawDataMigrationService()
+    return _raw_data_migration_service
@@ -0,0 +1,396 @@
+# services/retention_service.py
+"""
+Сервис хранения (retention) для быстрорастущих таблиц
+
+Политики задаются на таблицу:
+- удаление записей старше N дней
+- даунсэмплинг снимков стейкингов (почасовые -> 1 в день) для старых данных
+
+Удаление идет маленькими пачками (каждая - отдельная короткая транзакция)
+с паузой между пачками, чтобы не держать блокировку SQLite и не мешать
+парсингу и UI. После очистки освобожденные страницы возвращаются
+через PRAGMA incremental_vacuum (auto_vacuum=INCREMENTAL).
+"""
+
+import asyncio
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Any
+
+from sqlalchemy import text
+
+import config
+from data.database import get_engine, run_in_db_executor
+from data.data_version import bump_table_version
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class RetentionPolicy:
+    """Политика хранения для одной таблицы"""
+    table: str
+    time_column: str
+    max_age_days: float
+    time_is_epoch: bool = False  # REAL unix timestamp вместо DateTime
+    # Даунсэмплинг: записи старше downsample_after_days схлопываются
+    # до одной (последней) на группу в сутки
+    downsample_after_days: Optional[float] = None
+    downsample_group_by: Optional[str] = None
+    # Дополнительное условие (SQL): удалять только подходящие строки
+    condition: Optional[str] = None
+    # Файл SQLite вне основной БД (таблицы sqlite3-менеджеров со своим db_path)
+    db_path: Optional[str] = None
+
+
+@dataclass
+class RetentionResult:
+    """Результат применения политики"""
+    table: str
+    deleted: int = 0
+    downsampled: int = 0
+    chunks: int = 0
+    duration: float = 0.0
+    skipped: bool = False
+    error: Optional[str] = None
+
+
+def format_db_time(value: datetime) -> str:
+    """Формат DateTime, в котором SQLAlchemy хранит даты в SQLite"""
+    return value.strftime('%Y-%m-%d %H:%M:%S.%f')
+
+
+def delete_in_chunks(
+    table: str,
+    where_sql: str,
+    params: Dict[str, Any],
+    chunk_size: int = None,
+    pause: float = None,
+    db_path: str = None
+) -> int:
+    """
+    Синхронно удаляет строки пачками (для вызова из потоков и старых cleanup-функций)
+
+    Args:
+        table: Имя таблицы
+        where_sql: Условие отбора строк (SQL, с :параметрами)
+        params: Параметры условия
+        chunk_size: Строк за одну транзакцию
+        pause: Пауза между пачками (сек), чтобы отпустить блокировку БД
+        db_path: Файл SQLite вне основной БД (sqlite3-менеджеры со своим db_path);
+            по умолчанию - основной движок SQLAlchemy
+
+    Returns:
+        Количество удаленных строк
+    """
+    chunk_size = chunk_size or config.RETENTION_CHUNK_SIZE
+    pause = config.RETENTION_CHUNK_PAUSE if pause is None else pause
+
+    total = 0
+    while True:
+        deleted = _delete_chunk(table, where_sql, params, chunk_size, db_path)
+        total += deleted
+        if deleted < chunk_size:
+            break
+        time.sleep(pause)
+    if total and db_path is None:
+        # Удаление сырым SQL не видно событиям ORM
+        bump_table_version(table)
+    return total
+
+
+def _delete_chunk(
+    table: str,
+    where_sql: str,
+    params: Dict[str, Any],
+    chunk_size: int,
+    db_path: str = None
+) -> int:
+    """Удаляет одну пачку строк в отдельной короткой транзакции"""
+    sql = (
+        f"DELETE FROM {table} WHERE id IN "
+        f"(SELECT id FROM {table} WHERE {where_sql} ORDER BY id LIMIT :_chunk_size)"
+    )
+    if db_path is not None:
+        conn = sqlite3.connect(db_path)
+        try:
+            with conn:
+                cursor = conn.execute(sql, {**params, '_chunk_size': chunk_size})
+                return cursor.rowcount or 0
+        finally:
+            conn.close()
+
+    with get_engine().begin() as conn:
+        result = conn.execute(text(sql), {**params, '_chunk_size': chunk_size})
+        return result.rowcount or 0
+
+
+class RetentionService:
+    """Движок хранения: применяет политики ко всем таблицам"""
+
+    def __init__(self, policies: List[RetentionPolicy] = None):
+        self.policies = policies if policies is not None else self.default_policies()
+        self.last_run: Optional[datetime] = None
+        self.last_results: List[RetentionResult] = []
+        self._running = False
+
+    @staticmethod
+    def default_policies() -> List[RetentionPolicy]:
+        """Политики по умолчанию (сроки из config)"""
+        from utils.statistics_manager import get_statistics_manager
+
+        return [
+            RetentionPolicy(
+                table='staking_snapshots',
+                time_column='snapshot_time',
+                max_age_days=config.RETENTION_STAKING_SNAPSHOTS_DAYS,
+                downsample_after_days=config.RETENTION_SNAPSHOT_DOWNSAMPLE_AFTER_DAYS,
+                downsample_group_by='staking_history_id'
+            ),
+            RetentionPolicy(
+                table='promo_participants_history',
+                time_column='recorded_at',
+                max_age_days=config.RETENTION_PARTICIPANTS_DAYS
+            ),
+            RetentionPolicy(
+                table='telegram_messages',
+                time_column='created_at',
+                max_age_days=config.RETENTION_TELEGRAM_MESSAGES_DAYS
+            ),
+            # ORM-таблица статистики ротации (DateTime)
+            RetentionPolicy(
+                table='rotation_stats',
+                time_column='timestamp',
+                max_age_days=config.RETENTION_ROTATION_STATS_DAYS
+            ),
+            # Outbox уведомлений: только доставленные или окончательно неудачные
+            RetentionPolicy(
+                table='notification_outbox',
+                time_column='created_at',
+                max_age_days=config.RETENTION_OUTBOX_DAYS,
+                condition="status IN ('sent', 'failed')"
+            ),
+            # Таблица StatisticsManager (REAL unix timestamp) - в БД менеджера
+            RetentionPolicy(
+                table='RotationStats',
+                time_column='timestamp',
+                max_age_days=config.RETENTION_ROTATION_STATS_DAYS,
+                time_is_epoch=True,
+                db_path=get_statistics_manager().db_path
+            ),
+        ]
+
+    # ========== ЗАПУСК ==========
+
+    async def run(self) -> List[RetentionResult]:
+        """
+        Применить все политики (не блокирует event loop)
+
+        Каждая пачка выполняется в DB executor, между пачками - asyncio.sleep,
+        чтобы другие операции с БД успевали проходить.
+        """
+        if self._running:
+            logger.info("⏭️ Retention уже выполняется, пропускаем")
+            return []
+
+        self._running = True
+        started = time.monotonic()
+        results = []
+
+        try:
+            existing_tables = {}  # db_path -> таблицы этой БД
+
+            for policy in self.policies:
+                if policy.db_path not in existing_tables:
+                    existing_tables[policy.db_path] = await run_in_db_executor(
+                        self._get_existing_tables, policy.db_path
+                    )
+                if policy.table not in existing_tables[policy.db_path]:
+                    results.append(RetentionResult(table=policy.table, skipped=True))
+                    continue
+                results.append(await self._apply_policy(policy))
+
+            await run_in_db_executor(self.incremental_vacuum)
+
+        finally:
+            self._running = False
+
+        self.last_run = datetime.utcnow()
+        self.last_results = results
+
+        total_deleted = sum(r.deleted + r.downsampled for r in results)
+        logger.info(f"🧹 Retention завершен за {time.monotonic() - started:.1f}с: удалено {total_deleted} строк")
+        for r in results:
+            if r.deleted or r.downsampled or r.error:
+                logger.info(
+                    f"   ├─ {r.table}: удалено {r.deleted}, даунсэмплинг {r.downsampled}, "
+                    f"пачек {r.chunks}, {r.duration:.1f}с" + (f", ошибка: {r.error}" if r.error else "")
+                )
+
+        return results
+
+    async def _apply_policy(self, policy: RetentionPolicy) -> RetentionResult:
+        result = RetentionResult(table=policy.table)
+        started = time.monotonic()
+        chunk_size = config.RETENTION_CHUNK_SIZE
+
+        try:
+            # 1. Удаление записей старше срока хранения
+            where_sql, params = self._age_condition(policy, policy.max_age_days)
+            result.deleted, chunks = await self._delete_async(
+                policy.table, where_sql, params, chunk_size, policy.db_path
+            )
+            result.chunks += chunks
+
+            # 2. Даунсэмплинг: оставляем последнюю запись на группу в сутки
+            if policy.downsample_after_days is not None and policy.downsample_group_by:
+                where_sql, params = self._downsample_condition(policy)
+                result.downsampled, chunks = await self._delete_async(
+                    policy.table, where_sql, params, chunk_size, policy.db_path
+                )
+                result.chunks += chunks
+
+        except Exception as e:
+            logger.error(f"❌ Ошибка retention для {policy.table}: {e}")
+            result.error = str(e)
+
+        if (result.deleted or result.downsampled) and policy.db_path is None:
+            # Удаление сырым SQL не видно событиям ORM
+            bump_table_version(policy.table)
+
+        result.duration = time.monotonic() - started
+        return result
+
+    async def _delete_async(
+        self,
+        table: str,
+        where_sql: str,
+        params: Dict[str, Any],
+        chunk_size: int,
+        db_path: str = None
+    ) -> tuple:
+        total = 0
+        chunks = 0
+        while True:
+            deleted = await run_in_db_executor(_delete_chunk, table, where_sql, params, chunk_size, db_path)
+            total += deleted
+            chunks += 1
+            if deleted < chunk_size:
+                break
+            # Отдаем БД и event loop другим задачам
+            await asyncio.sleep(config.RETENTION_CHUNK_PAUSE)
+        return total, chunks
+
+    # ========== УСЛОВИЯ ==========
+
+    @staticmethod
+    def _cutoff_param(policy: RetentionPolicy, days: float):
+        cutoff = datetime.utcnow() - timedelta(days=days)
+        if policy.time_is_epoch:
+            return time.time() - days * 86400
+        return format_db_time(cutoff)
+
+    def _age_condition(self, policy: RetentionPolicy, days: float) -> tuple:
+        where_sql = f"{policy.time_column} < :cutoff"
+        if policy.condition:
+            where_sql += f" AND ({policy.condition})"
+        return where_sql, {'cutoff': self._cutoff_param(policy, days)}
+
+    def _downsample_condition(self, policy: RetentionPolicy) -> tuple:
+        """
+        Записи в окне [срок хранения, порог даунсэмплинга), кроме последней
+        записи (MAX(id)) на группу в каждые сутки
+        """
+        time_col = policy.time_column
+        day_expr = f"date({time_col}, 'unixepoch')" if policy.time_is_epoch else f"date({time_col})"
+        where_sql = (
+            f"{time_col} < :ds_cutoff AND {time_col} >= :ret_cutoff "
+            f"AND id NOT IN ("
+            f"SELECT MAX(id) FROM {policy.table} "
+            f"WHERE {time_col} < :ds_cutoff AND {time_col} >= :ret_cutoff "
+            f"GROUP BY {policy.downsample_group_by}, {day_expr})"
+        )
+        params = {
+            'ds_cutoff': self._cutoff_param(policy, policy.downsample_after_days),
+            'ret_cutoff': self._cutoff_param(policy, policy.max_age_days),
+        }
+        return where_sql, params
+
+    # ========== SQLITE ==========
+
+    @staticmethod
+    def _get_existing_tables(db_path: str = None) -> set:
+        if db_path is not None:
+            conn = sqlite3.connect(db_path)
+            try:
+                rows = conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'").fetchall()
+                return {row[0] for row in rows}
+            finally:
+                conn.close()
+
+        with get_engine().connect() as conn:
+            rows = conn.execute(text("SELECT name FROM sqlite_master WHERE type = 'table'")).fetchall()
+            return {row[0] for row in rows}
+
+    @staticmethod
+    def ensure_incremental_auto_vacuum() -> bool:
+        """
+        Переводит БД в режим auto_vacuum=INCREMENTAL (один раз)
+
+        Для существующей БД смена режима требует полного VACUUM,
+        поэтому вызывается при старте, до запуска парсинга.
+
+        Returns:
+            True если режим уже был или успешно включен
+        """
+        try:
+            with get_engine().connect() as conn:
+                mode = conn.exec_driver_sql("PRAGMA auto_vacuum").scalar()
+                if mode == 2:  # INCREMENTAL
+                    return True
+
+                logger.info("🗜️ Включение auto_vacuum=INCREMENTAL (однократный VACUUM)...")
+                started = time.monotonic()
+                conn.exec_driver_sql("PRAGMA auto_vacuum = INCREMENTAL")
+                conn.exec_driver_sql("VACUUM")
+                logger.info(f"✅ auto_vacuum=INCREMENTAL включен за {time.monotonic() - started:.1f}с")
+                return True
+
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось включить incremental auto_vacuum: {e}")
+            return False
+
+    @staticmethod
+    def incremental_vacuum(pages: int = None) -> int:
+        """
+        Возвращает ОС до N свободных страниц
+
+        Returns:
+            Количество свободных страниц до очистки
+        """
+        pages = pages or config.RETENTION_INCREMENTAL_VACUUM_PAGES
+        try:
+            with get_engine().connect() as conn:
+                freelist = conn.exec_driver_sql("PRAGMA freelist_count").scalar() or 0
+                if freelist:
+                    conn.exec_driver_sql(f"PRAGMA incremental_vacuum({int(pages)})")
+                    logger.debug(f"🗜️ incremental_vacuum: свободных страниц {freelist}, освобождаем до {pages}")
+                return freelist
+        except Exception as e:
+            logger.warning(f"⚠️ Ошибка incremental_vacuum: {e}")
+            return 0
+
+
+# Глобальный экземпляр сервиса
+_retention_service: Optional[RetentionService] = None
+
+
+def get_retention_service() -> RetentionService:
+    """Получить глобальный экземпляр сервиса хранения"""
+    global _retention_service
+    if _retention_service is None:
+        _retention_service = RetentionService()
+    return _retention_service
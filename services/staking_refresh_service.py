@@ -0,0 +1,159 @@
+"""
+Фоновое обновление стейкингов ссылки (stale-while-revalidate).
+
+Кнопка "Обновить" в текущих стейкингах сразу показывает данные из БД,
+а парсинг запускается в фоне через общий пул воркеров (как автопроверка).
+Повторные запросы той же ссылки, пока парсинг идет, присоединяются
+к уже запущенному обновлению вместо нового прохода по API биржи.
+
+Если пул воркеров не запущен (PARALLEL_PARSING_ENABLED=false),
+парсинг выполняется в общем ThreadPoolExecutor.
+
+Использование:
+    from services.staking_refresh_service import get_staking_refresh_service
+
+    refresh = get_staking_refresh_service().refresh(link_id, name, api_url, exchange, page_url, min_apr)
+    await asyncio.shield(refresh)
+"""
+import asyncio
+import logging
+from datetime import datetime
+from typing import Dict, Optional
+
+import config
+from data.database import get_db_session
+from data.models import ApiLink
+from utils.executor import get_executor
+from utils.parsing_queue import TaskPriority, TaskStatus
+
+logger = logging.getLogger(__name__)
+
+
+class StakingRefreshService:
+    """Объединяет параллельные обновления одной ссылки в одну задачу парсинга"""
+
+    def __init__(self):
+        self._in_flight: Dict[int, asyncio.Task] = {}
+        self._stats = {
+            'started': 0,
+            'joined': 0,
+            'failed': 0,
+        }
+
+    def is_refreshing(self, link_id: int) -> bool:
+        """Идет ли сейчас обновление ссылки"""
+        task = self._in_flight.get(link_id)
+        return task is not None and not task.done()
+
+    def refresh(
+        self,
+        link_id: int,
+        link_name: str,
+        api_url: str,
+        exchange: str,
+        page_url: Optional[str] = None,
+        min_apr: Optional[float] = None
+    ) -> asyncio.Task:
+        """
+        Запустить обновление ссылки или присоединиться к уже идущему.
+
+        Returns:
+            Задача обновления (результат - количество новых стейкингов).
+            Задача общая для всех ожидающих - ждать через asyncio.shield.
+        """
+        task = self._in_flight.get(link_id)
+        if task is not None and not task.done():
+            self._stats['joined'] += 1
+            logger.info(f"🔗 Обновление {link_name} уже идет, присоединяемся")
+            return task
+
+        self._stats['started'] += 1
+        task = asyncio.create_task(
+            self._run(link_id, link_name, api_url, exchange, page_url, min_apr)
+        )
+        self._in_flight[link_id] = task
+        task.add_done_callback(lambda t, lid=link_id: self._on_done(lid, t))
+        return task
+
+    def _on_done(self, link_id: int, task: asyncio.Task):
+        if self._in_flight.get(link_id) is task:
+            del self._in_flight[link_id]
+        if not task.cancelled() and task.exception() is not None:
+            self._stats['failed'] += 1
+
+    async def _run(
+        self,
+        link_id: int,
+        link_name: str,
+        api_url: str,
+        exchange: str,
+        page_url: Optional[str],
+        min_apr: Optional[float]
+    ) -> int:
+        from services.parsing_worker import get_worker_pool
+
+        pool = get_worker_pool()
+        if pool is not None and pool.is_running:
+            return await self._run_in_pool(pool, link_id, link_name, api_url, exchange, page_url, min_apr)
+        return await self._run_in_executor(link_id, link_name, api_url, exchange, page_url, min_apr)
+
+    async def _run_in_pool(self, pool, link_id, link_name, api_url, exchange, page_url, min_apr) -> int:
+        """Парсинг воркером пула: last_checked и уведомления о новых - в его callback"""
+        task_id = await pool.add_task(
+            link_id=link_id,
+            link_name=link_name,
+            url=api_url,
+            category='staking',
+            priority=TaskPriority.HIGH,
+            exchange=exchange or '',
+            api_url=api_url,
+            page_url=page_url,
+            min_apr=min_apr
+        )
+        logger.info(f"📥 Фоновое обновление стейкингов {link_name} поставлено в очередь")
+
+        task = await pool.wait_task(task_id, timeout=config.STAKINGS_REFRESH_TIMEOUT)
+        if task.status == TaskStatus.FAILED:
+            raise RuntimeError(task.error or f"Парсинг {link_name} не удался")
+        return (task.result or {}).get('new_count', 0)
+
+    async def _run_in_executor(self, link_id, link_name, api_url, exchange, page_url, min_apr) -> int:
+        """Парсинг без пула воркеров (PARALLEL_PARSING_ENABLED=false)"""
+        from bot.parser_service import ParserService
+
+        loop = asyncio.get_running_loop()
+        new_stakings = await asyncio.wait_for(
+            loop.run_in_executor(
+                get_executor(),
+                ParserService().parse_staking_link,
+                link_id,
+                api_url,
+                exchange,
+                page_url,
+                min_apr
+            ),
+            timeout=config.STAKINGS_REFRESH_TIMEOUT
+        )
+
+        with get_db_session() as db:
+            link = db.query(ApiLink).filter(ApiLink.id == link_id).first()
+            if link:
+                link.last_checked = datetime.utcnow()
+
+        return len([s for s in (new_stakings or []) if not s.get('_no_new')])
+
+    def get_stats(self) -> Dict[str, int]:
+        """Статистика обновлений"""
+        return {**self._stats, 'in_flight': len(self._in_flight)}
+
+
+# Глобальный экземпляр сервиса
+_staking_refresh_service: Optional[StakingRefreshService] = None
+
+
+def get_staking_refresh_service() -> StakingRefreshService:
+    """Возвращает глобальный экземпляр сервиса обновления стейкингов"""
+    global _staking_refresh_service
+    if _staking_refresh_service is None:
+        _staking_refresh_service = StakingRefreshService()
+    return _staking_refresh_service
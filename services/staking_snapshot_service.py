@@ -3,20 +3,179 @@ services/staking_snapshot_service.py
 Сервис для создания снимков стейкингов и расчета дельт изменений
 """
 import logging
-from typing import List, Dict, Optional
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Optional, Iterable
 from datetime import datetime, timedelta
-from sqlalchemy import desc
+from sqlalchemy import desc, event, func
+from sqlalchemy.orm import Session
 from data.database import get_db_session
+from data.data_version import staking_scope, track_bulk_write
 from data.models import StakingHistory, StakingSnapshot
 
 logger = logging.getLogger(__name__)
 
+# Ключ session.info: снимки, которые попадут в SnapshotThrottle после commit
+_PENDING_THROTTLE_KEY = '_snapshot_throttle_pending'
+_commit_hooks_installed = False
+_commit_hooks_lock = threading.Lock()
+
+
+def _apply_pending_throttle(session: Session):
+    for throttle, staking_history_ids, snapshot_time in session.info.pop(_PENDING_THROTTLE_KEY, ()):
+        throttle.record(staking_history_ids, snapshot_time)
+
+
+def _drop_pending_throttle(session: Session):
+    # Транзакция откатилась - снимков нет, троттлить нечего
+    session.info.pop(_PENDING_THROTTLE_KEY, None)
+
+
+def _install_commit_hooks():
+    """Подписаться на commit/rollback сессий (один раз)"""
+    global _commit_hooks_installed
+    with _commit_hooks_lock:
+        if _commit_hooks_installed:
+            return
+        _commit_hooks_installed = True
+    event.listen(Session, 'after_commit', _apply_pending_throttle)
+    event.listen(Session, 'after_rollback', _drop_pending_throttle)
+
+
+class SnapshotThrottle:
+    """
+    Ограниченная in-memory карта времени последнего снимка по staking_history_id
+
+    Позволяет решать "рано ли делать снимок" без запросов к БД.
+    Загружается одним GROUP BY запросом (только снимки моложе интервала -
+    более старые и так означают "пора") и обновляется при каждой записи.
+
+    Если пришлось вытеснить запись, которая еще внутри интервала, карта
+    считается неполной и промахи перепроверяются в БД.
+    """
+
+    def __init__(self, interval_seconds: int, max_size: int = 20000):
+        self._interval = interval_seconds
+        self._max_size = max_size
+        self._times: OrderedDict[int, datetime] = OrderedDict()
+        self._lock = threading.RLock()
+        self._loaded = False
+        self._complete = False
+
+    @property
+    def is_complete(self) -> bool:
+        """True если промах в карте гарантированно означает 'снимок нужен'"""
+        return self._loaded and self._complete
+
+    def load(self, session) -> int:
+        """Загружает время последних снимков одним запросом"""
+        since = datetime.utcnow() - timedelta(seconds=self._interval)
+        rows = session.query(
+            StakingSnapshot.staking_history_id,
+            func.max(StakingSnapshot.snapshot_time)
+        ).filter(
+            StakingSnapshot.snapshot_time >= since
+        ).group_by(StakingSnapshot.staking_history_id).all()
+
+        with self._lock:
+            self._times.clear()
+            self._complete = True
+            for staking_history_id, snapshot_time in sorted(rows, key=lambda r: r[1]):
+                self._put(staking_history_id, snapshot_time)
+            self._loaded = True
+
+        logger.info(f"📸 SnapshotThrottle: загружено {len(self._times)} записей (complete={self._complete})")
+        return len(self._times)
+
+    def ensure_loaded(self, session) -> None:
+        """Ленивая загрузка при первом обращении"""
+        if not self._loaded:
+            self.load(session)
+
+    def get(self, staking_history_id: int) -> Optional[datetime]:
+        with self._lock:
+            return self._times.get(staking_history_id)
+
+    def record(self, staking_history_ids: Iterable[int], snapshot_time: datetime) -> None:
+        """Фиксирует запись снимков (уже зафиксированных в БД)"""
+        with self._lock:
+            for staking_history_id in staking_history_ids:
+                self._put(staking_history_id, snapshot_time)
+
+    def record_on_commit(self, session, staking_history_ids: Iterable[int], snapshot_time: datetime) -> None:
+        """
+        Зафиксировать снимки, записанные в сессии вызывающего кода, после ее commit
+
+        При rollback снимков в БД нет - карта не меняется, и следующая
+        проверка снова создаст снимки.
+        """
+        _install_commit_hooks()
+        session.info.setdefault(_PENDING_THROTTLE_KEY, []).append(
+            (self, list(staking_history_ids), snapshot_time)
+        )
+
+    def is_due(self, last_time: Optional[datetime], now: datetime) -> bool:
+        return last_time is None or (now - last_time).total_seconds() >= self._interval
+
+    def _put(self, staking_history_id: int, snapshot_time: datetime) -> None:
+        self._times.pop(staking_history_id, None)
+        self._times[staking_history_id] = snapshot_time
+
+        while len(self._times) > self._max_size:
+            _, evicted_time = self._times.popitem(last=False)
+            # Вытеснили запись внутри интервала - промахам больше нельзя доверять
+            if not self.is_due(evicted_time, datetime.utcnow()):
+                if self._complete:
+                    logger.warning("⚠️ SnapshotThrottle переполнен, промахи будут проверяться в БД")
+                self._complete = False
+
+    def clear(self) -> None:
+        with self._lock:
+            self._times.clear()
+            self._loaded = False
+            self._complete = False
+
 
 class StakingSnapshotService:
     """Сервис для управления снимками стейкингов"""
 
     MIN_SNAPSHOT_INTERVAL = 3600  # 1 час в секундах
 
+    def __init__(self):
+        self.throttle = get_snapshot_throttle()
+
+    def _get_last_snapshot_times(self, session, staking_history_ids: List[int]) -> Dict[int, datetime]:
+        """
+        Время последних снимков для набора стейкингов
+
+        Берется из in-memory карты; в БД идем только за промахами
+        и только если карта неполная.
+        """
+        self.throttle.ensure_loaded(session)
+
+        result = {}
+        misses = []
+        for staking_history_id in staking_history_ids:
+            last_time = self.throttle.get(staking_history_id)
+            if last_time is not None:
+                result[staking_history_id] = last_time
+            else:
+                misses.append(staking_history_id)
+
+        if misses and not self.throttle.is_complete:
+            # SQLite ограничивает число параметров в IN (...) - запрашиваем частями
+            for i in range(0, len(misses), 500):
+                chunk = misses[i:i + 500]
+                rows = session.query(
+                    StakingSnapshot.staking_history_id,
+                    func.max(StakingSnapshot.snapshot_time)
+                ).filter(
+                    StakingSnapshot.staking_history_id.in_(chunk)
+                ).group_by(StakingSnapshot.staking_history_id).all()
+                result.update({row[0]: row[1] for row in rows})
+
+        return result
+
     def should_create_snapshot(self, staking_history_id: int) -> bool:
         """
         Проверяет, прошло ли >= 1 час с последнего снимка
@@ -29,17 +188,15 @@ class StakingSnapshotService:
         """
         try:
             with get_db_session() as session:
-                # Получаем последний снимок
-                last_snapshot = session.query(StakingSnapshot).filter(
-                    StakingSnapshot.staking_history_id == staking_history_id
-                ).order_by(desc(StakingSnapshot.snapshot_time)).first()
+                # Время последнего снимка (из in-memory карты, БД - только при промахе)
+                last_time = self._get_last_snapshot_times(session, [staking_history_id]).get(staking_history_id)
 
-                if not last_snapshot:
+                if not last_time:
                     # Нет снимков - создаем первый
                     return True
 
                 # Проверяем интервал
-                time_since_last = (datetime.utcnow() - last_snapshot.snapshot_time).total_seconds()
+                time_since_last = (datetime.utcnow() - last_time).total_seconds()
                 should_create = time_since_last >= self.MIN_SNAPSHOT_INTERVAL
 
                 if should_create:
@@ -84,18 +241,78 @@ class StakingSnapshotService:
 
                 session.add(snapshot)
                 session.commit()
+                snapshot_time = snapshot.snapshot_time
 
-                logger.info(
-                    f"📸 Создан снимок: {staking_history.exchange} {staking_history.coin} "
-                    f"APR={staking_history.apr}% Fill={staking_history.fill_percentage}%"
-                )
+            # Снимок зафиксирован - только теперь троттлим
+            self.throttle.record([staking_history.id], snapshot_time)
 
-                return snapshot
+            logger.info(
+                f"📸 Создан снимок: {staking_history.exchange} {staking_history.coin} "
+                f"APR={staking_history.apr}% Fill={staking_history.fill_percentage}%"
+            )
+
+            return snapshot
 
         except Exception as e:
             logger.error(f"❌ Ошибка создания снимка: {e}")
             return None
 
+    def create_snapshots_bulk(self, session, stakings: List[StakingHistory]) -> int:
+        """
+        Создает снимки для пачки стейкингов в сессии вызывающего кода
+
+        Время последних снимков берется из in-memory карты (SnapshotThrottle),
+        снимки вставляются одним bulk INSERT без отдельных сессий на каждый стейкинг.
+
+        Args:
+            session: Открытая сессия (commit делает вызывающий код)
+            stakings: Записи StakingHistory (уже с ID после flush)
+
+        Returns:
+            Количество созданных снимков
+        """
+        stakings = [s for s in stakings if s.id is not None]
+        if not stakings:
+            return 0
+
+        now = datetime.utcnow()
+        ids = list({s.id for s in stakings})
+
+        last_times = self._get_last_snapshot_times(session, ids)
+
+        mappings = []
+        seen_ids = set()
+        for staking in stakings:
+            if staking.id in seen_ids:
+                continue
+            seen_ids.add(staking.id)
+
+            last_time = last_times.get(staking.id)
+            if last_time and (now - last_time).total_seconds() < self.MIN_SNAPSHOT_INTERVAL:
+                continue
+
+            mappings.append({
+                'staking_history_id': staking.id,
+                'exchange': staking.exchange,
+                'product_id': staking.product_id,
+                'coin': staking.coin,
+                'apr': staking.apr,
+                'fill_percentage': staking.fill_percentage,
+                'token_price_usd': staking.token_price_usd,
+                'status': staking.status,
+                'snapshot_time': now
+            })
+
+        if mappings:
+            session.bulk_insert_mappings(StakingSnapshot, mappings)
+            # bulk_insert_mappings не вызывает событий ORM
+            track_bulk_write(session, 'staking_snapshots', {staking_scope(m['exchange']) for m in mappings})
+            # В карту - только после commit вызывающего кода (при rollback снимков нет)
+            self.throttle.record_on_commit(session, (m['staking_history_id'] for m in mappings), now)
+            logger.info(f"📸 Создано {len(mappings)} снимков (пропущено по интервалу: {len(seen_ids) - len(mappings)})")
+
+        return len(mappings)
+
     def get_last_snapshot(self, staking_history_id: int) -> Optional[StakingSnapshot]:
         """
         Получает последний снимок для расчета дельт
@@ -370,3 +587,32 @@ class StakingSnapshotService:
         except Exception as e:
             logger.error(f"❌ Ошибка получения истории снимков: {e}")
             return []
+
+
+# Общая карта для всех экземпляров сервиса (сервис создается на каждый вызов)
+_snapshot_throttle: Optional[SnapshotThrottle] = None
+_throttle_lock = threading.Lock()
+
+
+def get_snapshot_throttle() -> SnapshotThrottle:
+    """
+    Получить глобальную карту времени последних снимков (singleton)
+    """
+    global _snapshot_throttle
+
+    if _snapshot_throttle is None:
+        with _throttle_lock:
+            if _snapshot_throttle is None:
+                import config
+                _snapshot_throttle = SnapshotThrottle(
+                    interval_seconds=StakingSnapshotService.MIN_SNAPSHOT_INTERVAL,
+                    max_size=getattr(config, 'SNAPSHOT_THROTTLE_MAX_SIZE', 20000)
+                )
+
+    return _snapshot_throttle
+
+
+def warm_up_snapshot_throttle() -> int:
+    """Загрузить карту времени последних снимков (вызывается при старте бота)"""
+    with get_db_session() as session:
+        return get_snapshot_throttle().load(session)
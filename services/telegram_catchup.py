@@ -0,0 +1,243 @@
+"""
+Догрузка Telegram-сообщений, пропущенных во время отключения
+
+Живые события NewMessage приходят только пока клиент подключен. Чтобы
+сообщения, опубликованные за время разрыва или перезапуска бота, не
+терялись, для каждого канала хранится ID последнего обработанного
+сообщения (таблица telegram_channel_cursors). После подключения
+запрашиваются только сообщения с ID больше него (min_id), пакетами
+по TELEGRAM_CATCHUP_BATCH от старых к новым.
+
+- Новый канал (курсора нет): курсор ставится на последнее сообщение канала,
+  история не обрабатывается
+- Пропущено больше TELEGRAM_CATCHUP_MAX_MESSAGES: обрабатываются первые
+  TELEGRAM_CATCHUP_MAX_MESSAGES, курсор переносится на последнее сообщение
+- FloodWait обрабатывается TelegramParser.handle_flood_wait; при слишком
+  долгом ожидании канал пропускается до следующего подключения (курсор
+  остается на месте)
+- Курсоры в памяти сдвигаются на каждом сообщении, в БД сохраняются
+  не чаще раза в TELEGRAM_CURSOR_SAVE_INTERVAL секунд и при остановке
+
+Курсоры загружаются и копируются (snapshot) до подписки на живые
+сообщения: живое сообщение, пришедшее во время догрузки, сдвигает курсор
+в памяти, но догрузка идет от позиций из копии и разрыв не теряет.
+
+Использование:
+    catchup = TelegramCatchUp(parser)
+    await catchup.load()
+    cursors = catchup.snapshot()                           # до подписки на каналы
+    catchup.advance(chat_id, message.id)                   # живые сообщения
+    await catchup.catch_up(client, chat_index, process, cursors)  # после подключения
+    await catchup.persist()
+"""
+import asyncio
+import logging
+import time
+from typing import Awaitable, Callable, Dict, Optional
+
+from telethon.errors import FloodWaitError
+
+from data.database import get_db_session, run_in_db_executor
+from data.models import TelegramChannelCursor
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _load_cursors() -> Dict[int, int]:
+    with get_db_session() as db:
+        return {
+            channel_id: last_message_id
+            for channel_id, last_message_id in
+            db.query(TelegramChannelCursor.channel_id, TelegramChannelCursor.last_message_id).all()
+        }
+
+
+def _save_cursors(cursors: Dict[int, int], usernames: Dict[int, str]):
+    with get_db_session() as db:
+        existing = {
+            cursor.channel_id: cursor for cursor in
+            db.query(TelegramChannelCursor).filter(TelegramChannelCursor.channel_id.in_(cursors)).all()
+        }
+        for channel_id, last_message_id in cursors.items():
+            cursor = existing.get(channel_id)
+            if cursor is None:
+                db.add(TelegramChannelCursor(
+                    channel_id=channel_id,
+                    channel_username=usernames.get(channel_id),
+                    last_message_id=last_message_id
+                ))
+            elif last_message_id > cursor.last_message_id:
+                cursor.last_message_id = last_message_id
+                cursor.channel_username = usernames.get(channel_id, cursor.channel_username)
+        db.commit()
+
+
+class TelegramCatchUp:
+    """Курсоры каналов и догрузка сообщений после переподключения"""
+
+    def __init__(self, parser):
+        self.parser = parser  # TelegramParser (handle_flood_wait)
+        self._cursors: Dict[int, int] = {}  # channel peer id -> последний обработанный message_id
+        self._usernames: Dict[int, str] = {}
+        self._dirty: Dict[int, int] = {}
+        self._loaded = False
+        self._last_save = time.monotonic()
+        self._save_task: Optional[asyncio.Task] = None
+
+        self._stats = {
+            'recovered': 0,
+            'catchup_runs': 0,
+            'channels_initialized': 0,
+            'truncated': 0,
+            'flood_waits': 0,
+        }
+
+    async def load(self):
+        """Загрузить курсоры из БД (один раз)"""
+        if self._loaded:
+            return
+        try:
+            for channel_id, last_message_id in (await run_in_db_executor(_load_cursors)).items():
+                if last_message_id > self._cursors.get(channel_id, -1):
+                    self._cursors[channel_id] = last_message_id
+            self._loaded = True
+            logger.info(f"📍 Загружено курсоров Telegram-каналов: {len(self._cursors)}")
+        except Exception as e:
+            logger.warning(f"⚠️ Не удалось загрузить курсоры Telegram-каналов: {e}")
+
+    def snapshot(self) -> Dict[int, int]:
+        """Копия курсоров - позиции, от которых догружать (до подписки на живые сообщения)"""
+        return dict(self._cursors)
+
+    def advance(self, channel_id: int, message_id: int, channel_username: str = None):
+        """Отметить сообщение канала обработанным"""
+        if message_id <= self._cursors.get(channel_id, 0):
+            return
+        self._cursors[channel_id] = message_id
+        self._dirty[channel_id] = message_id
+        if channel_username:
+            self._usernames[channel_id] = channel_username
+
+        # Сохраняем пачкой, не на каждое сообщение
+        if (time.monotonic() - self._last_save > config.TELEGRAM_CURSOR_SAVE_INTERVAL
+                and (self._save_task is None or self._save_task.done())):
+            self._save_task = asyncio.create_task(self.persist())
+
+    def forget(self, channel_ids):
+        """Сбросить курсоры: каналы начнутся с текущего сообщения (заново добавленные)"""
+        for channel_id in channel_ids:
+            self._cursors.pop(channel_id, None)
+            self._dirty.pop(channel_id, None)
+
+    async def persist(self):
+        """Сохранить изменившиеся курсоры в БД"""
+        if not self._dirty:
+            return
+        dirty, self._dirty = self._dirty, {}
+        self._last_save = time.monotonic()
+        try:
+            await run_in_db_executor(_save_cursors, dirty, dict(self._usernames))
+        except Exception as e:
+            # Вернем в очередь сохранения (новые значения не перетираем)
+            for channel_id, message_id in dirty.items():
+                if message_id > self._dirty.get(channel_id, 0):
+                    self._dirty[channel_id] = message_id
+            logger.warning(f"⚠️ Не удалось сохранить курсоры Telegram-каналов: {e}")
+
+    async def _call(self, request: Callable[[], Awaitable]):
+        """Запрос к Telegram с обработкой FloodWait. Returns: результат или None (пропустить канал)"""
+        while True:
+            try:
+                return await request()
+            except FloodWaitError as e:
+                self._stats['flood_waits'] += 1
+                if not await self.parser.handle_flood_wait(e):
+                    return None
+
+    async def catch_up(
+        self,
+        client,
+        chat_index: Dict[int, str],
+        process: Callable[[int, str, object], Awaitable],
+        cursors: Optional[Dict[int, int]] = None
+    ) -> int:
+        """
+        Догрузить пропущенные сообщения каналов
+
+        Args:
+            client: Подключенный TelegramClient
+            chat_index: peer id канала -> username (ключ monitored_channels)
+            process: async process(channel_id, channel_username, message) - та же
+                обработка, что у живых сообщений
+            cursors: Позиции, от которых догружать (snapshot() до подписки на
+                живые сообщения); None - текущие курсоры
+
+        Returns:
+            Сколько сообщений догружено
+        """
+        await self.load()
+        if cursors is None:
+            cursors = self.snapshot()
+        self._stats['catchup_runs'] += 1
+        batch_size = config.TELEGRAM_CATCHUP_BATCH
+        max_messages = config.TELEGRAM_CATCHUP_MAX_MESSAGES
+        recovered_total = 0
+
+        for channel_id, channel_username in chat_index.items():
+            self._usernames[channel_id] = channel_username
+            try:
+                cursor = cursors.get(channel_id)
+                if cursor is None:
+                    # Новый канал: начинаем с текущего последнего сообщения
+                    latest = await self._call(lambda: client.get_messages(channel_id, limit=1))
+                    if latest is None:
+                        continue
+                    self.advance(channel_id, latest[0].id if latest else 0, channel_username)
+                    self._cursors.setdefault(channel_id, 0)
+                    self._stats['channels_initialized'] += 1
+                    continue
+
+                # Идем от позиции из snapshot: живые сообщения, пришедшие во время
+                # догрузки, сдвигают курсор в памяти, но не разрыв
+                # (уже обработанные живыми отсеет дедупликация в process)
+                since = cursor
+                recovered = 0
+                while recovered < max_messages:
+                    limit = min(batch_size, max_messages - recovered)
+                    messages = await self._call(
+                        lambda: client.get_messages(channel_id, min_id=since, limit=limit, reverse=True)
+                    )
+                    if not messages:
+                        break
+                    for message in messages:
+                        await process(channel_id, channel_username, message)
+                        self.advance(channel_id, message.id, channel_username)
+                    since = messages[-1].id
+                    recovered += len(messages)
+                    if len(messages) < limit:
+                        break
+                else:
+                    # Разрыв слишком большой: остаток пропускаем, курсор - на последнее сообщение
+                    latest = await self._call(lambda: client.get_messages(channel_id, limit=1))
+                    if latest and latest[0].id > since:
+                        self._stats['truncated'] += 1
+                        logger.warning(
+                            f"⚠️ @{channel_username}: пропущено больше {max_messages} сообщений, "
+                            f"догружены первые {max_messages}"
+                        )
+                        self.advance(channel_id, latest[0].id, channel_username)
+
+                if recovered:
+                    logger.info(f"📥 @{channel_username}: догружено {recovered} пропущенных сообщений")
+                recovered_total += recovered
+
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось догрузить сообщения @{channel_username}: {e}")
+
+        self._stats['recovered'] += recovered_total
+        await self.persist()
+        return recovered_total
+
+    def get_stats(self) -> Dict[str, int]:
+        return {**self._stats, 'channels': len(self._cursors), 'unsaved': len(self._dirty)}
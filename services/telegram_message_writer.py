@@ -0,0 +1,229 @@
+"""
+Пакетная запись найденных Telegram-сообщений в БД
+
+Обработчик Telethon не пишет в БД сам: сообщение ставится в очередь,
+фоновая задача собирает пакет и записывает его одной транзакцией в потоке
+БД (run_in_db_executor). Всплеск сообщений в активном канале больше не
+блокирует event loop (UI бота и обработку других аккаунтов).
+
+- Пакет записывается, когда набралось TELEGRAM_WRITE_BATCH_SIZE сообщений
+  или прошло TELEGRAM_WRITE_FLUSH_INTERVAL секунд с первого сообщения пакета
+- Очередь ограничена (TELEGRAM_WRITE_QUEUE_SIZE): если БД не успевает,
+  submit ждет места - обработчики притормаживают, память не растет
+- Дубликаты (promo_id уже в БД или дважды в пакете) пропускаются одним запросом
+- Если пакет не записался, сообщения пишутся по одному
+- flush() дописывает очередь (при остановке монитора)
+
+Использование:
+    from services.telegram_message_writer import TelegramMessageWriter
+
+    writer = TelegramMessageWriter()
+    await writer.submit(api_link_id=1, promo_id='telegram_chan_5', ...)
+    await writer.flush()
+"""
+import asyncio
+import logging
+import time
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from data.database import get_db_session, run_in_db_executor
+from data.models import ApiLink, PromoHistory
+import config
+
+logger = logging.getLogger(__name__)
+
+
+def _build_promo(item: Dict[str, Any], api_link: Optional[ApiLink]) -> PromoHistory:
+    """Запись PromoHistory для найденного сообщения"""
+    result = item['result']
+    channel_username = item['channel_username']
+
+    # Формируем описание с ключевыми словами и датами
+    description = item['text'][:500]  # Ограничиваем длину описания
+    if result['dates']:
+        description = f"📅 {result['dates']}\n\n{description}"
+
+    # Формируем ссылку на сообщение в Telegram
+    if result['links']:
+        message_link = result['links'][0]  # Первая ссылка из сообщения
+    else:
+        # Ссылка на сообщение в канале
+        message_link = f"https://t.me/{channel_username}/{item['message_id']}"
+
+    return PromoHistory(
+        api_link_id=item['api_link_id'],
+        promo_id=item['promo_id'],
+        exchange=api_link.name if api_link else "Telegram",
+        title=f"📱 Telegram: @{channel_username}",
+        description=description,
+        total_prize_pool=", ".join(result['matched_keywords']),  # Сохраняем ключевые слова
+        award_token=None,
+        start_time=item['date'],
+        end_time=None,
+        link=message_link,
+        icon=None
+    )
+
+
+def _write_batch(items: List[Dict[str, Any]]) -> Dict[str, int]:
+    """Записать пакет одной транзакцией (выполняется в потоке БД)"""
+    with get_db_session() as db:
+        promo_ids = {item['promo_id'] for item in items}
+        existing = {
+            promo_id for (promo_id,) in
+            db.query(PromoHistory.promo_id).filter(PromoHistory.promo_id.in_(promo_ids)).all()
+        }
+
+        link_ids = {item['api_link_id'] for item in items}
+        api_links = {
+            link.id: link for link in
+            db.query(ApiLink).filter(ApiLink.id.in_(link_ids)).all()
+        }
+
+        written_links = set()
+        duplicates = 0
+        for item in items:
+            if item['promo_id'] in existing:
+                duplicates += 1
+                continue
+            existing.add(item['promo_id'])
+            db.add(_build_promo(item, api_links.get(item['api_link_id'])))
+            written_links.add(item['api_link_id'])
+
+        # Обновляем last_checked для ссылок с новыми сообщениями
+        now = datetime.utcnow()
+        for link_id in written_links:
+            if link_id in api_links:
+                api_links[link_id].last_checked = now
+
+        db.commit()
+        return {'written': len(items) - duplicates, 'duplicates': duplicates}
+
+
+class TelegramMessageWriter:
+    """Очередь записи найденных сообщений с пакетным сбросом в БД"""
+
+    def __init__(self, batch_size: int = None, flush_interval: float = None, max_queue: int = None):
+        self.batch_size = batch_size or config.TELEGRAM_WRITE_BATCH_SIZE
+        self.flush_interval = config.TELEGRAM_WRITE_FLUSH_INTERVAL if flush_interval is None else flush_interval
+        self._queue: asyncio.Queue = asyncio.Queue(maxsize=max_queue or config.TELEGRAM_WRITE_QUEUE_SIZE)
+        self._flusher: Optional[asyncio.Task] = None
+
+        self._stats = {
+            'enqueued': 0,
+            'written': 0,
+            'duplicates': 0,
+            'failed': 0,
+            'batches': 0,
+            'backpressure_waits': 0,
+        }
+        self._max_depth = 0
+        self._last_backpressure_log = 0.0
+
+    async def submit(
+        self,
+        api_link_id: int,
+        promo_id: str,
+        message_id: int,
+        text: str,
+        date: datetime,
+        result: Dict,
+        channel_username: str
+    ):
+        """Поставить сообщение в очередь записи (ждет, если очередь заполнена)"""
+        if self._queue.full():
+            self._stats['backpressure_waits'] += 1
+            now = time.monotonic()
+            if now - self._last_backpressure_log > 60:
+                self._last_backpressure_log = now
+                logger.warning(f"⏳ Очередь записи Telegram-сообщений заполнена ({self._queue.qsize()}), ждем БД")
+
+        await self._queue.put({
+            'api_link_id': api_link_id,
+            'promo_id': promo_id,
+            'message_id': message_id,
+            'text': text,
+            'date': date,
+            'result': result,
+            'channel_username': channel_username,
+        })
+        self._stats['enqueued'] += 1
+        self._max_depth = max(self._max_depth, self._queue.qsize())
+
+        if self._flusher is None or self._flusher.done():
+            self._flusher = asyncio.create_task(self._flush_loop())
+
+    async def _collect_batch(self) -> List[Dict[str, Any]]:
+        """Первое сообщение + все, что успело прийти до дедлайна (не больше batch_size)"""
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout=timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _flush_loop(self):
+        while True:
+            batch = await self._collect_batch()
+            try:
+                await self._write(batch)
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+    async def _write(self, batch: List[Dict[str, Any]]):
+        try:
+            counts = await run_in_db_executor(_write_batch, batch)
+        except Exception as e:
+            logger.warning(f"⚠️ Пакет из {len(batch)} Telegram-сообщений не записан ({e}), пишем по одному")
+            counts = {'written': 0, 'duplicates': 0}
+            for item in batch:
+                try:
+                    item_counts = await run_in_db_executor(_write_batch, [item])
+                    counts['written'] += item_counts['written']
+                    counts['duplicates'] += item_counts['duplicates']
+                except Exception as item_error:
+                    self._stats['failed'] += 1
+                    logger.error(f"❌ Ошибка сохранения сообщения {item['promo_id']}: {item_error}")
+
+        self._stats['batches'] += 1
+        self._stats['written'] += counts['written']
+        self._stats['duplicates'] += counts['duplicates']
+        if counts['written']:
+            logger.info(f"💾 Сохранено {counts['written']} Telegram-сообщений в PromoHistory")
+        if counts['duplicates']:
+            logger.debug(f"ℹ️ Пропущено дубликатов: {counts['duplicates']}")
+
+    async def flush(self, timeout: float = 10.0):
+        """
+        Дописать очередь (не дольше timeout) и остановить фоновую задачу
+
+        Следующий submit запустит задачу заново.
+        """
+        if self._flusher is not None and not self._queue.empty():
+            try:
+                await asyncio.wait_for(self._queue.join(), timeout=timeout)
+            except asyncio.TimeoutError:
+                logger.warning(f"⚠️ Не записано Telegram-сообщений: {self._queue.qsize()}")
+        if self._flusher is not None:
+            self._flusher.cancel()
+            await asyncio.gather(self._flusher, return_exceptions=True)
+            self._flusher = None
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика записи"""
+        return {
+            **self._stats,
+            'queue_depth': self._queue.qsize(),
+            'max_queue_depth': self._max_depth,
+            'avg_batch_size': round(
+                (self._stats['written'] + self._stats['duplicates'] + self._stats['failed'])
+                / self._stats['batches'], 1
+            ) if self._stats['batches'] else 0.0,
+        }
@@ -10,9 +10,12 @@ from telethon.errors import (
     UserDeactivatedBanError
 )
 from parsers.telegram_parser import TelegramParser
-from data.database import get_db_session
-from data.models import ApiLink, PromoHistory
+from data.database import get_db_session, run_in_db_executor
+from data.models import ApiLink
 from utils.promo_formatter import format_promo_header
+from utils.cache import CacheManager
+from services.telegram_message_writer import TelegramMessageWriter
+from services.telegram_catchup import TelegramCatchUp
 import config
 
 logger = logging.getLogger(__name__)
@@ -27,6 +30,24 @@ class TelegramMonitor:
         self.monitored_channels = {}
         self._shutdown_event = asyncio.Event()
 
+        # Кэш chat_id -> канал: обработчик не ходит в сеть за get_chat()
+        self._chat_index: Dict[int, str] = {}  # peer id -> ключ monitored_channels
+        self._peer_id_cache: Dict[str, int] = {}  # username (lower) -> peer id
+        self._registered_handlers: Dict[int, events.NewMessage] = {}  # account_id -> фильтр
+        self._channels_watch_task: Optional[asyncio.Task] = None
+
+        # Один канал на нескольких аккаунтах: каждое сообщение приходит N раз,
+        # обрабатывается только первая доставка (ключ - channel_id:message_id)
+        self._seen_messages = CacheManager(max_size=10000, default_ttl=config.TELEGRAM_DEDUP_WINDOW)
+        self.duplicates_skipped = 0
+
+        # Запись найденных сообщений в БД - пакетами вне обработчика
+        self.message_writer = TelegramMessageWriter()
+
+        # Догрузка сообщений, пропущенных за время отключения
+        self.catchup = TelegramCatchUp(self.parser)
+        self._catchup_task: Optional[asyncio.Task] = None
+
     async def start(self):
         """Запуск мониторинга с автоматическим переподключением"""
         reconnect_delay = 60  # Задержка между попытками переподключения
@@ -57,17 +78,19 @@ class TelegramMonitor:
                 # Загружаем активные каналы
                 await self.load_active_channels()
 
-                # Подписываемся на новые сообщения для ВСЕХ подключенных клиентов
-                for account_id, client_data in self.parser.clients.items():
-                    if client_data['is_connected']:
-                        client_data['client'].add_event_handler(
-                            self.handle_new_message,
-                            events.NewMessage()
-                        )
-                        logger.info(f"👾 Event handler добавлен для аккаунта {client_data['account']['name']}")
+                # Позиции каналов - до подписки: живые сообщения не должны
+                # сдвинуть курсоры дальше пропущенных за время отключения
+                await self.catchup.load()
+                cursors = self.catchup.snapshot()
+
+                # Подписываемся на новые сообщения ТОЛЬКО из отслеживаемых каналов
+                self._registered_handlers.clear()
+                await self.register_message_handlers()
 
                 connected_count = self.parser.get_connected_clients_count()
                 self.is_running = True
+                self._channels_watch_task = asyncio.create_task(self._watch_channels())
+                self._start_catch_up(self._chat_index, cursors)
                 logger.info(f"✅ Telegram Monitor запущен. {connected_count} аккаунтов отслеживают {len(self.monitored_channels)} каналов")
 
                 # Ожидаем сигнала завершения
@@ -109,6 +132,18 @@ class TelegramMonitor:
         logger.info("🛑 Остановка Telegram Monitor...")
         self.is_running = False
 
+        if self._channels_watch_task:
+            self._channels_watch_task.cancel()
+            self._channels_watch_task = None
+        if self._catchup_task:
+            self._catchup_task.cancel()
+            self._catchup_task = None
+        self._registered_handlers.clear()
+
+        # Дописываем найденные сообщения и курсоры каналов, пока БД доступна
+        await self.message_writer.flush()
+        await self.catchup.persist()
+
         if self.parser:
             try:
                 # Ждём завершения текущих операций (таймаут 10 сек)
@@ -124,61 +159,225 @@ class TelegramMonitor:
         """Сигнал завершения работы"""
         self._shutdown_event.set()
 
+    def _query_active_channels(self) -> Dict[str, Dict]:
+        """Активные Telegram-ссылки из БД: username канала (без @) -> данные"""
+        channels = {}
+        with get_db_session() as db:
+            # Загружаем активные ссылки с типом 'telegram'
+            telegram_links = db.query(ApiLink).filter(
+                ApiLink.parsing_type == 'telegram',
+                ApiLink.is_active == True,
+                ApiLink.telegram_channel.isnot(None)
+            ).all()
+
+            for link in telegram_links:
+                # Нормализуем имя канала (убираем @ если есть)
+                channel_username = link.telegram_channel
+                if channel_username.startswith('@'):
+                    channel_username = channel_username[1:]
+
+                channels[channel_username] = {
+                    'api_link_id': link.id,
+                    'name': link.name,
+                    'keywords': link.get_telegram_keywords(),
+                    'telegram_channel': link.telegram_channel
+                }
+        return channels
+
     async def load_active_channels(self):
         """Загрузка активных Telegram-ссылок из БД"""
         try:
-            with get_db_session() as db:
-                # Загружаем активные ссылки с типом 'telegram'
-                telegram_links = db.query(ApiLink).filter(
-                    ApiLink.parsing_type == 'telegram',
-                    ApiLink.is_active == True,
-                    ApiLink.telegram_channel.isnot(None)
-                ).all()
+            channels = self._query_active_channels()
+            self.monitored_channels.clear()
+            self.monitored_channels.update(channels)
+
+            logger.info(f"📋 Загружено {len(self.monitored_channels)} активных Telegram-каналов")
+
+            # Отображаем список каналов
+            if self.monitored_channels:
+                for username, data in self.monitored_channels.items():
+                    keywords_count = len(data['keywords'])
+                    keywords_preview = ', '.join(data['keywords'][:3])  # Показываем первые 3 ключевых слова
+                    if keywords_count > 3:
+                        keywords_preview += f" (+{keywords_count - 3} еще)"
+                    
+                    logger.info(f"   • @{username} ({data['name']}) - {keywords_count} ключевых слов")
+                    logger.info(f"     Ключевые слова: {keywords_preview}")
+            else:
+                logger.info("   Нет активных каналов для мониторинга")
 
-                self.monitored_channels.clear()
+        except Exception as e:
+            logger.error(f"❌ Ошибка загрузки Telegram-каналов: {e}")
 
-                for link in telegram_links:
-                    # Нормализуем имя канала (убираем @ если есть)
-                    channel_username = link.telegram_channel
-                    if channel_username.startswith('@'):
-                        channel_username = channel_username[1:]
-
-                    self.monitored_channels[channel_username] = {
-                        'api_link_id': link.id,
-                        'name': link.name,
-                        'keywords': link.get_telegram_keywords(),
-                        'telegram_channel': link.telegram_channel
-                    }
-
-                logger.info(f"📋 Загружено {len(self.monitored_channels)} активных Telegram-каналов")
-
-                # Отображаем список каналов
-                if self.monitored_channels:
-                    for username, data in self.monitored_channels.items():
-                        keywords_count = len(data['keywords'])
-                        keywords_preview = ', '.join(data['keywords'][:3])  # Показываем первые 3 ключевых слова
-                        if keywords_count > 3:
-                            keywords_preview += f" (+{keywords_count - 3} еще)"
-                        
-                        logger.info(f"   • @{username} ({data['name']}) - {keywords_count} ключевых слов")
-                        logger.info(f"     Ключевые слова: {keywords_preview}")
+    async def _resolve_peer_id(self, client, channel_username: str) -> Optional[int]:
+        """
+        ID канала по username (с кэшем)
+
+        Telethon сначала ищет username в кэше сущностей своей сессии,
+        поэтому сетевой ResolveUsername нужен только для новых каналов.
+        """
+        cache_key = channel_username.lower()
+        if cache_key in self._peer_id_cache:
+            return self._peer_id_cache[cache_key]
+
+        for attempt in range(2):
+            try:
+                peer_id = await client.get_peer_id(channel_username)
+                self._peer_id_cache[cache_key] = peer_id
+                return peer_id
+            except FloodWaitError as e:
+                if attempt or not await self.parser.handle_flood_wait(e):
+                    break
+            except Exception as e:
+                logger.warning(f"⚠️ Не удалось определить ID канала @{channel_username}: {e}")
+                break
+        return None
+
+    async def register_message_handlers(self):
+        """
+        Подписать клиентов на новые сообщения отслеживаемых каналов
+
+        Фильтр по chat_id проверяется внутри Telethon до вызова обработчика:
+        личные чаты, группы и неотслеживаемые каналы не будят обработчик.
+        Повторный вызов заменяет фильтр (после изменения списка каналов).
+        """
+        connected = [
+            (account_id, client_data)
+            for account_id, client_data in self.parser.clients.items()
+            if client_data['is_connected']
+        ]
+        if not connected:
+            return
+
+        # ID каналов одинаковы для всех аккаунтов - определяем один раз
+        resolver = connected[0][1]['client']
+        chat_index = {}
+        for channel_username in self.monitored_channels:
+            peer_id = await self._resolve_peer_id(resolver, channel_username)
+            if peer_id is not None:
+                chat_index[peer_id] = channel_username
+        self._chat_index = chat_index
+
+        unresolved = len(self.monitored_channels) - len(chat_index)
+        if unresolved:
+            logger.warning(f"⚠️ {unresolved} каналов без ID - повторим при следующей проверке списка каналов")
+
+        for account_id, client_data in connected:
+            client = client_data['client']
+            old_filter = self._registered_handlers.pop(account_id, None)
+            if old_filter is not None:
+                client.remove_event_handler(self.handle_new_message, old_filter)
+
+            if not chat_index:
+                continue
+            new_filter = events.NewMessage(chats=list(chat_index))
+            client.add_event_handler(self.handle_new_message, new_filter)
+            self._registered_handlers[account_id] = new_filter
+            logger.info(
+                f"👾 Event handler добавлен для аккаунта {client_data['account']['name']} "
+                f"({len(chat_index)} каналов)"
+            )
+
+    async def _watch_channels(self):
+        """
+        Перерегистрация обработчиков при изменении списка каналов в БД
+
+        Также повторяет определение ID каналов, для которых оно не удалось
+        (ошибка сети, долгий FloodWait) - иначе канал не отслеживался бы
+        до изменения списка или переподключения.
+        """
+        interval = config.TELEGRAM_CHANNELS_RELOAD_INTERVAL
+        while self.is_running and interval > 0:
+            await asyncio.sleep(interval)
+            try:
+                channels = await run_in_db_executor(self._query_active_channels)
+                unresolved = len(self._chat_index) < len(self.monitored_channels)
+                if channels == self.monitored_channels and not unresolved:
+                    continue
+                if channels != self.monitored_channels:
+                    logger.info("🔄 Список Telegram-каналов изменился")
                 else:
-                    logger.info("   Нет активных каналов для мониторинга")
+                    logger.info("🔄 Повторно определяем ID Telegram-каналов")
+                previous_ids = set(self._chat_index)
+                previous_usernames = set(self.monitored_channels)
+                self.monitored_channels.clear()
+                self.monitored_channels.update(channels)
+                cursors = self.catchup.snapshot()
+                await self.register_message_handlers()
 
+                added = {
+                    channel_id: username for channel_id, username in self._chat_index.items()
+                    if channel_id not in previous_ids
+                }
+                if added:
+                    # Новые в списке каналы начинаем с текущего сообщения (без истории);
+                    # каналы, которые были в списке, но не определились, - догружаем от курсора
+                    new_channels = [
+                        channel_id for channel_id, username in added.items()
+                        if username not in previous_usernames
+                    ]
+                    self.catchup.forget(new_channels)
+                    for channel_id in new_channels:
+                        cursors.pop(channel_id, None)
+                    self._start_catch_up(added, cursors)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Ошибка проверки списка Telegram-каналов: {e}")
+
+    def _start_catch_up(self, chat_index: Dict[int, str], cursors: Optional[Dict[int, int]] = None):
+        """Догрузить пропущенные сообщения каналов в фоне (от позиций cursors)"""
+        if not config.TELEGRAM_CATCHUP_ENABLED or not chat_index:
+            return
+        if self._catchup_task and not self._catchup_task.done():
+            # Предыдущая догрузка еще идет - новые каналы добавим после нее
+            previous = self._catchup_task
+
+            async def run_after():
+                await asyncio.gather(previous, return_exceptions=True)
+                await self._run_catch_up(chat_index, cursors)
+
+            self._catchup_task = asyncio.create_task(run_after())
+        else:
+            self._catchup_task = asyncio.create_task(self._run_catch_up(chat_index, cursors))
+
+    async def _run_catch_up(self, chat_index: Dict[int, str], cursors: Optional[Dict[int, int]] = None):
+        client = next(
+            (data['client'] for data in self.parser.clients.values() if data['is_connected']),
+            None
+        )
+        if client is None:
+            return
+        try:
+            await self.catchup.catch_up(client, dict(chat_index), self.process_channel_message, cursors)
+        except asyncio.CancelledError:
+            raise
         except Exception as e:
-            logger.error(f"❌ Ошибка загрузки Telegram-каналов: {e}")
+            logger.warning(f"⚠️ Ошибка догрузки пропущенных сообщений: {e}")
 
     async def handle_new_message(self, event):
         """Обработка нового сообщения из канала"""
+        # Проверяем, отслеживается ли этот канал (по локальному индексу, без запроса в сеть)
+        channel_username = self._chat_index.get(event.chat_id)
+        if not channel_username:
+            return
+        await self.process_channel_message(event.chat_id, channel_username, event.message)
+
+    async def process_channel_message(self, channel_id: int, channel_username: str, message):
+        """Обработка сообщения отслеживаемого канала (живого или догруженного)"""
         try:
-            message = event.message
-
-            # Проверяем, отслеживается ли этот канал
-            chat = await event.get_chat()
-            channel_username = getattr(chat, 'username', None)
+            if channel_username not in self.monitored_channels:
+                return
 
-            if not channel_username or channel_username not in self.monitored_channels:
+            # Копия того же сообщения от другого аккаунта (или уже догруженное).
+            # Проверка и отметка без await между ними - параллельные доставки не проскочат
+            dedup_key = f"{channel_id}:{message.id}"
+            if self._seen_messages.get(dedup_key) is not None:
+                self.duplicates_skipped += 1
+                logger.debug(f"⏭️ Дубликат сообщения {message.id} из @{channel_username} (другой аккаунт)")
                 return
+            self._seen_messages.set(dedup_key, True)
+            self.catchup.advance(channel_id, message.id, channel_username)
 
             channel_data = self.monitored_channels[channel_username]
             keywords = channel_data['keywords']
@@ -229,66 +428,28 @@ class TelegramMonitor:
 
     async def save_message(self, api_link_id: int, message_id: int, text: str,
                           date: datetime, result: Dict, channel_username: str):
-        """Сохранение найденного сообщения в БД (PromoHistory)"""
+        """
+        Сохранение найденного сообщения в БД (PromoHistory)
+
+        Запись идет через очередь: сообщение попадает в БД пакетом в потоке БД
+        (services/telegram_message_writer.py), обработчик ждет только места в очереди.
+        """
         try:
             # КРИТИЧЕСКАЯ ПРОВЕРКА: Ключевые слова должны быть найдены!
             if not result or not result.get('matched_keywords'):
                 logger.error(f"❌ ОШИБКА: save_message вызван БЕЗ ключевых слов! Пропускаем.")
                 return
 
-            with get_db_session() as db:
-                # Генерируем уникальный promo_id на основе канала и message_id
-                promo_id = f"telegram_{channel_username}_{message_id}"
-
-                # Проверяем, не сохранено ли уже (фильтрация дубликатов)
-                existing = db.query(PromoHistory).filter(
-                    PromoHistory.promo_id == promo_id
-                ).first()
-
-                if existing:
-                    logger.debug(f"ℹ️ Сообщение {message_id} уже сохранено (дубликат)")
-                    return
-
-                # Получаем информацию о ссылке
-                api_link = db.query(ApiLink).filter(ApiLink.id == api_link_id).first()
-
-                # Формируем описание с ключевыми словами и датами
-                description = text[:500]  # Ограничиваем длину описания
-                if result['dates']:
-                    description = f"📅 {result['dates']}\n\n{description}"
-
-                # Формируем ссылку на сообщение в Telegram
-                message_link = None
-                if result['links']:
-                    message_link = result['links'][0]  # Первая ссылка из сообщения
-                else:
-                    # Ссылка на сообщение в канале
-                    message_link = f"https://t.me/{channel_username}/{message_id}"
-
-                # Создаем новую запись в PromoHistory
-                promo = PromoHistory(
-                    api_link_id=api_link_id,
-                    promo_id=promo_id,
-                    exchange=api_link.name if api_link else "Telegram",
-                    title=f"📱 Telegram: @{channel_username}",
-                    description=description,
-                    total_prize_pool=", ".join(result['matched_keywords']),  # Сохраняем ключевые слова
-                    award_token=None,
-                    start_time=date,
-                    end_time=None,
-                    link=message_link,
-                    icon=None
-                )
-
-                db.add(promo)
-                db.commit()
-
-                # Обновляем last_checked для ApiLink
-                if api_link:
-                    api_link.last_checked = datetime.utcnow()
-                    db.commit()
-
-                logger.info(f"💾 Сообщение сохранено в PromoHistory")
+            await self.message_writer.submit(
+                api_link_id=api_link_id,
+                # Уникальный promo_id на основе канала и message_id (фильтрация дубликатов)
+                promo_id=f"telegram_{channel_username}_{message_id}",
+                message_id=message_id,
+                text=text,
+                date=date,
+                result=result,
+                channel_username=channel_username
+            )
 
         except Exception as e:
             logger.error(f"❌ Ошибка сохранения сообщения: {e}")
@@ -445,6 +606,8 @@ class TelegramMonitor:
         """Перезагрузка списка отслеживаемых каналов"""
         logger.info("🔄 Перезагрузка списка каналов...")
         await self.load_active_channels()
+        if self.is_running:
+            await self.register_message_handlers()
 
     async def force_check_channel(self, link_id: int) -> Optional[Dict]:
         """
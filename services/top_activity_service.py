@@ -5,9 +5,12 @@
 
 import logging
 import re
-from typing import List, Dict, Optional, Tuple
+import threading
+import time
+from bisect import bisect_left, insort
+from typing import List, Dict, Optional, Tuple, Iterable, Iterator, Any
 from datetime import datetime, timedelta
-from sqlalchemy import desc, or_, and_, func
+from sqlalchemy import desc, or_, and_, func, case
 
 from data.database import get_db_session
 from data.models import StakingHistory, PromoHistory, ApiLink
@@ -30,6 +33,7 @@ class TopActivityService:
     
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
+        self.leaderboard = TopActivityLeaderboard(self)
     
     def calculate_staking_profit(self, staking: Dict) -> Dict:
         """
@@ -320,113 +324,64 @@ class TopActivityService:
             Список стейкингов с расчётами заработка
         """
         try:
-            import time
-            current_timestamp_ms = int(time.time() * 1000)
-            
-            with get_db_session() as session:
-                # Базовый запрос
-                query = session.query(StakingHistory).filter(
-                    StakingHistory.status != 'Sold Out'
-                )
-                
-                # Фильтр по заполненности
-                if exclude_filled:
-                    query = query.filter(
-                        or_(
-                            StakingHistory.fill_percentage == None,
-                            StakingHistory.fill_percentage < self.MAX_FILL_PERCENTAGE
-                        )
-                    )
-                
-                # Фильтр по времени окончания (исключаем истёкшие)
-                query = query.filter(
-                    or_(
-                        StakingHistory.end_time == None,
-                        StakingHistory.end_time == '',
-                        StakingHistory.end_time > str(current_timestamp_ms)
-                    )
-                )
-                
-                # Фильтр по минимальному APR
-                if min_apr is not None:
-                    query = query.filter(StakingHistory.apr >= min_apr)
-                
-                # Фильтр по типу стейкинга
-                if staking_type:
-                    if staking_type.lower() == 'fixed':
-                        query = query.filter(
-                            ~StakingHistory.type.ilike('%flex%')
-                        )
-                    elif staking_type.lower() == 'flexible':
-                        query = query.filter(
-                            StakingHistory.type.ilike('%flex%')
-                        )
-                
-                # Получаем все записи для сортировки по заработку
-                stakings = query.all()
-                
-                # Конвертируем в словари и рассчитываем заработок
-                result = []
-                for staking in stakings:
-                    # Рассчитываем user_limit_usd если нет
-                    user_limit_usd = staking.user_limit_usd
-                    if not user_limit_usd and staking.user_limit_tokens and staking.token_price_usd:
-                        user_limit_usd = staking.user_limit_tokens * staking.token_price_usd
-                    
-                    # ФИЛЬТР: Пропускаем стейкинги с нереалистичными лимитами (> $50,000)
-                    if user_limit_usd and user_limit_usd > self.MAX_USER_LIMIT_USD:
-                        continue
-                    
-                    staking_dict = {
-                        'id': staking.id,
-                        'exchange': staking.exchange,
-                        'product_id': staking.product_id,
-                        'coin': staking.coin,
-                        'reward_coin': staking.reward_coin,
-                        'apr': staking.apr,
-                        'type': staking.type,
-                        'product_type': staking.product_type,
-                        'status': staking.status,
-                        'term_days': staking.term_days,
-                        'user_limit_usd': user_limit_usd,  # Используем рассчитанное значение
-                        'user_limit_tokens': staking.user_limit_tokens,
-                        'token_price_usd': staking.token_price_usd,
-                        'fill_percentage': staking.fill_percentage,
-                        'max_capacity': staking.max_capacity,
-                        'current_deposit': staking.current_deposit,
-                        'start_time': staking.start_time,
-                        'end_time': staking.end_time,
-                        'first_seen': staking.first_seen,
-                        'last_updated': staking.last_updated
-                    }
-                    
-                    # Рассчитываем заработок
-                    profit_data = self.calculate_staking_profit(staking_dict)
-                    staking_dict.update(profit_data)
-                    
-                    # Рассчитываем оставшееся время
-                    staking_dict['time_remaining'] = self._calculate_time_remaining(staking.end_time)
-                    
-                    result.append(staking_dict)
-                
-                # Сортировка: Fixed первыми, потом Flexible
-                # Внутри каждой группы - по заработку (profit) по убыванию
-                fixed_stakings = [s for s in result if not s.get('is_flexible', False)]
-                flexible_stakings = [s for s in result if s.get('is_flexible', False)]
-                
-                fixed_stakings.sort(key=lambda x: x.get('profit', 0), reverse=True)
-                flexible_stakings.sort(key=lambda x: x.get('profit', 0), reverse=True)
-                
-                # Объединяем: сначала Fixed, потом Flexible
-                sorted_result = fixed_stakings + flexible_stakings
-                
-                # Возвращаем топ N
-                return sorted_result[:limit]
-                
+            return self.leaderboard.top_stakings(
+                limit=limit,
+                min_apr=min_apr,
+                staking_type=staking_type,
+                exclude_filled=exclude_filled
+            )
         except Exception as e:
             self.logger.error(f"❌ Ошибка получения ТОП стейкингов: {e}", exc_info=True)
             return []
     
+    def _staking_to_entry(self, staking: StakingHistory) -> Optional[Dict]:
+        """
+        Готовит запись рейтинга для стейкинга (статические фильтры + расчёт заработка).
+        
+        Returns:
+            Словарь стейкинга с profit-данными или None если стейкинг не попадает в ТОП
+        """
+        if staking.status == 'Sold Out':
+            return None
+        
+        # Рассчитываем user_limit_usd если нет
+        user_limit_usd = staking.user_limit_usd
+        if not user_limit_usd and staking.user_limit_tokens and staking.token_price_usd:
+            user_limit_usd = staking.user_limit_tokens * staking.token_price_usd
+        
+        # ФИЛЬТР: Пропускаем стейкинги с нереалистичными лимитами (> $50,000)
+        if user_limit_usd and user_limit_usd > self.MAX_USER_LIMIT_USD:
+            return None
+        
+        staking_dict = {
+            'id': staking.id,
+            'exchange': staking.exchange,
+            'product_id': staking.product_id,
+            'coin': staking.coin,
+            'reward_coin': staking.reward_coin,
+            'apr': staking.apr,
+            'type': staking.type,
+            'product_type': staking.product_type,
+            'status': staking.status,
+            'term_days': staking.term_days,
+            'user_limit_usd': user_limit_usd,  # Используем рассчитанное значение
+            'user_limit_tokens': staking.user_limit_tokens,
+            'token_price_usd': staking.token_price_usd,
+            'fill_percentage': staking.fill_percentage,
+            'max_capacity': staking.max_capacity,
+            'current_deposit': staking.current_deposit,
+            'start_time': staking.start_time,
+            'end_time': staking.end_time,
+            'first_seen': staking.first_seen,
+            'last_updated': staking.last_updated
+        }
+        
+        # Рассчитываем заработок
+        profit_data = self.calculate_staking_profit(staking_dict)
+        staking_dict.update(profit_data)
+        
+        return staking_dict
+    
     def get_top_promos(
         self,
         limit: int = 10,
@@ -445,102 +400,67 @@ class TopActivityService:
             Список промоакций с расчётами
         """
         try:
-            now = datetime.utcnow()
-            
-            with get_db_session() as session:
-                # Базовый запрос - только активные или предстоящие
-                query = session.query(PromoHistory).filter(
-                    or_(
-                        PromoHistory.status.ilike('%ongoing%'),
-                        PromoHistory.status.ilike('%active%'),
-                        PromoHistory.status.ilike('%upcoming%'),
-                        PromoHistory.status == None  # Если статус не указан
-                    )
-                )
-                
-                # Фильтр по времени окончания (не истёкшие)
-                query = query.filter(
-                    or_(
-                        PromoHistory.end_time == None,
-                        PromoHistory.end_time > now
-                    )
-                )
-                
-                # Фильтр по минимальной награде
-                if min_reward is not None:
-                    query = query.filter(
-                        or_(
-                            PromoHistory.reward_per_winner_usd >= min_reward,
-                            PromoHistory.total_prize_pool_usd >= min_reward
-                        )
-                    )
-                
-                # Фильтр по статусу
-                if status_filter:
-                    query = query.filter(
-                        PromoHistory.status.ilike(f'%{status_filter}%')
-                    )
-                
-                promos = query.all()
-                
-                # Конвертируем в словари и рассчитываем награду
-                result = []
-                for promo in promos:
-                    promo_dict = {
-                        'id': promo.id,
-                        'exchange': promo.exchange,
-                        'title': promo.title,
-                        'description': promo.description,
-                        'award_token': promo.award_token,
-                        'total_prize_pool': promo.total_prize_pool,
-                        'total_prize_pool_usd': promo.total_prize_pool_usd,
-                        'reward_per_winner': promo.reward_per_winner,
-                        'reward_per_winner_usd': promo.reward_per_winner_usd,
-                        'participants_count': promo.participants_count,
-                        'winners_count': promo.winners_count,
-                        'conditions': promo.conditions,
-                        'status': promo.status,
-                        'start_time': promo.start_time,
-                        'end_time': promo.end_time,
-                        'link': promo.link,
-                        'created_at': promo.created_at,
-                        'last_updated': promo.last_updated
-                    }
-                    
-                    # Рассчитываем награду
-                    reward_data = self.calculate_promo_reward(promo_dict)
-                    promo_dict.update(reward_data)
-                    
-                    # ФИЛЬТР: Показываем только промо где есть понятная награда на пользователя
-                    if not promo_dict.get('has_user_reward'):
-                        continue
-                    
-                    # ФИЛЬТР: Пропускаем промо с нереалистично большой наградой (> $10,000)
-                    expected_reward = promo_dict.get('expected_reward', 0)
-                    if expected_reward and expected_reward > 10000:
-                        continue
-                    
-                    # Рассчитываем оставшееся время
-                    promo_dict['time_remaining'] = self._calculate_promo_time_remaining(promo.start_time, promo.end_time)
-                    
-                    result.append(promo_dict)
-                
-                # Сортируем: по награде в USD (expected_reward содержит USD если цена известна)
-                result.sort(
-                    key=lambda x: (
-                        x.get('expected_reward', 0),    # Награда в USD (приоритет)
-                        x.get('participants', 0) > 0    # Потом с участниками
-                    ),
-                    reverse=True
-                )
-                
-                # Возвращаем топ N
-                return result[:limit]
-                
+            return self.leaderboard.top_promos(
+                limit=limit,
+                min_reward=min_reward,
+                status_filter=status_filter
+            )
         except Exception as e:
             self.logger.error(f"❌ Ошибка получения ТОП промоакций: {e}", exc_info=True)
             return []
     
+    # Статусы промо, которые попадают в общий ТОП (как ilike '%...%')
+    TOP_PROMO_STATUSES = ('ongoing', 'active', 'upcoming')
+    
+    def _promo_to_top_entry(self, promo: PromoHistory) -> Optional[Dict]:
+        """
+        Готовит запись общего ТОП промо (статические фильтры + расчёт награды).
+        
+        Returns:
+            Словарь промо с reward-данными или None если промо не попадает в ТОП
+        """
+        # Только активные или предстоящие (если статус не указан - тоже)
+        if promo.status is not None:
+            status_lower = promo.status.lower()
+            if not any(st in status_lower for st in self.TOP_PROMO_STATUSES):
+                return None
+        
+        promo_dict = {
+            'id': promo.id,
+            'exchange': promo.exchange,
+            'title': promo.title,
+            'description': promo.description,
+            'award_token': promo.award_token,
+            'total_prize_pool': promo.total_prize_pool,
+            'total_prize_pool_usd': promo.total_prize_pool_usd,
+            'reward_per_winner': promo.reward_per_winner,
+            'reward_per_winner_usd': promo.reward_per_winner_usd,
+            'participants_count': promo.participants_count,
+            'winners_count': promo.winners_count,
+            'conditions': promo.conditions,
+            'status': promo.status,
+            'start_time': promo.start_time,
+            'end_time': promo.end_time,
+            'link': promo.link,
+            'created_at': promo.created_at,
+            'last_updated': promo.last_updated
+        }
+        
+        # Рассчитываем награду
+        reward_data = self.calculate_promo_reward(promo_dict)
+        promo_dict.update(reward_data)
+        
+        # ФИЛЬТР: Показываем только промо где есть понятная награда на пользователя
+        if not promo_dict.get('has_user_reward'):
+            return None
+        
+        # ФИЛЬТР: Пропускаем промо с нереалистично большой наградой (> $10,000)
+        expected_reward = promo_dict.get('expected_reward', 0)
+        if expected_reward and expected_reward > 10000:
+            return None
+        
+        return promo_dict
+    
     def get_combined_top(self, limit: int = 10) -> List[Dict]:
         """
         Получает комбинированный ТОП (стейкинги + промо) отсортированный по заработку.
@@ -672,38 +592,32 @@ class TopActivityService:
         """
         try:
             with get_db_session() as session:
-                # Считаем стейкинги
-                total_stakings = session.query(StakingHistory).count()
-                active_stakings = session.query(StakingHistory).filter(
-                    StakingHistory.status != 'Sold Out'
-                ).count()
-                
-                # Считаем промоакции
-                total_promos = session.query(PromoHistory).count()
                 now = datetime.utcnow()
-                active_promos = session.query(PromoHistory).filter(
-                    or_(
-                        PromoHistory.end_time == None,
-                        PromoHistory.end_time > now
-                    )
-                ).count()
                 
-                # Уникальные биржи
-                staking_exchanges = session.query(
+                # Стейкинги - один агрегирующий запрос
+                total_stakings, active_stakings, staking_exchanges = session.query(
+                    func.count(StakingHistory.id),
+                    func.sum(case((StakingHistory.status != 'Sold Out', 1), else_=0)),
                     func.count(func.distinct(StakingHistory.exchange))
-                ).scalar() or 0
+                ).one()
                 
-                promo_exchanges = session.query(
+                # Промоакции - один агрегирующий запрос
+                total_promos, active_promos, promo_exchanges = session.query(
+                    func.count(PromoHistory.id),
+                    func.sum(case(
+                        (or_(PromoHistory.end_time == None, PromoHistory.end_time > now), 1),
+                        else_=0
+                    )),
                     func.count(func.distinct(PromoHistory.exchange))
-                ).scalar() or 0
+                ).one()
                 
                 return {
-                    'total_stakings': total_stakings,
-                    'active_stakings': active_stakings,
-                    'total_promos': total_promos,
-                    'active_promos': active_promos,
-                    'staking_exchanges': staking_exchanges,
-                    'promo_exchanges': promo_exchanges
+                    'total_stakings': total_stakings or 0,
+                    'active_stakings': active_stakings or 0,
+                    'total_promos': total_promos or 0,
+                    'active_promos': active_promos or 0,
+                    'staking_exchanges': staking_exchanges or 0,
+                    'promo_exchanges': promo_exchanges or 0
                 }
                 
         except Exception as e:
@@ -815,6 +729,63 @@ class TopActivityService:
         Returns:
             Список промоакцій з розрахунками
         """
+        if category not in self.PROMO_CATEGORIES:
+            self.logger.warning(f"⚠️ Невідома категорія: {category}")
+            return []
+        
+        # Заробіток launchpool залежить від часу до кінця - рахуємо на кожен запит
+        if category in self.TIME_DEPENDENT_CATEGORIES:
+            return self._compute_top_promos_by_category(category, limit, min_apr)
+        
+        try:
+            return self.leaderboard.top_promos_by_category(category, limit)
+        except Exception as e:
+            self.logger.error(f"❌ Ошибка получения ТОП {category}: {e}", exc_info=True)
+            return []
+    
+    # Категорії, де рейтинг залежить від поточного часу (не матеріалізуються)
+    TIME_DEPENDENT_CATEGORIES = ('launchpool',)
+    
+    def _get_category_for_stored_promo_type(self, promo_type: Optional[str]) -> Optional[str]:
+        """
+        Категорія промо так само, як її вибирають SQL-фільтри get_top_promos_by_category
+        (точний збіг promo_type, NULL не потрапляє в жодну категорію).
+        """
+        if promo_type is None or promo_type in self.EXCLUDED_PROMO_TYPES:
+            return None
+        
+        for category, cfg in self.PROMO_CATEGORIES.items():
+            if category != 'other' and promo_type in cfg['promo_types']:
+                return category
+        
+        return 'other'
+    
+    def _promo_to_category_entry(self, promo: PromoHistory, category: str) -> Dict:
+        """Готує запис категорії (розрахунок нагороди + ключ сортування)"""
+        config = self.PROMO_CATEGORIES[category]
+        promo_dict = self._promo_to_dict(promo)
+        
+        if category == 'launchpad':
+            reward_data = self._calculate_launchpad_profit(promo_dict)
+        else:
+            reward_data = self.calculate_promo_reward(promo_dict)
+        
+        promo_dict.update(reward_data)
+        promo_dict['category'] = category
+        promo_dict['category_icon'] = config['icon']
+        promo_dict['category_name'] = config['name']
+        
+        # Ключ сортування як у _sort_promos_by_reward_per_winner
+        self._sort_promos_by_reward_per_winner([promo_dict])
+        return promo_dict
+    
+    def _compute_top_promos_by_category(
+        self,
+        category: str,
+        limit: int = 50,
+        min_apr: float = 0
+    ) -> List[Dict]:
+        """Розрахунок ТОП категорії напряму з БД (для категорій, залежних від часу)"""
         try:
             now = datetime.utcnow()
             
@@ -1219,6 +1190,338 @@ class TopActivityService:
         return stats
 
 
+class _RankedIndex:
+    """Отсортированный индекс (key, id): вставка/удаление через bisect, чтение первых N по порядку"""
+    
+    def __init__(self):
+        self._order: List[Tuple[Any, Any]] = []
+        self._keys: Dict[Any, Any] = {}
+    
+    def upsert(self, item_id, key) -> None:
+        self.remove(item_id)
+        insort(self._order, (key, item_id))
+        self._keys[item_id] = key
+    
+    def remove(self, item_id) -> None:
+        key = self._keys.pop(item_id, None)
+        if key is None:
+            return
+        idx = bisect_left(self._order, (key, item_id))
+        if idx < len(self._order) and self._order[idx] == (key, item_id):
+            del self._order[idx]
+    
+    def clear(self) -> None:
+        self._order.clear()
+        self._keys.clear()
+    
+    def __iter__(self) -> Iterator:
+        for _, item_id in self._order:
+            yield item_id
+    
+    def __len__(self) -> int:
+        return len(self._order)
+
+
+class TopActivityLeaderboard:
+    """
+    Инкрементально поддерживаемый рейтинг для ТОП экранов.
+    
+    Заработок/награда считаются один раз при изменении записи, а не на каждый
+    показ экрана. check_and_save_new_stakings и _save_to_history помечают
+    изменённые записи (mark_*_dirty), при чтении они перечитываются одним
+    запросом и переставляются в отсортированных индексах. Фильтры, зависящие
+    от текущего времени (окончание акции, оставшееся время), применяются при
+    чтении первых N записей.
+    
+    Полная пересборка - при первом обращении и раз в REBUILD_INTERVAL секунд
+    (подхватывает изменения мимо хуков и устаревшие цены токенов).
+    """
+    
+    REBUILD_INTERVAL = 600  # 10 минут
+    _IN_CHUNK_SIZE = 500
+    
+    def __init__(self, service: 'TopActivityService'):
+        self._service = service
+        self._lock = threading.RLock()
+        self._built_at: Optional[float] = None
+        
+        self._stakings: Dict[int, Dict] = {}
+        self._staking_index = _RankedIndex()
+        
+        self._promos: Dict[int, Dict] = {}
+        self._promo_index = _RankedIndex()
+        self._promo_pk_by_promo_id: Dict[str, int] = {}
+        self._promo_id_by_pk: Dict[int, str] = {}
+        
+        self._category_promos: Dict[int, Dict] = {}
+        self._category_indexes: Dict[str, _RankedIndex] = {}
+        
+        self._dirty_staking_ids = set()
+        self._dirty_promo_ids = set()
+    
+    # ---------- Хуки записи ----------
+    
+    def mark_stakings_dirty(self, staking_ids: Iterable[int]) -> None:
+        """Пометить стейкинги (StakingHistory.id) как изменённые"""
+        with self._lock:
+            self._dirty_staking_ids.update(i for i in staking_ids if i is not None)
+    
+    def mark_promos_dirty(self, promo_ids: Iterable[str]) -> None:
+        """Пометить промо (PromoHistory.promo_id) как изменённые"""
+        with self._lock:
+            self._dirty_promo_ids.update(i for i in promo_ids if i)
+    
+    def invalidate(self) -> None:
+        """Форсировать полную пересборку при следующем чтении"""
+        with self._lock:
+            self._built_at = None
+    
+    # ---------- Чтение ----------
+    
+    def top_stakings(
+        self,
+        limit: int = 10,
+        min_apr: float = None,
+        staking_type: str = None,
+        exclude_filled: bool = True
+    ) -> List[Dict]:
+        current_timestamp_ms = str(int(time.time() * 1000))
+        type_filter = staking_type.lower() if staking_type else None
+        max_fill = self._service.MAX_FILL_PERCENTAGE
+        
+        with self._lock:
+            self._ensure_fresh()
+            
+            result = []
+            for staking_id in self._staking_index:
+                entry = self._stakings[staking_id]
+                
+                if exclude_filled and entry['fill_percentage'] is not None and entry['fill_percentage'] >= max_fill:
+                    continue
+                end_time = entry['end_time']
+                if end_time not in (None, '') and not end_time > current_timestamp_ms:
+                    continue
+                if min_apr is not None and not (entry['apr'] is not None and entry['apr'] >= min_apr):
+                    continue
+                if type_filter in ('fixed', 'flexible'):
+                    # NULL type не проходит ни один из фильтров (как в SQL)
+                    if entry['type'] is None:
+                        continue
+                    is_flex_type = 'flex' in entry['type'].lower()
+                    if is_flex_type != (type_filter == 'flexible'):
+                        continue
+                
+                staking_dict = dict(entry)
+                staking_dict['time_remaining'] = self._service._calculate_time_remaining(end_time)
+                result.append(staking_dict)
+                
+                if len(result) >= limit:
+                    break
+            
+            return result
+    
+    def top_promos(
+        self,
+        limit: int = 10,
+        min_reward: float = None,
+        status_filter: str = None
+    ) -> List[Dict]:
+        now = datetime.utcnow()
+        status_filter = status_filter.lower() if status_filter else None
+        
+        with self._lock:
+            self._ensure_fresh()
+            
+            result = []
+            for promo_pk in self._promo_index:
+                entry = self._promos[promo_pk]
+                
+                if not self._is_not_expired(entry, now):
+                    continue
+                if min_reward is not None:
+                    per_winner = entry.get('reward_per_winner_usd')
+                    pool = entry.get('total_prize_pool_usd')
+                    if not ((per_winner is not None and per_winner >= min_reward) or
+                            (pool is not None and pool >= min_reward)):
+                        continue
+                if status_filter and status_filter not in (entry.get('status') or '').lower():
+                    continue
+                
+                promo_dict = dict(entry)
+                promo_dict['time_remaining'] = self._service._calculate_promo_time_remaining(
+                    entry['start_time'], entry['end_time']
+                )
+                result.append(promo_dict)
+                
+                if len(result) >= limit:
+                    break
+            
+            return result
+    
+    def top_promos_by_category(self, category: str, limit: int = 50) -> List[Dict]:
+        now = datetime.utcnow()
+        
+        with self._lock:
+            self._ensure_fresh()
+            
+            result = []
+            index = self._category_indexes.get(category)
+            if not index:
+                return result
+            
+            for promo_pk in index:
+                entry = self._category_promos[promo_pk]
+                if not self._is_not_expired(entry, now):
+                    continue
+                
+                promo_dict = dict(entry)
+                promo_dict['time_remaining'] = self._service._calculate_promo_time_remaining(
+                    entry['start_time'], entry['end_time']
+                )
+                result.append(promo_dict)
+                
+                if len(result) >= limit:
+                    break
+            
+            return result
+    
+    # ---------- Поддержка индексов ----------
+    
+    @staticmethod
+    def _is_not_expired(entry: Dict, now: datetime) -> bool:
+        end_time = entry.get('end_time')
+        return end_time is None or end_time > now
+    
+    def _ensure_fresh(self) -> None:
+        if self._built_at is None or time.monotonic() - self._built_at >= self.REBUILD_INTERVAL:
+            self._rebuild()
+        elif self._dirty_staking_ids or self._dirty_promo_ids:
+            self._apply_dirty()
+    
+    def _rebuild(self) -> None:
+        started = time.monotonic()
+        now = datetime.utcnow()
+        
+        self._stakings.clear()
+        self._staking_index.clear()
+        self._promos.clear()
+        self._promo_index.clear()
+        self._promo_pk_by_promo_id.clear()
+        self._promo_id_by_pk.clear()
+        self._category_promos.clear()
+        self._category_indexes.clear()
+        self._dirty_staking_ids.clear()
+        self._dirty_promo_ids.clear()
+        
+        with get_db_session() as session:
+            for staking in session.query(StakingHistory).filter(
+                StakingHistory.status != 'Sold Out'
+            ).yield_per(500):
+                self._safe_upsert(self._upsert_staking, staking)
+            
+            for promo in session.query(PromoHistory).filter(
+                or_(PromoHistory.end_time == None, PromoHistory.end_time > now)
+            ).yield_per(500):
+                self._safe_upsert(self._upsert_promo, promo)
+        
+        self._built_at = time.monotonic()
+        logger.info(
+            f"🏆 Рейтинг ТОП пересобран: {len(self._staking_index)} стейкингов, "
+            f"{len(self._promo_index)} промо за {self._built_at - started:.2f}с"
+        )
+    
+    def _apply_dirty(self) -> None:
+        staking_ids = list(self._dirty_staking_ids)
+        promo_ids = list(self._dirty_promo_ids)
+        self._dirty_staking_ids.clear()
+        self._dirty_promo_ids.clear()
+        
+        with get_db_session() as session:
+            for i in range(0, len(staking_ids), self._IN_CHUNK_SIZE):
+                chunk = staking_ids[i:i + self._IN_CHUNK_SIZE]
+                found = set()
+                for staking in session.query(StakingHistory).filter(StakingHistory.id.in_(chunk)):
+                    found.add(staking.id)
+                    self._safe_upsert(self._upsert_staking, staking)
+                for missing_id in set(chunk) - found:
+                    self._remove_staking(missing_id)
+            
+            for i in range(0, len(promo_ids), self._IN_CHUNK_SIZE):
+                chunk = promo_ids[i:i + self._IN_CHUNK_SIZE]
+                found = set()
+                for promo in session.query(PromoHistory).filter(PromoHistory.promo_id.in_(chunk)):
+                    found.add(promo.promo_id)
+                    self._safe_upsert(self._upsert_promo, promo)
+                for missing_promo_id in set(chunk) - found:
+                    promo_pk = self._promo_pk_by_promo_id.get(missing_promo_id)
+                    if promo_pk is not None:
+                        self._remove_promo(promo_pk)
+        
+        logger.debug(f"🏆 Рейтинг ТОП обновлён: {len(staking_ids)} стейкингов, {len(promo_ids)} промо")
+    
+    @staticmethod
+    def _safe_upsert(upsert_func, row) -> None:
+        """Одна битая запись не должна ломать весь рейтинг"""
+        try:
+            upsert_func(row)
+        except Exception as e:
+            logger.debug(f"⚠️ Пропуск записи {getattr(row, 'id', '?')} в рейтинге ТОП: {e}")
+    
+    def _upsert_staking(self, staking: StakingHistory) -> None:
+        entry = self._service._staking_to_entry(staking)
+        if entry is None:
+            self._remove_staking(staking.id)
+            return
+        
+        # Fixed первыми, внутри группы - по заработку по убыванию
+        key = (entry.get('is_flexible', False), -(entry.get('profit', 0) or 0))
+        self._stakings[staking.id] = entry
+        self._staking_index.upsert(staking.id, key)
+    
+    def _remove_staking(self, staking_id: int) -> None:
+        self._stakings.pop(staking_id, None)
+        self._staking_index.remove(staking_id)
+    
+    def _remove_promo(self, promo_pk: int) -> None:
+        promo_id = self._promo_id_by_pk.pop(promo_pk, None)
+        if promo_id is not None:
+            self._promo_pk_by_promo_id.pop(promo_id, None)
+        self._promos.pop(promo_pk, None)
+        self._promo_index.remove(promo_pk)
+        self._category_promos.pop(promo_pk, None)
+        for index in self._category_indexes.values():
+            index.remove(promo_pk)
+    
+    def _upsert_promo(self, promo: PromoHistory) -> None:
+        self._remove_promo(promo.id)
+        self._promo_pk_by_promo_id[promo.promo_id] = promo.id
+        self._promo_id_by_pk[promo.id] = promo.promo_id
+        
+        # Общий ТОП промо
+        entry = self._service._promo_to_top_entry(promo)
+        if entry is not None:
+            key = (-(entry.get('expected_reward', 0) or 0), not (entry.get('participants', 0) > 0))
+            self._promos[promo.id] = entry
+            self._promo_index.upsert(promo.id, key)
+        
+        # ТОП по категориям
+        category = self._service._get_category_for_stored_promo_type(promo.promo_type)
+        if category is None or category in self._service.TIME_DEPENDENT_CATEGORIES:
+            return
+        
+        category_entry = self._service._promo_to_category_entry(promo, category)
+        reward = category_entry.get('_sort_reward', 0)
+        if reward > 0:
+            key = (0, -reward)
+        else:
+            # Без нагороды - за датою закінчення
+            end_time = category_entry.get('end_time')
+            key = (1, end_time if isinstance(end_time, datetime) else datetime.max)
+        
+        self._category_promos[promo.id] = category_entry
+        self._category_indexes.setdefault(category, _RankedIndex()).upsert(promo.id, key)
+
+
 # Глобальный экземпляр сервиса
 _top_activity_service = None
 
@@ -394,6 +394,12 @@ class CacheKeys:
     # Статистика
     STATS_OVERVIEW = "stats:overview"
     
+    # Отрендеренные уведомления (части по 4096 символов)
+    RENDERED_MESSAGE = "render:{variant}:{digest}"
+    
+    # Отрендеренные страницы пагинации (см. utils/page_cache.py)
+    RENDERED_PAGE = "page:{kind}:{link_id}:v{version}:{filters}:{page}"
+    
     @classmethod
     def links_by_category(cls, category: str) -> str:
         return cls.LINKS_BY_CATEGORY.format(category=category)
@@ -409,6 +415,14 @@ class CacheKeys:
     @classmethod
     def current_stakings(cls, link_id: int) -> str:
         return cls.CURRENT_STAKINGS.format(link_id=link_id)
+    
+    @classmethod
+    def rendered_message(cls, variant: str, digest: str) -> str:
+        return cls.RENDERED_MESSAGE.format(variant=variant, digest=digest)
+    
+    @classmethod
+    def rendered_page(cls, kind: str, link_id: int, version: int, filters: str, page: int) -> str:
+        return cls.RENDERED_PAGE.format(kind=kind, link_id=link_id, version=version, filters=filters, page=page)
 
 
 # =============================================================================
@@ -432,6 +446,7 @@ def invalidate_promos_cache(link_id: Optional[int] = None):
     cache = get_cache_manager()
     if link_id:
         cache.invalidate(CacheKeys.current_promos(link_id))
+        cache.invalidate_pattern(f"page:promos:{link_id}:")
     else:
         cache.invalidate_pattern("promos:")
     logger.info(f"🗑️ Кэш промо инвалидирован (link_id={link_id})")
@@ -447,6 +462,7 @@ def invalidate_stakings_cache(link_id: Optional[int] = None):
     cache = get_cache_manager()
     if link_id:
         cache.invalidate(CacheKeys.current_stakings(link_id))
+        cache.invalidate_pattern(f"page:stakings:{link_id}:")
     else:
         cache.invalidate_pattern("stakings:")
     logger.info(f"🗑️ Кэш стейкингов инвалидирован (link_id={link_id})")
@@ -0,0 +1,174 @@
+"""
+Общая загрузка страниц для нескольких проверок одного URL
+
+Несколько ссылок-анонсов часто смотрят на одну страницу (свой набор
+ключевых слов или своя стратегия у каждой). Без кэша каждая проверка
+сама скачивает и разбирает страницу. FetchCache отдает проверкам один
+результат загрузки на ключ (URL + способ загрузки):
+
+- результат живет ANNOUNCEMENT_FETCH_CACHE_TTL секунд, дальше - новая загрузка
+- если загрузка уже идет в другом потоке, проверка ждет ее и получает
+  тот же результат (N одновременных проверок - один запрос)
+- ошибки не кэшируются: ждавшие проверки получают то же исключение,
+  следующая проверка загружает заново
+- хранится не больше ANNOUNCEMENT_FETCH_CACHE_SIZE результатов (LRU)
+
+Результат общий для потоков - его нельзя изменять.
+
+Использование:
+    from utils.fetch_cache import get_fetch_cache
+
+    document = get_fetch_cache().get_or_load(
+        (url, 'http'), lambda: load_document(url)
+    )
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class _Entry:
+    """Загрузка по ключу: идущая или завершенная"""
+
+    __slots__ = ('done', 'value', 'error', 'loaded_at')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value: Any = None
+        self.error: Optional[BaseException] = None
+        self.loaded_at = 0.0
+
+
+class FetchCache:
+    """TTL-кэш результатов загрузки с объединением одновременных загрузок"""
+
+    def __init__(self, ttl: float, max_size: int, wait_timeout: float = 120.0):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.wait_timeout = wait_timeout
+        self._entries: "OrderedDict[Hashable, _Entry]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'loads': 0,
+            'hits': 0,
+            'coalesced': 0,
+            'failures': 0,
+        }
+
+    def get_or_load(self, key: Hashable, loader: Callable[[], Any]) -> Any:
+        """
+        Результат загрузки по ключу: из кэша, из идущей загрузки или новый
+
+        Args:
+            key: Ключ (URL и все, от чего зависит результат)
+            loader: Загрузка без аргументов; None - страница не загружена
+                (не кэшируется)
+        """
+        if self.ttl <= 0:
+            return loader()
+
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.done.is_set() and time.monotonic() - entry.loaded_at >= self.ttl:
+                del self._entries[key]
+                entry = None
+
+            if entry is None:
+                entry = _Entry()
+                self._entries[key] = entry
+                self._evict()
+                self._stats['loads'] += 1
+                owner = True
+            else:
+                self._entries.move_to_end(key)
+                owner = False
+                if entry.done.is_set():
+                    self._stats['hits'] += 1
+                else:
+                    self._stats['coalesced'] += 1
+
+        if owner:
+            return self._load(key, entry, loader)
+
+        if not entry.done.wait(self.wait_timeout):
+            logger.warning(f"⚠️ Загрузка {key} идет дольше {self.wait_timeout:.0f}с, загружаем отдельно")
+            return loader()
+        if entry.error is not None:
+            raise entry.error
+        logger.debug(f"♻️ Общий результат загрузки: {key}")
+        return entry.value
+
+    def _load(self, key: Hashable, entry: _Entry, loader: Callable[[], Any]) -> Any:
+        try:
+            entry.value = loader()
+            return entry.value
+        except BaseException as e:
+            entry.error = e
+            raise
+        finally:
+            entry.loaded_at = time.monotonic()
+            if entry.error is not None or entry.value is None:
+                # Ошибку отдаем только тем, кто уже ждет
+                with self._lock:
+                    self._stats['failures'] += 1
+                    if self._entries.get(key) is entry:
+                        del self._entries[key]
+            entry.done.set()
+
+    def _evict(self):
+        """Удалить просроченные и лишние записи (под self._lock)"""
+        now = time.monotonic()
+        for key in [
+            key for key, entry in self._entries.items()
+            if entry.done.is_set() and now - entry.loaded_at >= self.ttl
+        ]:
+            del self._entries[key]
+        excess = len(self._entries) - self.max_size
+        if excess > 0:
+            # Идущие загрузки не вытесняем - их ждут другие потоки
+            for key in [key for key, entry in self._entries.items() if entry.done.is_set()][:excess]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика кэша"""
+        with self._lock:
+            requests = self._stats['loads'] + self._stats['hits'] + self._stats['coalesced']
+            shared = self._stats['hits'] + self._stats['coalesced']
+            return {
+                **self._stats,
+                'size': len(self._entries),
+                'max_size': self.max_size,
+                'ttl': self.ttl,
+                'shared_rate': f"{(shared / requests * 100) if requests else 0:.1f}%",
+            }
+
+
+# Глобальный кэш загрузок
+_fetch_cache: Optional[FetchCache] = None
+_fetch_cache_lock = threading.Lock()
+
+
+def get_fetch_cache() -> FetchCache:
+    """Получить глобальный экземпляр FetchCache (singleton)"""
+    global _fetch_cache
+
+    if _fetch_cache is None:
+        with _fetch_cache_lock:
+            if _fetch_cache is None:
+                _fetch_cache = FetchCache(
+                    ttl=config.ANNOUNCEMENT_FETCH_CACHE_TTL,
+                    max_size=config.ANNOUNCEMENT_FETCH_CACHE_SIZE
+                )
+
+    return _fetch_cache
@@ -0,0 +1,124 @@
+"""
+Поиск набора ключевых слов в тексте
+
+Набор слов подготавливается один раз (get_keyword_matcher кэширует
+матчер по набору): слова приводятся к нижнему регистру, дубликаты
+убираются, текст приводится к нижнему регистру один раз на вызов.
+
+Большие наборы (от REGEX_MIN_KEYWORDS слов) компилируются в регулярное
+выражение-префиксное дерево и ищутся за один проход по тексту: на каждой
+позиции проверяется только ветка дерева, начинающаяся с текущего символа.
+Для небольших наборов быстрее поиск подстроки по каждому слову: `in`
+работает в C и проходит текст быстрее, чем регулярное выражение
+(текст 70 КБ: 50 слов - 2.4 мс циклом против 6 мс деревом,
+200 слов - примерно поровну, 1000 слов - 60 мс против 18 мс).
+
+Семантика та же, что у `keyword.lower() in text.lower()`: слово находится
+и внутри других слов, вложенные слова ("air" в "airdrop") тоже считаются
+найденными.
+
+Использование:
+    from utils.keyword_matcher import get_keyword_matcher
+
+    matcher = get_keyword_matcher(keywords)
+    matched = matcher.find_all(text)     # найденные слова в порядке keywords
+    if matcher.contains_any(text): ...
+"""
+import re
+from functools import lru_cache
+from typing import Dict, Iterable, List, Set, Tuple
+
+# С какого числа разных слов поиск идет префиксным деревом
+REGEX_MIN_KEYWORDS = 200
+
+
+def _trie_pattern(node: Dict[str, dict]) -> str:
+    """Регулярное выражение для поддерева (жадное: сначала самое длинное слово)"""
+    is_end = '' in node
+    branches = [
+        re.escape(char) + _trie_pattern(child)
+        for char, child in sorted(node.items())
+        if char != ''
+    ]
+    if not branches:
+        return ''
+    if len(branches) == 1 and not is_end:
+        return branches[0]
+    pattern = '(?:' + '|'.join(branches) + ')'
+    return pattern + '?' if is_end else pattern
+
+
+class KeywordMatcher:
+    """Скомпилированный набор ключевых слов"""
+
+    def __init__(self, keywords: Iterable[str]):
+        self.keywords: Tuple[str, ...] = tuple(keywords)
+        lowered = {keyword.lower() for keyword in self.keywords}
+
+        # Пустое слово есть в любом тексте (как у `'' in text`)
+        self._always: Set[str] = {''} & lowered
+        words = sorted(lowered - self._always)
+
+        self._words: Tuple[str, ...] = tuple(words)
+        self._regex = None
+        self._implied: Dict[str, Set[str]] = {}
+        if len(words) >= REGEX_MIN_KEYWORDS:
+            # Совпадение со словом означает и совпадение со всеми словами внутри
+            # него (дерево находит на позиции только самое длинное слово)
+            self._implied = {
+                word: {other for other in words if other in word}
+                for word in words
+            }
+            trie: Dict[str, dict] = {}
+            for word in words:
+                node = trie
+                for char in word:
+                    node = node.setdefault(char, {})
+                node[''] = {}
+            # Lookahead: совпадение нулевой ширины, поэтому проверяется каждая
+            # позиция (слова могут перекрываться)
+            self._regex = re.compile(f'(?=({_trie_pattern(trie)}))')
+
+    def _matched_lower(self, text_lower: str) -> Set[str]:
+        found = set(self._always)
+        if self._regex is None:
+            found.update(word for word in self._words if word in text_lower)
+            return found
+
+        hits: Set[str] = set()
+        for match in self._regex.finditer(text_lower):
+            word = match.group(1)
+            if word not in hits:
+                hits.add(word)
+                found |= self._implied[word]
+                if len(found) - len(self._always) == len(self._words):
+                    break
+        return found
+
+    def find_all(self, text: str) -> List[str]:
+        """Найденные ключевые слова в исходном написании и порядке"""
+        if not text:
+            return []
+        found = self._matched_lower(text.lower())
+        return [keyword for keyword in self.keywords if keyword.lower() in found]
+
+    def contains_any(self, text: str) -> bool:
+        """Есть ли в тексте хотя бы одно ключевое слово"""
+        if not text:
+            return False
+        if self._always:
+            return True
+        text_lower = text.lower()
+        if self._regex is None:
+            return any(word in text_lower for word in self._words)
+        return self._regex.search(text_lower) is not None
+
+
+@lru_cache(maxsize=256)
+def _cached_matcher(keywords: Tuple[str, ...]) -> KeywordMatcher:
+    return KeywordMatcher(keywords)
+
+
+def get_keyword_matcher(keywords: Iterable[str]) -> KeywordMatcher:
+    """Матчер для набора слов (компилируется один раз на набор)"""
+    return _cached_matcher(tuple(keywords))
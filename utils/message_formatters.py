@@ -1385,13 +1385,10 @@ class AirdropFormatter:
                 except:
                     pass
         
-        # Используем PriceFetcher
+        # Цена из кэша PriceFetcher (загружается заранее, см. prefetch_promo_prices)
         try:
             from utils.price_fetcher import get_price_fetcher
-            fetcher = get_price_fetcher()
-            
-            exchange = promo.get('exchange', '').lower()
-            price = fetcher.get_token_price(token, preferred_exchange=exchange)
+            price = get_price_fetcher().get_cached_price(token)
             
             if price:
                 return amount * price
@@ -1699,13 +1696,10 @@ class CandybombFormatter:
             except:
                 pass
         
-        # Використовуємо PriceFetcher
+        # Ціна з кешу PriceFetcher (завантажується заздалегідь, див. prefetch_promo_prices)
         try:
             from utils.price_fetcher import get_price_fetcher
-            fetcher = get_price_fetcher()
-            
-            exchange = promo.get('exchange', '').lower()
-            price = fetcher.get_token_price(token, preferred_exchange=exchange)
+            price = get_price_fetcher().get_cached_price(token)
             
             if price:
                 return amount * price
@@ -2105,12 +2099,14 @@ class BybitTokenSplashFormatter:
     
     @staticmethod
     def _get_token_price(token_symbol: str) -> Optional[float]:
-        """Получает цену токена через PriceFetcher"""
+        """
+        Цена токена из кэша PriceFetcher - без сетевых запросов.
+
+        Цены загружаются пачкой до рендера (NotificationService.prefetch_promo_prices).
+        """
         try:
             from utils.price_fetcher import get_price_fetcher
-            fetcher = get_price_fetcher()
-            price = fetcher.get_token_price(token_symbol, preferred_exchange='bybit')
-            return price
+            return get_price_fetcher().get_cached_price(token_symbol)
         except Exception as e:
             logger.debug(f"⚠️ Не удалось получить цену {token_symbol}: {e}")
             return None
@@ -0,0 +1,140 @@
+"""
+Кэш отрендеренных страниц пагинации (текущие стейкинги и промоакции)
+
+Ключ страницы: (вид, ссылка, фильтры, страница, версия данных).
+Версия данных увеличивается при изменении строк стейкингов/промо, которые
+показывает страница (data/data_version.py, scope: биржа стейкингов или
+ссылка промоакций), поэтому перелистывание без изменений в БД -
+это поиск в словаре и edit сообщения, без запроса к БД и рендера.
+
+Рядом кэшируется сам набор данных ссылки (список стейкингов с дельтами
+или промоакций) с той же версией - повторное открытие раздела тоже
+не ходит в БД, пока данные не изменились.
+
+Использование:
+    from utils.page_cache import KIND_STAKINGS, get_page, put_page
+
+    filters = {'min_apr': min_apr, 'exchange': exchange_name}
+    text = get_page(KIND_STAKINGS, link_id, filters, page, state['data_version'])
+    if text is None:
+        text = render(...)
+        put_page(KIND_STAKINGS, link_id, filters, page, state['data_version'], text)
+"""
+import hashlib
+import json
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+
+import config
+from data.data_version import PROMOS, STAKINGS, get_data_version
+from utils.cache import CacheKeys, get_cache_manager
+
+logger = logging.getLogger(__name__)
+
+# Виды страниц совпадают с областями данных
+KIND_STAKINGS = STAKINGS
+KIND_PROMOS = PROMOS
+
+
+def _enabled() -> bool:
+    return config.CACHE_ENABLED and config.CACHE_PAGES_ENABLED
+
+
+def filters_digest(filters: Optional[Dict[str, Any]]) -> str:
+    """Короткий хэш фильтров и параметров рендера страницы"""
+    payload = json.dumps(filters or {}, sort_keys=True, ensure_ascii=False, default=str)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+def current_version(kind: str, scope: Optional[Any] = None) -> int:
+    """
+    Версия данных вида страниц.
+
+    Args:
+        scope: Часть данных страницы - фильтр биржи (стейкинги) или ID ссылки
+            (промоакции); None - любые изменения
+
+    Читать ДО загрузки данных: если данные изменятся во время загрузки,
+    результат сохранится под старой версией и не будет отдан как свежий.
+    """
+    return get_data_version(kind, scope)
+
+
+def _page_key(kind: str, link_id: int, filters: Optional[Dict[str, Any]], page: int, version: int) -> str:
+    return CacheKeys.rendered_page(kind, link_id, version, filters_digest(filters), page)
+
+
+def get_page(
+    kind: str,
+    link_id: int,
+    filters: Optional[Dict[str, Any]],
+    page: int,
+    version: int
+) -> Optional[str]:
+    """Готовый текст страницы для версии данных, с которой работает пользователь"""
+    if not _enabled():
+        return None
+    return get_cache_manager().get(_page_key(kind, link_id, filters, page, version))
+
+
+def put_page(
+    kind: str,
+    link_id: int,
+    filters: Optional[Dict[str, Any]],
+    page: int,
+    version: int,
+    text: str
+):
+    """Сохранить страницу, отрендеренную из данных версии version"""
+    if not _enabled() or not text:
+        return
+    get_cache_manager().set(_page_key(kind, link_id, filters, page, version), text, ttl=config.CACHE_PAGES_TTL)
+
+
+def _dataset_key(kind: str, link_id: int) -> str:
+    if kind == KIND_STAKINGS:
+        return CacheKeys.current_stakings(link_id)
+    return CacheKeys.current_promos(link_id)
+
+
+def get_dataset(
+    kind: str,
+    link_id: int,
+    filters: Optional[Dict[str, Any]] = None,
+    scope: Optional[Any] = None
+) -> Optional[Tuple[int, List[Any]]]:
+    """
+    Набор данных ссылки, загруженный для текущей версии данных и тех же фильтров
+
+    Args:
+        scope: Как в current_version
+
+    Returns:
+        (версия, данные) или None
+    """
+    if not _enabled():
+        return None
+    entry = get_cache_manager().get(_dataset_key(kind, link_id))
+    if entry is None:
+        return None
+    if entry['version'] != current_version(kind, scope) or entry['filters'] != filters_digest(filters):
+        return None
+    return entry['version'], entry['items']
+
+
+def put_dataset(
+    kind: str,
+    link_id: int,
+    filters: Optional[Dict[str, Any]],
+    version: int,
+    items: List[Any]
+):
+    """Сохранить набор данных ссылки, загруженный при версии version"""
+    if not _enabled():
+        return
+    ttl = config.CACHE_STAKINGS_TTL if kind == KIND_STAKINGS else config.CACHE_PROMOS_TTL
+    get_cache_manager().set(
+        _dataset_key(kind, link_id),
+        {'version': version, 'filters': filters_digest(filters), 'items': items},
+        ttl=ttl
+    )
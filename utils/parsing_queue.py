@@ -91,6 +91,7 @@ class ParsingQueue:
         self._queue: asyncio.PriorityQueue = asyncio.PriorityQueue(maxsize=max_size)
         self._tasks: Dict[str, ParsingTask] = {}  # Все задачи по ID
         self._results: asyncio.Queue = asyncio.Queue()  # Результаты выполнения
+        self._waiters: Dict[str, asyncio.Future] = {}  # Ожидающие окончательного результата задачи
         self._shutdown = False
         self._lock = asyncio.Lock()
         
@@ -191,10 +192,37 @@ class ParsingQueue:
             task.status = TaskStatus.COMPLETED
             self._stats['total_completed'] += 1
         
+        if task.status != TaskStatus.PENDING:
+            self._resolve_waiter(task)
+        
         # Отправляем результат
         await self._results.put(task)
         self._queue.task_done()
     
+    def wait_task(self, task_id: str) -> asyncio.Future:
+        """
+        Future окончательного результата задачи (после всех повторов).
+        
+        Returns:
+            Future с завершённой задачей (status COMPLETED или FAILED)
+        """
+        waiter = self._waiters.get(task_id)
+        if waiter is None:
+            waiter = asyncio.get_running_loop().create_future()
+            task = self._tasks.get(task_id)
+            if task is not None and task.status in (TaskStatus.COMPLETED, TaskStatus.FAILED):
+                waiter.set_result(task)
+            elif task is not None and task.status == TaskStatus.CANCELLED:
+                waiter.cancel()
+            else:
+                self._waiters[task_id] = waiter
+        return waiter
+    
+    def _resolve_waiter(self, task: ParsingTask):
+        waiter = self._waiters.pop(task.task_id, None)
+        if waiter is not None and not waiter.done():
+            waiter.set_result(task)
+    
     async def get_result(self, timeout: float = 1.0) -> Optional[ParsingTask]:
         """
         Получает результат выполнения задачи.
@@ -257,6 +285,9 @@ class ParsingQueue:
                     task.status = TaskStatus.CANCELLED
                     self._stats['total_cancelled'] += 1
                     cancelled += 1
+                    waiter = self._waiters.pop(task.task_id, None)
+                    if waiter is not None and not waiter.done():
+                        waiter.cancel()
                 except asyncio.QueueEmpty:
                     break
             
@@ -267,6 +298,10 @@ class ParsingQueue:
         """Завершает работу очереди"""
         self._shutdown = True
         await self.clear()
+        for waiter in self._waiters.values():
+            if not waiter.done():
+                waiter.cancel()
+        self._waiters.clear()
         logger.info("📋 ParsingQueue завершена")
     
     @property
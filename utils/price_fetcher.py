@@ -11,8 +11,9 @@ utils/price_fetcher.py
 """
 
 import requests
+import asyncio
 import logging
-from typing import Optional, Dict, List, Tuple
+from typing import Iterable, Optional, Dict, List, Set, Tuple
 import time
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
@@ -46,6 +47,8 @@ class PriceFetcher:
     # Настройки
     CACHE_DURATION = 300  # 5 минут кэш
     FAST_TIMEOUT = 3  # Быстрый таймаут для бирж
+    PREFETCH_TIMEOUT = 8  # Сколько ждать пакетную загрузку цен для страницы
+    PREFETCH_MAX_WORKERS = 10  # Параллельных запросов в пакетной загрузке
     
     # Стейблкоины (цена = 1 USD)
     STABLECOINS = {'USDT', 'USDC', 'BUSD', 'DAI', 'TUSD', 'USDP', 'GUSD', 'FRAX', 'LUSD', 'SUSD'}
@@ -157,13 +160,37 @@ class PriceFetcher:
 
     def _get_from_cache(self, symbol: str) -> Optional[float]:
         """Получить цену из кэша"""
-        if symbol in self._cache:
-            price, timestamp = self._cache[symbol]
+        entry = self._cache.get(symbol)
+        if entry is not None:
+            price, timestamp = entry
             if time.time() - timestamp < self.CACHE_DURATION:
                 logger.debug(f"💰 {symbol}: ${price:.6f} (кэш)")
                 return price
         return None
 
+    def get_cached_price(self, symbol: str) -> Optional[float]:
+        """
+        Цена без сетевых запросов: стейблкоин или свежее значение из кэша.
+
+        Для форматтеров - они не должны ходить в сеть из event loop,
+        цены для них заранее загружает prefetch_prices().
+        """
+        if not symbol:
+            return None
+        symbol = symbol.upper().strip()
+        if symbol in self.STABLECOINS:
+            return 1.0
+        return self._get_from_cache(symbol)
+
+    def get_cached_prices(self, symbols: Iterable[str]) -> Dict[str, float]:
+        """Карта {symbol: price} из кэша (символы без цены пропускаются)"""
+        prices = {}
+        for symbol in symbols:
+            price = self.get_cached_price(symbol)
+            if price and price > 0:
+                prices[symbol] = price
+        return prices
+
     def _save_to_cache(self, symbol: str, price: float):
         """Сохранить цену в кэш"""
         self._cache[symbol] = (price, time.time())
@@ -287,7 +314,12 @@ class PriceFetcher:
 
     # ==================== BATCH ОПЕРАЦИИ ====================
 
-    def get_multiple_prices(self, symbols: List[str], preferred_exchange: Optional[str] = None) -> Dict[str, Optional[float]]:
+    def get_multiple_prices(
+        self,
+        symbols: List[str],
+        preferred_exchange: Optional[str] = None,
+        max_workers: int = 5
+    ) -> Dict[str, Optional[float]]:
         """
         Получить цены нескольких токенов эффективно.
         Использует кэш и параллельные запросы.
@@ -295,6 +327,7 @@ class PriceFetcher:
         Args:
             symbols: Список символов ['BTC', 'ETH', 'SCOR']
             preferred_exchange: Предпочтительная биржа
+            max_workers: Максимум параллельных запросов
         
         Returns:
             Словарь {symbol: price}
@@ -321,7 +354,7 @@ class PriceFetcher:
         
         # Получаем недостающие цены параллельно
         if symbols_to_fetch:
-            with ThreadPoolExecutor(max_workers=5) as executor:
+            with ThreadPoolExecutor(max_workers=min(max_workers, len(symbols_to_fetch))) as executor:
                 futures = {
                     executor.submit(self.get_token_price, symbol, preferred_exchange): symbol
                     for symbol in symbols_to_fetch
@@ -368,6 +401,10 @@ class PriceFetcher:
 # Singleton instance
 _price_fetcher: Optional[PriceFetcher] = None
 
+# Символы, которые сейчас загружаются в фоне (schedule_price_prefetch)
+_prefetch_in_flight: Set[str] = set()
+_prefetch_tasks: Set[asyncio.Task] = set()
+
 
 def get_price_fetcher() -> PriceFetcher:
     """Получить singleton instance PriceFetcher"""
@@ -375,3 +412,111 @@ def get_price_fetcher() -> PriceFetcher:
     if _price_fetcher is None:
         _price_fetcher = PriceFetcher()
     return _price_fetcher
+
+
+def _normalize_symbols(symbols: Iterable[str]) -> List[str]:
+    """Уникальные символы в верхнем регистре без пустых значений"""
+    normalized = []
+    seen = set()
+    for symbol in symbols:
+        if not symbol or not isinstance(symbol, str):
+            continue
+        symbol = symbol.upper().strip()
+        if symbol and symbol not in seen:
+            seen.add(symbol)
+            normalized.append(symbol)
+    return normalized
+
+
+async def prefetch_prices(
+    symbols: Iterable[str],
+    preferred_exchange: Optional[str] = None,
+    timeout: Optional[float] = None
+) -> Dict[str, float]:
+    """
+    Загрузить цены всех символов страницы одной параллельной пачкой.
+
+    Сетевые запросы выполняются в пуле потоков, event loop не блокируется.
+    Если пачка не уложилась в timeout, возвращаем то, что уже есть в кэше -
+    оставшиеся запросы дозаполнят кэш в фоне для следующего рендера.
+
+    Returns:
+        Карта {symbol: price} только с найденными ценами
+        (ключи - символы в верхнем регистре и в том виде, как переданы)
+    """
+    fetcher = get_price_fetcher()
+    requested = [symbol for symbol in symbols if symbol and isinstance(symbol, str)]
+    symbols = _normalize_symbols(requested)
+    if not symbols:
+        return {}
+
+    prices = fetcher.get_cached_prices(symbols)
+    missing = [symbol for symbol in symbols if symbol not in prices]
+    if not missing:
+        return _with_requested_keys(prices, requested)
+
+    loop = asyncio.get_running_loop()
+    started = time.monotonic()
+    try:
+        fetched = await asyncio.wait_for(
+            loop.run_in_executor(
+                None, fetcher.get_multiple_prices, missing, preferred_exchange, fetcher.PREFETCH_MAX_WORKERS
+            ),
+            timeout=timeout or fetcher.PREFETCH_TIMEOUT
+        )
+        for symbol, price in fetched.items():
+            if price and price > 0:
+                prices[symbol] = price
+    except asyncio.TimeoutError:
+        logger.warning(f"⏱️ Загрузка цен {len(missing)} токенов не уложилась в таймаут, рендерим без них")
+        prices.update(fetcher.get_cached_prices(missing))
+    except Exception as e:
+        logger.warning(f"⚠️ Ошибка пакетной загрузки цен: {e}")
+
+    logger.debug(
+        f"💰 Prefetch: {len(prices)}/{len(symbols)} цен за {(time.monotonic() - started) * 1000:.0f}мс"
+    )
+    return _with_requested_keys(prices, requested)
+
+
+def _with_requested_keys(prices: Dict[str, float], requested: List[str]) -> Dict[str, float]:
+    """Добавляет в карту цен ключи в исходном написании ('Pepe' -> цена 'PEPE')"""
+    for symbol in requested:
+        price = prices.get(symbol.upper().strip())
+        if price is not None:
+            prices.setdefault(symbol, price)
+    return prices
+
+
+def schedule_price_prefetch(symbols: Iterable[str], preferred_exchange: Optional[str] = None):
+    """
+    Запустить фоновую загрузку цен, которых нет в кэше (не ждет результата).
+
+    Для синхронных форматтеров, которые узнают список токенов только
+    во время рендера: сейчас они показывают то, что есть в кэше,
+    а следующий рендер получит уже загруженные цены.
+    """
+    fetcher = get_price_fetcher()
+    missing = [
+        symbol for symbol in _normalize_symbols(symbols)
+        if fetcher.get_cached_price(symbol) is None and symbol not in _prefetch_in_flight
+    ]
+    if not missing:
+        return
+
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        return  # Нет event loop (скрипты) - фоновая загрузка не нужна
+
+    _prefetch_in_flight.update(missing)
+
+    async def _run():
+        try:
+            await prefetch_prices(missing, preferred_exchange)
+        finally:
+            _prefetch_in_flight.difference_update(missing)
+
+    task = loop.create_task(_run())
+    _prefetch_tasks.add(task)
+    task.add_done_callback(_prefetch_tasks.discard)
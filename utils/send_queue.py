@@ -0,0 +1,327 @@
+"""
+Очередь исходящих сообщений Telegram с ограничением скорости.
+
+Особенности:
+- Token bucket на весь бот (лимит Telegram ~30 сообщений/сек)
+- Token bucket на каждый чат (личка ~1 сообщение/сек, группы ~20/мин)
+- Разные чаты отправляются параллельно, внутри чата порядок сохраняется (FIFO)
+- TelegramRetryAfter: чат ставится на паузу на retry_after, сообщение повторяется
+- Метрики: глубина очереди, задержка от постановки до отправки, время вызова API
+
+Использование:
+    from utils.send_queue import get_send_queue
+
+    await get_send_queue().send(bot, chat_id, text, parse_mode="HTML")
+"""
+import asyncio
+import logging
+import time
+from collections import deque
+from dataclasses import dataclass, field
+from typing import Any, Deque, Dict, Optional
+
+from aiogram.exceptions import TelegramNetworkError, TelegramRetryAfter, TelegramServerError
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket: rate токенов в секунду, не больше capacity в запасе.
+
+    Работает в одном event loop, поэтому блокировка не нужна:
+    проверка и списание токена выполняются без await между ними.
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self.paused_until = 0.0
+
+    def _refill(self, now: float):
+        if now > self.updated:
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+
+    def delay(self) -> float:
+        """Сколько ждать до следующего токена (0 - можно сразу)"""
+        now = time.monotonic()
+        if now < self.paused_until:
+            return self.paused_until - now
+        self._refill(now)
+        if self.tokens >= 1:
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+    async def acquire(self):
+        """Дождаться и забрать токен"""
+        while True:
+            wait = self.delay()
+            if wait <= 0:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(wait)
+
+    def pause(self, seconds: float):
+        """Не выдавать токены seconds секунд (RetryAfter), запас обнуляется"""
+        now = time.monotonic()
+        self.paused_until = max(self.paused_until, now + seconds)
+        self.tokens = 0
+        self.updated = self.paused_until
+
+    @property
+    def is_idle(self) -> bool:
+        """Bucket полный и не на паузе - можно удалить без потери лимита"""
+        now = time.monotonic()
+        self._refill(now)
+        return now >= self.paused_until and self.tokens >= self.capacity
+
+
+@dataclass
+class OutgoingMessage:
+    """Сообщение в очереди отправки"""
+    bot: Any
+    chat_id: int
+    text: str
+    kwargs: Dict[str, Any]
+    future: asyncio.Future
+    enqueued_at: float = field(default_factory=time.monotonic)
+    attempts: int = 0
+
+
+class TelegramSendQueue:
+    """
+    Планировщик исходящих сообщений.
+
+    На каждый чат с непустой очередью запускается отдельная задача-воркер,
+    которая отправляет сообщения этого чата по одному. Общий лимит
+    бота соблюдается через глобальный token bucket и семафор конкурентности.
+    """
+
+    def __init__(
+        self,
+        global_rate: float = None,
+        chat_rate: float = None,
+        chat_burst: float = None,
+        group_rate_per_min: float = None,
+        max_concurrency: int = None,
+        max_retries: int = None
+    ):
+        self.global_rate = global_rate or config.SEND_QUEUE_GLOBAL_RATE
+        self.chat_rate = chat_rate or config.SEND_QUEUE_CHAT_RATE
+        self.chat_burst = chat_burst or config.SEND_QUEUE_CHAT_BURST
+        self.group_rate = (group_rate_per_min or config.SEND_QUEUE_GROUP_RATE_PER_MIN) / 60.0
+        self.max_retries = config.SEND_QUEUE_MAX_RETRIES if max_retries is None else max_retries
+
+        self._global_bucket = TokenBucket(self.global_rate, self.global_rate)
+        self._semaphore = asyncio.Semaphore(max_concurrency or config.SEND_QUEUE_MAX_CONCURRENCY)
+        self._chat_buckets: Dict[int, TokenBucket] = {}
+        self._chat_queues: Dict[int, Deque[OutgoingMessage]] = {}
+        self._workers: Dict[int, asyncio.Task] = {}
+        self._shutdown = False
+
+        # Метрики
+        self._stats = {
+            'total_enqueued': 0,
+            'total_sent': 0,
+            'total_failed': 0,
+            'total_retry_after': 0,
+            'total_retries': 0,
+        }
+        self._latencies: Deque[float] = deque(maxlen=500)  # Постановка -> отправлено (сек)
+        self._api_times: Deque[float] = deque(maxlen=500)  # Время вызова send_message (сек)
+        self._max_depth = 0
+
+        logger.info(
+            f"📮 SendQueue: {self.global_rate:g} msg/s на бота, "
+            f"{self.chat_rate:g} msg/s на чат, {self.group_rate * 60:g} msg/min на группу"
+        )
+
+    # ========== ПОСТАНОВКА В ОЧЕРЕДЬ ==========
+
+    def submit(self, bot, chat_id: int, text: str, **kwargs) -> asyncio.Future:
+        """
+        Поставить сообщение в очередь, не дожидаясь отправки.
+
+        Returns:
+            Future с результатом bot.send_message (или исключением)
+        """
+        if self._shutdown:
+            raise RuntimeError("Очередь отправки завершена, новые сообщения не принимаются")
+
+        future = asyncio.get_running_loop().create_future()
+        message = OutgoingMessage(bot=bot, chat_id=chat_id, text=text, kwargs=kwargs, future=future)
+
+        self._chat_queues.setdefault(chat_id, deque()).append(message)
+        self._stats['total_enqueued'] += 1
+        self._max_depth = max(self._max_depth, self.queue_depth)
+
+        if chat_id not in self._workers:
+            self._workers[chat_id] = asyncio.create_task(self._chat_worker(chat_id))
+
+        return future
+
+    async def send(self, bot, chat_id: int, text: str, **kwargs):
+        """Поставить сообщение в очередь и дождаться отправки"""
+        return await self.submit(bot, chat_id, text, **kwargs)
+
+    # ========== ОТПРАВКА ==========
+
+    def _get_chat_bucket(self, chat_id: int) -> TokenBucket:
+        bucket = self._chat_buckets.get(chat_id)
+        if bucket is None:
+            if chat_id < 0:
+                # Группы/каналы: ~20 сообщений в минуту
+                bucket = TokenBucket(self.group_rate, 1)
+            else:
+                bucket = TokenBucket(self.chat_rate, self.chat_burst)
+            self._chat_buckets[chat_id] = bucket
+        return bucket
+
+    async def _chat_worker(self, chat_id: int):
+        queue = self._chat_queues[chat_id]
+        bucket = self._get_chat_bucket(chat_id)
+
+        try:
+            while queue:
+                message = queue[0]
+                if message.future.done():
+                    # Отправитель отменил ожидание
+                    queue.popleft()
+                    continue
+
+                await bucket.acquire()
+                await self._global_bucket.acquire()
+
+                async with self._semaphore:
+                    started = time.monotonic()
+                    try:
+                        result = await message.bot.send_message(
+                            chat_id=message.chat_id, text=message.text, **message.kwargs
+                        )
+
+                    except TelegramRetryAfter as e:
+                        self._stats['total_retry_after'] += 1
+                        logger.warning(f"⏳ RetryAfter {e.retry_after}с для чата {chat_id}")
+                        bucket.pause(e.retry_after)
+                        # Лимит мог быть общим для бота - обнуляем общий запас
+                        self._global_bucket.tokens = 0
+                        if not self._retry(message, e):
+                            queue.popleft()
+                        continue
+
+                    except (TelegramNetworkError, TelegramServerError) as e:
+                        logger.warning(f"⚠️ Временная ошибка отправки в чат {chat_id}: {e}")
+                        bucket.pause(min(2 ** message.attempts, 30))
+                        if not self._retry(message, e):
+                            queue.popleft()
+                        continue
+
+                    except Exception as e:
+                        queue.popleft()
+                        self._fail(message, e)
+                        continue
+
+                    finally:
+                        self._api_times.append(time.monotonic() - started)
+
+                queue.popleft()
+                self._stats['total_sent'] += 1
+                self._latencies.append(time.monotonic() - message.enqueued_at)
+                if not message.future.done():
+                    message.future.set_result(result)
+
+        except asyncio.CancelledError:
+            for message in queue:
+                if not message.future.done():
+                    message.future.cancel()
+            queue.clear()
+            raise
+
+        finally:
+            self._workers.pop(chat_id, None)
+            if not queue:
+                self._chat_queues.pop(chat_id, None)
+                if bucket.is_idle:
+                    self._chat_buckets.pop(chat_id, None)
+
+    def _retry(self, message: OutgoingMessage, error: Exception) -> bool:
+        """True - сообщение остается в очереди для повтора"""
+        message.attempts += 1
+        if message.attempts > self.max_retries:
+            self._fail(message, error)
+            return False
+        self._stats['total_retries'] += 1
+        return True
+
+    def _fail(self, message: OutgoingMessage, error: Exception):
+        self._stats['total_failed'] += 1
+        if not message.future.done():
+            message.future.set_exception(error)
+
+    # ========== МЕТРИКИ ==========
+
+    @property
+    def queue_depth(self) -> int:
+        """Сообщений в очереди (всех чатов)"""
+        return sum(len(q) for q in self._chat_queues.values())
+
+    @staticmethod
+    def _percentile(values, percent: float) -> float:
+        if not values:
+            return 0.0
+        ordered = sorted(values)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * percent))]
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика очереди"""
+        latencies = list(self._latencies)
+        api_times = list(self._api_times)
+        return {
+            **self._stats,
+            'queue_depth': self.queue_depth,
+            'max_queue_depth': self._max_depth,
+            'active_chats': len(self._workers),
+            'latency_avg_ms': round(sum(latencies) / len(latencies) * 1000, 1) if latencies else 0.0,
+            'latency_p95_ms': round(self._percentile(latencies, 0.95) * 1000, 1),
+            'api_avg_ms': round(sum(api_times) / len(api_times) * 1000, 1) if api_times else 0.0,
+        }
+
+    # ========== ЗАВЕРШЕНИЕ ==========
+
+    async def shutdown(self, timeout: float = 10.0):
+        """Дождаться отправки очереди (не дольше timeout) и остановить воркеры"""
+        self._shutdown = True
+        workers = list(self._workers.values())
+        if workers:
+            done, pending = await asyncio.wait(workers, timeout=timeout)
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+                logger.warning(f"⚠️ SendQueue: не отправлено сообщений в {len(pending)} чатов")
+        logger.info(f"📮 SendQueue завершена: {self.get_stats()}")
+
+
+# Глобальный экземпляр очереди
+_send_queue: Optional[TelegramSendQueue] = None
+
+
+def get_send_queue() -> TelegramSendQueue:
+    """Возвращает глобальный экземпляр очереди отправки"""
+    global _send_queue
+    if _send_queue is None:
+        _send_queue = TelegramSendQueue()
+    return _send_queue
+
+
+async def shutdown_send_queue():
+    """Завершает глобальную очередь отправки"""
+    global _send_queue
+    if _send_queue is not None:
+        await _send_queue.shutdown()
+        _send_queue = None
@@ -0,0 +1,221 @@
+"""
+Оркестратор запуска: параллельная инициализация подсистем с зависимостями
+
+Подсистемы бота (БД и миграции, пул браузеров, пул воркеров, мониторинг
+ресурсов и т.д.) объявляются этапами с зависимостями. Этап стартует, как
+только завершились все этапы, от которых он зависит - независимые этапы
+(запуск Chromium и миграции БД) идут одновременно.
+
+- async функция этапа выполняется в event loop
+- обычная (блокирующая) функция выполняется в отдельном потоке
+- ошибка обязательного этапа (required=True) прерывает запуск
+- ошибка необязательного этапа логируется, зависящие от него этапы пропускаются
+- время каждого этапа пишется в лог, в конце - сводка
+
+STARTUP_PARALLEL_ENABLED=false - этапы выполняются по одному в порядке
+объявления (для диагностики).
+
+Использование:
+    from utils.startup_orchestrator import StartupOrchestrator
+
+    startup = StartupOrchestrator()
+    startup.add_stage('database', init_db)
+    startup.add_stage('browser_pool', init_browsers, required=False)
+    startup.add_stage('workers', init_workers, depends_on=('database',))
+    await startup.run()
+"""
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Статусы этапа
+PENDING = 'pending'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+SKIPPED = 'skipped'
+
+
+class StartupError(Exception):
+    """Обязательный этап запуска завершился ошибкой"""
+
+
+@dataclass
+class StartupStage:
+    """Этап запуска"""
+    name: str
+    func: Callable
+    depends_on: Tuple[str, ...] = ()
+    required: bool = True
+    status: str = PENDING
+    duration: Optional[float] = None
+    error: Optional[str] = None
+
+
+class StartupOrchestrator:
+    """Запускает этапы инициализации с учетом зависимостей"""
+
+    def __init__(self, parallel: bool = None):
+        self.parallel = config.STARTUP_PARALLEL_ENABLED if parallel is None else parallel
+        self.stages: Dict[str, StartupStage] = {}
+        self.total_time: Optional[float] = None
+
+    def add_stage(
+        self,
+        name: str,
+        func: Callable,
+        depends_on: Iterable[str] = (),
+        required: bool = True
+    ) -> StartupStage:
+        """
+        Объявить этап
+
+        Args:
+            name: Имя этапа (для зависимостей и логов)
+            func: Функция без аргументов (async или блокирующая)
+            depends_on: Этапы, которые должны завершиться до этого
+            required: Ошибка этапа прерывает запуск
+        """
+        if name in self.stages:
+            raise ValueError(f"Этап {name} уже объявлен")
+        stage = StartupStage(name=name, func=func, depends_on=tuple(depends_on), required=required)
+        self.stages[name] = stage
+        return stage
+
+    def _order(self) -> List[StartupStage]:
+        """Порядок, в котором зависимости идут раньше зависящих (с проверкой циклов)"""
+        order: List[StartupStage] = []
+        visiting = set()
+        visited = set()
+
+        def visit(name: str, path: Tuple[str, ...]):
+            if name in visited:
+                return
+            if name not in self.stages:
+                raise ValueError(f"Этап {path[-1]} зависит от необъявленного этапа {name}")
+            if name in visiting:
+                raise ValueError(f"Циклическая зависимость этапов: {' -> '.join(path + (name,))}")
+            visiting.add(name)
+            for dependency in self.stages[name].depends_on:
+                visit(dependency, path + (name,))
+            visiting.discard(name)
+            visited.add(name)
+            order.append(self.stages[name])
+
+        for name in self.stages:
+            visit(name, ())
+        return order
+
+    async def _call(self, stage: StartupStage):
+        if asyncio.iscoroutinefunction(stage.func):
+            return await stage.func()
+        return await asyncio.to_thread(stage.func)
+
+    async def _run_stage(self, stage: StartupStage, done_events: Dict[str, asyncio.Event]):
+        try:
+            for dependency in stage.depends_on:
+                await done_events[dependency].wait()
+
+            failed = [
+                dependency for dependency in stage.depends_on
+                if self.stages[dependency].status != DONE
+            ]
+            if failed:
+                stage.status = SKIPPED
+                stage.error = f"не выполнены зависимости: {', '.join(failed)}"
+                logger.warning(f"⏭️ Этап {stage.name} пропущен ({stage.error})")
+                if stage.required:
+                    raise StartupError(f"Этап {stage.name} пропущен: {stage.error}")
+                return
+
+            stage.status = RUNNING
+            started = time.perf_counter()
+            try:
+                await self._call(stage)
+            except Exception as e:
+                stage.duration = time.perf_counter() - started
+                stage.status = FAILED
+                stage.error = str(e)
+                if stage.required:
+                    logger.error(f"❌ Этап {stage.name} завершился ошибкой за {stage.duration:.2f}с: {e}")
+                    raise StartupError(f"Этап {stage.name}: {e}") from e
+                logger.warning(f"⚠️ Этап {stage.name} завершился ошибкой за {stage.duration:.2f}с: {e}")
+                return
+
+            stage.duration = time.perf_counter() - started
+            stage.status = DONE
+            logger.info(f"⏱ Этап {stage.name}: {stage.duration:.2f}с")
+        finally:
+            done_events[stage.name].set()
+
+    async def run(self):
+        """
+        Выполнить все этапы
+
+        Raises:
+            StartupError: обязательный этап завершился ошибкой или был пропущен
+        """
+        order = self._order()
+        done_events = {stage.name: asyncio.Event() for stage in order}
+        started = time.perf_counter()
+
+        logger.info(
+            f"🚀 Инициализация: {len(order)} этапов "
+            f"({'параллельно' if self.parallel else 'последовательно'})"
+        )
+        try:
+            if self.parallel:
+                tasks = [
+                    asyncio.create_task(self._run_stage(stage, done_events), name=f"startup:{stage.name}")
+                    for stage in order
+                ]
+                try:
+                    await asyncio.gather(*tasks)
+                except BaseException:
+                    # Обязательный этап упал - остальные не ждем
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    for stage in order:
+                        if stage.status in (PENDING, RUNNING):
+                            stage.status = SKIPPED
+                            stage.error = 'запуск прерван'
+                    raise
+            else:
+                for stage in order:
+                    await self._run_stage(stage, done_events)
+        finally:
+            self.total_time = time.perf_counter() - started
+            self._log_summary()
+
+    def _log_summary(self):
+        sequential_time = sum(stage.duration or 0 for stage in self.stages.values())
+        logger.info(
+            f"🏁 Инициализация за {self.total_time:.2f}с "
+            f"(сумма этапов {sequential_time:.2f}с)"
+        )
+        not_done = [stage for stage in self.stages.values() if stage.status != DONE]
+        for stage in not_done:
+            logger.info(f"   {stage.name}: {stage.status}" + (f" - {stage.error}" if stage.error else ""))
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Время и статус этапов последнего запуска"""
+        return {
+            'parallel': self.parallel,
+            'total_time': round(self.total_time, 3) if self.total_time is not None else None,
+            'stages': {
+                stage.name: {
+                    'status': stage.status,
+                    'duration': round(stage.duration, 3) if stage.duration is not None else None,
+                    'depends_on': list(stage.depends_on),
+                    'error': stage.error,
+                }
+                for stage in self.stages.values()
+            },
+        }
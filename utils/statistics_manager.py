@@ -232,19 +232,19 @@ class StatisticsManager:
     def _cleanup_old_data(self):
         """Очистка старых данных"""
         try:
-            with sqlite3.connect(self.db_path) as conn:
-                cursor = conn.cursor()
-                
-                # Используем значение по умолчанию для retention_days
-                retention_days = 30
-                cutoff_time = time.time() - (retention_days * 24 * 3600)
-                
-                # Удаляем старые записи статистики
-                cursor.execute("DELETE FROM RotationStats WHERE timestamp < ?", (cutoff_time,))
-                deleted_count = cursor.rowcount
-                
-                conn.commit()
-                self.logger.info(f"Очистка статистики: удалено {deleted_count} записей")
+            from services.retention_service import delete_in_chunks
+            import config
+            
+            retention_days = getattr(config, 'RETENTION_ROTATION_STATS_DAYS', 30)
+            cutoff_time = time.time() - (retention_days * 24 * 3600)
+            
+            # Удаляем старые записи статистики пачками (без долгой блокировки БД)
+            # в БД менеджера, а не в основной БД SQLAlchemy
+            deleted_count = delete_in_chunks(
+                'RotationStats', 'timestamp < :cutoff', {'cutoff': cutoff_time}, db_path=self.db_path
+            )
+            
+            self.logger.info(f"Очистка статистики: удалено {deleted_count} записей")
                 
         except Exception as e:
             self.logger.error(f"Ошибка очистки старых данных: {e}")
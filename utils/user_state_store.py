@@ -0,0 +1,131 @@
+"""
+Ограниченное хранилище состояния пользователей (LRU + TTL простоя)
+
+Заменяет модульные словари обработчиков (текущая страница, выбранная
+ссылка, контекст навигации): без вытеснения они росли с каждым
+пользователем, который хоть раз открыл раздел.
+
+- Не больше max_size пользователей: при переполнении вытесняется тот,
+  кто дольше всех не обращался
+- Запись, к которой не обращались ttl секунд, удаляется
+- Интерфейс словаря: state.get(user_id), state[user_id] = {...}, del, in
+
+Храните в состоянии ссылки (ID, фильтры, страницу), а не списки данных:
+сами данные берутся из кэша (utils/page_cache.py) по этим ссылкам.
+
+Использование:
+    from utils.user_state_store import UserStateStore
+
+    current_stakings_state = UserStateStore('stakings')
+    state = current_stakings_state.get(user_id)
+"""
+import logging
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import MutableMapping
+from typing import Any, Dict, Iterator, List
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Все созданные хранилища (для статистики)
+_stores: List['UserStateStore'] = []
+
+
+class UserStateStore(MutableMapping):
+    """Словарь user_id -> состояние с LRU-вытеснением и TTL простоя"""
+
+    def __init__(self, name: str, max_size: int = None, ttl: float = None):
+        self.name = name
+        self.max_size = max_size or config.USER_STATE_MAX_USERS
+        self.ttl = ttl if ttl is not None else config.USER_STATE_TTL
+
+        self._data: 'OrderedDict[Any, tuple]' = OrderedDict()  # key -> (value, last_access)
+        self._lock = threading.RLock()
+        self._stats = {
+            'evicted_lru': 0,
+            'expired': 0,
+        }
+        _stores.append(self)
+
+    def _is_expired(self, last_access: float, now: float) -> bool:
+        return self.ttl > 0 and now - last_access > self.ttl
+
+    def __getitem__(self, key):
+        with self._lock:
+            value, last_access = self._data[key]
+            now = time.monotonic()
+            if self._is_expired(last_access, now):
+                del self._data[key]
+                self._stats['expired'] += 1
+                raise KeyError(key)
+            # Обращение продлевает жизнь записи
+            self._data[key] = (value, now)
+            self._data.move_to_end(key)
+            return value
+
+    def __setitem__(self, key, value):
+        with self._lock:
+            self._data[key] = (value, time.monotonic())
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self._stats['evicted_lru'] += 1
+
+    def __delitem__(self, key):
+        with self._lock:
+            del self._data[key]
+
+    def __iter__(self) -> Iterator:
+        self.purge_expired()
+        with self._lock:
+            return iter(list(self._data.keys()))
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key) -> bool:
+        try:
+            self[key]
+        except KeyError:
+            return False
+        return True
+
+    def purge_expired(self) -> int:
+        """Удалить просроченные записи. Returns: сколько удалено"""
+        if self.ttl <= 0:
+            return 0
+        now = time.monotonic()
+        with self._lock:
+            # Порядок LRU: просроченные - в начале
+            removed = 0
+            while self._data:
+                key, (_, last_access) = next(iter(self._data.items()))
+                if not self._is_expired(last_access, now):
+                    break
+                del self._data[key]
+                removed += 1
+            self._stats['expired'] += removed
+            return removed
+
+    def get_stats(self) -> Dict[str, Any]:
+        """Статистика хранилища"""
+        return {
+            'name': self.name,
+            'size': len(self._data),
+            'max_size': self.max_size,
+            'ttl': self.ttl,
+            **self._stats,
+        }
+
+
+def get_user_state_stats() -> List[Dict[str, Any]]:
+    """Статистика всех хранилищ состояния"""
+    return [store.get_stats() for store in _stores]
+
+
+def purge_all_expired() -> int:
+    """Удалить просроченные записи во всех хранилищах"""
+    return sum(store.purge_expired() for store in _stores)